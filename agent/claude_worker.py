@@ -8,6 +8,26 @@ import uuid
 from pathlib import Path
 
 
+# Liveness records in the outbox let the router detect dead workers.
+OUTBOX_HEARTBEAT_INTERVAL_SECONDS = 10.0
+
+BLOB_CACHE_LIMIT = 16
+_BLOB_CACHE: dict[str, str] = {}
+
+
+def resolve_inbox_content(event: dict, mailbox_dir: Path) -> str:
+    key = event.get("content_ref")
+    if not isinstance(key, str) or not key:
+        return str(event.get("content") or "")
+    content = _BLOB_CACHE.get(key)
+    if content is None:
+        content = (mailbox_dir / "blobs" / key[:2] / key).read_text(encoding="utf-8")
+        if len(_BLOB_CACHE) >= BLOB_CACHE_LIMIT:
+            _BLOB_CACHE.pop(next(iter(_BLOB_CACHE)))
+        _BLOB_CACHE[key] = content
+    return content
+
+
 def write_event(path: Path, payload: dict) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("a", encoding="utf-8") as f:
@@ -276,10 +296,15 @@ class ClaudeWorker:
         self.shutdown_requested = False
         self.inbox_offset_bytes = 0
         self.last_heartbeat_at = 0.0
+        self.last_outbox_heartbeat_at = 0.0
         self.heartbeat_interval_seconds = 1.0
         self.persistent_preamble: str | None = None
         self.client = None
         self.pending_injections: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
+        # Injections run one at a time, so queued ones are already held until
+        # the current query finishes; a revoke drops them before they start.
+        self.queued_injection_ids: set[str] = set()
+        self.revoked_injection_ids: set[str] = set()
         self.pending_approval_futures: dict[str, asyncio.Future] = {}
         self.pending_tool_states: dict[str, dict] = {}
         self.current_injection_id: str | None = None
@@ -435,6 +460,15 @@ class ClaudeWorker:
             encoding="utf-8",
         )
         self.last_heartbeat_at = now
+        if force or (now - self.last_outbox_heartbeat_at) >= OUTBOX_HEARTBEAT_INTERVAL_SECONDS:
+            write_event(self.outbox_path, {
+                "type": "heartbeat",
+                "job_id": self.job_id,
+                "node_id": self.node_id,
+                "timestamp": now,
+                "busy": self.current_injection_id is not None,
+            })
+            self.last_outbox_heartbeat_at = now
 
     async def _heartbeat_loop(self):
         while not self.shutdown_requested:
@@ -746,14 +780,27 @@ class ClaudeWorker:
                 self.inbox_offset_bytes = inbox_file.tell()
                 event_type = event.get("type")
                 if event_type == "control":
-                    self._record_control_decision(event.get("payload", {}))
+                    payload = event.get("payload", {})
+                    if isinstance(payload, dict) and payload.get("type") == "revoke_injection":
+                        revoked_id = str(payload.get("injection_id") or "")
+                        if revoked_id in self.queued_injection_ids:
+                            self.revoked_injection_ids.add(revoked_id)
+                        continue
+                    self._record_control_decision(payload)
                     continue
                 if event_type != "user":
                     continue
                 injection_id = str(event.get("injection_id") or "")
-                content = str(event.get("content") or "")
                 if not injection_id:
                     continue
+                try:
+                    content = resolve_inbox_content(event, self.base / "mailbox")
+                except OSError as e:
+                    emit_worker_error(
+                        self.outbox_path, self.job_id, self.node_id, injection_id, f"content blob unavailable: {e}"
+                    )
+                    continue
+                self.queued_injection_ids.add(injection_id)
                 await self.pending_injections.put((injection_id, content))
 
     async def _injection_loop(self, sdk_symbols):
@@ -762,6 +809,11 @@ class ClaudeWorker:
                 injection_id, content = await asyncio.wait_for(self.pending_injections.get(), timeout=0.2)
             except asyncio.TimeoutError:
                 continue
+            self.queued_injection_ids.discard(injection_id)
+            if injection_id in self.revoked_injection_ids:
+                self.revoked_injection_ids.discard(injection_id)
+                emit_worker_event(self.outbox_path, self.job_id, self.node_id, injection_id, "prefetch_revoked")
+                continue
             await self._handle_user_injection(sdk_symbols, injection_id, content)
 
     async def run(self):
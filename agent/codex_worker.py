@@ -14,6 +14,26 @@ from datetime import datetime, timezone
 CODEX_ROLLOUT_CHANNEL_CLOSED_MARKER = "failed to record rollout items: failed to queue rollout items: channel closed"
 CODEX_MAX_RESTARTS = 5
 CODEX_RESTART_BACKOFF_SECONDS = 1.0
+# Liveness records in the outbox let the router detect dead workers.
+OUTBOX_HEARTBEAT_INTERVAL_SECONDS = 10.0
+
+# Injections above the router's inline limit arrive as ``content_ref`` keys
+# into the shared mailbox blob store; resolved texts are cached per worker.
+BLOB_CACHE_LIMIT = 16
+_BLOB_CACHE: dict[str, str] = {}
+
+
+def resolve_inbox_content(event: dict, mailbox_dir: Path) -> str:
+    key = event.get("content_ref")
+    if not isinstance(key, str) or not key:
+        return str(event.get("content") or "")
+    content = _BLOB_CACHE.get(key)
+    if content is None:
+        content = (mailbox_dir / "blobs" / key[:2] / key).read_text(encoding="utf-8")
+        if len(_BLOB_CACHE) >= BLOB_CACHE_LIMIT:
+            _BLOB_CACHE.pop(next(iter(_BLOB_CACHE)))
+        _BLOB_CACHE[key] = content
+    return content
 
 
 def write_event(f, obj):
@@ -143,15 +163,17 @@ def main():
     persistent_preamble = None
     pending_fresh_turn = None
     pending_fresh_thread_request_id = None
+    held_injections = deque()
     SESSION_TOOL_NATIVE_GRACE_SECONDS = 1.0
     restart_count = 0
     last_restart_ts = 0.0
     rehydrate_history_on_thread_start = None
     heartbeat_interval_seconds = 1.0
     last_heartbeat_at = 0.0
+    last_outbox_heartbeat_at = 0.0
 
     def write_heartbeat(force: bool = False):
-        nonlocal last_heartbeat_at
+        nonlocal last_heartbeat_at, last_outbox_heartbeat_at
         now = time.time()
         if not force and (now - last_heartbeat_at) < heartbeat_interval_seconds:
             return
@@ -163,6 +185,15 @@ def main():
             "pid": os.getpid(),
         }), encoding="utf-8")
         last_heartbeat_at = now
+        if force or (now - last_outbox_heartbeat_at) >= OUTBOX_HEARTBEAT_INTERVAL_SECONDS:
+            write_event(outbox, {
+                "type": "heartbeat",
+                "job_id": job_id,
+                "node_id": node_id,
+                "timestamp": now,
+                "busy": _worker_turn_busy(),
+            })
+            last_outbox_heartbeat_at = now
 
     def handle_shutdown(signum, frame):
         nonlocal shutdown_requested
@@ -232,6 +263,78 @@ def main():
         pending_fresh_thread_request_id = send_request("thread/start", {})
         return pending_fresh_thread_request_id
 
+    def _worker_turn_busy():
+        return (
+            current_active_turn_id is not None
+            or pending_fresh_turn is not None
+            or any(request.get("kind") == "turn_start" for request in pending_user_requests.values())
+        )
+
+    def _deliver_user_injection(injection_id, content):
+        nonlocal last_injection_id, persistent_preamble
+        last_injection_id = injection_id
+        if fresh_thread_per_injection:
+            if persistent_preamble is None:
+                persistent_preamble = content
+                write_event(outbox, {
+                    "type": "worker_trace",
+                    "job_id": job_id,
+                    "node_id": node_id,
+                    "injection_id": injection_id,
+                    "event": "persistent_preamble_captured",
+                })
+                write_event(outbox, {
+                    "type": "complete",
+                    "job_id": job_id,
+                    "node_id": node_id,
+                    "injection_id": injection_id,
+                })
+            else:
+                effective_content = content
+                if isinstance(persistent_preamble, str) and persistent_preamble.strip():
+                    effective_content = f"{persistent_preamble.rstrip()}\n\n{content}"
+                _start_fresh_turn(injection_id, effective_content)
+                write_event(outbox, {
+                    "type": "worker_trace",
+                    "job_id": job_id,
+                    "node_id": node_id,
+                    "injection_id": injection_id,
+                    "event": "fresh_thread_requested",
+                })
+        elif current_active_turn_id:
+            _send_user_turn_steer(injection_id, content)
+            write_event(outbox, {
+                "type": "worker_trace",
+                "job_id": job_id,
+                "node_id": node_id,
+                "injection_id": injection_id,
+                "event": "turn_steer_sent",
+                "turn_id": current_active_turn_id,
+            })
+        else:
+            _send_user_turn_start(injection_id, content)
+            write_event(outbox, {
+                "type": "worker_trace",
+                "job_id": job_id,
+                "node_id": node_id,
+                "injection_id": injection_id,
+                "event": "turn_start_sent",
+            })
+
+    def _revoke_held_injection(injection_id):
+        for held in list(held_injections):
+            if held[0] == injection_id:
+                held_injections.remove(held)
+                write_event(outbox, {
+                    "type": "worker_event",
+                    "event": "prefetch_revoked",
+                    "job_id": job_id,
+                    "node_id": node_id,
+                    "injection_id": injection_id,
+                    "payload": {},
+                })
+                return
+
     def send_notification(method, params=None):
         nonlocal proc
         msg = jsonrpc_notification(method, params)
@@ -1156,60 +1259,37 @@ def main():
 
                             if event.get("type") == "user":
                                 injection_id = event.get("injection_id")
-                                last_injection_id = injection_id
-                                content = event.get("content", "")
-                                if fresh_thread_per_injection:
-                                    if persistent_preamble is None:
-                                        persistent_preamble = content
-                                        write_event(outbox, {
-                                            "type": "worker_trace",
-                                            "job_id": job_id,
-                                            "node_id": node_id,
-                                            "injection_id": injection_id,
-                                            "event": "persistent_preamble_captured",
-                                        })
-                                        write_event(outbox, {
-                                            "type": "complete",
-                                            "job_id": job_id,
-                                            "node_id": node_id,
-                                            "injection_id": injection_id,
-                                        })
-                                    else:
-                                        effective_content = content
-                                        if isinstance(persistent_preamble, str) and persistent_preamble.strip():
-                                            effective_content = f"{persistent_preamble.rstrip()}\n\n{content}"
-                                        _start_fresh_turn(injection_id, effective_content)
-                                        write_event(outbox, {
-                                            "type": "worker_trace",
-                                            "job_id": job_id,
-                                            "node_id": node_id,
-                                            "injection_id": injection_id,
-                                            "event": "fresh_thread_requested",
-                                        })
-                                elif current_active_turn_id:
-                                    _send_user_turn_steer(injection_id, content)
+                                try:
+                                    content = resolve_inbox_content(event, base / "mailbox")
+                                except OSError as e:
                                     write_event(outbox, {
-                                        "type": "worker_trace",
+                                        "type": "worker_error",
                                         "job_id": job_id,
                                         "node_id": node_id,
                                         "injection_id": injection_id,
-                                        "event": "turn_steer_sent",
-                                        "turn_id": current_active_turn_id,
+                                        "error": f"content blob unavailable: {e}",
                                     })
-                                else:
-                                    _send_user_turn_start(injection_id, content)
+                                    inbox_offset_bytes = inbox_file.tell()
+                                    continue
+                                if event.get("hold") and _worker_turn_busy():
+                                    # Prefetched work waits for the current turn instead of steering it.
+                                    held_injections.append((injection_id, content))
                                     write_event(outbox, {
                                         "type": "worker_trace",
                                         "job_id": job_id,
                                         "node_id": node_id,
                                         "injection_id": injection_id,
-                                        "event": "turn_start_sent",
+                                        "event": "injection_held",
                                     })
+                                else:
+                                    _deliver_user_injection(injection_id, content)
 
                             elif event.get("type") == "control":
                                 payload = event.get("payload", {})
 
-                                if payload.get("type") == "rpc_response":
+                                if payload.get("type") == "revoke_injection":
+                                    _revoke_held_injection(payload.get("injection_id"))
+                                elif payload.get("type") == "rpc_response":
                                     response_id = payload.get("rpc_id")
                                     result = payload.get("result")
                                     if response_id in pending_dynamic_tool_requests:
@@ -1274,6 +1354,10 @@ def main():
                         "error": f"inbox_tail_error: {str(e)}"
                     })
 
+            if held_injections and (thread_id or fresh_thread_per_injection) and not _worker_turn_busy():
+                held_injection_id, held_content = held_injections.popleft()
+                _deliver_user_injection(held_injection_id, held_content)
+
             # --- Session file tailing for internal function_call artifacts ---
             if session_path and session_path.exists():
                 try:
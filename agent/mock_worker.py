@@ -8,6 +8,26 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 
+# Liveness records in the outbox let the router detect dead workers.
+OUTBOX_HEARTBEAT_INTERVAL_SECONDS = 10.0
+
+BLOB_CACHE_LIMIT = 16
+_BLOB_CACHE: dict[str, str] = {}
+
+
+def resolve_inbox_content(event: dict, mailbox_dir: Path) -> str:
+    key = event.get("content_ref")
+    if not isinstance(key, str) or not key:
+        return str(event.get("content") or "")
+    content = _BLOB_CACHE.get(key)
+    if content is None:
+        content = (mailbox_dir / "blobs" / key[:2] / key).read_text(encoding="utf-8")
+        if len(_BLOB_CACHE) >= BLOB_CACHE_LIMIT:
+            _BLOB_CACHE.pop(next(iter(_BLOB_CACHE)))
+        _BLOB_CACHE[key] = content
+    return content
+
+
 def write_jsonl(path: Path, payload: dict) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("a", encoding="utf-8") as f:
@@ -331,9 +351,10 @@ def main():
     heartbeat_path = agent_dir / "heartbeat.json"
     heartbeat_interval_seconds = 1.0
     last_heartbeat_at = 0.0
+    last_outbox_heartbeat_at = 0.0
 
     def write_heartbeat(force: bool = False) -> None:
-        nonlocal last_heartbeat_at
+        nonlocal last_heartbeat_at, last_outbox_heartbeat_at
         now = time.time()
         if not force and (now - last_heartbeat_at) < heartbeat_interval_seconds:
             return
@@ -347,6 +368,15 @@ def main():
             encoding="utf-8",
         )
         last_heartbeat_at = now
+        if force or (now - last_outbox_heartbeat_at) >= OUTBOX_HEARTBEAT_INTERVAL_SECONDS:
+            write_jsonl(outbox_path, {
+                "type": "heartbeat",
+                "job_id": job_id,
+                "node_id": node_id,
+                "timestamp": now,
+                "busy": False,
+            })
+            last_outbox_heartbeat_at = now
 
     write_jsonl(outbox_path, {
         "type": "start",
@@ -385,8 +415,18 @@ def main():
                     continue
                 if payload.get("type") != "user":
                     continue
-                content = str(payload.get("content") or "")
                 injection_id = payload.get("injection_id")
+                try:
+                    content = resolve_inbox_content(payload, base / "mailbox")
+                except OSError as e:
+                    write_jsonl(outbox_path, {
+                        "type": "worker_error",
+                        "job_id": job_id,
+                        "node_id": node_id,
+                        "injection_id": injection_id,
+                        "error": f"content blob unavailable: {e}",
+                    })
+                    continue
                 write_jsonl(outbox_path, rpc_event(job_id, node_id, injection_id, "thread/status/changed", {
                     "status": {"type": "active"}
                 }))
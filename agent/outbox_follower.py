@@ -4,6 +4,9 @@ import sys
 import time
 from pathlib import Path
 
+# Lets the router tell a quiet worker from a stalled event stream.
+STREAM_HEARTBEAT_INTERVAL_SECONDS = 5.0
+
 
 def main():
     if len(sys.argv) != 2:
@@ -79,6 +82,8 @@ def main():
                 sys.stdout.flush()
             return f.tell()
 
+    last_stream_heartbeat_at = 0.0
+
     while True:
         try:
             files = sorted(outbox_dir.glob("*.jsonl"))
@@ -119,6 +124,18 @@ def main():
                 tracked["offset"] = drain_path(path, int(tracked.get("offset", 0)))
                 save_offsets()
 
+            now = time.time()
+            if now - last_stream_heartbeat_at >= STREAM_HEARTBEAT_INTERVAL_SECONDS:
+                # Jobs whose outboxes this follower is tailing right now.
+                jobs = sorted({path.name.rsplit("_", 1)[0] for path in files})
+                sys.stdout.buffer.write((json.dumps({
+                    "type": "follower_heartbeat",
+                    "jobs": jobs,
+                    "timestamp": now,
+                }) + "\n").encode("utf-8"))
+                sys.stdout.flush()
+                last_stream_heartbeat_at = now
+
             time.sleep(0.1)
 
         except KeyboardInterrupt:
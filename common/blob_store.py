@@ -0,0 +1,154 @@
+"""
+Content-addressed blob store inside a mailbox.
+
+Injection contents above ``INLINE_CONTENT_LIMIT_BYTES`` are written once
+under ``<mailbox>/blobs/<key[:2]>/<key>`` and inbox records carry
+``content_ref`` instead of the text. Agent files are stored the same way
+and hardlinked into each agent directory. Every job using a blob holds a
+marker at ``<mailbox>/blobs/refs/<job_id>/<key>``; releasing a job drops
+its markers and deletes blobs no other job references. Hardlinked agent
+files keep their content after the blob itself is deleted. Storing and
+releasing hold ``<mailbox>/blobs/.lock``, so a release never deletes a
+blob another job is about to reference.
+"""
+
+import fcntl
+import hashlib
+import os
+import shlex
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+INLINE_CONTENT_LIMIT_BYTES = 16 * 1024
+
+
+def blob_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_rel_path(key: str) -> str:
+    return f"blobs/{key[:2]}/{key}"
+
+
+def ref_rel_path(job_id: str, key: str) -> str:
+    return f"blobs/refs/{job_id}/{key}"
+
+
+@contextmanager
+def _store_lock(mailbox_root: Path):
+    lock_path = Path(mailbox_root) / "blobs" / ".lock"
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def put_blob(mailbox_root: Path, job_id: str, data: bytes) -> str:
+    """Store data once, record job_id's reference and return its key."""
+    mailbox_root = Path(mailbox_root)
+    key = blob_key(data)
+    with _store_lock(mailbox_root):
+        # Reference first, so a release for another job keeps the blob.
+        ref = mailbox_root / ref_rel_path(job_id, key)
+        if not ref.exists():
+            ref.parent.mkdir(parents=True, exist_ok=True)
+            ref.touch()
+        blob = mailbox_root / blob_rel_path(key)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=f".{key}.", dir=str(blob.parent))
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(data)
+                # Blobs are shared by hardlink, so nobody may edit one in place.
+                os.chmod(tmp_name, 0o444)
+                os.replace(tmp_name, blob)
+            finally:
+                if os.path.exists(tmp_name):
+                    os.unlink(tmp_name)
+    return key
+
+
+def link_blob(mailbox_root: Path, key: str, target: Path) -> None:
+    """Hardlink a stored blob to target, copying when links are unsupported."""
+    blob = Path(mailbox_root) / blob_rel_path(key)
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists() or target.is_symlink():
+        target.unlink()
+    try:
+        os.link(blob, target)
+    except OSError:
+        target.write_bytes(blob.read_bytes())
+
+
+def release_job_blobs(mailbox_root: Path, job_id: str) -> int:
+    """Drop job_id's references and delete blobs left unreferenced. Returns the number deleted."""
+    mailbox_root = Path(mailbox_root)
+    with _store_lock(mailbox_root):
+        refs_root = mailbox_root / "blobs" / "refs"
+        refs_dir = refs_root / str(job_id)
+        if not refs_dir.is_dir():
+            return 0
+        keys = [ref.name for ref in refs_dir.iterdir()]
+        for key in keys:
+            (refs_dir / key).unlink()
+        try:
+            refs_dir.rmdir()
+        except OSError:
+            pass
+        deleted = 0
+        for key in keys:
+            if any((other / key).exists() for other in refs_root.iterdir()):
+                continue
+            try:
+                (mailbox_root / blob_rel_path(key)).unlink()
+                deleted += 1
+            except FileNotFoundError:
+                continue
+        return deleted
+
+
+def store_script(mailbox_base: str, job_id: str, key: str) -> str:
+    """Shell lines that store stdin as blob key (once) and reference it for job_id."""
+    mailbox = f"{mailbox_base.rstrip('/')}/mailbox"
+    return "\n".join([
+        f"BLOB={shlex.quote(mailbox + '/' + blob_rel_path(key))}",
+        f"REF={shlex.quote(mailbox + '/' + ref_rel_path(job_id, key))}",
+        f"mkdir -p {shlex.quote(mailbox + '/blobs')}",
+        f"exec 9>>{shlex.quote(mailbox + '/blobs/.lock')}",
+        "flock 9",
+        'mkdir -p "$(dirname "$REF")"',
+        ': > "$REF"',
+        'if [ -f "$BLOB" ]; then',
+        "  cat > /dev/null",
+        "else",
+        '  mkdir -p "$(dirname "$BLOB")"',
+        '  cat > "$BLOB.$$.tmp"',
+        '  chmod a-w "$BLOB.$$.tmp"',
+        '  mv -f "$BLOB.$$.tmp" "$BLOB"',
+        "fi",
+    ]) + "\n"
+
+
+def release_script(mailbox_base: str, job_id: str) -> str:
+    """Shell equivalent of release_job_blobs for a remote mailbox."""
+    mailbox = f"{mailbox_base.rstrip('/')}/mailbox"
+    lines = [
+        "set -uo pipefail",
+        f"BLOBS={shlex.quote(mailbox + '/blobs')}",
+        f"REFS={shlex.quote(mailbox + '/blobs/refs/' + str(job_id))}",
+        '[ -d "$REFS" ] || exit 0',
+        'exec 9>>"$BLOBS/.lock"',
+        "flock 9",
+        'KEYS=$(ls "$REFS")',
+        'rm -rf "$REFS"',
+        'for key in $KEYS; do',
+        '  if ! ls "$BLOBS"/refs/*/"$key" >/dev/null 2>&1; then rm -f "$BLOBS/${key:0:2}/$key"; fi',
+        "done",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,177 @@
+"""
+Content-addressed staging cache for code pushed to remote hosts.
+
+Trees (the agent dir, container assets, clean git checkouts) are uploaded
+once per content key into ``<cache_root>/<namespace>/<key>`` and then
+hardlinked into their target directory. A repeated launch with unchanged
+content costs one SSH round trip and no bulk transfer.
+"""
+
+import hashlib
+import os
+import shlex
+import subprocess
+from pathlib import Path
+from typing import Callable
+
+DEFAULT_EXCLUDES = ("__pycache__", ".pytest_cache", ".DS_Store")
+
+
+def tree_content_hash(root: Path, excludes: tuple[str, ...] = DEFAULT_EXCLUDES) -> str:
+    """Hash relative paths, modes and file contents under root."""
+    root = Path(root)
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if name not in excludes)
+        for name in sorted(filenames):
+            if name in excludes or name.endswith(".pyc"):
+                continue
+            path = Path(dirpath) / name
+            rel = path.relative_to(root).as_posix()
+            digest.update(rel.encode("utf-8") + b"\0")
+            if path.is_symlink():
+                digest.update(b"L" + os.readlink(path).encode("utf-8") + b"\0")
+                continue
+            digest.update(b"X" if os.access(path, os.X_OK) else b"F")
+            with path.open("rb") as handle:
+                for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+def _git(repo_path: Path, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["git", "-C", str(repo_path), *args],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def git_commit_key(repo_path: Path) -> str | None:
+    """
+    Return a key for a clean checkout, staged whole including ``.git`` and
+    ignored files. The key covers HEAD, every ref (so new or moved branches
+    miss) and the path, size and mtime of each ignored file. Dirty or
+    untracked changes are not captured, so those trees are not cacheable.
+    """
+    repo_path = Path(repo_path)
+    if not (repo_path / ".git").exists():
+        return None
+    head = _git(repo_path, "rev-parse", "HEAD")
+    if head.returncode != 0 or not head.stdout.strip():
+        return None
+    status = _git(repo_path, "status", "--porcelain")
+    if status.returncode != 0 or status.stdout.strip():
+        return None
+    refs = _git(repo_path, "show-ref", "--head")
+    ignored = _git(repo_path, "ls-files", "-z", "--others", "--ignored", "--exclude-standard")
+    if refs.returncode not in (0, 1) or ignored.returncode != 0:
+        return None
+    digest = hashlib.sha256()
+    digest.update(head.stdout.strip().encode("utf-8") + b"\0")
+    digest.update(_git(repo_path, "symbolic-ref", "-q", "HEAD").stdout.strip().encode("utf-8") + b"\0")
+    digest.update(refs.stdout.encode("utf-8") + b"\0")
+    for rel in sorted(name for name in ignored.stdout.split("\0") if name):
+        try:
+            stat = (repo_path / rel).lstat()
+        except OSError:
+            continue
+        digest.update(f"{rel}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode("utf-8"))
+    return f"{head.stdout.strip()[:12]}-{digest.hexdigest()[:20]}"
+
+
+def namespace_for(value: str) -> str:
+    return hashlib.sha256(str(value).encode("utf-8")).hexdigest()[:16]
+
+
+def _materialize_lines(entry: str, target: str) -> list[str]:
+    # Swap the target in place so running readers keep their open files.
+    return [
+        f"ENTRY={shlex.quote(entry)}",
+        f"TARGET={shlex.quote(target.rstrip('/'))}",
+        'mkdir -p "$(dirname "$TARGET")"',
+        'rm -rf "$TARGET.cache-new" "$TARGET.cache-old"',
+        'cp -al "$ENTRY" "$TARGET.cache-new"',
+        'rm -f "$TARGET.cache-new/.complete"',
+        'if [ -e "$TARGET" ]; then mv "$TARGET" "$TARGET.cache-old"; fi',
+        'mv "$TARGET.cache-new" "$TARGET"',
+        'rm -rf "$TARGET.cache-old"',
+    ]
+
+
+def lookup_script(cache_root: str, namespace: str, key: str, target: str) -> str:
+    """Materialize on hit and print ``hit``; otherwise print ``miss`` (+ ``latest``)."""
+    ns_dir = f"{cache_root.rstrip('/')}/{namespace}"
+    entry = f"{ns_dir}/{key}"
+    lines = [
+        "set -euo pipefail",
+        f"NS={shlex.quote(ns_dir)}",
+        f'if [ -f {shlex.quote(entry + "/.complete")} ]; then',
+        *("  " + line for line in _materialize_lines(entry, target)),
+        f"  touch {shlex.quote(entry)}",
+        "  echo hit",
+        "else",
+        '  mkdir -p "$NS"',
+        '  if [ -L "$NS/latest" ] && [ -f "$NS/latest/.complete" ]; then echo miss latest; else echo miss; fi',
+        "fi",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def promote_script(cache_root: str, namespace: str, key: str, target: str, keep: int = 5) -> str:
+    """Publish an uploaded ``<key>.partial`` dir, prune old entries and materialize."""
+    ns_dir = f"{cache_root.rstrip('/')}/{namespace}"
+    entry = f"{ns_dir}/{key}"
+    lines = [
+        "set -euo pipefail",
+        f"NS={shlex.quote(ns_dir)}",
+        f"ENTRY_DIR={shlex.quote(entry)}",
+        'if [ -f "$ENTRY_DIR/.complete" ]; then',
+        # A concurrent launch published the same content first.
+        '  rm -rf "$ENTRY_DIR.partial"',
+        "else",
+        '  rm -rf "$ENTRY_DIR"',
+        '  mv "$ENTRY_DIR.partial" "$ENTRY_DIR"',
+        '  touch "$ENTRY_DIR/.complete"',
+        "fi",
+        f'ln -sfn {shlex.quote(key)} "$NS/latest"',
+        f'ls -1dt "$NS"/*/ 2>/dev/null | tail -n +{max(1, int(keep)) + 1} | while read -r old; do',
+        '  case "$old" in */latest/|*.partial/) continue ;; esac',
+        '  rm -rf "$old"',
+        "done",
+        *_materialize_lines(entry, target),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def stage_tree(
+    local_source: Path,
+    key: str,
+    cache_root: str,
+    namespace: str,
+    remote_target: str,
+    run_remote: Callable[[str], subprocess.CompletedProcess],
+    upload: Callable[[Path, str, str | None], None],
+    keep: int = 5,
+) -> bool:
+    """
+    Stage local_source at remote_target through the cache. Returns True on a
+    cache hit. ``upload(local, remote_dir, link_dest)`` must copy the tree
+    into remote_dir, using link_dest (relative to remote_dir) when given.
+    """
+    result = run_remote(lookup_script(cache_root, namespace, key, remote_target))
+    if result.returncode != 0:
+        raise RuntimeError(f"Staging cache lookup failed: {(result.stderr or result.stdout).strip()}")
+    verdict = str(result.stdout or "").strip().splitlines()
+    status = verdict[-1] if verdict else ""
+    if status == "hit":
+        return True
+    link_dest = "../latest" if status == "miss latest" else None
+    partial = f"{cache_root.rstrip('/')}/{namespace}/{key}.partial"
+    upload(Path(local_source), partial, link_dest)
+    result = run_remote(promote_script(cache_root, namespace, key, remote_target, keep=keep))
+    if result.returncode != 0:
+        raise RuntimeError(f"Staging cache promote failed: {(result.stderr or result.stdout).strip()}")
+    return False
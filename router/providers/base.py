@@ -1,9 +1,23 @@
 from abc import ABC, abstractmethod
+import json
 from typing import Callable, Dict, Optional
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
+# Worker clones borrow objects from project_sources/<job> through alternates.
+# Repacking them into their own object database lets archives and copies of
+# "$BASE/runs/$JOB" outlive the per-job object store.
+DISSOCIATE_CLONES_SCRIPT = """
+for alt in "$BASE/runs/$JOB"/agent_*/*/.git/objects/info/alternates; do
+  [ -f "$alt" ] || continue
+  repo="${alt%/.git/objects/info/alternates}"
+  if git -C "$repo" repack -a -d -q; then rm -f "$alt"; fi
+done
+"""
+
+
 class ClusterProvider(ABC):
 
     @abstractmethod
@@ -43,11 +57,48 @@ class ClusterProvider(ABC):
         job_id: str,
         node_id: int,
         content: str,
-        injection_id: str
+        injection_id: str,
+        hold: bool = False,
     ) -> None:
-        """Deliver injection to worker."""
+        """
+        Deliver injection to worker. With hold, a worker that is mid-turn
+        queues the injection until that turn completes instead of steering it.
+        """
         pass
 
+    def release_job_blobs(self, job_id: str) -> None:
+        """
+        Optional hook invoked after a job is terminated and archived.
+        Providers that store large injection contents in the mailbox blob
+        store drop the job's references and delete unreferenced blobs.
+        """
+        return None
+
+    def read_outbox_events(self, job_id: str, node_id: int, injection_ids: list[str]) -> list[dict] | None:
+        """
+        Optional hook used to recover in-flight project tasks after a router
+        restart. Return the worker outbox events (archived files first, then
+        the live outbox) tagged with one of injection_ids, in write order, or
+        None when the provider cannot read worker outboxes.
+        """
+        return None
+
+    @staticmethod
+    def _outbox_events_for_injections(lines, injection_ids) -> list[dict]:
+        wanted = {str(injection_id) for injection_id in injection_ids or [] if injection_id}
+        events = []
+        for line in lines:
+            line = str(line or "").strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(event, dict) and str(event.get("injection_id") or "") in wanted:
+                events.append(event)
+        return events
+
     def create_workspace_archive(
         self,
         job_id: str,
@@ -66,14 +117,55 @@ class ClusterProvider(ABC):
         repo_path: str,
         branch: str | None = None,
         subdir: str = "repo",
+        worker_progress_cb: Optional[Callable[[dict], None]] = None,
+        sparse_checkout: bool = False,
+        sparse_paths: list[str] | None = None,
     ) -> dict:
         """
         Optional hook used by orchestrated-project mode.
         Providers may prepare an isolated per-worker repo checkout and return
-        metadata describing the prepared workspace layout.
+        metadata describing the prepared workspace layout. When given,
+        worker_progress_cb receives one report dict per worker as it finishes.
+        With sparse_checkout, new checkouts are blobless partial clones whose
+        cone starts at sparse_paths (top-level files only when empty).
         """
         raise NotImplementedError("provider does not support repository preparation")
 
+    def widen_sparse_checkout(self, job_id: str, node_id: int, subdir: str, paths: list[str] | None) -> None:
+        """
+        Optional hook used by orchestrated-project mode with sparse checkouts.
+        Adds cone directories to a worker checkout; paths=None disables
+        sparse checkout so the worker sees the whole tree.
+        """
+        raise NotImplementedError("provider does not support sparse checkouts")
+
+    def _run_worker_preparation(
+        self,
+        node_ids: list[int],
+        prepare_worker: Callable[[int], dict],
+        worker_progress_cb: Optional[Callable[[dict], None]] = None,
+        concurrency: int = 8,
+    ) -> list[dict]:
+        """
+        Run prepare_worker for each node with bounded concurrency, reporting
+        each result (or failure) to worker_progress_cb. Results keep node order.
+        """
+        def _run(node_id: int) -> dict:
+            try:
+                report = prepare_worker(node_id)
+            except Exception as e:
+                if callable(worker_progress_cb):
+                    worker_progress_cb({"node_id": node_id, "status": "failed", "error": str(e)})
+                raise
+            if callable(worker_progress_cb):
+                worker_progress_cb(report)
+            return report
+
+        if not node_ids:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(node_ids), max(1, int(concurrency)))) as pool:
+            return list(pool.map(_run, node_ids))
+
     def bind_swarm(self, job_id: str, swarm_id: str, swarm_record: dict) -> None:
         """
         Optional hook invoked after the router assigns a swarm_id to a launched job.
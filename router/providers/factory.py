@@ -325,6 +325,21 @@ def _default_launch_fields_for_backend(backend: str, backend_cfg: dict):
                 "default": slurm_cfg.get("qos") or "",
                 "required": False,
             },
+            {
+                "key": "agents_per_node",
+                "label": "Agents Per Node",
+                "type": "number",
+                "default": slurm_cfg.get("agents_per_node", 1),
+                "required": False,
+            },
+            {
+                "key": "stage_repo_path",
+                "label": "Pre-stage Repository",
+                "type": "text",
+                "default": "",
+                "required": False,
+                "placeholder": "owner/repo or /path/to/repo",
+            },
         ]
         raw_claude_profiles = slurm_cfg.get("claude_env_profiles")
         if isinstance(raw_claude_profiles, dict):
@@ -1,3 +1,4 @@
+import hashlib
 import subprocess
 import uuid
 import shutil
@@ -14,6 +15,8 @@ from pathlib import PurePosixPath
 from typing import Callable, Dict, List, Optional
 
 
+from common import blob_store
+
 from .base import ClusterProvider
 from .claude_env import (
     configured_claude_env_profiles,
@@ -493,12 +496,33 @@ class LocalProvider(ClusterProvider):
             return None
         return str(PurePosixPath(*parts))
 
-    def _apply_agents_payload(self, agent_dir: Path, agents_md_content: str | None, agents_bundle: dict | None) -> None:
+    def _apply_agents_payload(
+        self,
+        agent_dir: Path,
+        agents_md_content: str | None,
+        agents_bundle: dict | None,
+        job_id: str | None = None,
+    ) -> None:
+        """
+        Write AGENTS.md and bundled skills into agent_dir. With job_id, each
+        file is stored once in the mailbox blob store and hardlinked, so
+        identical files share one copy across the job's agent dirs.
+        """
+        mailbox_dir = self.workspace_root.resolve() / "mailbox"
+
+        def _write(dest: Path, content: str) -> None:
+            if job_id is None:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                dest.write_text(content, encoding="utf-8")
+                return
+            key = blob_store.put_blob(mailbox_dir, job_id, content.encode("utf-8"))
+            blob_store.link_blob(mailbox_dir, key, dest)
+
         bundle_mode = str((agents_bundle or {}).get("mode") or "file")
         bundle_md = (agents_bundle or {}).get("agents_md_content")
         effective_md = bundle_md if isinstance(bundle_md, str) and bundle_md.strip() else agents_md_content
         if isinstance(effective_md, str) and effective_md.strip():
-            (agent_dir / "AGENTS.md").write_text(effective_md, encoding="utf-8")
+            _write(agent_dir / "AGENTS.md", effective_md)
 
         if bundle_mode != "directory":
             return
@@ -517,9 +541,7 @@ class LocalProvider(ClusterProvider):
             safe_rel = self._safe_skill_rel_path(rel_path)
             if not safe_rel:
                 continue
-            dest = agent_dir / ".agents" / "skills" / safe_rel
-            dest.parent.mkdir(parents=True, exist_ok=True)
-            dest.write_text(content, encoding="utf-8")
+            _write(agent_dir / ".agents" / "skills" / safe_rel, content)
 
     def _write_worker_codex_config(self, agent_dir: Path, launch_params: dict | None = None) -> None:
         launch_params = launch_params if isinstance(launch_params, dict) else {}
@@ -766,7 +788,7 @@ class LocalProvider(ClusterProvider):
             agent_index = f"{i:02d}"
             agent_dir = self.workspace_root / job_id / f"agent_{agent_index}"
             agent_dir.mkdir(parents=True, exist_ok=True)
-            self._apply_agents_payload(agent_dir, agents_md_content, agents_bundle)
+            self._apply_agents_payload(agent_dir, agents_md_content, agents_bundle, job_id=job_id)
             if worker_mode == "codex":
                 self._write_worker_codex_config(agent_dir, launch_params)
 
@@ -887,7 +909,29 @@ class LocalProvider(ClusterProvider):
 
         self.jobs.pop(job_id, None)
 
+    def _dissociate_repositories(self, job_id: str) -> None:
+        # Worker clones borrow objects from project_sources/<job> through
+        # alternates; repack them so the job dir stands on its own.
+        for alternates in self._job_dir(job_id).glob("agent_*/*/.git/objects/info/alternates"):
+            repo = alternates.parents[3]
+            repack = subprocess.run(
+                ["git", "-C", str(repo), "repack", "-a", "-d", "-q"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=False,
+            )
+            if repack.returncode != 0:
+                print(f"[archive] LocalProvider failed to repack {repo}: {repack.stderr.strip()}")
+                continue
+            alternates.unlink(missing_ok=True)
+
     def archive(self, job_id: str, swarm_id: str) -> None:
+        self._dissociate_repositories(job_id)
+        object_stores = self.workspace_root / "project_sources" / str(job_id)
+        if object_stores.exists():
+            self._remove_path(object_stores)
+
         if not self.archive_root:
             return
 
@@ -920,6 +964,9 @@ class LocalProvider(ClusterProvider):
         except Exception as e:
             print(f"[archive] LocalProvider failed to archive {swarm_id}: {e}")
 
+    def release_job_blobs(self, job_id: str) -> None:
+        blob_store.release_job_blobs(self.workspace_root.resolve() / "mailbox", str(job_id))
+
     def create_workspace_archive(self, job_id: str, swarm_id: str, output_dir: Path) -> str | None:
         output_dir.mkdir(parents=True, exist_ok=True)
         archive_path = output_dir / f"swarm_{swarm_id}_{job_id}_workspaces.tar.gz"
@@ -927,6 +974,7 @@ class LocalProvider(ClusterProvider):
         runs_dir = self.workspace_root / job_id
         mailbox_root = self.workspace_root / "mailbox"
         included = 0
+        self._dissociate_repositories(job_id)
 
         with tarfile.open(archive_path, "w:gz") as tar:
             if runs_dir.exists():
@@ -950,12 +998,56 @@ class LocalProvider(ClusterProvider):
 
         return str(archive_path.resolve())
 
+    def _repo_prepare_concurrency(self) -> int:
+        try:
+            value = int(self.config.get("repo_prepare_concurrency") or 8)
+        except Exception:
+            value = 8
+        return max(1, value)
+
+    def _ensure_object_store(self, job_id: str, clone_source: str) -> Path:
+        # One bare mirror per job and source; worker clones borrow its objects
+        # through alternates instead of each holding a full copy.
+        key = hashlib.sha256(str(clone_source).encode("utf-8")).hexdigest()[:16]
+        store = (self.workspace_root / "project_sources" / str(job_id) / "objects" / f"{key}.git").resolve()
+        if store.exists():
+            cmd = ["git", "-C", str(store), "fetch", "--prune", "origin"]
+        else:
+            store.parent.mkdir(parents=True, exist_ok=True)
+            cmd = ["git", "clone", "--mirror"]
+            if self._is_local_path_like(clone_source):
+                cmd.append("--no-local")
+            cmd.extend([clone_source, str(store)])
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False)
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"Failed to prepare shared repository object store: {result.stderr.strip() or result.stdout.strip()}"
+            )
+        # Objects dropped from the mirror would vanish from every worker clone.
+        # The store also serves blobless (sparse mode) clones and their lazy fetches.
+        for key, value in (
+            ("gc.auto", "0"),
+            ("uploadpack.allowFilter", "true"),
+            ("uploadpack.allowAnySHA1InWant", "true"),
+        ):
+            subprocess.run(
+                ["git", "-C", str(store), "config", key, value],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=False,
+            )
+        return store
+
     def prepare_repository(
         self,
         job_id: str,
         repo_path: str,
         branch: str | None = None,
         subdir: str = "repo",
+        worker_progress_cb: Optional[Callable[[dict], None]] = None,
+        sparse_checkout: bool = False,
+        sparse_paths: list[str] | None = None,
     ) -> dict:
         source_text = str(repo_path or "").strip()
         github_repo = self._parse_github_repo_ref(source_text)
@@ -988,7 +1080,6 @@ class LocalProvider(ClusterProvider):
         if not workers:
             raise RuntimeError(f"No active workers found for job {job_id}")
 
-        prepared_paths: list[str] = []
         branch_name = str(branch).strip() if isinstance(branch, str) and str(branch).strip() else None
         resolved_clone_source, inherited_origin = self._resolved_clone_source(clone_source)
         desired_origin = inherited_origin or resolved_clone_source
@@ -996,13 +1087,14 @@ class LocalProvider(ClusterProvider):
             if self._container_host_path_mode(inherited_origin) != "rw":
                 desired_origin = resolved_clone_source
 
-        for worker in workers:
-            node_id = worker.get("node_id")
-            if not isinstance(node_id, int) or node_id < 0:
-                continue
+        object_store = self._ensure_object_store(job_id, resolved_clone_source)
+
+        def _prepare_worker(node_id: int) -> dict:
+            started = time.time()
             agent_dir = self._agent_dir(job_id, node_id)
             agent_dir.mkdir(parents=True, exist_ok=True)
             target = (agent_dir / subdir).resolve()
+            status = "refreshed"
 
             if target.exists():
                 if not (target / ".git").exists():
@@ -1012,10 +1104,27 @@ class LocalProvider(ClusterProvider):
                     if current_origin and current_origin != desired_origin:
                         self._remove_path(target)
             if not target.exists():
-                try:
-                    self._clone_repository(resolved_clone_source, target)
-                except Exception as e:
-                    raise RuntimeError(f"Failed to clone repository for worker {node_id}: {e}")
+                status = "cloned"
+                if sparse_checkout:
+                    # Blobless and sparse: only trees for the whole history, blobs
+                    # fetched on demand as the cone widens.
+                    clone_cmd = ["git", "clone", "--sparse", "--filter=blob:none", object_store.as_uri(), str(target)]
+                else:
+                    clone_cmd = ["git", "clone", "--shared", str(object_store), str(target)]
+                clone = subprocess.run(
+                    clone_cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    check=False,
+                )
+                if clone.returncode != 0:
+                    raise RuntimeError(
+                        f"Failed to clone repository for worker {node_id}: "
+                        f"{clone.stderr.strip() or clone.stdout.strip()}"
+                    )
+                if sparse_checkout and sparse_paths:
+                    self._run_sparse_checkout(target, ["set", *sparse_paths], node_id)
             subprocess.run(
                 ["git", "-C", str(target), "remote", "set-url", "origin", desired_origin],
                 stdout=subprocess.PIPE,
@@ -1038,7 +1147,25 @@ class LocalProvider(ClusterProvider):
             if branch_name:
                 self._checkout_prepared_branch(target, branch_name, node_id)
 
-            prepared_paths.append(str(target))
+            return {
+                "node_id": node_id,
+                "path": str(target),
+                "status": status,
+                "seconds": round(time.time() - started, 3),
+            }
+
+        node_ids = [
+            worker.get("node_id")
+            for worker in workers
+            if isinstance(worker.get("node_id"), int) and worker.get("node_id") >= 0
+        ]
+        worker_reports = self._run_worker_preparation(
+            node_ids,
+            _prepare_worker,
+            worker_progress_cb,
+            self._repo_prepare_concurrency(),
+        )
+        prepared_paths = [report["path"] for report in worker_reports]
 
         self._write_job_metadata(job_id, {
             "prepared_repo": {
@@ -1060,8 +1187,35 @@ class LocalProvider(ClusterProvider):
             "branch": branch_name,
             "subdir": subdir,
             "worker_paths": prepared_paths,
+            "object_store": str(object_store),
+            "worker_reports": worker_reports,
+            "sparse_checkout": bool(sparse_checkout),
         }
 
+    @staticmethod
+    def _run_sparse_checkout(repo_path: Path, args: list[str], worker_id: int) -> None:
+        result = subprocess.run(
+            ["git", "-C", str(repo_path), "sparse-checkout", *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"Failed to update sparse checkout for worker {worker_id}: "
+                f"{result.stderr.strip() or result.stdout.strip()}"
+            )
+
+    def widen_sparse_checkout(self, job_id: str, node_id: int, subdir: str, paths: list[str] | None) -> None:
+        target = (self._agent_dir(job_id, node_id) / subdir).resolve()
+        if not (target / ".git").exists():
+            raise RuntimeError(f"No prepared repository for worker {node_id}: {target}")
+        if paths is None:
+            self._run_sparse_checkout(target, ["disable"], node_id)
+        elif paths:
+            self._run_sparse_checkout(target, ["add", *paths], node_id)
+
     def get_job_state(self, job_id: str) -> Optional[str]:
         if self._active_workers_for_job(job_id):
             return "RUNNING"
@@ -1141,19 +1295,41 @@ class LocalProvider(ClusterProvider):
             stderr=subprocess.PIPE,
         )
 
-    def inject(self, job_id, node_id, content, injection_id):
+    def read_outbox_events(self, job_id, node_id, injection_ids):
+        mailbox = self.workspace_root.resolve() / "mailbox"
+        name = f"{job_id}_{int(node_id):02d}.jsonl"
+        lines = []
+        for path in (mailbox / "archive" / name, mailbox / "outbox" / name):
+            if path.exists():
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    lines.extend(f)
+        return self._outbox_events_for_injections(lines, injection_ids)
+
+    def inject(self, job_id, node_id, content, injection_id, hold=False):
         node_index = f"{int(node_id):02d}"
 
-        inbox_dir = self.workspace_root.resolve() / "mailbox" / "inbox"
+        mailbox_dir = self.workspace_root.resolve() / "mailbox"
+        inbox_dir = mailbox_dir / "inbox"
         inbox_dir.mkdir(parents=True, exist_ok=True)
 
         inbox_path = inbox_dir / f"{job_id}_{node_index}.jsonl"
 
-        payload = {
-            "type": "user",
-            "content": content,
-            "injection_id": injection_id
-        }
+        data = str(content).encode("utf-8")
+        if len(data) > blob_store.INLINE_CONTENT_LIMIT_BYTES:
+            # Large contents are stored once and referenced from every inbox.
+            payload = {
+                "type": "user",
+                "content_ref": blob_store.put_blob(mailbox_dir, str(job_id), data),
+                "injection_id": injection_id
+            }
+        else:
+            payload = {
+                "type": "user",
+                "content": content,
+                "injection_id": injection_id
+            }
+        if hold:
+            payload["hold"] = True
 
         with open(inbox_path, "a") as f:
             f.write(json.dumps(payload) + "\n")
@@ -1,19 +1,24 @@
 import subprocess
 import re
 import json
+import math
 import shlex
 import base64
 import tempfile
 import time
 import os
 import sys
+import threading
 import uuid
 from functools import lru_cache
 from pathlib import Path
 from pathlib import PurePosixPath
 from typing import Callable, Dict, Optional
 
-from .base import ClusterProvider
+from common import blob_store
+from common.staging_cache import git_commit_key, namespace_for, stage_tree
+
+from .base import DISSOCIATE_CLONES_SCRIPT, ClusterProvider
 from .claude_env import resolve_claude_env_overrides, resolve_claude_profile_env
 
 
@@ -26,6 +31,10 @@ class SlurmProvider(ClusterProvider):
         self._provider_ref = str(config.get("_provider_ref") or "slurm")
         self.ssh_retry_attempts = max(1, int(self.slurm_cfg.get("ssh_retry_attempts") or 4))
         self.ssh_retry_delay_seconds = max(0.2, float(self.slurm_cfg.get("ssh_retry_delay_seconds") or 1.5))
+        self._pool_lock = threading.Lock()
+        self._pool_last_demand = 0.0
+        self._pool_maintainer_started = False
+        self._stored_blobs: set[tuple[str, str]] = set()
 
     def _login_host(self) -> str:
         slurm_login = self.slurm_cfg.get("login_host")
@@ -67,6 +76,17 @@ class SlurmProvider(ClusterProvider):
         params = launch_params if isinstance(launch_params, dict) else {}
         return str(params.get("container_engine") or self.slurm_cfg.get("default_container_engine") or "apptainer").strip().lower() or "apptainer"
 
+    def _agents_per_node(self, launch_params: dict | None) -> int:
+        params = launch_params if isinstance(launch_params, dict) else {}
+        raw = params.get("agents_per_node") or self.slurm_cfg.get("agents_per_node") or 1
+        try:
+            value = int(raw)
+        except (TypeError, ValueError) as e:
+            raise RuntimeError(f"Invalid Slurm agents_per_node: {raw}") from e
+        if value < 1:
+            raise RuntimeError("agents_per_node must be >= 1")
+        return value
+
     def _approval_policy(self, launch_params: dict | None) -> str:
         params = launch_params if isinstance(launch_params, dict) else {}
         return str(params.get("approval_policy") or self.slurm_cfg.get("approval_policy") or "never").strip().lower() or "never"
@@ -202,8 +222,37 @@ class SlurmProvider(ClusterProvider):
             cleaned.append(raw_line)
         return "\n".join(cleaned).strip()
 
-    def _rsync_to_login_host(self, local_source: Path, remote_target: str) -> None:
+    def _rsync_to_login_host(self, local_source: Path, remote_target: str) -> str:
         login_host = self._login_host()
+        commit = git_commit_key(local_source) if self.slurm_cfg.get("staging_cache", True) else None
+        if commit:
+
+            def _run_remote(script: str) -> subprocess.CompletedProcess:
+                return self._ssh_run(["ssh", login_host, "/bin/bash -lc " + shlex.quote(script)])
+
+            def _upload(local: Path, remote_dir: str, link_dest: str | None) -> None:
+                mkdir_res = self._ssh_run(["ssh", login_host, f"mkdir -p {shlex.quote(remote_dir)}"])
+                if mkdir_res.returncode != 0:
+                    raise RuntimeError(
+                        f"Failed to prepare staging cache entry: {(mkdir_res.stderr or mkdir_res.stdout).strip()}"
+                    )
+                cmd = ["rsync", "-az", "--delete"]
+                if link_dest:
+                    cmd.append(f"--link-dest={link_dest}")
+                cmd += [str(local.resolve()) + "/", f"{login_host}:{remote_dir}/"]
+                subprocess.run(cmd, check=True)
+
+            hit = stage_tree(
+                local_source,
+                commit,
+                f"{self._resolve_slurm_mailbox_base()}/cache/staging",
+                f"repos/{namespace_for(str(local_source.resolve()))}",
+                remote_target,
+                run_remote=_run_remote,
+                upload=_upload,
+                keep=int(self.slurm_cfg.get("staging_cache_keep") or 5),
+            )
+            return "hit" if hit else "miss"
         remote_parent = str(PurePosixPath(remote_target).parent)
         mkdir_res = self._ssh_run(["ssh", login_host, f"mkdir -p {shlex.quote(remote_parent)}"])
         if mkdir_res.returncode != 0:
@@ -218,6 +267,7 @@ class SlurmProvider(ClusterProvider):
             ],
             check=True,
         )
+        return "bypass"
 
     def _stage_github_token_file(self, token: str) -> str:
         base = self._resolve_slurm_mailbox_base()
@@ -352,6 +402,20 @@ exit 1
             time.sleep(self.ssh_retry_delay_seconds * attempt)
         return last
 
+    def _write_runtime_config(self) -> str:
+        runtime_config = dict(self.config)
+        # allocate_and_prepare consumes a resolved single-backend config;
+        # retaining launch_providers can force profile re-resolution and fail.
+        runtime_config.pop("launch_providers", None)
+        with tempfile.NamedTemporaryFile(
+            mode="w",
+            suffix=f".{self._provider_ref.replace(':', '_')}.json",
+            prefix="codeswarm-slurm-",
+            delete=False,
+        ) as tf:
+            json.dump(runtime_config, tf)
+            return tf.name
+
     def launch(
         self,
         nodes: int,
@@ -370,19 +434,10 @@ exit 1
         _progress("starting", f"Preparing Slurm launch for {nodes} node(s)")
         config_path = None
         temp_config_path = None
+        pool_job_id = None
+        swarm_job_id = None
         try:
-            runtime_config = dict(self.config)
-            # allocate_and_prepare consumes a resolved single-backend config;
-            # retaining launch_providers can force profile re-resolution and fail.
-            runtime_config.pop("launch_providers", None)
-            with tempfile.NamedTemporaryFile(
-                mode="w",
-                suffix=f".{self._provider_ref.replace(':', '_')}.json",
-                prefix="codeswarm-slurm-",
-                delete=False,
-            ) as tf:
-                json.dump(runtime_config, tf)
-                temp_config_path = tf.name
+            temp_config_path = self._write_runtime_config()
             config_path = temp_config_path
 
             launch_params = launch_params if isinstance(launch_params, dict) else {}
@@ -414,6 +469,21 @@ exit 1
                 raise RuntimeError("Slurm time_limit not configured")
             _progress("config", f"Using time limit: {time_limit}")
 
+            agents_per_node = self._agents_per_node(launch_params)
+            compute_nodes = int(math.ceil(int(nodes) / agents_per_node))
+            if agents_per_node > 1:
+                _progress("config", f"Compute nodes: {compute_nodes} - agents per node: {agents_per_node}")
+
+            if self._allocation_pool_enabled(launch_params):
+                self._pool_last_demand = time.time()
+                self._ensure_pool_maintainer()
+                pool_job_id, swarm_job_id = self._pool_try_lease(compute_nodes, str(partition))
+                if pool_job_id:
+                    _progress("pool", f"Using pooled allocation {pool_job_id} for {compute_nodes} node(s)")
+                else:
+                    _progress("pool", "No idle pooled allocation fits; submitting a dedicated allocation")
+                    threading.Thread(target=self._maintain_allocation_pool_quietly, daemon=True).start()
+
             repo_root = Path(__file__).resolve().parents[2]
             allocate_script = repo_root / "slurm" / "allocate_and_prepare.py"
 
@@ -435,6 +505,11 @@ exit 1
                 self._approval_policy(launch_params),
             ]
 
+            if agents_per_node > 1:
+                cmd += ["--agents-per-node", str(agents_per_node)]
+            if pool_job_id:
+                cmd += ["--pool-job", str(pool_job_id), "--swarm-job-id", str(swarm_job_id)]
+
             if account:
                 cmd += ["--account", str(account)]
 
@@ -481,16 +556,62 @@ exit 1
                 bufsize=1,
             )
 
+            # Repository staging only needs the run dirs, so it overlaps the
+            # remaining tool staging and queue wait instead of following them.
+            stage_repo_path = str(launch_params.get("stage_repo_path") or "").strip()
+            stage_repo_branch = str(launch_params.get("stage_repo_branch") or "").strip() or None
+            staged_job_id = swarm_job_id if pool_job_id else None
+            repo_stage: dict = {"thread": None, "error": None}
+
+            def _stage_repository(job_id: str) -> None:
+                started = time.time()
+                try:
+                    self.prepare_repository(job_id, stage_repo_path, branch=stage_repo_branch)
+                except Exception as e:
+                    repo_stage["error"] = str(e)
+                finally:
+                    _progress("stage_timing", f"repository: {time.time() - started:.2f}s")
+
             output_lines = []
             if proc.stdout is not None:
                 for raw in proc.stdout:
                     output_lines.append(raw)
                     line = raw.strip()
-                    if line:
+                    if not line:
+                        continue
+                    submitted = re.match(r"Submitted job (\d+)", line)
+                    if submitted:
+                        staged_job_id = submitted.group(1)
+                    cache = re.match(r"STAGING_CACHE name=(\S+) result=(\S+)", line)
+                    if cache:
+                        _progress("staging_cache", f"{cache.group(1)}: {cache.group(2)}")
+                        continue
+                    timing = re.match(r"STAGE_TIMING stage=(\S+) seconds=(\S+)", line)
+                    if not timing:
                         _progress("slurm_setup", line)
+                        continue
+                    _progress("stage_timing", f"{timing.group(1)}: {timing.group(2)}s")
+                    if (
+                        timing.group(1) == "run_dirs"
+                        and stage_repo_path
+                        and staged_job_id
+                        and repo_stage["thread"] is None
+                    ):
+                        _progress("repo_stage", f"Staging repository {stage_repo_path} while the job is queued")
+                        repo_stage["thread"] = threading.Thread(
+                            target=_stage_repository,
+                            args=(staged_job_id,),
+                            daemon=True,
+                        )
+                        repo_stage["thread"].start()
 
             exit_code = proc.wait()
             output = "".join(output_lines)
+            if repo_stage["thread"] is not None:
+                repo_stage["thread"].join()
+                if repo_stage["error"]:
+                    # Not fatal: project preparation retries the checkout later.
+                    _progress("repo_stage", f"Repository staging failed: {repo_stage['error']}")
 
             if exit_code != 0:
                 raise RuntimeError(
@@ -498,7 +619,7 @@ exit 1
                     f"OUTPUT:\n{output}"
                 )
 
-            match = re.search(r"JOB_ID=(\d+)", output)
+            match = re.search(r"^JOB_ID=(\S+)", output, re.MULTILINE)
             if not match:
                 match = re.search(r"Submitted job (\d+)", output)
 
@@ -506,8 +627,15 @@ exit 1
                 raise RuntimeError(f"Unable to parse Slurm JOB_ID. Output:\n{output}")
 
             _progress("ready", f"Slurm job is ready: {match.group(1)}")
+            pool_job_id = None
             return match.group(1)
         finally:
+            if pool_job_id and swarm_job_id:
+                # Launch failed after leasing; hand the allocation back.
+                try:
+                    self._pool_release(pool_job_id, swarm_job_id)
+                except Exception:
+                    pass
             if temp_config_path:
                 try:
                     Path(temp_config_path).unlink(missing_ok=True)
@@ -516,13 +644,282 @@ exit 1
 
     def terminate(self, job_id: str, terminate_params: dict | None = None) -> None:
         login_host = self._login_host()
+        pool_job_id = self._pooled_allocation_id(job_id)
+        if pool_job_id:
+            # Stop only the swarm's job step and return the allocation to the pool.
+            step_name = f"codeswarm-{job_id}"
+            script = f"""
+set -uo pipefail
+squeue -s -j {shlex.quote(pool_job_id)} -h -o '%i|%j' | while IFS='|' read -r step name; do
+  if [ "$name" = {shlex.quote(step_name)} ]; then
+    scancel "$step"
+  fi
+done
+"""
+            self._ssh_run(["ssh", login_host, "/bin/bash -lc " + shlex.quote(script)])
+            self._pool_release(pool_job_id, str(job_id))
+            return
         self._ssh_run(["ssh", login_host, f"scancel {job_id}"])
 
+    # ----- allocation pool -----
+
+    def _allocation_pool_cfg(self) -> dict:
+        raw = self.slurm_cfg.get("allocation_pool")
+        return raw if isinstance(raw, dict) else {}
+
+    def _allocation_pool_enabled(self, launch_params: dict | None = None) -> bool:
+        if not bool(self._allocation_pool_cfg().get("enabled", False)):
+            return False
+        params = launch_params if isinstance(launch_params, dict) else {}
+        if "use_allocation_pool" in params:
+            return bool(params.get("use_allocation_pool"))
+        return True
+
+    @staticmethod
+    def _new_pooled_job_id(pool_job_id: str) -> str:
+        # Swarms carved from a pool allocation get their own job id so
+        # mailbox files and run dirs never collide across leases.
+        return f"{pool_job_id}-pool-{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def _pooled_allocation_id(job_id: str) -> str | None:
+        match = re.fullmatch(r"(\d+)-pool-[0-9a-f]{8}", str(job_id or "").strip())
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _parse_slurm_duration(text: str) -> int | None:
+        value = str(text or "").strip()
+        if not value or value.upper() in {"UNLIMITED", "NOT_SET", "INVALID"}:
+            return None
+        days = 0
+        if "-" in value:
+            day_text, value = value.split("-", 1)
+            try:
+                days = int(day_text)
+            except ValueError:
+                return None
+        try:
+            parts = [int(part) for part in value.split(":")]
+        except ValueError:
+            return None
+        while len(parts) < 3:
+            parts.insert(0, 0)
+        hours, minutes, seconds = parts[-3:]
+        return days * 86400 + hours * 3600 + minutes * 60 + seconds
+
+    def _pool_snapshot(self) -> dict[str, dict]:
+        login_host = self._login_host()
+        base = self._resolve_slurm_mailbox_base()
+        script = f"""
+set -uo pipefail
+BASE={shlex.quote(base)}
+squeue -h -u "$USER" -n codeswarm-pool -o '%i|%T|%D|%L|%P' | sed 's/^/J|/'
+for f in "$BASE"/pool/*/lease; do
+  [ -f "$f" ] || continue
+  printf 'L|%s|%s\\n' "$(basename "$(dirname "$f")")" "$(head -n1 "$f")"
+done
+"""
+        result = self._ssh_run(["ssh", login_host, "/bin/bash -lc " + shlex.quote(script)], timeout=30)
+        if result is None or result.returncode != 0:
+            detail = "" if result is None else (result.stderr or result.stdout).strip()
+            raise RuntimeError(f"Failed to query Slurm allocation pool: {detail}")
+        allocations: dict[str, dict] = {}
+        leases: dict[str, str] = {}
+        for raw_line in str(result.stdout or "").splitlines():
+            parts = raw_line.strip().split("|")
+            if parts[0] == "J" and len(parts) == 6:
+                _, alloc_id, state, node_count, time_left, partition = parts
+                try:
+                    nodes = int(node_count)
+                except ValueError:
+                    nodes = 0
+                allocations[alloc_id] = {
+                    "job_id": alloc_id,
+                    "state": state.strip().upper(),
+                    "nodes": nodes,
+                    "time_left_seconds": self._parse_slurm_duration(time_left),
+                    "partition": partition.strip(),
+                    "lease": None,
+                }
+            elif parts[0] == "L" and len(parts) == 3:
+                leases[parts[1]] = parts[2].strip()
+        for alloc_id, lease in leases.items():
+            if alloc_id in allocations and lease:
+                allocations[alloc_id]["lease"] = lease
+        return allocations
+
+    def _pool_try_lease(self, compute_nodes: int, partition: str) -> tuple[str | None, str | None]:
+        pool_cfg = self._allocation_pool_cfg()
+        # Allocations inside the refresh window are about to be cancelled.
+        min_remaining = max(
+            int(pool_cfg.get("min_remaining_seconds") or 900),
+            int(pool_cfg.get("refresh_before_seconds") or 1800),
+        )
+        candidates = [
+            alloc
+            for alloc in self._pool_snapshot().values()
+            if alloc["state"] == "RUNNING"
+            and not alloc["lease"]
+            and alloc["nodes"] >= compute_nodes
+            and (not partition or partition in alloc["partition"].split(","))
+            and (alloc["time_left_seconds"] is None or alloc["time_left_seconds"] >= min_remaining)
+        ]
+        candidates.sort(key=lambda alloc: (alloc["nodes"], -(alloc["time_left_seconds"] or 0)))
+        login_host = self._login_host()
+        base = self._resolve_slurm_mailbox_base()
+        for alloc in candidates:
+            pool_dir = f"{base}/pool/{alloc['job_id']}"
+            job_id = self._new_pooled_job_id(alloc["job_id"])
+            # noclobber makes lease creation atomic across concurrent launches.
+            script = (
+                f"[ -d {shlex.quote(pool_dir)} ] && "
+                f"(set -o noclobber; printf '%s\\n' {shlex.quote(job_id)} > {shlex.quote(pool_dir + '/lease')})"
+            )
+            result = self._ssh_run(["ssh", login_host, "/bin/bash -lc " + shlex.quote(script)])
+            if result is not None and result.returncode == 0:
+                return alloc["job_id"], job_id
+        return None, None
+
+    def _pool_release(self, pool_job_id: str, job_id: str) -> None:
+        login_host = self._login_host()
+        pool_dir = f"{self._resolve_slurm_mailbox_base()}/pool/{pool_job_id}"
+        script = f"""
+LEASE={shlex.quote(pool_dir + '/lease')}
+if [ -f "$LEASE" ] && [ "$(head -n1 "$LEASE")" = {shlex.quote(job_id)} ]; then
+  touch {shlex.quote(pool_dir + '/last_active')}
+  rm -f "$LEASE"
+fi
+"""
+        self._ssh_run(["ssh", login_host, "/bin/bash -lc " + shlex.quote(script)])
+
+    def _pool_submit(self, count: int) -> list[str]:
+        pool_cfg = self._allocation_pool_cfg()
+        partition = pool_cfg.get("partition") or self.slurm_cfg.get("partition")
+        time_limit = pool_cfg.get("time_limit") or self.slurm_cfg.get("time_limit")
+        if not partition or not time_limit:
+            raise RuntimeError("Slurm allocation pool requires partition and time_limit")
+        account = pool_cfg.get("account") or self.slurm_cfg.get("account")
+        qos = pool_cfg.get("qos") or self.slurm_cfg.get("qos")
+        repo_root = Path(__file__).resolve().parents[2]
+        submitted: list[str] = []
+        config_path = self._write_runtime_config()
+        try:
+            for _ in range(max(0, int(count))):
+                cmd = [
+                    sys.executable,
+                    str(repo_root / "slurm" / "allocate_and_prepare.py"),
+                    "--config",
+                    config_path,
+                    "--pool-allocation",
+                    "--nodes",
+                    str(max(1, int(pool_cfg.get("nodes") or 1))),
+                    "--time",
+                    str(time_limit),
+                    "--partition",
+                    str(partition),
+                    "--pool-idle-timeout",
+                    str(int(pool_cfg.get("idle_timeout_seconds") or 900)),
+                ]
+                if account:
+                    cmd += ["--account", str(account)]
+                if qos:
+                    cmd += ["--qos", str(qos)]
+                result = subprocess.run(cmd, capture_output=True, text=True)
+                match = re.search(r"^POOL_JOB_ID=(\d+)", result.stdout or "", re.MULTILINE)
+                if result.returncode != 0 or not match:
+                    raise RuntimeError(
+                        f"Failed to submit Slurm pool allocation: {(result.stderr or result.stdout).strip()}"
+                    )
+                submitted.append(match.group(1))
+        finally:
+            Path(config_path).unlink(missing_ok=True)
+        return submitted
+
+    def maintain_allocation_pool(self) -> dict:
+        """
+        Refresh idle allocations close to their time limit and top the pool
+        back up to its configured size while launches keep arriving.
+        """
+        if not self._allocation_pool_enabled():
+            return {}
+        pool_cfg = self._allocation_pool_cfg()
+        size = max(0, int(pool_cfg.get("size") or 1))
+        idle_timeout = int(pool_cfg.get("idle_timeout_seconds") or 900)
+        refresh_before = int(pool_cfg.get("refresh_before_seconds") or 1800)
+        with self._pool_lock:
+            allocations = self._pool_snapshot()
+            refreshed: list[str] = []
+            for alloc in allocations.values():
+                time_left = alloc["time_left_seconds"]
+                if alloc["state"] != "RUNNING" or alloc["lease"] or time_left is None:
+                    continue
+                if time_left < refresh_before:
+                    # Claim the lease like a launch would, so an allocation
+                    # leased since the snapshot is never cancelled under it.
+                    pool_dir = f"{self._resolve_slurm_mailbox_base()}/pool/{alloc['job_id']}"
+                    script = (
+                        f"if [ -d {shlex.quote(pool_dir)} ]; then "
+                        f"(set -o noclobber; printf 'refresh\\n' > {shlex.quote(pool_dir + '/lease')}) || exit 1; "
+                        f"fi; scancel {shlex.quote(alloc['job_id'])}"
+                    )
+                    result = self._ssh_run(["ssh", self._login_host(), "/bin/bash -lc " + shlex.quote(script)])
+                    if result is None or result.returncode != 0:
+                        continue
+                    refreshed.append(alloc["job_id"])
+            live = [
+                alloc for alloc in allocations.values()
+                if alloc["job_id"] not in refreshed and alloc["state"] in {"PENDING", "CONFIGURING", "RUNNING"}
+            ]
+            submitted: list[str] = []
+            if time.time() - self._pool_last_demand < idle_timeout and len(live) < size:
+                submitted = self._pool_submit(size - len(live))
+        return {
+            "allocations": len(live) + len(submitted),
+            "refreshed": refreshed,
+            "submitted": submitted,
+        }
+
+    def _maintain_allocation_pool_quietly(self) -> None:
+        try:
+            self.maintain_allocation_pool()
+        except Exception:
+            pass
+
+    def _ensure_pool_maintainer(self) -> None:
+        with self._pool_lock:
+            if self._pool_maintainer_started:
+                return
+            self._pool_maintainer_started = True
+        interval = max(15, int(self._allocation_pool_cfg().get("maintain_interval_seconds") or 60))
+
+        def _loop():
+            while True:
+                self._maintain_allocation_pool_quietly()
+                time.sleep(interval)
+
+        threading.Thread(target=_loop, daemon=True).start()
+
+    def recover_swarms(self) -> Dict[str, dict]:
+        if self._allocation_pool_enabled():
+            if bool(self._allocation_pool_cfg().get("prewarm", False)):
+                self._pool_last_demand = time.time()
+            self._ensure_pool_maintainer()
+        return {}
+
     def archive(self, job_id: str, swarm_id: str) -> None:
         # Archival for Slurm should be handled by cluster-side policy
         # (e.g., SBATCH epilog or shared filesystem rules).
-        # Router does not enforce filesystem moves for Slurm backend.
-        return
+        # Router does not enforce filesystem moves for Slurm backend; it only
+        # detaches worker clones from the per-job object store and drops it.
+        base = self._resolve_slurm_mailbox_base()
+        script = f"""
+set -uo pipefail
+BASE={shlex.quote(base)}
+JOB={shlex.quote(str(job_id))}
+{DISSOCIATE_CLONES_SCRIPT}
+rm -rf "$BASE/project_sources/$JOB"
+"""
+        self._ssh_run(["ssh", self._login_host(), "/bin/bash -lc " + shlex.quote(script)])
 
     def create_workspace_archive(self, job_id: str, swarm_id: str, output_dir: Path) -> str | None:
         login_host = self._login_host()
@@ -542,6 +939,7 @@ exit 1
 set -euo pipefail
 BASE={shlex.quote(base)}
 JOB={shlex.quote(str(job_id))}
+{DISSOCIATE_CLONES_SCRIPT}
 TMP=$(mktemp -d)
 ROOT="$TMP/export"
 mkdir -p "$ROOT"
@@ -597,12 +995,22 @@ rm -rf "$TMP"
 
         return str(archive_path.resolve())
 
+    def _repo_prepare_concurrency(self) -> int:
+        try:
+            value = int(self.slurm_cfg.get("repo_prepare_concurrency") or 8)
+        except Exception:
+            value = 8
+        return max(1, value)
+
     def prepare_repository(
         self,
         job_id: str,
         repo_path: str,
         branch: str | None = None,
         subdir: str = "repo",
+        worker_progress_cb: Optional[Callable[[dict], None]] = None,
+        sparse_checkout: bool = False,
+        sparse_paths: list[str] | None = None,
     ) -> dict:
         source_text = str(repo_path or "").strip()
         if not source_text:
@@ -616,6 +1024,7 @@ rm -rf "$TMP"
         source_kind = "local_path" if source_is_local else ("github" if github_repo else "remote_url")
         base = self._resolve_slurm_mailbox_base()
         remote_source = f"{base}/project_sources/{job_id}/source"
+        staging_cache = "bypass"
         github_token = self._local_github_token()
         github_token_file = ""
         public_origin = ""
@@ -635,7 +1044,7 @@ rm -rf "$TMP"
             else:
                 public_origin = desired_origin
                 authenticated_origin = desired_origin
-            self._rsync_to_login_host(source, remote_source)
+            staging_cache = self._rsync_to_login_host(source, remote_source)
         else:
             clone_source, _inherited_origin = self._resolved_clone_source(github_repo or source_text)
             github_origin = self._parse_github_repo_ref(clone_source)
@@ -677,12 +1086,43 @@ fi
         if not node_ids:
             raise RuntimeError(f"No prepared worker directories found for Slurm job {job_id}")
 
-        prepared_paths: list[str] = []
-        for node_id in node_ids:
+        object_store = f"{base}/project_sources/{job_id}/objects.git"
+        store_script = f"""
+set -euo pipefail
+SOURCE={shlex.quote(remote_source)}
+STORE={shlex.quote(object_store)}
+if [ -d "$STORE" ]; then
+  git -C "$STORE" fetch --prune origin
+else
+  git clone --mirror "$SOURCE" "$STORE"
+fi
+# Worker clones borrow objects through alternates, so the store must never prune.
+git -C "$STORE" config gc.auto 0
+# Blobless (sparse mode) clones and their lazy fetches are served from the store.
+git -C "$STORE" config uploadpack.allowFilter true
+git -C "$STORE" config uploadpack.allowAnySHA1InWant true
+"""
+        result = self._ssh_run(["ssh", login_host, "/bin/bash -lc " + shlex.quote(store_script)])
+        if result.returncode != 0:
+            raise RuntimeError(f"Failed to prepare Slurm repository object store: {(result.stderr or result.stdout).strip()}")
+
+        if sparse_checkout:
+            # Blobless and sparse: trees for the whole history, blobs fetched on
+            # demand as the task cone widens.
+            clone_lines = ['  git clone --sparse --filter=blob:none "file://$STORE" "$TARGET"']
+            if sparse_paths:
+                clone_lines.append(
+                    '  git -C "$TARGET" sparse-checkout set ' + " ".join(shlex.quote(path) for path in sparse_paths)
+                )
+        else:
+            clone_lines = ['  git clone --shared "$STORE" "$TARGET"']
+
+        def _prepare_worker(node_id: int) -> dict:
+            started = time.time()
             target = f"{base}/runs/{job_id}/agent_{node_id:02d}/{subdir}"
             script_lines = [
                 "set -euo pipefail",
-                f"SOURCE={shlex.quote(remote_source)}",
+                f"STORE={shlex.quote(object_store)}",
                 f"TARGET={shlex.quote(target)}",
                 f"ORIGIN={shlex.quote(public_origin or desired_origin)}",
                 'if [ -e "$TARGET" ] && [ ! -d "$TARGET/.git" ]; then rm -rf "$TARGET"; fi',
@@ -694,7 +1134,8 @@ fi
                 "fi",
                 'if [ ! -d "$TARGET/.git" ]; then',
                 '  mkdir -p "$(dirname "$TARGET")"',
-                '  git clone "$SOURCE" "$TARGET"',
+                *clone_lines,
+                "  echo cloned",
                 "fi",
                 'git -C "$TARGET" remote set-url origin "$ORIGIN" || true',
             ]
@@ -729,7 +1170,20 @@ fi
                 )
             if branch_name:
                 self._checkout_prepared_branch_remote(target, branch_name, node_id)
-            prepared_paths.append(target)
+            return {
+                "node_id": node_id,
+                "path": target,
+                "status": "cloned" if "cloned" in str(result.stdout or "").split() else "refreshed",
+                "seconds": round(time.time() - started, 3),
+            }
+
+        worker_reports = self._run_worker_preparation(
+            node_ids,
+            _prepare_worker,
+            worker_progress_cb,
+            self._repo_prepare_concurrency(),
+        )
+        prepared_paths = [report["path"] for report in worker_reports]
 
         return {
             "mode": "per_agent_clone",
@@ -740,11 +1194,37 @@ fi
             "branch": branch_name,
             "subdir": subdir,
             "worker_paths": prepared_paths,
+            "staging_cache": staging_cache,
+            "object_store": object_store,
+            "worker_reports": worker_reports,
+            "sparse_checkout": bool(sparse_checkout),
         }
 
+    def widen_sparse_checkout(self, job_id: str, node_id: int, subdir: str, paths: list[str] | None) -> None:
+        target = f"{self._resolve_slurm_mailbox_base()}/runs/{job_id}/agent_{int(node_id):02d}/{subdir}"
+        if paths is None:
+            command = f"git -C {shlex.quote(target)} sparse-checkout disable"
+        elif paths:
+            command = f"git -C {shlex.quote(target)} sparse-checkout add " + " ".join(shlex.quote(path) for path in paths)
+        else:
+            return
+        result = self._ssh_run(["ssh", self._login_host(), "/bin/bash -lc " + shlex.quote(command)])
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"Failed to update sparse checkout for Slurm worker {node_id}: "
+                f"{self._strip_ssh_noise(result.stderr or result.stdout)}"
+            )
+
     def get_job_state(self, job_id: str) -> Optional[str]:
         login_host = self._login_host()
 
+        pool_job_id = self._pooled_allocation_id(job_id)
+        if pool_job_id:
+            allocation = self._pool_snapshot().get(pool_job_id)
+            if not allocation or allocation.get("lease") != str(job_id):
+                return None
+            return allocation.get("state") or None
+
         result = self._ssh_run(
             ["ssh", login_host, f"squeue -j {job_id} -h -o '%T'"],
             timeout=15,
@@ -775,6 +1255,13 @@ fi
             job_id, job_name, state = parts
             running_jobs[job_id] = state
 
+        if self._allocation_pool_enabled():
+            # Pooled swarms run as job steps; report them under their lease id.
+            for alloc_id, allocation in self._pool_snapshot().items():
+                lease = allocation.get("lease")
+                if lease and alloc_id in running_jobs:
+                    running_jobs[lease] = running_jobs[alloc_id]
+
         return running_jobs
 
     def start_follower(self):
@@ -798,7 +1285,22 @@ fi
 
         return f"{workspace_root}/{cluster_subdir}"
 
-    def inject(self, job_id, node_id, content, injection_id):
+    def read_outbox_events(self, job_id, node_id, injection_ids):
+        base = self._resolve_slurm_mailbox_base()
+        name = f"{job_id}_{int(node_id):02d}.jsonl"
+        patterns = " ".join(f"-e {shlex.quote(str(injection_id))}" for injection_id in injection_ids if injection_id)
+        if not patterns:
+            return []
+        remote_cmd = (
+            f"cat {shlex.quote(f'{base}/mailbox/archive/{name}')} {shlex.quote(f'{base}/mailbox/outbox/{name}')} 2>/dev/null"
+            f" | grep -F {patterns} || true"
+        )
+        result = self._ssh_run(["ssh", self._login_host(), remote_cmd])
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip())
+        return self._outbox_events_for_injections(result.stdout.splitlines(), injection_ids)
+
+    def inject(self, job_id, node_id, content, injection_id, hold=False):
         login_host = self._login_host()
         base = self._resolve_slurm_mailbox_base()
 
@@ -807,20 +1309,49 @@ fi
             f"{job_id}_{int(node_id):02d}.jsonl"
         )
 
-        payload = {
-            "type": "user",
-            "content": content,
-            "injection_id": injection_id
-        }
+        data = str(content).encode("utf-8")
+        blob_key = None
+        if len(data) > blob_store.INLINE_CONTENT_LIMIT_BYTES:
+            blob_key = blob_store.blob_key(data)
+            payload = {
+                "type": "user",
+                "content_ref": blob_key,
+                "injection_id": injection_id
+            }
+        else:
+            payload = {
+                "type": "user",
+                "content": content,
+                "injection_id": injection_id
+            }
+        if hold:
+            payload["hold"] = True
 
         json_line = json.dumps(payload)
         remote_cmd = f"printf '%s\\n' {shlex.quote(json_line)} >> {inbox_path}"
 
-        result = self._ssh_run(["ssh", login_host, remote_cmd])
+        if blob_key is not None and (str(job_id), blob_key) not in self._stored_blobs:
+            # Ship the content once per job; later injects only append the reference.
+            script = "set -euo pipefail\n" + blob_store.store_script(base, str(job_id), blob_key) + remote_cmd + "\n"
+            result = self._ssh_run(
+                ["ssh", login_host, "/bin/bash -lc " + shlex.quote(script)],
+                input_text=str(content),
+            )
+            if result.returncode == 0:
+                self._stored_blobs.add((str(job_id), blob_key))
+        else:
+            result = self._ssh_run(["ssh", login_host, remote_cmd])
 
         if result.returncode != 0:
             raise RuntimeError(result.stderr.strip())
 
+    def release_job_blobs(self, job_id: str) -> None:
+        login_host = self._login_host()
+        base = self._resolve_slurm_mailbox_base()
+        script = blob_store.release_script(base, str(job_id))
+        self._ssh_run(["ssh", login_host, "/bin/bash -lc " + shlex.quote(script)])
+        self._stored_blobs = {entry for entry in self._stored_blobs if entry[0] != str(job_id)}
+
     def send_control(self, job_id: str, node_id: int, message: dict) -> None:
         """
         Send control message (e.g., exec_approval_response) to a specific worker node
@@ -55,6 +55,40 @@ STATE_SAVE_LOCK = threading.Lock()
 TERMINATION_IN_PROGRESS = set()
 FORCE_TERMINATION_REQUESTED = set()
 PROJECT_BEADS_PERSIST_LOCKS = defaultdict(threading.Lock)
+PROJECT_REPO_MIRROR_LOCKS = defaultdict(threading.Lock)
+PROJECT_BEADS_PERSIST_DUE = {}
+PROJECT_BEADS_PERSIST_COND = threading.Condition()
+PROJECT_BEADS_PERSISTER_THREAD = None
+PROJECT_REPO_MIRROR_EVICTION_LOCK = threading.Lock()
+# Clones and fetches reading each mirror; guarded by that mirror's lock.
+PROJECT_REPO_MIRROR_USERS = defaultdict(int)
+PROJECT_MERGE_TRAIN_RUNS = {}
+FAIR_SHARE_PASSES = {}
+PROJECT_PREFETCHED_INJECTIONS = {}
+NODE_LAST_SEEN = {}
+NODE_DOWN = {}
+# Nodes back from NODE_DOWN whose old turn may still be running; kept out of
+# idle selection until they report a finished turn or an idle heartbeat.
+NODE_RECOVERING = set()
+FOLLOWER_STREAMS = {}
+INTER_SWARM_INFLIGHT = {}
+INTER_SWARM_DEAD_LETTERS = deque()
+INTER_SWARM_WAIT_STATS = {}
+MAP_REDUCE_JOBS = {}
+MAP_REDUCE_INJECTIONS = {}
+PIPELINES = {}
+PIPELINE_STATS = {}
+# (pipeline_id, stage_id) -> items waiting in INTER_SWARM_QUEUE, kept as
+# items are inserted and removed so backpressure checks need no queue scan.
+PIPELINE_QUEUED = defaultdict(int)
+PROJECT_TASK_TIMER_WHEEL = defaultdict(dict)
+PROJECT_TASK_TIMER_TICK = None
+AUTOSCALE_GROUPS = {}
+GIT_REVISION_HELPERS = {}
+GIT_REVISION_HELPERS_LOCK = threading.Lock()
+GIT_REVISION_MEMO = {}
+GIT_ANCESTRY_MEMO = {}
+GIT_MEMO_LOCK = threading.Lock()
 
 # Retention policy
 TERMINATED_TTL_SECONDS = 900  # 15 minutes
@@ -73,6 +107,39 @@ APPROVAL_ACK_RETRY_SECONDS = 2.0
 APPROVAL_ACK_MAX_BACKOFF_SECONDS = 15.0
 PROJECT_REPO_CACHE_ROOT = Path(__file__).resolve().parents[1] / ".tmp" / "project_repos"
 PROJECT_REPO_CACHE_ROOT = Path(__file__).resolve().parents[1] / ".tmp" / "project_repos"
+PROJECT_REPO_MIRROR_TTL_SECONDS = 30.0
+PROJECT_REPO_MIRROR_BUDGET_BYTES = 20 * 1024 ** 3
+PROJECT_BEADS_PERSIST_INTERVAL_SECONDS = 5.0
+BEADS_IMPORT_CHUNK_SIZE = 100
+PROJECT_HEDGE_CHECK_INTERVAL_SECONDS = 15.0
+PROJECT_TASK_DURATION_SAMPLES = 200
+SWARM_PREFETCH_MAX_DEPTH = 4
+PROJECT_TASK_TIMER_TICK_SECONDS = 1.0
+PROJECT_TASK_TIMER_SLOTS = 512
+PROJECT_TASK_RETRY_DEFAULTS = {
+    "deadline_seconds": None,
+    "max_attempts": 1,
+    "backoff_seconds": 30.0,
+    "backoff_max_seconds": 900.0,
+    "retry_on_different_node": True,
+}
+NODE_HEARTBEAT_TIMEOUT_SECONDS = 90.0
+NODE_FAILURE_CHECK_INTERVAL_SECONDS = 5.0
+# Follower heartbeats arrive every 5s; a longer gap means the router was not
+# reading the stream, so node silence during it proves nothing.
+FOLLOWER_STREAM_STALE_SECONDS = 20.0
+AUTOSCALE_CHECK_INTERVAL_SECONDS = 15.0
+AUTOSCALE_LAUNCH_TIMEOUT_SECONDS = 3600.0
+SWARM_POOL_QUEUE_PREFIX = "pool:"
+# Inter-swarm queue priority classes, highest first.
+INTER_SWARM_PRIORITY_CLASSES = ("urgent", "normal", "bulk")
+INTER_SWARM_DEFAULT_PRIORITY = "normal"
+INTER_SWARM_DEAD_LETTER_LIMIT = 200
+INTER_SWARM_EXPIRY_CHECK_INTERVAL_SECONDS = 1.0
+MAP_REDUCE_CHECK_INTERVAL_SECONDS = 1.0
+MAP_REDUCE_HISTORY_LIMIT = 50
+PIPELINE_THROUGHPUT_WINDOW_SECONDS = 300.0
+GIT_MEMO_MAX_ENTRIES = 8192
 PROJECT_CONTROL_BRANCH_PREFIX = "codeswarm/project-control"
 STARTUP_RECONCILE_TIMEOUT_SECONDS = 20.0
 LOCAL_STARTUP_RECONCILE_TIMEOUT_SECONDS = 5.0
@@ -113,6 +180,217 @@ def _project_control_cache_root():
     return _project_repo_cache_root() / "_control"
 
 
+def _project_repo_mirror_root():
+    return _project_repo_cache_root() / "_mirrors"
+
+
+def _configure_project_repo_persistence(config):
+    global PROJECT_REPO_MIRROR_TTL_SECONDS, PROJECT_REPO_MIRROR_BUDGET_BYTES, PROJECT_BEADS_PERSIST_INTERVAL_SECONDS
+    router_cfg = config.get("router") if isinstance(config, dict) else {}
+    router_cfg = router_cfg if isinstance(router_cfg, dict) else {}
+    try:
+        ttl = float(router_cfg.get("project_repo_mirror_ttl_seconds"))
+        if ttl >= 0:
+            PROJECT_REPO_MIRROR_TTL_SECONDS = ttl
+    except Exception:
+        pass
+    try:
+        budget_mb = float(router_cfg.get("project_repo_mirror_budget_mb"))
+        if budget_mb >= 0:
+            PROJECT_REPO_MIRROR_BUDGET_BYTES = int(budget_mb * 1024 * 1024)
+    except Exception:
+        pass
+    try:
+        interval = float(router_cfg.get("beads_persist_interval_seconds"))
+        if interval >= 0:
+            PROJECT_BEADS_PERSIST_INTERVAL_SECONDS = interval
+    except Exception:
+        pass
+
+
+def _configure_node_failure_detection(config):
+    global NODE_HEARTBEAT_TIMEOUT_SECONDS, NODE_FAILURE_CHECK_INTERVAL_SECONDS
+    router_cfg = config.get("router") if isinstance(config, dict) else {}
+    router_cfg = router_cfg if isinstance(router_cfg, dict) else {}
+    try:
+        timeout = float(router_cfg.get("node_heartbeat_timeout_seconds"))
+        if timeout >= 0:
+            NODE_HEARTBEAT_TIMEOUT_SECONDS = timeout
+    except Exception:
+        pass
+    try:
+        interval = float(router_cfg.get("node_failure_check_interval_seconds"))
+        if interval > 0:
+            NODE_FAILURE_CHECK_INTERVAL_SECONDS = interval
+    except Exception:
+        pass
+
+
+def _normalize_autoscale_group(raw):
+    raw = raw if isinstance(raw, dict) else {}
+
+    def _number(key, default, minimum=0.0):
+        try:
+            return max(minimum, float(raw.get(key, default)))
+        except (TypeError, ValueError):
+            return default
+
+    nodes_per_swarm = max(1, _to_int(raw.get("nodes_per_swarm")) or 1)
+    max_nodes = _to_int(raw.get("max_nodes"))
+    max_hourly_cost = raw.get("max_hourly_cost_usd")
+    provider_params = raw.get("provider_params")
+    return {
+        "provider": str(raw.get("provider") or "").strip() or None,
+        "provider_params": dict(provider_params) if isinstance(provider_params, dict) else {},
+        "system_prompt": raw.get("system_prompt") if isinstance(raw.get("system_prompt"), str) else "",
+        "prefetch_depth": _normalize_prefetch_depth(raw.get("prefetch_depth")),
+        "pool": str(raw.get("pool") or "").strip() or None,
+        "nodes_per_swarm": nodes_per_swarm,
+        "min_nodes": max(0, _to_int(raw.get("min_nodes")) or 0),
+        "max_nodes": max(nodes_per_swarm, max_nodes) if max_nodes is not None else None,
+        "scale_up_after_seconds": _number("scale_up_after_seconds", 60.0),
+        "scale_down_after_seconds": _number("scale_down_after_seconds", 600.0),
+        "node_hour_cost_usd": _number("node_hour_cost_usd", 0.0),
+        "max_hourly_cost_usd": _number("max_hourly_cost_usd", 0.0) if max_hourly_cost is not None else None,
+    }
+
+
+def _configure_autoscaling(config):
+    global AUTOSCALE_CHECK_INTERVAL_SECONDS
+    router_cfg = config.get("router") if isinstance(config, dict) else {}
+    router_cfg = router_cfg if isinstance(router_cfg, dict) else {}
+    autoscale_cfg = router_cfg.get("autoscale")
+    if not isinstance(autoscale_cfg, dict):
+        return
+    try:
+        interval = float(autoscale_cfg.get("check_interval_seconds"))
+        if interval > 0:
+            AUTOSCALE_CHECK_INTERVAL_SECONDS = interval
+    except Exception:
+        pass
+    groups = autoscale_cfg.get("groups")
+    for group_id, raw in (groups.items() if isinstance(groups, dict) else []):
+        group = _normalize_autoscale_group(raw)
+        if not group["provider"]:
+            print(f"[router WARN] autoscale group {group_id} has no provider; ignored", file=sys.stderr, flush=True)
+            continue
+        AUTOSCALE_GROUPS[str(group_id)] = {
+            **group,
+            "pressure_since": None,
+            "quiet_since": {},
+            "launching": {},
+            "launched": 0,
+            "terminated": 0,
+        }
+
+
+def _pipeline_graph_node(swarm_id, pool):
+    """A pipeline stage end, with member swarms folded into their pool."""
+    if swarm_id:
+        pool = (SWARMS.get(str(swarm_id)) or {}).get("pool") or None
+    return ("pool", pool) if pool else ("swarm", str(swarm_id))
+
+
+def _normalize_pipeline(raw, origin="command"):
+    """
+    Validate a pipeline definition. Each stage is an edge from a source swarm
+    or pool to a target swarm or pool. Returns ``(pipeline, None)`` or
+    ``(None, reason)``.
+    """
+    if not isinstance(raw, dict):
+        return None, "pipeline must be an object"
+    pipeline_id = str(raw.get("pipeline_id") or "").strip() or str(uuid.uuid4())
+    raw_stages = raw.get("stages")
+    if not isinstance(raw_stages, list) or not raw_stages:
+        return None, "pipeline needs at least one stage"
+    stages = []
+    for index, raw_stage in enumerate(raw_stages):
+        if not isinstance(raw_stage, dict):
+            return None, f"stage {index} must be an object"
+        stage_id = str(raw_stage.get("stage_id") or index)
+        ends = {}
+        for end in ("source", "target"):
+            swarm_id = str(raw_stage.get(f"{end}_swarm_id") or "").strip() or None
+            pool = str(raw_stage.get(f"{end}_pool") or "").strip() or None
+            if bool(swarm_id) == bool(pool):
+                return None, f"stage {stage_id} needs exactly one of {end}_swarm_id or {end}_pool"
+            ends[end] = (swarm_id, pool)
+        if _pipeline_graph_node(*ends["source"]) == _pipeline_graph_node(*ends["target"]):
+            return None, f"stage {stage_id} feeds its own source"
+        match = raw_stage.get("match")
+        if match is not None:
+            try:
+                re.compile(str(match))
+            except re.error as e:
+                return None, f"stage {stage_id} has an invalid match pattern: {e}"
+        template = raw_stage.get("prompt_template")
+        if not _has_nonempty_text(template):
+            return None, f"stage {stage_id} needs a prompt_template"
+        max_in_flight = _to_int(raw_stage.get("max_in_flight"))
+        max_queued = _to_int(raw_stage.get("max_queued"))
+        stages.append({
+            "stage_id": stage_id,
+            "source_swarm_id": ends["source"][0],
+            "source_pool": ends["source"][1],
+            "target_swarm_id": ends["target"][0],
+            "target_pool": ends["target"][1],
+            "match": str(match) if match is not None else None,
+            "prompt_template": template,
+            "priority": _inter_swarm_priority(raw_stage.get("priority")),
+            "max_in_flight": max_in_flight if max_in_flight and max_in_flight > 0 else None,
+            "max_queued": max_queued if max_queued and max_queued > 0 else None,
+        })
+    if len({stage["stage_id"] for stage in stages}) != len(stages):
+        return None, "stage ids must be unique"
+
+    # An answer must never be able to feed back into its own source, also
+    # through the stages of other pipelines. A pool and its member swarms
+    # count as one node.
+    with SCHEDULER_LOCK:
+        others = [
+            stage
+            for other_id, other in PIPELINES.items()
+            if other_id != pipeline_id
+            for stage in other.get("stages") or []
+        ]
+        edges = defaultdict(set)
+        for stage in others + stages:
+            edges[_pipeline_graph_node(stage["source_swarm_id"], stage["source_pool"])].add(
+                _pipeline_graph_node(stage["target_swarm_id"], stage["target_pool"])
+            )
+
+    def _reaches(start, goal, seen):
+        for nxt in edges.get(start, ()):
+            if nxt == goal:
+                return True
+            if nxt not in seen:
+                seen.add(nxt)
+                if _reaches(nxt, goal, seen):
+                    return True
+        return False
+
+    if any(_reaches(start, start, set()) for start in list(edges)):
+        return None, "pipeline stages form a cycle"
+    return {
+        "pipeline_id": pipeline_id,
+        "origin": origin,
+        "stages": stages,
+        "created_at": time.time(),
+    }, None
+
+
+def _configure_pipelines(config):
+    router_cfg = config.get("router") if isinstance(config, dict) else {}
+    router_cfg = router_cfg if isinstance(router_cfg, dict) else {}
+    raw_pipelines = router_cfg.get("pipelines")
+    for raw in (raw_pipelines if isinstance(raw_pipelines, list) else []):
+        pipeline, error = _normalize_pipeline(raw, origin="config")
+        if error:
+            print(f"[router WARN] ignoring configured pipeline: {error}", file=sys.stderr, flush=True)
+            continue
+        PIPELINES[pipeline["pipeline_id"]] = pipeline
+
+
 def _bump_approvals_version():
     global APPROVALS_VERSION
     APPROVALS_VERSION += 1
@@ -1101,24 +1379,43 @@ def save_state():
                 projects_snapshot = copy.deepcopy(PROJECTS)
                 plans_snapshot = copy.deepcopy(PENDING_PROJECT_PLANS)
                 queue_snapshot = []
-                for target_swarm_id, q in INTER_SWARM_QUEUE.items():
+                for q in INTER_SWARM_QUEUE.values():
                     for item in q:
                         queue_snapshot.append({
                             "queue_id": item.get("queue_id"),
                             "request_id": item.get("request_id"),
                             "source_swarm_id": item.get("source_swarm_id"),
-                            "target_swarm_id": str(target_swarm_id),
+                            "target_swarm_id": item.get("target_swarm_id"),
+                            "target_pool": item.get("target_pool"),
                             "selector": item.get("selector"),
                             "nodes": item.get("nodes"),
                             "content": item.get("content"),
+                            "weight": item.get("weight"),
+                            "priority": item.get("priority"),
+                            "expires_at": item.get("expires_at"),
+                            "map_reduce_id": item.get("map_reduce_id"),
+                            "shard_id": item.get("shard_id"),
+                            "pipeline_id": item.get("pipeline_id"),
+                            "stage_id": item.get("stage_id"),
                             "created_at": item.get("created_at"),
                         })
+                dead_letters_snapshot = copy.deepcopy(list(INTER_SWARM_DEAD_LETTERS))
+                map_reduce_snapshot = copy.deepcopy(MAP_REDUCE_JOBS)
+                # Configured pipelines are reloaded from config on startup.
+                pipelines_snapshot = {
+                    pipeline_id: copy.deepcopy(pipeline)
+                    for pipeline_id, pipeline in PIPELINES.items()
+                    if pipeline.get("origin") == "command"
+                }
 
             data = {
                 "swarms": swarms_snapshot,
                 "projects": projects_snapshot,
                 "pending_project_plans": plans_snapshot,
                 "inter_swarm_queue": queue_snapshot,
+                "inter_swarm_dead_letters": dead_letters_snapshot,
+                "map_reduce_jobs": map_reduce_snapshot,
+                "pipelines": pipelines_snapshot,
             }
 
             state_file.parent.mkdir(parents=True, exist_ok=True)
@@ -1145,7 +1442,8 @@ def save_state():
 
 
 def load_state():
-    global SWARMS, INTER_SWARM_QUEUE, PROJECTS, PENDING_PROJECT_PLANS
+    global SWARMS, INTER_SWARM_QUEUE, INTER_SWARM_DEAD_LETTERS, PROJECTS, PENDING_PROJECT_PLANS
+    global MAP_REDUCE_JOBS, MAP_REDUCE_INJECTIONS
     try:
         state_file = _state_file_path()
         if state_file.exists():
@@ -1158,44 +1456,68 @@ def load_state():
                     if isinstance(data.get("pending_project_plans"), dict)
                     else {}
                 )
-                for project in PROJECTS.values():
-                    if not isinstance(project, dict):
-                        continue
-                    tasks = project.get("tasks")
-                    if not isinstance(tasks, dict):
-                        continue
-                    for task in tasks.values():
-                        if not isinstance(task, dict):
-                            continue
-                        if task.get("status") == "assigned":
-                            task["status"] = "pending"
-                            task["assigned_swarm_id"] = None
-                            task["assigned_node_id"] = None
-                            task["assignment_injection_id"] = None
-                            task["updated_at"] = time.time()
+                # Assigned tasks keep their assignment here; once providers have
+                # been reconciled, _recover_project_assignments rebinds the ones
+                # whose node is still running and resets the rest.
                 restored_queue = defaultdict(deque)
+                PIPELINE_QUEUED.clear()
                 for item in data.get("inter_swarm_queue", []):
                     if not isinstance(item, dict):
                         continue
                     target_swarm_id = item.get("target_swarm_id")
-                    if not target_swarm_id:
+                    target_pool = item.get("target_pool")
+                    if not target_swarm_id and not target_pool:
                         continue
-                    restored_queue[str(target_swarm_id)].append({
+                    restored_item = {
                         "queue_id": item.get("queue_id"),
                         "request_id": item.get("request_id"),
                         "source_swarm_id": item.get("source_swarm_id"),
-                        "target_swarm_id": str(target_swarm_id),
+                        "target_swarm_id": None if target_pool else str(target_swarm_id),
+                        "target_pool": target_pool,
                         "selector": item.get("selector") or "idle",
                         "nodes": item.get("nodes"),
                         "content": item.get("content"),
+                        "weight": item.get("weight"),
+                        "priority": _inter_swarm_priority(item.get("priority")),
+                        "expires_at": item.get("expires_at"),
+                        "map_reduce_id": item.get("map_reduce_id"),
+                        "shard_id": item.get("shard_id"),
+                        "pipeline_id": item.get("pipeline_id"),
+                        "stage_id": item.get("stage_id"),
                         "created_at": item.get("created_at"),
-                    })
+                    }
+                    _insert_inter_swarm_item(restored_queue[_inter_swarm_queue_key(restored_item)], restored_item)
                 INTER_SWARM_QUEUE = restored_queue
+                dead_letters = data.get("inter_swarm_dead_letters")
+                INTER_SWARM_DEAD_LETTERS = deque(
+                    [item for item in (dead_letters if isinstance(dead_letters, list) else []) if isinstance(item, dict)][
+                        -INTER_SWARM_DEAD_LETTER_LIMIT:
+                    ]
+                )
+                jobs = data.get("map_reduce_jobs")
+                MAP_REDUCE_JOBS = jobs if isinstance(jobs, dict) else {}
+                # Running shards keep their injection so answers that arrive
+                # after the restart are still recorded.
+                MAP_REDUCE_INJECTIONS = {}
+                for map_reduce_id, job in MAP_REDUCE_JOBS.items():
+                    if job.get("status") == "reducing" and job.get("reduce_injection_id"):
+                        MAP_REDUCE_INJECTIONS[str(job["reduce_injection_id"])] = (map_reduce_id, None)
+                    for shard_id, shard in (job.get("shards") or {}).items():
+                        if job.get("status") == "mapping" and shard.get("status") == "running":
+                            MAP_REDUCE_INJECTIONS[str(shard.get("injection_id"))] = (map_reduce_id, shard_id)
+                pipelines = data.get("pipelines")
+                for pipeline_id, pipeline in (pipelines.items() if isinstance(pipelines, dict) else []):
+                    if isinstance(pipeline, dict):
+                        PIPELINES.setdefault(str(pipeline_id), pipeline)
     except Exception:
         SWARMS = {}
         PROJECTS = {}
         PENDING_PROJECT_PLANS = {}
         INTER_SWARM_QUEUE = defaultdict(deque)
+        PIPELINE_QUEUED.clear()
+        INTER_SWARM_DEAD_LETTERS = deque()
+        MAP_REDUCE_JOBS = {}
+        MAP_REDUCE_INJECTIONS = {}
 
 
 def write_pid_file():
@@ -1336,6 +1658,9 @@ def reconcile(providers, config=None):
                 key = _node_key(swarm_id, node_id)
                 NODE_THREAD_ACTIVE.pop(key, None)
                 NODE_OUTSTANDING.pop(key, None)
+                NODE_LAST_SEEN.pop(key, None)
+                NODE_DOWN.pop(key, None)
+                NODE_RECOVERING.discard(key)
 
             stale_final_keys = [
                 key for key in FINAL_ANSWER_SEEN
@@ -1345,6 +1670,8 @@ def reconcile(providers, config=None):
                 FINAL_ANSWER_SEEN.discard(key)
 
             dropped = list(INTER_SWARM_QUEUE.pop(str(swarm_id), []))
+            for item in dropped:
+                _note_pipeline_queued(item, -1)
 
         for item in dropped:
             emit_event("inter_swarm_dropped", {
@@ -1378,6 +1705,147 @@ def reconcile(providers, config=None):
     save_state()
 
 
+def _project_assignment_node_alive(swarm_id, node_id):
+    swarm = SWARMS.get(str(swarm_id or "").strip())
+    if not isinstance(swarm, dict) or swarm.get("status") in ("terminating", "terminated"):
+        return False
+    if JOB_TO_SWARM.get(str(swarm.get("job_id"))) != str(swarm_id):
+        return False
+    node = _to_int(node_id)
+    return node is not None and 0 <= node < int(swarm.get("node_count") or 0)
+
+
+def _replay_recovered_outbox_event(event):
+    translated = translate_event(event)
+    if not translated:
+        return False
+    event_name, data = translated
+    swarm_id = data.get("swarm_id")
+    node_id = data.get("node_id")
+    injection_id = data.get("injection_id")
+    if event_name == "turn_complete":
+        _mark_outstanding(swarm_id, node_id, -1)
+        return False
+    if event_name == "task_complete":
+        _mark_outstanding(swarm_id, node_id, -1)
+        project_id, task_id = _find_project_and_task_by_injection(injection_id)
+        if not (project_id and task_id):
+            return False
+        _record_project_task_result(project_id, task_id, data)
+        return True
+    if event_name == "assistant" and bool(data.get("final_answer")):
+        final_key = (
+            str(swarm_id),
+            int(node_id if isinstance(node_id, int) else -1),
+            str(injection_id or ""),
+        )
+        with SCHEDULER_LOCK:
+            if final_key in FINAL_ANSWER_SEEN:
+                return False
+            FINAL_ANSWER_SEEN.add(final_key)
+        project_id, task_id = _find_project_and_task_by_injection(injection_id)
+        if not (project_id and task_id):
+            return False
+        _record_project_task_result(project_id, task_id, {
+            "last_agent_message": data.get("content"),
+            "injection_id": injection_id,
+        })
+        return True
+    return False
+
+
+def _recover_project_assignments():
+    """
+    Rebind project tasks that were assigned when the router stopped. Tasks
+    whose node is still running keep their assignment and count as that
+    node's outstanding work, and the node's outbox is replayed for their
+    injections so results written while the router was down are recorded.
+    Tasks whose swarm or node is gone are reset to pending.
+    """
+    summary = {"rebound": 0, "reset": 0, "replayed": 0}
+    replay_targets = {}
+    node_attempts = defaultdict(int)
+    now = time.time()
+    with SCHEDULER_LOCK:
+        for project_id, project in PROJECTS.items():
+            if not isinstance(project, dict):
+                continue
+            reset_any = False
+            for task_id, task in (project.get("tasks") or {}).items():
+                if not isinstance(task, dict) or task.get("status") != "assigned":
+                    continue
+                attempts = [(task.get("assigned_swarm_id"), task.get("assigned_node_id"), task.get("assignment_injection_id"))]
+                hedge = task.get("hedge")
+                if isinstance(hedge, dict):
+                    attempts.append((hedge.get("swarm_id"), hedge.get("node_id"), hedge.get("injection_id")))
+                live_attempts = [
+                    (str(swarm_id), int(node_id), str(injection_id))
+                    for swarm_id, node_id, injection_id in attempts
+                    if injection_id and _project_assignment_node_alive(swarm_id, node_id)
+                ]
+                # Nodes still working on an attempt stay busy even when the
+                # task itself is reset, so they are not handed more work.
+                for swarm_id, node_id, _ in live_attempts:
+                    node_attempts[_node_key(swarm_id, node_id)] += 1
+                primary_alive = bool(live_attempts) and live_attempts[0][2] == str(attempts[0][2])
+                if not primary_alive:
+                    task["status"] = "pending"
+                    task["assigned_swarm_id"] = None
+                    task["assigned_node_id"] = None
+                    task["assignment_injection_id"] = None
+                    task["active_attempt_usage"] = None
+                    task["hedge"] = None
+                    task["prefetched"] = False
+                    task["last_resume_reason"] = "Assigned node unavailable after router restart"
+                    task["updated_at"] = now
+                    if _task_is_integration(task):
+                        _reset_project_integration_result(project)
+                    summary["reset"] += 1
+                    reset_any = True
+                    continue
+                if isinstance(hedge, dict) and len(live_attempts) < 2:
+                    task["hedge"] = None
+                if task.get("prefetched"):
+                    PROJECT_PREFETCHED_INJECTIONS[live_attempts[0][2]] = (
+                        str(project_id),
+                        str(task_id),
+                        _node_key(live_attempts[0][0], live_attempts[0][1]),
+                    )
+                for swarm_id, node_id, injection_id in live_attempts:
+                    replay_targets.setdefault((swarm_id, node_id), []).append(injection_id)
+                summary["rebound"] += 1
+            if reset_any:
+                _refresh_project_status(project)
+        for key, attempts in node_attempts.items():
+            NODE_OUTSTANDING[key] = max(attempts, int(NODE_OUTSTANDING.get(key, 0)))
+
+    for (swarm_id, node_id), injection_ids in replay_targets.items():
+        swarm = SWARMS.get(swarm_id) or {}
+        provider = _provider_for_swarm(swarm_id)
+        if provider is None:
+            continue
+        try:
+            events = provider.read_outbox_events(str(swarm.get("job_id")), node_id, injection_ids)
+        except Exception as e:
+            print(
+                f"[router WARN] outbox replay failed for swarm {swarm_id} node {node_id}: {e}",
+                file=sys.stderr,
+                flush=True,
+            )
+            continue
+        for event in events or []:
+            if isinstance(event, dict) and _replay_recovered_outbox_event(event):
+                summary["replayed"] += 1
+
+    if summary["rebound"] or summary["reset"]:
+        startup_log(
+            f"recovered in-flight project tasks: {summary['rebound']} rebound, "
+            f"{summary['replayed']} result(s) replayed, {summary['reset']} reset"
+        )
+        save_state()
+    return summary
+
+
 def now_iso():
     return datetime.now(timezone.utc).isoformat()
 
@@ -1918,21 +2386,329 @@ def approval_trace(stage, **fields):
 def _queue_snapshot():
     with SCHEDULER_LOCK:
         items = []
-        for target_swarm_id, q in INTER_SWARM_QUEUE.items():
+        for q in INTER_SWARM_QUEUE.values():
             for item in q:
                 items.append({
                     "queue_id": item.get("queue_id"),
                     "request_id": item.get("request_id"),
                     "source_swarm_id": item.get("source_swarm_id"),
-                    "target_swarm_id": target_swarm_id,
+                    "target_swarm_id": item.get("target_swarm_id"),
+                    "target_pool": item.get("target_pool"),
                     "selector": item.get("selector"),
                     "nodes": item.get("nodes"),
                     "content": item.get("content"),
+                    "weight": item.get("weight"),
+                    "priority": item.get("priority"),
+                    "expires_at": item.get("expires_at"),
+                    "map_reduce_id": item.get("map_reduce_id"),
+                    "shard_id": item.get("shard_id"),
+                    "pipeline_id": item.get("pipeline_id"),
+                    "stage_id": item.get("stage_id"),
                     "created_at": item.get("created_at"),
                 })
         return items
 
 
+def _dead_letter_snapshot():
+    with SCHEDULER_LOCK:
+        return [dict(item) for item in INTER_SWARM_DEAD_LETTERS]
+
+
+def _inter_swarm_wait_stats_snapshot(now=None):
+    """
+    Per priority class: items still queued and the oldest one's wait, plus
+    dispatch wait totals and expiries since the router started.
+    """
+    now = time.time() if now is None else now
+    with SCHEDULER_LOCK:
+        stats = {}
+        for priority in INTER_SWARM_PRIORITY_CLASSES:
+            recorded = INTER_SWARM_WAIT_STATS.get(priority) or {}
+            dispatched = int(recorded.get("dispatched") or 0)
+            stats[priority] = {
+                "queued": 0,
+                "oldest_wait_seconds": None,
+                "dispatched": dispatched,
+                "expired": int(recorded.get("expired") or 0),
+                "mean_wait_seconds": (
+                    round(float(recorded.get("total_wait_seconds") or 0.0) / dispatched, 3) if dispatched else None
+                ),
+                "max_wait_seconds": recorded.get("max_wait_seconds"),
+            }
+        for q in INTER_SWARM_QUEUE.values():
+            for item in q:
+                entry = stats[_inter_swarm_priority(item.get("priority"))]
+                entry["queued"] += 1
+                waited = round(max(0.0, now - float(item.get("created_at") or now)), 3)
+                if entry["oldest_wait_seconds"] is None or waited > entry["oldest_wait_seconds"]:
+                    entry["oldest_wait_seconds"] = waited
+        return stats
+
+
+def _inter_swarm_priority(value):
+    priority = str(value or "").strip().lower()
+    return priority if priority in INTER_SWARM_PRIORITY_CLASSES else INTER_SWARM_DEFAULT_PRIORITY
+
+
+def _insert_inter_swarm_item(queue_for_target, item, front=False):
+    """
+    Insert item into a target queue kept ordered by priority class, stable
+    within a class: after its class, or at the head of its class when front
+    (requeued work that already had its turn). Call with SCHEDULER_LOCK held.
+    """
+    rank = INTER_SWARM_PRIORITY_CLASSES.index(_inter_swarm_priority(item.get("priority")))
+    index = len(queue_for_target)
+    # Scan from the tail: most items land in the lowest class present.
+    while index > 0:
+        other = INTER_SWARM_PRIORITY_CLASSES.index(_inter_swarm_priority(queue_for_target[index - 1].get("priority")))
+        if other < rank or (other == rank and not front):
+            break
+        index -= 1
+    queue_for_target.insert(index, item)
+    _note_pipeline_queued(item, 1)
+
+
+def _note_pipeline_queued(item, delta):
+    """Call with SCHEDULER_LOCK held."""
+    if not item.get("pipeline_id"):
+        return
+    key = (item["pipeline_id"], item.get("stage_id"))
+    PIPELINE_QUEUED[key] += delta
+    if PIPELINE_QUEUED[key] <= 0:
+        PIPELINE_QUEUED.pop(key, None)
+
+
+def _record_inter_swarm_wait(item, now, expired=False):
+    """Call with SCHEDULER_LOCK held."""
+    entry = INTER_SWARM_WAIT_STATS.setdefault(_inter_swarm_priority(item.get("priority")), {
+        "dispatched": 0,
+        "expired": 0,
+        "total_wait_seconds": 0.0,
+        "max_wait_seconds": None,
+    })
+    if expired:
+        entry["expired"] += 1
+        return
+    waited = round(max(0.0, now - float(item.get("created_at") or now)), 3)
+    entry["dispatched"] += 1
+    entry["total_wait_seconds"] += waited
+    if entry["max_wait_seconds"] is None or waited > entry["max_wait_seconds"]:
+        entry["max_wait_seconds"] = waited
+
+
+def _expire_inter_swarm_items(now=None):
+    """
+    Move queued items whose deadline has passed to the dead-letter list.
+    Returns the number expired.
+    """
+    now = time.time() if now is None else now
+    expired = []
+    with SCHEDULER_LOCK:
+        for queue_key, q in list(INTER_SWARM_QUEUE.items()):
+            for item in [item for item in q if item.get("expires_at") is not None]:
+                if float(item["expires_at"]) > now:
+                    continue
+                _remove_inter_swarm_item(queue_key, item)
+                _record_inter_swarm_wait(item, now, expired=True)
+                dead_letter = {
+                    "queue_id": item.get("queue_id"),
+                    "request_id": item.get("request_id"),
+                    "source_swarm_id": item.get("source_swarm_id"),
+                    "target_swarm_id": item.get("target_swarm_id"),
+                    "target_pool": item.get("target_pool"),
+                    "selector": item.get("selector"),
+                    "nodes": item.get("nodes"),
+                    "content": item.get("content"),
+                    "weight": item.get("weight"),
+                    "priority": item.get("priority"),
+                    "expires_at": item.get("expires_at"),
+                    "created_at": item.get("created_at"),
+                    "dead_lettered_at": now,
+                    "reason": "expired",
+                }
+                INTER_SWARM_DEAD_LETTERS.append(dead_letter)
+                while len(INTER_SWARM_DEAD_LETTERS) > INTER_SWARM_DEAD_LETTER_LIMIT:
+                    INTER_SWARM_DEAD_LETTERS.popleft()
+                expired.append(dead_letter)
+    if not expired:
+        return 0
+    for dead_letter in expired:
+        emit_event("inter_swarm_expired", {
+            "queue_id": dead_letter["queue_id"],
+            "request_id": dead_letter["request_id"],
+            "source_swarm_id": dead_letter["source_swarm_id"],
+            "target_swarm_id": dead_letter["target_swarm_id"],
+            "target_pool": dead_letter["target_pool"],
+            "priority": dead_letter["priority"],
+            "waited_seconds": round(max(0.0, now - float(dead_letter["created_at"] or now)), 3),
+        })
+    _emit_queue_updated()
+    save_state()
+    return len(expired)
+
+
+def _fair_share_weight(value, default=1.0):
+    try:
+        weight = float(value)
+    except (TypeError, ValueError):
+        return default
+    return weight if weight > 0 else default
+
+
+def _fair_share_pick(scope, candidates):
+    """
+    Weighted fair queuing (stride scheduling) across candidates, a list of
+    ``(key, weight)`` in tie-break order. Returns the key with the lowest
+    virtual pass. Keys rejoining after idling start at the scope's clock so
+    they cannot bank credit. Call with SCHEDULER_LOCK held.
+    """
+    clock = FAIR_SHARE_PASSES.get((scope, None), 0.0)
+    best = None
+    for index, (key, _weight) in enumerate(candidates):
+        pass_value = max(FAIR_SHARE_PASSES.get((scope, key), clock), clock)
+        FAIR_SHARE_PASSES[(scope, key)] = pass_value
+        if best is None or (pass_value, index) < best[0]:
+            best = ((pass_value, index), key)
+    return best[1] if best else None
+
+
+def _fair_share_charge(scope, key, weight):
+    """Charge one dispatch to key. Call with SCHEDULER_LOCK held."""
+    pass_value = FAIR_SHARE_PASSES.get((scope, key), FAIR_SHARE_PASSES.get((scope, None), 0.0))
+    FAIR_SHARE_PASSES[(scope, None)] = max(FAIR_SHARE_PASSES.get((scope, None), 0.0), pass_value)
+    FAIR_SHARE_PASSES[(scope, key)] = pass_value + 1.0 / _fair_share_weight(weight)
+
+
+def _next_inter_swarm_item(target_swarm_id, queue_for_target):
+    """
+    Pick the next queued item for a target: the highest priority class
+    present, FIFO within each source swarm, weighted fair share across
+    sources. Items of a pipeline stage at its max_in_flight are skipped, as
+    are items past their deadline that the expiry tick has not yet moved to
+    the dead letters. Returns None when nothing is eligible. Call with
+    SCHEDULER_LOCK held.
+    """
+    heads = {}
+    top_priority = None
+    in_flight = None
+    now = time.time()
+    for item in queue_for_target:
+        if item.get("expires_at") is not None and float(item["expires_at"]) <= now:
+            continue
+        if item.get("pipeline_id"):
+            if in_flight is None:
+                in_flight = _pipeline_in_flight()
+            if _pipeline_stage_at_limit(item, in_flight):
+                continue
+        priority = _inter_swarm_priority(item.get("priority"))
+        if top_priority is None:
+            top_priority = priority
+        elif priority != top_priority:
+            break
+        source = str(item.get("source_swarm_id") or "")
+        if source not in heads:
+            heads[source] = item
+    if not heads:
+        return None
+    if len(heads) == 1:
+        return next(iter(heads.values()))
+    source = _fair_share_pick(
+        ("queue", str(target_swarm_id)),
+        [(source, _fair_share_weight(item.get("weight"))) for source, item in heads.items()],
+    )
+    return heads[source]
+
+
+def _remove_inter_swarm_item(target_swarm_id, item, dispatched=False):
+    """Remove item from its target queue. Call with SCHEDULER_LOCK held."""
+    queue_for_target = INTER_SWARM_QUEUE.get(target_swarm_id)
+    if queue_for_target is not None:
+        try:
+            queue_for_target.remove(item)
+            _note_pipeline_queued(item, -1)
+        except ValueError:
+            pass
+        if not queue_for_target:
+            INTER_SWARM_QUEUE.pop(target_swarm_id, None)
+    if dispatched:
+        _record_inter_swarm_wait(item, time.time())
+        _fair_share_charge(
+            ("queue", str(target_swarm_id)),
+            str(item.get("source_swarm_id") or ""),
+            _fair_share_weight(item.get("weight")),
+        )
+
+
+def _inter_swarm_queue_key(item):
+    """Items for a pool share one queue; the member is chosen at dispatch."""
+    pool = item.get("target_pool")
+    return f"{SWARM_POOL_QUEUE_PREFIX}{pool}" if pool else str(item.get("target_swarm_id"))
+
+
+def _swarm_pool_members(pool):
+    return [
+        str(swarm_id)
+        for swarm_id, swarm in SWARMS.items()
+        if swarm.get("pool") == pool and swarm.get("status") not in ("terminating", "terminated")
+    ]
+
+
+def _pick_pool_target(pool):
+    """
+    Choose the pool member for the next item: among members with an idle
+    node that are not held back by pipeline backpressure, the one with the
+    least outstanding work plus directly queued items per node. Returns
+    ``(swarm_id, node_id)``, or ``(None, None)`` when every member is busy.
+    """
+    best = None
+    for swarm_id in _swarm_pool_members(pool):
+        if PIPELINES and _pipeline_backpressured(swarm_id):
+            continue
+        node_id = _first_idle_node_id(swarm_id)
+        if node_id is None:
+            continue
+        node_count = max(1, int(SWARMS[swarm_id].get("node_count") or 0))
+        with SCHEDULER_LOCK:
+            outstanding = sum(int(NODE_OUTSTANDING.get(_node_key(swarm_id, n), 0)) for n in range(node_count))
+            queued = len(INTER_SWARM_QUEUE.get(swarm_id) or ())
+        load = (outstanding + queued) / node_count
+        if best is None or load < best[0]:
+            best = (load, swarm_id, node_id)
+    if best is None:
+        return None, None
+    return best[1], best[2]
+
+
+def _inter_swarm_target_error(target_swarm_id, target_pool):
+    """Why a swarm or pool cannot take queued work, or None."""
+    if target_pool:
+        pool_is_scalable = any(group.get("pool") == target_pool for group in AUTOSCALE_GROUPS.values())
+        if not _swarm_pool_members(target_pool) and not pool_is_scalable:
+            return "unknown target_pool"
+        return None
+    target_swarm = SWARMS.get(str(target_swarm_id))
+    if not target_swarm:
+        return "unknown target_swarm_id"
+    if target_swarm.get("status") in ("terminating", "terminated"):
+        return "target swarm is terminating or terminated"
+    return None
+
+
+def _swarm_pools_snapshot():
+    pools = {}
+    for swarm_id, swarm in SWARMS.items():
+        pool = swarm.get("pool")
+        if pool and swarm.get("status") not in ("terminating", "terminated"):
+            pools.setdefault(pool, {"members": [], "queued": 0})["members"].append(str(swarm_id))
+    for group in AUTOSCALE_GROUPS.values():
+        if group.get("pool"):
+            pools.setdefault(group["pool"], {"members": [], "queued": 0})
+    with SCHEDULER_LOCK:
+        for pool, entry in pools.items():
+            entry["queued"] = len(INTER_SWARM_QUEUE.get(f"{SWARM_POOL_QUEUE_PREFIX}{pool}") or ())
+    return pools
+
+
 def _emit_queue_updated():
     emit_event("queue_updated", {
         "items": _queue_snapshot()
@@ -2070,11 +2846,174 @@ def _ensure_github_repo(name_with_owner, create_if_missing=False, visibility="pr
     return metadata
 
 
+def _normalize_remote_url(url):
+    """
+    Canonical key for an upstream so that ssh/https spellings of the same
+    repository share one mirror.
+    """
+    text = str(url or "").strip()
+    if not text:
+        return ""
+    local_path = Path(text).expanduser()
+    if "://" not in text and (local_path.is_absolute() or local_path.exists()):
+        return str(local_path.resolve())
+    github = _parse_github_repo_ref(text)
+    if github:
+        return f"github.com/{github.lower()}"
+    match = re.match(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*://)?(?:[^@/]+@)?([^/:]+)(?::\d+)?[:/](.*)$", text)
+    if not match:
+        return text
+    path = match.group(2).strip("/")
+    if path.endswith(".git"):
+        path = path[:-4]
+    return f"{match.group(1).lower()}/{path}"
+
+
+def _project_repo_mirror_dir(clone_source):
+    digest = hashlib.sha1(_normalize_remote_url(clone_source).encode("utf-8")).hexdigest()[:16]
+    return _project_repo_mirror_root() / f"{digest}.git"
+
+
+def _ensure_project_repo_mirror(clone_source):
+    """
+    Return a bare mirror of clone_source, cloning it on first use and
+    fetching incrementally once it is older than the freshness TTL.
+    """
+    source = str(clone_source or "").strip()
+    mirror = _project_repo_mirror_dir(source)
+    with PROJECT_REPO_MIRROR_LOCKS[str(mirror)]:
+        stamp = mirror / "codeswarm-fetched-at"
+        if not (mirror / "HEAD").exists():
+            _remove_path(mirror)
+            mirror.parent.mkdir(parents=True, exist_ok=True)
+            result = subprocess.run(
+                ["git", "clone", "--mirror", source, str(mirror)],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=False,
+            )
+            if result.returncode != 0:
+                _remove_path(mirror)
+                detail = result.stderr.strip() or result.stdout.strip() or f"clone failed for {source}"
+                raise RuntimeError(detail)
+            stamp.write_text(str(time.time()), encoding="utf-8")
+        else:
+            try:
+                fetched_at = float(stamp.read_text(encoding="utf-8").strip())
+            except Exception:
+                fetched_at = 0.0
+            if time.time() - fetched_at >= PROJECT_REPO_MIRROR_TTL_SECONDS:
+                _run_git(mirror, ["remote", "set-url", "origin", source])
+                fetch = _run_git(mirror, ["fetch", "--prune", "origin"])
+                if fetch.returncode != 0:
+                    detail = fetch.stderr.strip() or fetch.stdout.strip() or "git fetch failed"
+                    raise RuntimeError(f"Failed to update repository mirror: {detail}")
+                stamp.write_text(str(time.time()), encoding="utf-8")
+        (mirror / "codeswarm-last-used").touch()
+    _evict_project_repo_mirrors(keep=mirror)
+    return mirror
+
+
+def _acquire_project_repo_mirror(clone_source):
+    """
+    Return the mirror for clone_source and pin it against eviction until
+    _release_project_repo_mirror. Pin before ensuring, so eviction cannot
+    drop the mirror between its refresh and the caller's clone.
+    """
+    mirror = _project_repo_mirror_dir(str(clone_source or "").strip())
+    with PROJECT_REPO_MIRROR_LOCKS[str(mirror)]:
+        PROJECT_REPO_MIRROR_USERS[str(mirror)] += 1
+    try:
+        return _ensure_project_repo_mirror(clone_source)
+    except Exception:
+        _release_project_repo_mirror(mirror)
+        raise
+
+
+def _release_project_repo_mirror(mirror):
+    with PROJECT_REPO_MIRROR_LOCKS[str(mirror)]:
+        PROJECT_REPO_MIRROR_USERS[str(mirror)] -= 1
+        if PROJECT_REPO_MIRROR_USERS[str(mirror)] <= 0:
+            PROJECT_REPO_MIRROR_USERS.pop(str(mirror), None)
+
+
+def _mark_project_repo_mirror_stale(clone_source):
+    mirror = _project_repo_mirror_dir(clone_source)
+    with PROJECT_REPO_MIRROR_LOCKS[str(mirror)]:
+        if (mirror / "HEAD").exists():
+            (mirror / "codeswarm-fetched-at").write_text("0", encoding="utf-8")
+
+
+def _dir_size_bytes(path: Path):
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def _evict_project_repo_mirrors(keep=None):
+    """
+    Drop least recently used mirrors until the cache fits the disk budget.
+    Checkouts are standalone clones, so evicting a mirror only costs a
+    re-clone on next use. Mirrors pinned by a running clone or fetch are
+    skipped.
+    """
+    budget = PROJECT_REPO_MIRROR_BUDGET_BYTES
+    root = _project_repo_mirror_root()
+    if budget <= 0 or not root.exists():
+        return []
+    evicted = []
+    with PROJECT_REPO_MIRROR_EVICTION_LOCK:
+        entries = []
+        for path in root.glob("*.git"):
+            marker = path / "codeswarm-last-used"
+            try:
+                last_used = marker.stat().st_mtime if marker.exists() else path.stat().st_mtime
+            except OSError:
+                continue
+            entries.append((last_used, path, _dir_size_bytes(path)))
+        total = sum(size for _last_used, _path, size in entries)
+        for _last_used, path, size in sorted(entries, key=lambda item: item[0]):
+            if total <= budget:
+                break
+            if keep is not None and str(path) == str(keep):
+                continue
+            lock = PROJECT_REPO_MIRROR_LOCKS[str(path)]
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                if PROJECT_REPO_MIRROR_USERS.get(str(path)):
+                    continue
+                _remove_path(path)
+            finally:
+                lock.release()
+            total -= size
+            evicted.append(str(path))
+    return evicted
+
+
+def _fetch_from_project_repo_mirror(repo_dir: Path, mirror: Path):
+    return _run_git(repo_dir, ["fetch", "--prune", str(mirror), "+refs/heads/*:refs/remotes/origin/*"])
+
+
 def _sync_project_control_clone(clone_source, target: Path):
     target = target.resolve()
     desired_origin = str(clone_source or "").strip()
     if not desired_origin:
         raise RuntimeError("Repository clone source is required")
+    mirror = _acquire_project_repo_mirror(desired_origin)
+    try:
+        _sync_clone_from_project_repo_mirror(desired_origin, mirror, target)
+    finally:
+        _release_project_repo_mirror(mirror)
+
+
+def _sync_clone_from_project_repo_mirror(desired_origin, mirror: Path, target: Path):
     if target.exists():
         if not (target / ".git").exists():
             _remove_path(target)
@@ -2084,8 +3023,10 @@ def _sync_project_control_clone(clone_source, target: Path):
                 _remove_path(target)
     if not target.exists():
         target.parent.mkdir(parents=True, exist_ok=True)
+        # A local clone hardlinks the mirror's objects, yet stays a standalone
+        # repository that providers can copy to remote hosts.
         result = subprocess.run(
-            ["git", "clone", desired_origin, str(target)],
+            ["git", "clone", str(mirror), str(target)],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
@@ -2094,6 +3035,7 @@ def _sync_project_control_clone(clone_source, target: Path):
         if result.returncode != 0:
             detail = result.stderr.strip() or result.stdout.strip() or f"clone failed for {desired_origin}"
             raise RuntimeError(detail)
+        _run_git(target, ["remote", "set-url", "origin", desired_origin])
         return
     subprocess.run(
         ["git", "-C", str(target), "remote", "set-url", "origin", desired_origin],
@@ -2102,13 +3044,7 @@ def _sync_project_control_clone(clone_source, target: Path):
         text=True,
         check=False,
     )
-    fetch = subprocess.run(
-        ["git", "-C", str(target), "fetch", "origin", "--prune"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        check=False,
-    )
+    fetch = _fetch_from_project_repo_mirror(target, mirror)
     if fetch.returncode != 0:
         detail = fetch.stderr.strip() or fetch.stdout.strip() or "git fetch failed"
         raise RuntimeError(f"Failed to update cached repository clone: {detail}")
@@ -2192,23 +3128,192 @@ def _refresh_project_repo_for_resume(project):
         return repo_dir
     origin_url = _git_origin_remote_url(repo_dir)
     if origin_url:
-        fetch = _run_git(repo_dir, ["fetch", "origin", "--prune"])
-        if fetch.returncode != 0:
+        mirror = _acquire_project_repo_mirror(origin_url)
+        try:
+            fetch = _fetch_from_project_repo_mirror(repo_dir, mirror)
+        finally:
+            _release_project_repo_mirror(mirror)
+        if fetch.returncode != 0:
             detail = fetch.stderr.strip() or fetch.stdout.strip() or "git fetch failed"
             raise RuntimeError(f"Failed to refresh project repository: {detail}")
     return repo_dir
 
 
+class _GitRevisionHelper:
+    """
+    Long-lived ``git cat-file --batch-check`` process for one repository.
+
+    Each query is one line on an open pipe instead of a ``git rev-parse``
+    subprocess. The process is respawned whenever the repository's refs change,
+    so it never answers from a stale ref or pack view.
+    """
+
+    def __init__(self, repo_dir: Path):
+        self.repo_dir = Path(repo_dir)
+        self.lock = threading.Lock()
+        self.process = None
+        self.signature = None
+
+    def _spawn(self):
+        self.process = subprocess.Popen(
+            ["git", "-C", str(self.repo_dir), "cat-file", "--batch-check=%(objectname) %(objecttype)"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+
+    def close(self):
+        process = self.process
+        self.process = None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except Exception:
+            pass
+        try:
+            process.wait(timeout=2)
+        except Exception:
+            process.kill()
+
+    def _query(self, rev):
+        if self.process is None or self.process.poll() is not None:
+            self._spawn()
+        self.process.stdin.write(rev + "\n")
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("git cat-file exited")
+        return line.strip()
+
+    def resolve(self, rev, signature):
+        """Return ``(object_id, object_type)`` for rev, or ``(None, None)``."""
+        with self.lock:
+            if signature != self.signature:
+                self.close()
+                self.signature = signature
+            try:
+                line = self._query(rev)
+            except (OSError, RuntimeError, ValueError):
+                self.close()
+                line = self._query(rev)
+        parts = line.split()
+        if len(parts) != 2 or parts[1] in ("missing", "ambiguous"):
+            return None, None
+        return parts[0], parts[1]
+
+
+def _git_repo_key(repo_dir: Path):
+    return str(Path(repo_dir).resolve())
+
+
+def _git_revision_helper(repo_dir: Path):
+    key = _git_repo_key(repo_dir)
+    with GIT_REVISION_HELPERS_LOCK:
+        helper = GIT_REVISION_HELPERS.get(key)
+        if helper is None:
+            helper = _GitRevisionHelper(Path(key))
+            GIT_REVISION_HELPERS[key] = helper
+        return helper
+
+
+def close_git_revision_helpers():
+    with GIT_REVISION_HELPERS_LOCK:
+        helpers = list(GIT_REVISION_HELPERS.values())
+        GIT_REVISION_HELPERS.clear()
+    for helper in helpers:
+        with helper.lock:
+            helper.close()
+
+
+def _git_ref_signature(repo_dir: Path):
+    """
+    Fingerprint the ref tips of repo_dir from ref storage metadata. Ref
+    updates rewrite HEAD, packed-refs or a loose ref file, so any change to a
+    tip changes the signature without spawning git.
+    """
+    dot_git = Path(repo_dir) / ".git"
+    git_dirs = [dot_git]
+    if dot_git.is_file():
+        # Linked worktree: HEAD is private, refs live in the common dir.
+        text = dot_git.read_text(encoding="utf-8", errors="replace").strip()
+        if text.startswith("gitdir:"):
+            worktree_dir = (Path(repo_dir) / text[len("gitdir:"):].strip()).resolve()
+            git_dirs = [worktree_dir]
+            common = worktree_dir / "commondir"
+            if common.is_file():
+                git_dirs.append((worktree_dir / common.read_text(encoding="utf-8").strip()).resolve())
+    digest = hashlib.sha1()
+    for git_dir in git_dirs:
+        paths = [git_dir / "HEAD", git_dir / "packed-refs"]
+        for dirpath, dirnames, filenames in os.walk(git_dir / "refs"):
+            dirnames.sort()
+            paths.extend(Path(dirpath) / name for name in sorted(filenames))
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                digest.update(f"{path}:-\n".encode("utf-8"))
+                continue
+            digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _git_memo_put(memo, key, value):
+    with GIT_MEMO_LOCK:
+        if len(memo) >= GIT_MEMO_MAX_ENTRIES:
+            memo.clear()
+        memo[key] = value
+
+
+def _git_lookup_object(repo_dir: Path, rev, signature=None):
+    """
+    Resolve rev through the repository's batch helper, memoized by ref tips so
+    a resume preview followed by the resume itself reuses every lookup.
+    """
+    repo_key = _git_repo_key(repo_dir)
+    if signature is None:
+        signature = _git_ref_signature(repo_dir)
+    memo_key = (repo_key, signature, rev)
+    with GIT_MEMO_LOCK:
+        if memo_key in GIT_REVISION_MEMO:
+            return GIT_REVISION_MEMO[memo_key]
+    try:
+        result = _git_revision_helper(repo_dir).resolve(rev, signature)
+    except (OSError, RuntimeError, ValueError):
+        completed = _run_git(repo_dir, ["rev-parse", "--verify", "--quiet", rev])
+        value = str(completed.stdout or "").strip() if completed.returncode == 0 else ""
+        return (value, None) if value else (None, None)
+    _git_memo_put(GIT_REVISION_MEMO, memo_key, result)
+    return result
+
+
+def _refresh_project_repo_for_task_results(project):
+    """
+    Refresh the project repository right after workers pushed task branches.
+    Returns ``(repo_dir, source_url)``; source_url is the mirrored upstream, if any.
+    """
+    repo_dir = _project_repo_dir(project)
+    source_url = str((project or {}).get("repo_remote_url") or "").strip()
+    if str((project or {}).get("repo_mode") or "").strip().lower() != "github":
+        source_url = _git_origin_remote_url(repo_dir) or source_url
+    if source_url:
+        # Branches were just pushed; skip the mirror freshness window.
+        _mark_project_repo_mirror_stale(source_url)
+    return _refresh_project_repo_for_resume(project), source_url
+
+
 def _git_resolve_revision(repo_dir: Path, revisions):
+    signature = _git_ref_signature(repo_dir)
     for revision in revisions:
         rev = str(revision or "").strip()
         if not rev:
             continue
-        completed = _run_git(repo_dir, ["rev-parse", rev])
-        if completed.returncode == 0:
-            value = str(completed.stdout or "").strip()
-            if value:
-                return value
+        value, _ = _git_lookup_object(repo_dir, rev, signature)
+        if value:
+            return value
     return None
 
 
@@ -2217,8 +3322,29 @@ def _git_is_ancestor(repo_dir: Path, ancestor_rev, descendant_rev):
     descendant = str(descendant_rev or "").strip()
     if not ancestor or not descendant:
         return False
-    completed = _run_git(repo_dir, ["merge-base", "--is-ancestor", ancestor, descendant])
-    return completed.returncode == 0
+    signature = _git_ref_signature(repo_dir)
+    ancestor_id, ancestor_type = _git_lookup_object(repo_dir, ancestor, signature)
+    descendant_id, descendant_type = _git_lookup_object(repo_dir, descendant, signature)
+    if not ancestor_id or not descendant_id:
+        return False
+    # Ancestry between two commit ids never changes, so those answers are
+    # cached for the life of the router.
+    memo_key = None
+    if ancestor_type == "commit" and descendant_type == "commit":
+        memo_key = (_git_repo_key(repo_dir), ancestor_id, descendant_id)
+        with GIT_MEMO_LOCK:
+            if memo_key in GIT_ANCESTRY_MEMO:
+                return GIT_ANCESTRY_MEMO[memo_key]
+    if ancestor_id == descendant_id:
+        result = True
+    else:
+        completed = _run_git(repo_dir, ["merge-base", "--is-ancestor", ancestor_id, descendant_id])
+        if completed.returncode not in (0, 1):
+            return False
+        result = completed.returncode == 0
+    if memo_key is not None:
+        _git_memo_put(GIT_ANCESTRY_MEMO, memo_key, result)
+    return result
 
 
 def _resolve_project_repo_spec(
@@ -2365,6 +3491,12 @@ def _project_task_is_ready(project, task_id):
     task = (project.get("tasks") or {}).get(task_id) or {}
     if task.get("status") not in ("pending", "ready"):
         return False
+    if task.get("retry_not_before") is not None:
+        # Backing off after a failed attempt; the retry timer clears this.
+        return False
+    if _task_is_integration(task) and _project_merge_train_active(project):
+        # The merge train completes integration router-side.
+        return False
     for dep_id in task.get("depends_on") or []:
         dep = (project.get("tasks") or {}).get(dep_id) or {}
         if dep.get("status") != "completed":
@@ -2372,8 +3504,18 @@ def _project_task_is_ready(project, task_id):
     candidate_paths = _project_task_paths(task)
     if not candidate_paths:
         return True
+    is_merge = str(task.get("task_kind") or "").strip().lower() == "merge"
     for other_id, other_task in (project.get("tasks") or {}).items():
-        if other_id == task_id or other_task.get("status") != "assigned":
+        if other_id == task_id:
+            continue
+        other_status = other_task.get("status")
+        # Unresolved merge conflicts hold back new work on the same paths.
+        holds_paths = other_status == "assigned" or (
+            not is_merge
+            and other_status in ("pending", "ready")
+            and str(other_task.get("task_kind") or "").strip().lower() == "merge"
+        )
+        if not holds_paths:
             continue
         other_paths = _project_task_paths(other_task)
         if other_paths and _paths_overlap(candidate_paths, other_paths):
@@ -2381,6 +3523,124 @@ def _project_task_is_ready(project, task_id):
     return True
 
 
+def _task_path_set_key(task):
+    dirs = sorted({path.split("/", 1)[0] for path in _project_task_paths(task) if path})
+    return ",".join(dirs)
+
+
+def _task_duration_estimates():
+    """
+    Median completed-task durations across all projects, keyed by task kind
+    and by (task kind, top-level path set), plus an overall ``None`` key.
+    """
+    samples = defaultdict(list)
+    for project in PROJECTS.values():
+        for task in ((project or {}).get("tasks") or {}).values():
+            duration = task.get("duration_seconds") if isinstance(task, dict) else None
+            if task.get("status") != "completed" or not isinstance(duration, (int, float)):
+                continue
+            kind = str(task.get("task_kind") or "implementation").strip().lower()
+            samples[None].append(float(duration))
+            samples[kind].append(float(duration))
+            samples[(kind, _task_path_set_key(task))].append(float(duration))
+    return {key: _percentile(values, 50) for key, values in samples.items()}
+
+
+def _project_task_duration_estimate(project, task, estimates):
+    if not project.get("critical_path_history") or not estimates.get(None):
+        return 1.0
+    kind = str(task.get("task_kind") or "implementation").strip().lower()
+    for key in ((kind, _task_path_set_key(task)), kind, None):
+        if estimates.get(key):
+            return estimates[key]
+    return 1.0
+
+
+def _update_project_task_priorities(project, changed_task_ids=None, estimates=None):
+    """
+    Set each task's ``critical_path`` to its own estimated duration plus the
+    longest downstream chain. Completed tasks count as zero. With
+    changed_task_ids, only those tasks and their ancestors are recomputed.
+    """
+    tasks = project.get("tasks") or {}
+    if estimates is None:
+        estimates = _task_duration_estimates() if project.get("critical_path_history") else {}
+    dependents = defaultdict(list)
+    for task_id, task in tasks.items():
+        for dep_id in task.get("depends_on") or []:
+            dependents[str(dep_id)].append(str(task_id))
+    if changed_task_ids is None:
+        dirty = set(tasks.keys())
+    else:
+        dirty = set()
+        stack = [str(task_id) for task_id in changed_task_ids if str(task_id) in tasks]
+        while stack:
+            task_id = stack.pop()
+            if task_id in dirty:
+                continue
+            dirty.add(task_id)
+            stack.extend(str(dep_id) for dep_id in tasks[task_id].get("depends_on") or [] if str(dep_id) in tasks)
+
+    def _resolve(task_id, visiting):
+        task = tasks[task_id]
+        if task_id not in dirty and isinstance(task.get("critical_path"), (int, float)):
+            return float(task["critical_path"])
+        if task_id in visiting:
+            return 0.0
+        visiting.add(task_id)
+        own = 0.0 if task.get("status") == "completed" else _project_task_duration_estimate(project, task, estimates)
+        downstream = max((_resolve(child, visiting) for child in dependents.get(task_id, [])), default=0.0)
+        visiting.discard(task_id)
+        task["critical_path"] = round(own + downstream, 3)
+        dirty.discard(task_id)
+        return task["critical_path"]
+
+    for task_id in list(dirty):
+        if task_id in dirty:
+            _resolve(task_id, set())
+
+
+def _project_priority_changes_on_completion(project, task):
+    changed = [str(task.get("task_id"))]
+    if project.get("critical_path_history"):
+        # The new sample moves the estimate for every open task of this kind.
+        kind = str(task.get("task_kind") or "implementation").strip().lower()
+        changed.extend(
+            str(task_id)
+            for task_id, other in (project.get("tasks") or {}).items()
+            if other.get("status") != "completed"
+            and str(other.get("task_kind") or "implementation").strip().lower() == kind
+        )
+    return changed
+
+
+def _project_next_ready_task(project, target=None):
+    """
+    Return the ready task with the longest remaining critical path. With a
+    ``(swarm_id, node_id)`` target, tasks retrying away from that node are
+    skipped unless it is the project's only worker node.
+    """
+    best = None
+    best_key = None
+    avoid = None
+    if target is not None:
+        worker_nodes = sum(
+            int((SWARMS.get(str(swarm_id)) or {}).get("node_count") or 0)
+            for swarm_id in project.get("worker_swarm_ids") or []
+        )
+        avoid = [str(target[0]), int(target[1])] if worker_nodes > 1 else None
+    for index, task_id in enumerate(project.get("task_order") or list((project.get("tasks") or {}).keys())):
+        task = (project.get("tasks") or {}).get(task_id)
+        if not task or not _project_task_is_ready(project, task_id):
+            continue
+        if avoid is not None and task.get("retry_avoid_node") == avoid:
+            continue
+        key = (-float(task.get("critical_path") or 0.0), index)
+        if best_key is None or key < best_key:
+            best, best_key = task, key
+    return best
+
+
 def _project_task_counts(project):
     counts = {
         "pending": 0,
@@ -2389,6 +3649,7 @@ def _project_task_counts(project):
         "completed": 0,
         "failed": 0,
         "blocked": 0,
+        "retrying": 0,
     }
     tasks = project.get("tasks") or {}
     for task_id, task in tasks.items():
@@ -2400,10 +3661,16 @@ def _project_task_counts(project):
         elif status == "failed":
             counts["failed"] += 1
         else:
-            if _project_task_is_ready(project, task_id):
+            if task.get("retry_not_before") is not None:
+                counts["retrying"] += 1
+                task["ready_at"] = None
+            elif _project_task_is_ready(project, task_id):
                 counts["ready"] += 1
+                if not isinstance(task.get("ready_at"), (int, float)):
+                    task["ready_at"] = time.time()
             else:
                 counts["blocked"] += 1
+                task["ready_at"] = None
             counts["pending"] += 1
     return counts
 
@@ -2412,13 +3679,21 @@ def _refresh_project_status(project):
     counts = _project_task_counts(project)
     project["task_counts"] = counts
     project["updated_at"] = time.time()
+    fair_share = project.get("fair_share")
+    if isinstance(fair_share, dict):
+        ready_since = [
+            float(task["ready_at"])
+            for task in (project.get("tasks") or {}).values()
+            if task.get("status") in ("pending", "ready") and isinstance(task.get("ready_at"), (int, float))
+        ]
+        fair_share["oldest_ready_wait_seconds"] = round(project["updated_at"] - min(ready_since), 3) if ready_since else 0.0
     current = str(project.get("status") or "draft")
     if current in ("draft", "starting", "resuming", "error"):
         return
     total = len(project.get("tasks") or {})
     if total > 0 and counts["completed"] == total:
         project["status"] = "completed"
-    elif counts["failed"] > 0 and counts["assigned"] == 0 and counts["ready"] == 0:
+    elif counts["failed"] > 0 and counts["assigned"] == 0 and counts["ready"] == 0 and counts["retrying"] == 0:
         project["status"] = "attention"
     else:
         project["status"] = "running"
@@ -2438,6 +3713,16 @@ def _emit_projects_updated():
     })
 
 
+def _repo_worker_progress_cb(project_id, swarm_id):
+    def _report(report):
+        emit_event("project_repo_worker_prepared", {
+            "project_id": project_id,
+            "swarm_id": swarm_id,
+            **(report if isinstance(report, dict) else {}),
+        })
+    return _report
+
+
 def _normalize_graph_from_parsed_payload(parsed):
     if isinstance(parsed, dict):
         if isinstance(parsed.get("tasks"), list):
@@ -2648,6 +3933,7 @@ def _persist_project_beads_snapshot(project):
             if push_result.returncode != 0:
                 detail = push_result.stderr.strip() or push_result.stdout.strip() or "git push failed"
                 raise RuntimeError(f"Failed to push Beads export: {detail}")
+            _mark_project_repo_mirror_stale(_project_control_clone_source(project))
 
 
 def _project_beads_status(project):
@@ -2768,6 +4054,100 @@ def _create_beads_issue(repo_path, title, issue_type, description, metadata, par
     return parsed, None
 
 
+def _beads_topological_task_ids(project):
+    tasks = project.get("tasks") or {}
+    order = [task_id for task_id in (project.get("task_order") or list(tasks.keys())) if task_id in tasks]
+    placed = set()
+    result = []
+    remaining = list(order)
+    while remaining:
+        progressed = False
+        for task_id in list(remaining):
+            deps = [dep for dep in (tasks[task_id].get("depends_on") or []) if dep in tasks]
+            if all(dep in placed for dep in deps):
+                result.append(task_id)
+                placed.add(task_id)
+                remaining.remove(task_id)
+                progressed = True
+        if not progressed:
+            # Cycles cannot be ordered; keep declaration order for the rest.
+            result.extend(remaining)
+            break
+    return result
+
+
+def _bulk_create_beads_tasks(project, root_id, chunk_size=BEADS_IMPORT_CHUNK_SIZE):
+    """
+    Create missing task issues (with parent and blocking edges) through
+    `bd import` in topologically ordered chunks. IDs are assigned up front so
+    they map back to tasks without parsing output. Returns the task ids
+    created; tasks from a failed chunk onwards are left for per-issue creation.
+    """
+    tasks = project.get("tasks") or {}
+    prefix = str(project.get("beads_prefix") or "").strip()
+    pending = [task_id for task_id in _beads_topological_task_ids(project) if not str(tasks[task_id].get("beads_id") or "").strip()]
+    if not prefix or len(pending) < 2:
+        return []
+    now = now_iso()
+    assigned = {}
+    for task_id in pending:
+        digest = hashlib.sha1(f"{project.get('project_id')}:{task_id}".encode("utf-8")).hexdigest()[:8]
+        assigned[task_id] = f"{prefix}-{digest}"
+
+    created = []
+    for start in range(0, len(pending), max(1, int(chunk_size))):
+        chunk = pending[start:start + max(1, int(chunk_size))]
+        lines = []
+        for task_id in chunk:
+            task = tasks[task_id]
+            issue_id = assigned[task_id]
+            dependencies = []
+            if root_id:
+                dependencies.append({"issue_id": issue_id, "depends_on_id": root_id, "type": "parent-child", "created_at": now})
+            for dep_id in task.get("depends_on") or []:
+                blocker_id = assigned.get(dep_id) or str((tasks.get(dep_id) or {}).get("beads_id") or "").strip()
+                if blocker_id:
+                    dependencies.append({"issue_id": issue_id, "depends_on_id": blocker_id, "type": "blocks", "created_at": now})
+            lines.append(json.dumps({
+                "id": issue_id,
+                "title": str(task.get("title") or task_id),
+                "description": _build_task_beads_description(task),
+                "status": "open",
+                "priority": 2,
+                "issue_type": "task",
+                "created_at": now,
+                "updated_at": now,
+                "metadata": {
+                    "codeswarm_project_id": project.get("project_id"),
+                    "codeswarm_task_id": task_id,
+                    "base_branch": project.get("base_branch"),
+                },
+                "dependencies": dependencies,
+            }, sort_keys=True))
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8") as handle:
+            handle.write("\n".join(lines) + "\n")
+            payload_path = handle.name
+        try:
+            _, error = _run_beads(project.get("repo_path"), ["import", "-i", payload_path])
+        finally:
+            try:
+                os.unlink(payload_path)
+            except OSError:
+                pass
+        if error:
+            break
+        for task_id in chunk:
+            task = tasks[task_id]
+            task["beads_id"] = assigned[task_id]
+            task["beads_dependencies_synced"] = sorted(
+                str(dep_id)
+                for dep_id in task.get("depends_on") or []
+                if assigned.get(dep_id) or str((tasks.get(dep_id) or {}).get("beads_id") or "").strip()
+            )
+            created.append(task_id)
+    return created
+
+
 def _sync_project_to_beads(project):
     if str(os.environ.get("CODESWARM_DISABLE_BEADS_SYNC") or "").strip().lower() in ("1", "true", "yes", "on"):
         _set_project_beads_status(project, "disabled")
@@ -2806,6 +4186,8 @@ def _sync_project_to_beads(project):
         root_id = str(created.get("id") or "").strip()
         project["beads_root_id"] = root_id
 
+    _bulk_create_beads_tasks(project, root_id)
+
     task_errors = []
     tasks = project.get("tasks") or {}
     for task_id in project.get("task_order") or list(tasks.keys()):
@@ -2855,12 +4237,70 @@ def _sync_project_to_beads(project):
         _set_project_beads_status(project, "partial", "; ".join(task_errors[:3]))
     else:
         _set_project_beads_status(project, "synced")
+    _schedule_project_beads_snapshot(project)
+
+
+def _persist_project_beads_snapshot_safely(project):
     try:
         _persist_project_beads_snapshot(project)
     except Exception as e:
         _set_project_beads_status(project, "warning", str(e))
 
 
+def _schedule_project_beads_snapshot(project, flush=False):
+    """
+    Write-behind Beads persistence. Requests for a project are coalesced
+    into one export/commit/push per interval on a background thread; flush
+    persists immediately (project completion) and drops any pending request.
+    """
+    global PROJECT_BEADS_PERSISTER_THREAD
+    if not project:
+        return
+    project_id = str(project.get("project_id") or "").strip()
+    if flush or not project_id or PROJECT_BEADS_PERSIST_INTERVAL_SECONDS <= 0:
+        with PROJECT_BEADS_PERSIST_COND:
+            PROJECT_BEADS_PERSIST_DUE.pop(project_id, None)
+        _persist_project_beads_snapshot_safely(project)
+        return
+    with PROJECT_BEADS_PERSIST_COND:
+        if project_id not in PROJECT_BEADS_PERSIST_DUE:
+            PROJECT_BEADS_PERSIST_DUE[project_id] = time.time() + PROJECT_BEADS_PERSIST_INTERVAL_SECONDS
+        if PROJECT_BEADS_PERSISTER_THREAD is None or not PROJECT_BEADS_PERSISTER_THREAD.is_alive():
+            PROJECT_BEADS_PERSISTER_THREAD = threading.Thread(target=_beads_persister_loop, daemon=True)
+            PROJECT_BEADS_PERSISTER_THREAD.start()
+        PROJECT_BEADS_PERSIST_COND.notify_all()
+
+
+def _beads_persister_loop():
+    while True:
+        with PROJECT_BEADS_PERSIST_COND:
+            while True:
+                now = time.time()
+                due_ids = [project_id for project_id, due_at in PROJECT_BEADS_PERSIST_DUE.items() if due_at <= now]
+                if due_ids:
+                    for project_id in due_ids:
+                        PROJECT_BEADS_PERSIST_DUE.pop(project_id, None)
+                    break
+                timeout = min(PROJECT_BEADS_PERSIST_DUE.values()) - now if PROJECT_BEADS_PERSIST_DUE else None
+                PROJECT_BEADS_PERSIST_COND.wait(timeout)
+        for project_id in due_ids:
+            project = PROJECTS.get(project_id)
+            if project:
+                _persist_project_beads_snapshot_safely(project)
+
+
+def flush_project_beads_snapshots(project_id=None):
+    """Persist pending Beads snapshots now (one project, or all on shutdown)."""
+    with PROJECT_BEADS_PERSIST_COND:
+        candidates = [str(project_id)] if project_id else list(PROJECT_BEADS_PERSIST_DUE.keys())
+        pending = [item for item in candidates if PROJECT_BEADS_PERSIST_DUE.pop(item, None) is not None]
+    for item in pending:
+        project = PROJECTS.get(item)
+        if project:
+            _persist_project_beads_snapshot_safely(project)
+    return pending
+
+
 def _sync_task_status_to_beads(project, task):
     if not project or not task or not _project_beads_available(project):
         return
@@ -2878,10 +4318,7 @@ def _sync_task_status_to_beads(project, task):
             _set_task_beads_status(task, "warning", error)
         else:
             _set_task_beads_status(task, "synced")
-            try:
-                _persist_project_beads_snapshot(project)
-            except Exception as e:
-                _set_project_beads_status(project, "warning", str(e))
+            _schedule_project_beads_snapshot(project, flush=project.get("status") == "completed")
         return
 
     if task_status == "completed":
@@ -2891,10 +4328,7 @@ def _sync_task_status_to_beads(project, task):
             _set_task_beads_status(task, "warning", error)
         else:
             _set_task_beads_status(task, "closed")
-            try:
-                _persist_project_beads_snapshot(project)
-            except Exception as e:
-                _set_project_beads_status(project, "warning", str(e))
+            _schedule_project_beads_snapshot(project, flush=project.get("status") == "completed")
         return
 
     if task_status == "failed":
@@ -2904,10 +4338,7 @@ def _sync_task_status_to_beads(project, task):
             _set_task_beads_status(task, "warning", error)
         else:
             _set_task_beads_status(task, "synced")
-            try:
-                _persist_project_beads_snapshot(project)
-            except Exception as e:
-                _set_project_beads_status(project, "warning", str(e))
+            _schedule_project_beads_snapshot(project, flush=project.get("status") == "completed")
 
 
 def _parse_task_graph_json_block(text):
@@ -2951,6 +4382,153 @@ def _parse_task_graph_json_block(text):
     return best_graph
 
 
+def _normalize_sparse_checkout_options(payload):
+    payload = payload if isinstance(payload, dict) else {}
+    always_include = payload.get("sparse_always_include")
+    if isinstance(always_include, str):
+        always_include = [always_include]
+    paths = []
+    for item in always_include if isinstance(always_include, list) else []:
+        path = _sparse_cone_dir(item)
+        if path and path not in paths:
+            paths.append(path)
+    return {
+        "sparse_checkout": bool(payload.get("sparse_checkout")),
+        "sparse_always_include": paths,
+    }
+
+
+def _normalize_hedging_options(payload):
+    payload = payload if isinstance(payload, dict) else {}
+    raw = payload.get("hedging")
+    if not isinstance(raw, dict):
+        raw = {"enabled": bool(raw)}
+
+    def _number(key, default, minimum, maximum):
+        try:
+            return min(maximum, max(minimum, float(raw.get(key, default))))
+        except (TypeError, ValueError):
+            return default
+
+    return {
+        "enabled": bool(raw.get("enabled", True)),
+        "percentile": _number("percentile", 90.0, 50.0, 99.9),
+        "min_samples": int(_number("min_samples", 3, 1, 1000)),
+        "min_elapsed_seconds": _number("min_elapsed_seconds", 120.0, 0.0, 7 * 86400.0),
+        "launched": 0,
+        "hedge_wins": 0,
+        "primary_wins": 0,
+        "usage": _empty_usage_totals(),
+    }
+
+
+def _normalize_fair_share_options(payload):
+    payload = payload if isinstance(payload, dict) else {}
+    max_concurrency = _to_int(payload.get("max_concurrency"))
+    return {
+        "weight": _fair_share_weight(payload.get("weight")),
+        "max_concurrency": max_concurrency if max_concurrency and max_concurrency > 0 else None,
+        "dispatched": 0,
+        "wait_samples": 0,
+        "wait_seconds_total": 0.0,
+        "mean_wait_seconds": None,
+        "max_wait_seconds": 0.0,
+        "last_wait_seconds": None,
+        "oldest_ready_wait_seconds": 0.0,
+    }
+
+
+def _normalize_retry_policy(raw, defaults=True):
+    """
+    Normalize a task retry policy. Project policies are filled in with
+    PROJECT_TASK_RETRY_DEFAULTS; task policies keep only the keys they set.
+    """
+    raw = raw if isinstance(raw, dict) else {}
+    policy = dict(PROJECT_TASK_RETRY_DEFAULTS) if defaults else {}
+    for key in ("deadline_seconds", "backoff_seconds", "backoff_max_seconds"):
+        if raw.get(key) is None:
+            continue
+        try:
+            policy[key] = min(30 * 86400.0, max(0.0, float(raw[key])))
+        except (TypeError, ValueError):
+            continue
+    if "deadline_seconds" in policy and not policy["deadline_seconds"]:
+        policy["deadline_seconds"] = None
+    max_attempts = _to_int(raw.get("max_attempts"))
+    if max_attempts is not None:
+        policy["max_attempts"] = max(1, max_attempts)
+    if "retry_on_different_node" in raw:
+        policy["retry_on_different_node"] = bool(raw["retry_on_different_node"])
+    return policy
+
+
+def _project_task_retry_policy(project, task):
+    policy = dict(PROJECT_TASK_RETRY_DEFAULTS)
+    policy.update((project or {}).get("retry_policy") or {})
+    policy.update((task or {}).get("retry_policy") or {})
+    return policy
+
+
+def _sparse_cone_dir(path):
+    """
+    Map a declared task path (file, directory or glob) to the cone-mode
+    directory that contains it. Returns "" for the repository root.
+    """
+    text = str(path or "").strip().replace("\\", "/")
+    for marker in ("*", "?", "["):
+        if marker in text:
+            text = text[:text.index(marker)]
+            text = text.rsplit("/", 1)[0] if "/" in text else ""
+            break
+    parts = [part for part in text.split("/") if part and part != "."]
+    if ".." in parts:
+        return ""
+    if parts and "." in parts[-1] and not text.endswith("/"):
+        parts = parts[:-1]
+    return "/".join(parts)
+
+
+def _project_task_sparse_paths(project, task):
+    """
+    Cone directories a task needs in a sparse worker checkout, or None when
+    the task needs the whole tree (integration tasks, undeclared scope, or a
+    path at the repository root).
+    """
+    if str(task.get("task_kind") or "").strip().lower() == "integration":
+        return None
+    declared = list(task.get("owned_paths") or []) + list(task.get("expected_touch_paths") or [])
+    if not declared:
+        return None
+    paths = list(project.get("sparse_always_include") or [])
+    for item in declared:
+        path = _sparse_cone_dir(item)
+        if not path:
+            return None
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+def _widen_project_sparse_checkout(project, provider, swarm, node_id, task):
+    if not project.get("sparse_checkout"):
+        return
+    job_id = str(swarm.get("job_id"))
+    subdir = project.get("workspace_subdir") or "repo"
+    paths = _project_task_sparse_paths(project, task)
+    try:
+        provider.widen_sparse_checkout(job_id, int(node_id), subdir, paths)
+    except Exception as e:
+        print(
+            f"[router WARN] sparse checkout update failed for {job_id}/{node_id}, using full checkout: {e}",
+            file=sys.stderr,
+            flush=True,
+        )
+        try:
+            provider.widen_sparse_checkout(job_id, int(node_id), subdir, None)
+        except Exception:
+            pass
+
+
 def _create_project_record(
     title,
     repo_path,
@@ -2959,6 +4537,7 @@ def _create_project_record(
     base_branch="main",
     workspace_subdir="repo",
     repo_meta=None,
+    checkout_options=None,
 ):
     if not title or not repo_path:
         raise RuntimeError("project requires title and repo_path")
@@ -3020,6 +4599,14 @@ def _create_project_record(
         "worker_swarm_ids": normalized_swarm_ids,
         "status": "draft",
         "workspace_subdir": str(workspace_subdir or "repo"),
+        **_normalize_sparse_checkout_options(checkout_options),
+        "merge_train": _new_project_merge_train(bool((checkout_options or {}).get("merge_train"))),
+        "hedging": _normalize_hedging_options(checkout_options),
+        "task_durations": [],
+        "critical_path_history": bool((checkout_options or {}).get("critical_path_history")),
+        "fair_share": _normalize_fair_share_options(checkout_options),
+        "retry_policy": _normalize_retry_policy((checkout_options or {}).get("retry_policy")),
+        "autoscale_group": str((checkout_options or {}).get("autoscale_group") or "").strip() or None,
         "repo_preparation": {},
         "task_order": task_order,
         "tasks": tasks,
@@ -3043,6 +4630,7 @@ def _create_project_record(
         "created_at": now,
         "updated_at": now,
     }
+    _update_project_task_priorities(project)
     _refresh_project_status(project)
     _sync_project_to_beads(project)
     with SCHEDULER_LOCK:
@@ -3136,6 +4724,7 @@ def _record_project_plan_result(plan_id, data):
             base_branch=plan.get("base_branch") or "main",
             workspace_subdir=plan.get("workspace_subdir") or "repo",
             repo_meta=plan,
+            checkout_options=plan,
         )
         emit_event("project_created", {
             "request_id": plan.get("request_id"),
@@ -3313,6 +4902,10 @@ def _normalize_task_payload(raw_task, index):
         "system_generated": bool(raw_task.get("system_generated", False)),
         "status": "pending",
         "attempts": 0,
+        "retry_policy": _normalize_retry_policy(raw_task.get("retry_policy"), defaults=False),
+        "failed_attempts": 0,
+        "retry_not_before": None,
+        "retry_avoid_node": None,
         "assigned_swarm_id": None,
         "assigned_node_id": None,
         "last_assigned_swarm_id": None,
@@ -3399,8 +4992,8 @@ def _parse_task_result_block(text):
     return parsed if parsed else None
 
 
-def _build_project_task_prompt(project, task):
-    branch_name = _project_task_branch_name(project, task)
+def _build_project_task_prompt(project, task, branch_name=None):
+    branch_name = branch_name or _project_task_branch_name(project, task)
     acceptance_lines = "\n".join(
         f"- {item}" for item in (task.get("acceptance_criteria") or []) if str(item).strip()
     ) or "- Satisfy the task prompt and describe any verification you ran."
@@ -3409,6 +5002,12 @@ def _build_project_task_prompt(project, task):
     ) or "- none"
     repo_subdir = str(project.get("workspace_subdir") or "repo").strip() or "repo"
     prompt = str(task.get("prompt") or "").strip()
+    sparse_note = (
+        "This checkout is a sparse partial clone scoped to the task's declared paths; "
+        "run `git sparse-checkout add <dir>` if you need files outside it.\n"
+        if project.get("sparse_checkout")
+        else ""
+    )
     return (
         f"You are executing orchestrated project task {task.get('task_id')}.\n\n"
         f"Project: {project.get('title')}\n"
@@ -3421,6 +5020,7 @@ def _build_project_task_prompt(project, task):
         f"Dependencies:\n{dependency_lines}\n\n"
         f"Acceptance criteria:\n{acceptance_lines}\n\n"
         "Operate only on this task's scope. If you need to run commands or edit files, work in the current working directory unless a command explicitly requires another path.\n"
+        f"{sparse_note}"
         f"Use or create the branch `{branch_name}` in the repository workspace before making changes.\n"
         "Commit your changes on that branch. If git user identity is missing, configure repository-local user.name and user.email first.\n"
         "If the repository has an origin remote, push the branch with upstream tracking before you finish.\n"
@@ -3440,13 +5040,32 @@ def _build_project_task_prompt(project, task):
     )
 
 
+def _project_task_attempt(task, injection_id):
+    """
+    Classify injection_id against a task: ``primary`` (the assignment),
+    ``hedge`` (a live hedged duplicate) or ``side`` (a hedge or abandoned
+    attempt whose usage is still accounted but whose result is ignored).
+    """
+    injection_id = str(injection_id or "").strip()
+    if not injection_id or not isinstance(task, dict):
+        return None
+    if task.get("assignment_injection_id") == injection_id:
+        return "primary"
+    hedge = task.get("hedge")
+    if isinstance(hedge, dict) and hedge.get("injection_id") == injection_id:
+        return "hedge"
+    if injection_id in (task.get("side_attempts") or {}):
+        return "side"
+    return None
+
+
 def _find_project_and_task_by_injection(injection_id):
     if not isinstance(injection_id, str) or not injection_id:
         return None, None
     with SCHEDULER_LOCK:
         for project_id, project in PROJECTS.items():
             for task_id, task in (project.get("tasks") or {}).items():
-                if task.get("assignment_injection_id") == injection_id:
+                if _project_task_attempt(task, injection_id):
                     return project_id, task_id
     return None, None
 
@@ -3461,52 +5080,238 @@ def _find_pending_project_plan_by_injection(injection_id):
     return None
 
 
-def _project_first_idle_target(project):
+def _project_first_idle_target(project, avoid=None):
     worker_swarm_ids = project.get("worker_swarm_ids") or []
+    fallback = (None, None)
     for swarm_id in worker_swarm_ids:
         swarm = SWARMS.get(str(swarm_id))
         if not swarm or swarm.get("status") in ("terminating", "terminated"):
             continue
-        node_id = _first_idle_node_id(str(swarm_id))
+        exclude = avoid[1] if avoid and str(avoid[0]) == str(swarm_id) else None
+        node_id = _first_idle_node_id(str(swarm_id), exclude=exclude)
         if node_id is not None:
             return str(swarm_id), int(node_id)
-    return None, None
+        if exclude is not None and fallback[0] is None and _first_idle_node_id(str(swarm_id)) is not None:
+            fallback = (str(swarm_id), int(exclude))
+    return fallback
 
 
-def _update_project_usage_for_injection(payload):
-    if not isinstance(payload, dict):
-        return False
-    project_id, task_id = _find_project_and_task_by_injection(payload.get("injection_id"))
-    if not project_id or not task_id:
-        return False
+def _normalize_prefetch_depth(value):
+    depth = _to_int(value)
+    if depth is None:
+        return 0
+    return max(0, min(SWARM_PREFETCH_MAX_DEPTH, depth))
 
-    changed = False
-    with SCHEDULER_LOCK:
-        project = PROJECTS.get(str(project_id))
-        if not isinstance(project, dict):
+
+def _project_prefetch_target(project):
+    """
+    Pick a busy worker node to prefetch into: its swarm opted in with
+    ``prefetch_depth`` and fewer than that many injections are queued behind
+    its current turn. The least loaded node wins.
+    """
+    best = None
+    for swarm_id in project.get("worker_swarm_ids") or []:
+        swarm = SWARMS.get(str(swarm_id))
+        if not swarm or swarm.get("status") in ("terminating", "terminated"):
+            continue
+        depth = _normalize_prefetch_depth(swarm.get("prefetch_depth"))
+        if depth <= 0:
+            continue
+        for node_id in range(int(swarm.get("node_count") or 0)):
+            key = _node_key(swarm_id, node_id)
+            if key in NODE_DOWN:
+                continue
+            outstanding = int(NODE_OUTSTANDING.get(key, 0))
+            if outstanding < 1 or outstanding > depth:
+                continue
+            if best is None or outstanding < best[0]:
+                best = (outstanding, str(swarm_id), int(node_id))
+    if best is None:
+        return None, None
+    return best[1], best[2]
+
+
+def _node_prefetched_count(swarm_id, node_id):
+    """Prefetched injections still held in a node's inbox (caller holds SCHEDULER_LOCK)."""
+    key = _node_key(swarm_id, node_id)
+    count = 0
+    for injection_id, (project_id, task_id, held_key) in list(PROJECT_PREFETCHED_INJECTIONS.items()):
+        task = ((PROJECTS.get(project_id) or {}).get("tasks") or {}).get(task_id) or {}
+        if task.get("status") != "assigned" or task.get("assignment_injection_id") != injection_id:
+            PROJECT_PREFETCHED_INJECTIONS.pop(injection_id, None)
+            continue
+        if held_key == key:
+            count += 1
+    return count
+
+
+def _project_prefetch_still_ready(project, task_id):
+    """
+    Re-check a held task as if it were still pending. Path conflicts with
+    other assigned tasks were ruled out at dispatch, so only later changes
+    matter: a reset dependency, the merge train taking over integration, or
+    a merge-resolution task claiming overlapping paths.
+    """
+    tasks = project.get("tasks") or {}
+    task = tasks.get(task_id) or {}
+    for dep_id in task.get("depends_on") or []:
+        if (tasks.get(dep_id) or {}).get("status") != "completed":
             return False
-        task = (project.get("tasks") or {}).get(str(task_id))
-        if not isinstance(task, dict):
+    if _task_is_integration(task) and _project_merge_train_active(project):
+        return False
+    if str(task.get("task_kind") or "").strip().lower() == "merge":
+        return True
+    candidate_paths = _project_task_paths(task)
+    if not candidate_paths:
+        return True
+    for other_id, other_task in tasks.items():
+        if other_id == task_id or other_task.get("status") not in ("pending", "ready"):
+            continue
+        if str(other_task.get("task_kind") or "").strip().lower() != "merge":
+            continue
+        other_paths = _project_task_paths(other_task)
+        if other_paths and _paths_overlap(candidate_paths, other_paths):
             return False
+    return True
 
-        current_snapshot = _normalize_usage_snapshot(payload)
-        if not current_snapshot:
+
+def _revoke_stale_project_prefetches():
+    revocations = []
+    with SCHEDULER_LOCK:
+        for injection_id, (project_id, task_id, key) in list(PROJECT_PREFETCHED_INJECTIONS.items()):
+            project = PROJECTS.get(project_id) or {}
+            task = (project.get("tasks") or {}).get(task_id)
+            if not task or task.get("status") != "assigned" or task.get("assignment_injection_id") != injection_id:
+                PROJECT_PREFETCHED_INJECTIONS.pop(injection_id, None)
+                continue
+            if task.get("prefetch_revoke_requested_at") or _project_prefetch_still_ready(project, task_id):
+                continue
+            task["prefetch_revoke_requested_at"] = time.time()
+            revocations.append((injection_id, key))
+    for injection_id, (swarm_id, node_id) in revocations:
+        swarm = SWARMS.get(swarm_id) or {}
+        provider = _provider_for_swarm(swarm_id)
+        if provider is None or not hasattr(provider, "send_control"):
+            continue
+        # The worker drops the injection if it is still held and confirms with
+        # prefetch_revoked; if it already started, the task runs to completion.
+        try:
+            provider.send_control(str(swarm.get("job_id")), node_id, {
+                "type": "revoke_injection",
+                "injection_id": injection_id,
+            })
+        except Exception as e:
+            print(
+                f"[router WARN] prefetch revoke failed for swarm {swarm_id} node {node_id}: {e}",
+                file=sys.stderr,
+                flush=True,
+            )
+
+
+def _mark_prefetched_task_started(injection_id):
+    with SCHEDULER_LOCK:
+        entry = PROJECT_PREFETCHED_INJECTIONS.pop(str(injection_id), None)
+        if not entry:
             return False
-        previous_snapshot = task.get("active_attempt_usage")
-        delta = _usage_delta_for_project_accounting(current_snapshot, previous_snapshot, payload)
-        task["active_attempt_usage"] = current_snapshot
-        if not delta:
+        project_id, task_id, _ = entry
+        task = ((PROJECTS.get(project_id) or {}).get("tasks") or {}).get(task_id)
+        if not task or task.get("assignment_injection_id") != injection_id:
             return False
+        # Durations, hedging and deadlines measure the run, not the wait behind the previous turn.
+        task["prefetched"] = False
+        task["prefetch_revoke_requested_at"] = None
+        task["assigned_at"] = time.time()
+        task["updated_at"] = task["assigned_at"]
+    return True
 
-        task_changed = _apply_usage_delta(task, delta)
-        if task_changed:
-            task["usage_updated_at"] = time.time()
-            changed = True
 
-        if _apply_usage_delta(project, delta):
+def _handle_project_prefetch_revoked(data):
+    injection_id = str((data or {}).get("injection_id") or "")
+    with SCHEDULER_LOCK:
+        entry = PROJECT_PREFETCHED_INJECTIONS.pop(injection_id, None)
+        if not entry:
+            return False
+        project_id, task_id, key = entry
+        project = PROJECTS.get(project_id)
+        task = ((project or {}).get("tasks") or {}).get(task_id)
+        if not task or task.get("status") != "assigned" or task.get("assignment_injection_id") != injection_id:
+            return False
+        NODE_OUTSTANDING[key] = max(0, int(NODE_OUTSTANDING.get(key, 0)) - 1)
+        task["status"] = "pending"
+        task["attempts"] = max(0, int(task.get("attempts") or 0) - 1)
+        task["assigned_swarm_id"] = None
+        task["assigned_node_id"] = None
+        task["assignment_injection_id"] = None
+        task["active_attempt_usage"] = None
+        task["prefetched"] = False
+        task["prefetch_revoke_requested_at"] = None
+        task["updated_at"] = time.time()
+        _refresh_project_status(project)
+    _sync_task_status_to_beads(project, task)
+    emit_event("project_task_prefetch_revoked", {
+        "project_id": project_id,
+        "task_id": task_id,
+        "swarm_id": key[0],
+        "node_id": key[1],
+        "injection_id": injection_id,
+    })
+    _emit_projects_updated()
+    save_state()
+    return True
+
+
+def _update_project_usage_for_injection(payload):
+    if not isinstance(payload, dict):
+        return False
+    project_id, task_id = _find_project_and_task_by_injection(payload.get("injection_id"))
+    if not project_id or not task_id:
+        return False
+
+    changed = False
+    with SCHEDULER_LOCK:
+        project = PROJECTS.get(str(project_id))
+        if not isinstance(project, dict):
+            return False
+        task = (project.get("tasks") or {}).get(str(task_id))
+        if not isinstance(task, dict):
+            return False
+
+        current_snapshot = _normalize_usage_snapshot(payload)
+        if not current_snapshot:
+            return False
+        side_attempt = (task.get("side_attempts") or {}).get(str(payload.get("injection_id") or ""))
+        if isinstance(side_attempt, dict):
+            previous_snapshot = side_attempt.get("usage")
+            hedged = bool(side_attempt.get("hedged"))
+        else:
+            previous_snapshot = task.get("active_attempt_usage")
+            hedged = bool(task.get("assignment_hedged"))
+        delta = _usage_delta_for_project_accounting(current_snapshot, previous_snapshot, payload)
+        if isinstance(side_attempt, dict):
+            side_attempt["usage"] = current_snapshot
+        else:
+            task["active_attempt_usage"] = current_snapshot
+        if not delta:
+            return False
+
+        task_changed = _apply_usage_delta(task, delta)
+        if task_changed:
+            task["usage_updated_at"] = time.time()
+            changed = True
+
+        if _apply_usage_delta(project, delta):
             project["usage_updated_at"] = time.time()
             changed = True
 
+        if hedged:
+            # Hedged duplicates are also tallied on their own so their cost stays visible.
+            hedge_stats = task.get("hedge_stats")
+            if isinstance(hedge_stats, dict):
+                changed = _apply_usage_delta(hedge_stats, delta) or changed
+            hedging = project.get("hedging")
+            if isinstance(hedging, dict):
+                changed = _apply_usage_delta(hedging, delta) or changed
+
         swarm_id = str(payload.get("swarm_id") or task.get("assigned_swarm_id") or "").strip()
         node_id = payload.get("node_id")
         if swarm_id and isinstance(node_id, int):
@@ -3536,6 +5341,21 @@ def _update_project_usage_for_injection(payload):
 
 
 def _record_project_task_result(project_id, task_id, data):
+    injection_id = str((data or {}).get("injection_id") or "").strip()
+    with SCHEDULER_LOCK:
+        project = PROJECTS.get(str(project_id))
+        task = ((project or {}).get("tasks") or {}).get(str(task_id))
+        if not task:
+            return
+        attempt = _project_task_attempt(task, injection_id) if injection_id else "primary"
+        if attempt == "side":
+            return
+        hedged_snapshot = copy.deepcopy(project) if isinstance(task.get("hedge"), dict) else None
+    if hedged_snapshot is not None and not _settle_hedged_task_result(
+        project_id, task_id, attempt, data, hedged_snapshot
+    ):
+        return
+
     project_ref = None
     task_ref = None
     with SCHEDULER_LOCK:
@@ -3566,6 +5386,8 @@ def _record_project_task_result(project_id, task_id, data):
             if result_status == "done":
                 task["status"] = "completed"
                 task["last_error"] = None
+                _record_project_task_duration(project, task)
+                _update_project_task_priorities(project, _project_priority_changes_on_completion(project, task))
             elif result_status in ("blocked", "failed", "needs_followups"):
                 task["status"] = "failed"
                 task["last_error"] = parsed.get("notes") or result_status
@@ -3584,12 +5406,28 @@ def _record_project_task_result(project_id, task_id, data):
                 project["integration_head_commit"] = integration_head_commit
                 project["final_result_branch"] = integration_branch
                 project["final_result_head_commit"] = integration_head_commit
+        retry_at = None
+        # Blocked and follow-up results need a human, not another attempt.
+        if task["status"] == "failed" and task.get("result_status") not in ("blocked", "needs_followups"):
+            retry_at = _apply_project_task_failure(
+                project_id,
+                project,
+                task,
+                task.get("last_error"),
+                task["updated_at"],
+                (task.get("last_assigned_swarm_id"), task.get("last_assigned_node_id")),
+            )
         _refresh_project_status(project)
         project_ref = project
         task_ref = task
+        merge_train_has_work = _project_merge_train_has_work(project)
     _sync_task_status_to_beads(project_ref, task_ref)
+    if retry_at is not None:
+        _emit_project_task_retry_scheduled(project_id, task_ref, retry_at)
     _emit_projects_updated()
     save_state()
+    if merge_train_has_work:
+        _schedule_project_merge_train(project_id)
 
 
 def _task_recorded_head_commit(task):
@@ -3616,6 +5454,748 @@ def _reset_project_integration_result(project):
     project["final_result_head_commit"] = None
 
 
+def _record_project_task_duration(project, task):
+    assigned_at = task.get("assigned_at")
+    if not isinstance(assigned_at, (int, float)):
+        return
+    duration = max(0.0, time.time() - float(assigned_at))
+    task["duration_seconds"] = round(duration, 3)
+    if str(task.get("task_kind") or "implementation").strip().lower() != "implementation":
+        return
+    samples = project.setdefault("task_durations", [])
+    samples.append(round(duration, 3))
+    del samples[:-PROJECT_TASK_DURATION_SAMPLES]
+
+
+def _percentile(values, percentile):
+    ordered = sorted(float(value) for value in values)
+    if not ordered:
+        return None
+    rank = max(1, int(-(-len(ordered) * float(percentile) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _project_hedge_threshold(project):
+    policy = (project or {}).get("hedging")
+    if not isinstance(policy, dict) or not policy.get("enabled"):
+        return None
+    samples = project.get("task_durations") or []
+    if len(samples) < int(policy.get("min_samples") or 1):
+        return None
+    return max(_percentile(samples, policy.get("percentile") or 90.0), float(policy.get("min_elapsed_seconds") or 0.0))
+
+
+def _project_hedge_candidates(project, now):
+    threshold = _project_hedge_threshold(project)
+    if threshold is None:
+        return []
+    stragglers = []
+    for task_id, task in (project.get("tasks") or {}).items():
+        if not isinstance(task, dict) or task.get("status") != "assigned":
+            continue
+        if str(task.get("task_kind") or "implementation").strip().lower() != "implementation":
+            continue
+        if isinstance(task.get("hedge"), dict) or int((task.get("hedge_stats") or {}).get("launched") or 0) > 0:
+            continue
+        if task.get("prefetched"):
+            continue
+        assigned_at = task.get("assigned_at")
+        if not isinstance(assigned_at, (int, float)) or now - float(assigned_at) <= threshold:
+            continue
+        stragglers.append((float(assigned_at), str(task_id)))
+    return [task_id for _, task_id in sorted(stragglers)]
+
+
+def _launch_project_task_hedge(config, project_id, task_id, swarm_id, node_id):
+    with SCHEDULER_LOCK:
+        project = PROJECTS.get(str(project_id))
+        task = ((project or {}).get("tasks") or {}).get(str(task_id))
+        if not task or task.get("status") != "assigned" or isinstance(task.get("hedge"), dict):
+            return False
+        if (str(task.get("assigned_swarm_id")), task.get("assigned_node_id")) == (str(swarm_id), int(node_id)):
+            return False
+        project_snapshot = copy.deepcopy(project)
+        task_snapshot = copy.deepcopy(task)
+        hedge_stats = task.setdefault("hedge_stats", {"launched": 0, "usage": _empty_usage_totals()})
+        # Count the attempt up front so a failed launch is not retried every tick.
+        hedge_stats["launched"] = int(hedge_stats.get("launched") or 0) + 1
+    swarm = SWARMS.get(str(swarm_id))
+    provider = _provider_for_swarm(str(swarm_id))
+    if not swarm or not provider:
+        return False
+    branch_name = f"{_project_task_branch_name(project_snapshot, task_snapshot)}-hedge"
+    request_id = f"project:{project_id}:{task_id}:hedge:{uuid.uuid4().hex[:8]}"
+    _mark_outstanding(str(swarm_id), node_id, +1)
+    _widen_project_sparse_checkout(project_snapshot, provider, swarm, node_id, task_snapshot)
+    success, injection_id, error = perform_injection(
+        config,
+        provider,
+        request_id,
+        str(swarm_id),
+        str(swarm.get("job_id")),
+        int(node_id),
+        _build_project_task_prompt(project_snapshot, task_snapshot, branch_name=branch_name),
+        count_outstanding=False,
+    )
+    if not success:
+        _mark_outstanding(str(swarm_id), node_id, -1)
+        print(f"[router WARN] hedge launch failed for {project_id}/{task_id}: {error}", file=sys.stderr, flush=True)
+        return False
+    now = time.time()
+    with SCHEDULER_LOCK:
+        project = PROJECTS.get(str(project_id))
+        task = ((project or {}).get("tasks") or {}).get(str(task_id))
+        if not task:
+            return False
+        task["hedge"] = {
+            "injection_id": injection_id,
+            "swarm_id": str(swarm_id),
+            "node_id": int(node_id),
+            "branch": branch_name,
+            "started_at": now,
+        }
+        task.setdefault("side_attempts", {})[str(injection_id)] = {"hedged": True, "usage": None}
+        task["updated_at"] = now
+        hedging = project.get("hedging")
+        if isinstance(hedging, dict):
+            hedging["launched"] = int(hedging.get("launched") or 0) + 1
+    emit_event("project_task_hedged", {
+        "project_id": str(project_id),
+        "task_id": str(task_id),
+        "swarm_id": str(swarm_id),
+        "node_id": int(node_id),
+        "branch": branch_name,
+        "injection_id": injection_id,
+        "elapsed_seconds": round(now - float(task_snapshot.get("assigned_at") or now), 3),
+    })
+    _emit_projects_updated()
+    save_state()
+    return True
+
+
+def _schedule_project_task_timer(project_id, task_id, kind, due_at):
+    """
+    Arm a ``deadline`` or ``retry`` timer for a task. Timers sit in a hashed
+    wheel of one-tick slots, so advancing the clock visits only the slots
+    that elapsed rather than every task. Caller holds SCHEDULER_LOCK.
+    """
+    global PROJECT_TASK_TIMER_TICK
+    if PROJECT_TASK_TIMER_TICK is None:
+        PROJECT_TASK_TIMER_TICK = int(time.time() // PROJECT_TASK_TIMER_TICK_SECONDS)
+    tick = max(int(float(due_at) // PROJECT_TASK_TIMER_TICK_SECONDS), PROJECT_TASK_TIMER_TICK)
+    slot = PROJECT_TASK_TIMER_WHEEL[tick % PROJECT_TASK_TIMER_SLOTS]
+    slot[(str(project_id), str(task_id), str(kind))] = float(due_at)
+
+
+def _pop_due_project_task_timers(now):
+    """Return the ``(project_id, task_id, kind)`` timers due by now. Caller holds SCHEDULER_LOCK."""
+    global PROJECT_TASK_TIMER_TICK
+    current = int(now // PROJECT_TASK_TIMER_TICK_SECONDS)
+    start = current if PROJECT_TASK_TIMER_TICK is None else PROJECT_TASK_TIMER_TICK
+    due = []
+    # One lap covers every slot; timers for later laps stay until their time.
+    for tick in range(max(start, current - PROJECT_TASK_TIMER_SLOTS + 1), current + 1):
+        slot = PROJECT_TASK_TIMER_WHEEL.get(tick % PROJECT_TASK_TIMER_SLOTS)
+        if not slot:
+            continue
+        for key, due_at in list(slot.items()):
+            if due_at <= now:
+                del slot[key]
+                due.append(key)
+    PROJECT_TASK_TIMER_TICK = current
+    return due
+
+
+def _arm_project_task_timers():
+    """Re-arm deadline and retry timers for tasks restored from state."""
+    with SCHEDULER_LOCK:
+        for project_id, project in PROJECTS.items():
+            if not isinstance(project, dict):
+                continue
+            for task_id, task in (project.get("tasks") or {}).items():
+                if not isinstance(task, dict):
+                    continue
+                if task.get("status") == "pending" and task.get("retry_not_before") is not None:
+                    _schedule_project_task_timer(project_id, task_id, "retry", task["retry_not_before"])
+                deadline = _project_task_retry_policy(project, task).get("deadline_seconds")
+                if task.get("status") == "assigned" and deadline:
+                    due_at = float(task.get("assigned_at") or time.time()) + float(deadline)
+                    _schedule_project_task_timer(project_id, task_id, "deadline", due_at)
+
+
+def _apply_project_task_failure(project_id, project, task, reason, now, failed_node=None):
+    """
+    Record a failed attempt against the task's retry policy. While attempts
+    remain the task goes back to pending behind an exponential backoff,
+    preferring a node other than failed_node; otherwise it is marked failed.
+    Returns the retry time, or None. Caller holds SCHEDULER_LOCK.
+    """
+    policy = _project_task_retry_policy(project, task)
+    failures = int(task.get("failed_attempts") or 0) + 1
+    task["failed_attempts"] = failures
+    task["last_error"] = reason
+    task["updated_at"] = now
+    if failures >= int(policy["max_attempts"]):
+        task["status"] = "failed"
+        task["retry_not_before"] = None
+        return None
+    delay = min(float(policy["backoff_max_seconds"]), float(policy["backoff_seconds"]) * 2 ** (failures - 1))
+    task["status"] = "pending"
+    task["retry_not_before"] = now + delay
+    swarm_id, node_id = failed_node or (None, None)
+    task["retry_avoid_node"] = (
+        [str(swarm_id), int(node_id)]
+        if policy["retry_on_different_node"] and swarm_id is not None and node_id is not None
+        else None
+    )
+    _schedule_project_task_timer(project_id, task.get("task_id"), "retry", task["retry_not_before"])
+    return task["retry_not_before"]
+
+
+def _emit_project_task_retry_scheduled(project_id, task, retry_at):
+    emit_event("project_task_retry_scheduled", {
+        "project_id": project_id,
+        "task_id": task.get("task_id"),
+        "failed_attempts": task.get("failed_attempts"),
+        "retry_at": retry_at,
+        "avoid_node": task.get("retry_avoid_node"),
+        "reason": task.get("last_error"),
+    })
+
+
+def _run_project_task_timers(config, now=None):
+    """
+    Fire due task timers. Assignments past their deadline are abandoned and
+    go through the retry policy; tasks whose backoff elapsed become ready.
+    """
+    now = time.time() if now is None else now
+    timed_out = []
+    released = False
+    with SCHEDULER_LOCK:
+        for project_id, task_id, kind in _pop_due_project_task_timers(now):
+            project = PROJECTS.get(project_id)
+            task = ((project or {}).get("tasks") or {}).get(task_id)
+            if not isinstance(task, dict):
+                continue
+            if kind == "retry":
+                retry_at = task.get("retry_not_before")
+                if task.get("status") != "pending" or retry_at is None:
+                    continue
+                if float(retry_at) > now:
+                    _schedule_project_task_timer(project_id, task_id, "retry", retry_at)
+                    continue
+                task["retry_not_before"] = None
+                task["updated_at"] = now
+                _refresh_project_status(project)
+                released = True
+                continue
+            deadline = _project_task_retry_policy(project, task).get("deadline_seconds")
+            if task.get("status") != "assigned" or not deadline:
+                continue
+            if task.get("prefetched"):
+                # Still held behind another turn; the clock starts when it runs.
+                _schedule_project_task_timer(project_id, task_id, "deadline", now + float(deadline))
+                continue
+            due_at = float(task.get("assigned_at") or now) + float(deadline)
+            if due_at > now:
+                _schedule_project_task_timer(project_id, task_id, "deadline", due_at)
+                continue
+            # The abandoned attempts keep running; their usage is still
+            # accounted but their results are ignored.
+            failed_node = (task.get("assigned_swarm_id"), task.get("assigned_node_id"))
+            side_attempts = task.setdefault("side_attempts", {})
+            side_attempts[str(task.get("assignment_injection_id") or "")] = {
+                "hedged": bool(task.get("assignment_hedged")),
+                "usage": task.get("active_attempt_usage"),
+            }
+            hedge = task.get("hedge")
+            if isinstance(hedge, dict):
+                side_attempts.setdefault(str(hedge.get("injection_id") or ""), {"hedged": True, "usage": None})
+            task["hedge"] = None
+            task["assigned_swarm_id"] = None
+            task["assigned_node_id"] = None
+            task["assignment_injection_id"] = None
+            task["active_attempt_usage"] = None
+            retry_at = _apply_project_task_failure(
+                project_id,
+                project,
+                task,
+                f"Task exceeded its {float(deadline):g}s deadline",
+                now,
+                failed_node,
+            )
+            _refresh_project_status(project)
+            timed_out.append((project_id, project, task, failed_node, float(deadline), retry_at))
+
+    for project_id, project, task, failed_node, deadline, retry_at in timed_out:
+        _sync_task_status_to_beads(project, task)
+        emit_event("project_task_timed_out", {
+            "project_id": project_id,
+            "task_id": task.get("task_id"),
+            "swarm_id": failed_node[0],
+            "node_id": failed_node[1],
+            "deadline_seconds": deadline,
+            "retry_at": retry_at,
+        })
+        if retry_at is not None:
+            _emit_project_task_retry_scheduled(project_id, task, retry_at)
+    if timed_out or released:
+        _emit_projects_updated()
+        save_state()
+        _dispatch_project_tasks(config)
+    return len(timed_out)
+
+
+def _hedge_project_stragglers(config):
+    """
+    Launch a duplicate attempt of each straggling task on an idle worker.
+    A task straggles once it has run longer than the project's hedging
+    percentile of completed task durations. Ready tasks always take idle
+    workers first.
+    """
+    launched = False
+    with SCHEDULER_LOCK:
+        project_ids = list(PROJECTS.keys())
+    for project_id in project_ids:
+        attempted = set()
+        while True:
+            with SCHEDULER_LOCK:
+                project = PROJECTS.get(str(project_id))
+                if not project or project.get("status") != "running":
+                    break
+                if not (project.get("hedging") or {}).get("enabled"):
+                    break
+                task_ids = project.get("task_order") or list((project.get("tasks") or {}).keys())
+                if any(_project_task_is_ready(project, task_id) for task_id in task_ids):
+                    break
+                candidates = [
+                    task_id for task_id in _project_hedge_candidates(project, time.time()) if task_id not in attempted
+                ]
+            if not candidates:
+                break
+            swarm_id, node_id = _project_first_idle_target(project)
+            if swarm_id is None or node_id is None:
+                break
+            attempted.add(candidates[0])
+            launched = _launch_project_task_hedge(config, project_id, candidates[0], swarm_id, node_id) or launched
+    return launched
+
+
+def _promote_task_hedge(task):
+    """
+    Make the task's hedge its assignment; the primary becomes a side attempt
+    whose result is ignored. Caller holds SCHEDULER_LOCK.
+    """
+    hedge = task.get("hedge")
+    if not isinstance(hedge, dict):
+        return False
+    side_attempts = task.setdefault("side_attempts", {})
+    side_attempts[str(task.get("assignment_injection_id") or "")] = {
+        "hedged": bool(task.get("assignment_hedged")),
+        "usage": task.get("active_attempt_usage"),
+    }
+    promoted = side_attempts.pop(str(hedge.get("injection_id")), None) or {}
+    task["assignment_injection_id"] = hedge.get("injection_id")
+    task["assigned_swarm_id"] = hedge.get("swarm_id")
+    task["assigned_node_id"] = hedge.get("node_id")
+    task["last_assigned_swarm_id"] = hedge.get("swarm_id")
+    task["last_assigned_node_id"] = hedge.get("node_id")
+    task["active_attempt_usage"] = promoted.get("usage")
+    task["assignment_hedged"] = True
+    task["branch"] = hedge.get("branch")
+    task["hedge"] = None
+    return True
+
+
+def _settle_hedged_task_result(project_id, task_id, attempt, data, project_snapshot):
+    """
+    Judge one side of a hedged task. The first attempt whose branch passes
+    _verify_task_branch_state wins and becomes the task's assignment; the
+    other keeps running, but its result is ignored. Returns True when this
+    attempt won and its result should be recorded.
+    """
+    raw_text = _extract_text_content(data.get("last_agent_message")) or ""
+    parsed = _parse_task_result_block(raw_text)
+    verified = False
+    reason = "TASK_RESULT block missing or malformed"
+    if isinstance(parsed, dict):
+        result_status = str(parsed.get("status") or "").strip().lower()
+        reason = parsed.get("notes") or result_status or reason
+        if result_status == "done":
+            try:
+                repo_dir, _ = _refresh_project_repo_for_task_results(project_snapshot)
+                verification = _verify_task_branch_state(
+                    project_snapshot,
+                    {"branch": parsed.get("branch"), "head_commit": parsed.get("head_commit")},
+                    repo_dir,
+                )
+                verified = bool(verification.get("recoverable"))
+                reason = verification.get("reason")
+            except Exception as e:
+                reason = str(e)
+
+    now = time.time()
+    with SCHEDULER_LOCK:
+        project = PROJECTS.get(str(project_id))
+        task = ((project or {}).get("tasks") or {}).get(str(task_id))
+        if not task:
+            return False
+        hedge = task.get("hedge")
+        current = _project_task_attempt(task, data.get("injection_id")) if data.get("injection_id") else attempt
+        if not isinstance(hedge, dict):
+            return current == "primary"
+        if current not in ("primary", "hedge"):
+            return False
+        promote_hedge = (current == "hedge") == verified
+        if promote_hedge:
+            _promote_task_hedge(task)
+        task["hedge"] = None
+        task["hedge_outcome"] = {
+            "attempt": current,
+            "verified": verified,
+            "reason": reason,
+            "at": now,
+        }
+        task["updated_at"] = now
+        hedging = project.get("hedging")
+        if verified and isinstance(hedging, dict):
+            key = "hedge_wins" if current == "hedge" else "primary_wins"
+            hedging[key] = int(hedging.get(key) or 0) + 1
+        if not verified:
+            task["last_error"] = reason
+    if not verified:
+        _emit_projects_updated()
+        save_state()
+    return verified
+
+
+def _new_project_merge_train(enabled=False):
+    return {
+        "enabled": bool(enabled),
+        "status": "idle",
+        "branch": None,
+        "head_commit": None,
+        "merges": [],
+        "clean_merges": 0,
+        "conflicts": 0,
+        "merge_seconds": 0.0,
+        "last_error": None,
+        "updated_at": None,
+    }
+
+
+def _project_merge_train(project):
+    train = (project or {}).get("merge_train")
+    if isinstance(train, dict) and train.get("enabled"):
+        return train
+    return None
+
+
+def _project_merge_train_active(project):
+    train = _project_merge_train(project)
+    return bool(train) and train.get("status") != "fallback"
+
+
+def _reset_project_merge_train(project):
+    train = _project_merge_train(project)
+    if not train:
+        return
+    project["merge_train"] = _new_project_merge_train(True)
+    for task in (project.get("tasks") or {}).values():
+        if isinstance(task, dict):
+            task["merge_state"] = None
+
+
+def _project_integration_task(project):
+    tasks = (project or {}).get("tasks") or {}
+    for task_id in (project or {}).get("task_order") or list(tasks.keys()):
+        task = tasks.get(task_id)
+        if isinstance(task, dict) and _task_is_integration(task):
+            return task
+    return None
+
+
+def _project_merge_train_candidates(project):
+    tasks = project.get("tasks") or {}
+    return [
+        str(task_id)
+        for task_id in project.get("task_order") or list(tasks.keys())
+        if isinstance(tasks.get(task_id), dict)
+        and tasks[task_id].get("status") == "completed"
+        and not _task_is_integration(tasks[task_id])
+        and not tasks[task_id].get("merge_state")
+    ]
+
+
+def _project_merge_train_ready_to_finalize(project):
+    integration = _project_integration_task(project)
+    if not integration or integration.get("status") not in ("pending", "ready"):
+        return False
+    tasks = project.get("tasks") or {}
+    for dep_id in integration.get("depends_on") or []:
+        dep = tasks.get(dep_id) or {}
+        if dep.get("status") != "completed" or dep.get("merge_state") not in ("merged", "escalated"):
+            return False
+    return True
+
+
+def _project_merge_train_has_work(project):
+    if not _project_merge_train_active(project):
+        return False
+    return bool(_project_merge_train_candidates(project)) or _project_merge_train_ready_to_finalize(project)
+
+
+def _git_merge_tree(repo_dir: Path, ours, theirs):
+    """
+    Test-merge two commits without a worktree. Returns ``(tree, conflicts)``;
+    tree is None when the merge has conflicts.
+    """
+    completed = _run_git(repo_dir, ["merge-tree", "--write-tree", "--name-only", "--no-messages", ours, theirs])
+    lines = [line.strip() for line in str(completed.stdout or "").splitlines() if line.strip()]
+    if completed.returncode == 0 and lines:
+        return lines[0], []
+    if completed.returncode == 1 and lines:
+        return None, sorted(set(lines[1:]))
+    detail = completed.stderr.strip() or completed.stdout.strip() or "git merge-tree failed"
+    raise RuntimeError(detail)
+
+
+def _merge_train_step(repo_dir: Path, tip, task_id, branch):
+    started = time.time()
+    record = {
+        "task_id": task_id,
+        "branch": branch,
+        "task_commit": None,
+        "result": None,
+        "conflict_paths": [],
+        "train_commit": tip,
+        "at": started,
+    }
+    task_tip = _git_resolve_revision(
+        repo_dir,
+        [f"origin/{branch}", f"refs/remotes/origin/{branch}", branch, f"refs/heads/{branch}"],
+    )
+    record["task_commit"] = task_tip
+    if not task_tip:
+        record["result"] = "error"
+        record["error"] = f"Task branch {branch} was not found"
+    elif _git_is_ancestor(repo_dir, task_tip, tip):
+        record["result"] = "already_merged"
+    elif _git_is_ancestor(repo_dir, tip, task_tip):
+        record["result"] = "fast_forward"
+        record["train_commit"] = task_tip
+    else:
+        tree, conflicts = _git_merge_tree(repo_dir, tip, task_tip)
+        if tree is None:
+            record["result"] = "conflict"
+            record["conflict_paths"] = conflicts
+        else:
+            commit = _run_git(
+                repo_dir,
+                ["commit-tree", tree, "-p", tip, "-p", task_tip, "-m", f"Merge {branch} ({task_id}) into integration"],
+            )
+            if commit.returncode != 0:
+                raise RuntimeError(commit.stderr.strip() or "git commit-tree failed")
+            record["result"] = "clean"
+            record["train_commit"] = commit.stdout.strip()
+    record["seconds"] = round(time.time() - started, 3)
+    return record
+
+
+def _build_merge_resolution_task(project, task, record):
+    tasks = project.get("tasks") or {}
+    train = _project_merge_train(project) or {}
+    integration_branch = train.get("branch") or ""
+    conflict_lines = "\n".join(f"- {path}" for path in record.get("conflict_paths") or []) or "- (not reported)"
+    return {
+        "task_id": _next_project_task_id(set(tasks.keys())),
+        "title": f"Resolve merge conflicts for {task.get('task_id')}",
+        "prompt": (
+            f"The router merge train could not merge `{record.get('branch')}` ({task.get('task_id')}: {task.get('title')}) "
+            f"into the rolling integration branch `{integration_branch}` automatically.\n"
+            f"Start your working branch from integration commit `{record.get('train_commit')}` "
+            f"(fetch `{integration_branch}` from `origin` first if the commit is not available locally), "
+            f"then merge `{record.get('branch')}` into it and resolve the conflicts, preserving the intent of both sides.\n"
+            "Conflicting paths:\n"
+            f"{conflict_lines}\n"
+            "Run the verification relevant to the conflicting paths before committing the merge."
+        ),
+        "acceptance_criteria": [
+            f"The working branch contains integration commit {record.get('train_commit')} and every commit of {record.get('branch')}.",
+            "All merge conflicts are resolved and the merge is committed.",
+        ],
+        "depends_on": [str(task.get("task_id"))],
+        "owned_paths": list(record.get("conflict_paths") or []),
+        "expected_touch_paths": [],
+        "task_kind": "merge",
+        "system_generated": True,
+    }
+
+
+def _advance_project_merge_train(project_id):
+    """
+    Merge every completed, not yet merged task branch into the project's
+    rolling integration branch. Clean merges are committed router-side with
+    ``git merge-tree``; conflicting ones become merge-resolution tasks for an
+    agent. Once every branch is in, the integration task is completed without
+    an agent turn.
+    """
+    with SCHEDULER_LOCK:
+        project = PROJECTS.get(str(project_id))
+        if not project or not _project_merge_train_has_work(project):
+            return
+        snapshot = copy.deepcopy(project)
+    train = _project_merge_train(snapshot)
+    integration = _project_integration_task(snapshot)
+    branch = train.get("branch") or _project_task_branch_name(snapshot, integration or {"task_kind": "integration"})
+    repo_dir, source_url = _refresh_project_repo_for_task_results(snapshot)
+    _ensure_git_identity(repo_dir)
+    tip = train.get("head_commit")
+    if not tip:
+        base_branch = str(snapshot.get("base_branch") or "main").strip() or "main"
+        tip = _git_resolve_revision(
+            repo_dir,
+            [f"origin/{base_branch}", f"refs/remotes/origin/{base_branch}", base_branch, f"refs/heads/{base_branch}", "HEAD"],
+        )
+        if not tip:
+            raise RuntimeError(f"Base branch {base_branch} was not found")
+
+    records = []
+    for task_id in _project_merge_train_candidates(snapshot):
+        task = snapshot["tasks"][task_id]
+        task_branch = str(task.get("branch") or "").strip() or _project_task_branch_name(snapshot, task)
+        record = _merge_train_step(repo_dir, tip, task_id, task_branch)
+        records.append(record)
+        if record["result"] == "error":
+            break
+        tip = record["train_commit"]
+        emit_event("project_merge_train_merge", {"project_id": str(project_id), **record})
+
+    escalate = any(record["result"] == "conflict" for record in records)
+    finalize = False
+    if not any(record["result"] == "error" for record in records):
+        for record in records:
+            snapshot["tasks"][record["task_id"]]["merge_state"] = "merged" if record["result"] != "conflict" else "escalated"
+        finalize = _project_merge_train_ready_to_finalize(snapshot)
+    update = _run_git(repo_dir, ["update-ref", f"refs/heads/{branch}", tip])
+    if update.returncode != 0:
+        raise RuntimeError(update.stderr.strip() or f"Failed to update {branch}")
+    if (escalate or finalize) and _git_has_remote(repo_dir):
+        push = _run_git(repo_dir, ["push", "origin", f"+{tip}:refs/heads/{branch}"])
+        if push.returncode != 0:
+            raise RuntimeError(push.stderr.strip() or push.stdout.strip() or f"Failed to push {branch}")
+        if source_url:
+            _mark_project_repo_mirror_stale(source_url)
+
+    changed_tasks = []
+    with SCHEDULER_LOCK:
+        project = PROJECTS.get(str(project_id))
+        train = _project_merge_train(project)
+        if not project or not train:
+            return
+        tasks = project.get("tasks") or {}
+        integration = _project_integration_task(project)
+        now = time.time()
+        train["branch"] = branch
+        train["head_commit"] = tip
+        train["status"] = "running"
+        train["updated_at"] = now
+        for record in records:
+            task = tasks.get(record["task_id"])
+            if not task:
+                continue
+            train["merges"].append(record)
+            train["merge_seconds"] = round(float(train.get("merge_seconds") or 0.0) + record["seconds"], 3)
+            if record["result"] == "error":
+                train["status"] = "fallback"
+                train["last_error"] = record.get("error")
+                task["merge_state"] = "error"
+                continue
+            if record["result"] != "conflict":
+                train["clean_merges"] = int(train.get("clean_merges") or 0) + 1
+                task["merge_state"] = "merged"
+                continue
+            train["conflicts"] = int(train.get("conflicts") or 0) + 1
+            task["merge_state"] = "escalated"
+            resolver_id = str(task.get("merge_resolved_by") or "")
+            if resolver_id in tasks:
+                continue
+            resolver = _normalize_task_payload(_build_merge_resolution_task(project, task, record), len(tasks))
+            resolver_id = resolver["task_id"]
+            tasks[resolver_id] = resolver
+            order = project.setdefault("task_order", [])
+            integration_id = str((integration or {}).get("task_id") or "")
+            order.insert(order.index(integration_id) if integration_id in order else len(order), resolver_id)
+            task["merge_resolved_by"] = resolver_id
+            if integration is not None:
+                integration.setdefault("depends_on", []).append(resolver_id)
+                integration["prompt"] = (
+                    str(integration.get("prompt") or "")
+                    + f"- {resolver_id}: {_project_task_branch_name(project, resolver)} (resolves merge conflicts for {task.get('task_id')})\n"
+                )
+            _update_project_task_priorities(project, [resolver_id])
+            changed_tasks.append(resolver)
+        if train.get("status") != "fallback" and integration is not None and _project_merge_train_ready_to_finalize(project):
+            integration["status"] = "completed"
+            integration["result_status"] = "merged_by_router"
+            integration["branch"] = branch
+            integration["head_commit"] = tip
+            integration["verified_branch_commit"] = tip
+            integration["verified_at"] = now
+            integration["last_error"] = None
+            integration["updated_at"] = now
+            project["integration_branch"] = branch
+            project["integration_head_commit"] = tip
+            project["final_result_branch"] = branch
+            project["final_result_head_commit"] = tip
+            train["status"] = "completed"
+            changed_tasks.append(integration)
+        _refresh_project_status(project)
+        project_ref = project
+    for task in changed_tasks:
+        _sync_task_status_to_beads(project_ref, task)
+    _emit_projects_updated()
+    save_state()
+    if changed_tasks or train.get("status") == "fallback":
+        _dispatch_project_tasks(config=None)
+
+
+def _run_project_merge_train(project_id):
+    while True:
+        try:
+            _advance_project_merge_train(project_id)
+        except Exception as e:
+            print(f"[router WARN] merge train failed for project {project_id}: {e}", file=sys.stderr, flush=True)
+            with SCHEDULER_LOCK:
+                project = PROJECTS.get(str(project_id))
+                train = _project_merge_train(project)
+                if train:
+                    train["status"] = "fallback"
+                    train["last_error"] = str(e)
+                    train["updated_at"] = time.time()
+                    _refresh_project_status(project)
+            _emit_projects_updated()
+            save_state()
+            _dispatch_project_tasks(config=None)
+        with SCHEDULER_LOCK:
+            if PROJECT_MERGE_TRAIN_RUNS.get(str(project_id)):
+                PROJECT_MERGE_TRAIN_RUNS[str(project_id)] = False
+                continue
+            PROJECT_MERGE_TRAIN_RUNS.pop(str(project_id), None)
+            return
+
+
+def _schedule_project_merge_train(project_id):
+    project_id = str(project_id)
+    with SCHEDULER_LOCK:
+        if project_id in PROJECT_MERGE_TRAIN_RUNS:
+            # A run is in flight; have it take another pass when it finishes.
+            PROJECT_MERGE_TRAIN_RUNS[project_id] = True
+            return
+        PROJECT_MERGE_TRAIN_RUNS[project_id] = False
+    threading.Thread(target=_run_project_merge_train, args=(project_id,), daemon=True).start()
+
+
 def _verify_task_branch_state(project, task, repo_dir: Path):
     branch = str((task or {}).get("branch") or "").strip()
     if not branch:
@@ -3783,6 +6363,7 @@ def _reconcile_project_for_resume(project, retry_failed=False, reverify_complete
             task["assigned_node_id"] = None
             task["assignment_injection_id"] = None
             task["active_attempt_usage"] = None
+            task["hedge"] = None
             if verification.get("recoverable"):
                 task["status"] = "completed"
                 task["result_status"] = str(task.get("result_status") or "recovered_from_branch")
@@ -3803,6 +6384,9 @@ def _reconcile_project_for_resume(project, retry_failed=False, reverify_complete
                 _reset_project_integration_result(project)
         elif status == "failed" and retry_failed:
             task["status"] = "pending"
+            task["failed_attempts"] = 0
+            task["retry_not_before"] = None
+            task["retry_avoid_node"] = None
             task["assigned_swarm_id"] = None
             task["assigned_node_id"] = None
             task["assignment_injection_id"] = None
@@ -3852,7 +6436,9 @@ def _reconcile_project_for_resume(project, retry_failed=False, reverify_complete
     integration_completed = any(_task_is_integration(task) and task.get("status") == "completed" for task in tasks.values())
     if not integration_completed:
         _reset_project_integration_result(project)
+        _reset_project_merge_train(project)
 
+    _update_project_task_priorities(project)
     _refresh_project_status(project)
     return sorted(changed_task_ids), summary
 
@@ -4015,6 +6601,9 @@ def _resume_project_async(
                     str(project.get("repo_path")),
                     branch=project.get("base_branch"),
                     subdir=project.get("workspace_subdir") or "repo",
+                    worker_progress_cb=_repo_worker_progress_cb(project_id, str(swarm_id)),
+                    sparse_checkout=bool(project.get("sparse_checkout")),
+                    sparse_paths=project.get("sparse_always_include") or [],
                 )
                 preparation[str(swarm_id)] = prepared
             project["repo_preparation"] = preparation
@@ -4079,6 +6668,9 @@ def _start_project_async(project_id, request_id):
                     str(project.get("repo_path")),
                     branch=project.get("base_branch"),
                     subdir=project.get("workspace_subdir") or "repo",
+                    worker_progress_cb=_repo_worker_progress_cb(project_id, str(swarm_id)),
+                    sparse_checkout=bool(project.get("sparse_checkout")),
+                    sparse_paths=project.get("sparse_always_include") or [],
                 )
                 preparation[str(swarm_id)] = prepared
             with SCHEDULER_LOCK:
@@ -4113,85 +6705,170 @@ def _start_project_async(project_id, request_id):
     threading.Thread(target=_run_project_start, daemon=True).start()
 
 
+def _project_under_concurrency_cap(project):
+    cap = (project.get("fair_share") or {}).get("max_concurrency")
+    if not cap:
+        return True
+    assigned = sum(1 for task in (project.get("tasks") or {}).values() if task.get("status") == "assigned")
+    return assigned < int(cap)
+
+
+def _record_project_dispatch_wait(project, task, now):
+    fair_share = project.get("fair_share")
+    if not isinstance(fair_share, dict):
+        return
+    ready_at = task.get("ready_at")
+    wait = max(0.0, now - float(ready_at)) if isinstance(ready_at, (int, float)) else 0.0
+    fair_share["dispatched"] = int(fair_share.get("dispatched") or 0) + 1
+    fair_share["wait_samples"] = int(fair_share.get("wait_samples") or 0) + 1
+    fair_share["wait_seconds_total"] = round(float(fair_share.get("wait_seconds_total") or 0.0) + wait, 3)
+    fair_share["mean_wait_seconds"] = round(fair_share["wait_seconds_total"] / fair_share["wait_samples"], 3)
+    fair_share["max_wait_seconds"] = round(max(float(fair_share.get("max_wait_seconds") or 0.0), wait), 3)
+    fair_share["last_wait_seconds"] = round(wait, 3)
+    task["ready_at"] = None
+    task["last_wait_seconds"] = round(wait, 3)
+
+
+def _dispatch_next_project_task(config, project_id):
+    """
+    Inject the project's highest-priority ready task into an idle worker.
+    Returns ``dispatched``, ``no_target`` or ``failed``.
+    """
+    with SCHEDULER_LOCK:
+        project = PROJECTS.get(str(project_id))
+        ready_task = _project_next_ready_task(project) if project else None
+        if not ready_task:
+            return "no_target"
+    swarm_id, node_id = _project_first_idle_target(project, ready_task.get("retry_avoid_node"))
+    prefetch = False
+    if swarm_id is None or node_id is None:
+        swarm_id, node_id = _project_prefetch_target(project)
+        prefetch = swarm_id is not None
+    if swarm_id is None or node_id is None:
+        return "no_target"
+    with SCHEDULER_LOCK:
+        ready_task = _project_next_ready_task(project, (swarm_id, node_id))
+    if not ready_task:
+        return "no_target"
+    swarm = SWARMS.get(str(swarm_id))
+    provider = _provider_for_swarm(str(swarm_id))
+    if not swarm or not provider:
+        return "no_target"
+    task_prompt = _build_project_task_prompt(project, ready_task)
+    request_id = f"project:{project_id}:{ready_task.get('task_id')}:{uuid.uuid4().hex[:8]}"
+    branch_name = _project_task_branch_name(project, ready_task)
+    _mark_outstanding(str(swarm_id), node_id, +1)
+    _widen_project_sparse_checkout(project, provider, swarm, node_id, ready_task)
+    success, injection_id, error = perform_injection(
+        config,
+        provider,
+        request_id,
+        str(swarm_id),
+        str(swarm.get("job_id")),
+        int(node_id),
+        task_prompt,
+        count_outstanding=False,
+        hold=prefetch,
+    )
+    if not success:
+        _mark_outstanding(str(swarm_id), node_id, -1)
+        retry_at = None
+        with SCHEDULER_LOCK:
+            current_project = PROJECTS.get(str(project_id))
+            if current_project:
+                task = (current_project.get("tasks") or {}).get(str(ready_task.get("task_id")))
+                if task:
+                    retry_at = _apply_project_task_failure(
+                        project_id,
+                        current_project,
+                        task,
+                        error or "project injection failed",
+                        time.time(),
+                        (swarm_id, node_id),
+                    )
+                    _refresh_project_status(current_project)
+        if retry_at is not None:
+            _emit_project_task_retry_scheduled(project_id, task, retry_at)
+        _emit_projects_updated()
+        save_state()
+        return "failed"
+    project_ref = None
+    task_ref = None
+    with SCHEDULER_LOCK:
+        current_project = PROJECTS.get(str(project_id))
+        if current_project:
+            task = (current_project.get("tasks") or {}).get(str(ready_task.get("task_id")))
+            if task:
+                task["status"] = "assigned"
+                task["attempts"] = int(task.get("attempts") or 0) + 1
+                task["assigned_swarm_id"] = str(swarm_id)
+                task["assigned_node_id"] = int(node_id)
+                task["last_assigned_swarm_id"] = str(swarm_id)
+                task["last_assigned_node_id"] = int(node_id)
+                task["assignment_injection_id"] = injection_id
+                task["active_attempt_usage"] = None
+                task["assignment_hedged"] = False
+                task["hedge"] = None
+                task["prefetched"] = prefetch
+                task["prefetch_revoke_requested_at"] = None
+                task["branch"] = branch_name
+                task["last_error"] = None
+                task["retry_avoid_node"] = None
+                task["assigned_at"] = time.time()
+                task["updated_at"] = task["assigned_at"]
+                deadline = _project_task_retry_policy(current_project, task).get("deadline_seconds")
+                if deadline:
+                    _schedule_project_task_timer(project_id, task["task_id"], "deadline", task["assigned_at"] + deadline)
+                if prefetch:
+                    PROJECT_PREFETCHED_INJECTIONS[str(injection_id)] = (
+                        str(project_id),
+                        str(task["task_id"]),
+                        _node_key(swarm_id, node_id),
+                    )
+                _record_project_dispatch_wait(current_project, task, task["assigned_at"])
+                _fair_share_charge("project", str(project_id), (current_project.get("fair_share") or {}).get("weight"))
+                _refresh_project_status(current_project)
+                project_ref = current_project
+                task_ref = task
+    _sync_task_status_to_beads(project_ref, task_ref)
+    _emit_projects_updated()
+    save_state()
+    return "dispatched"
+
+
 def _dispatch_project_tasks(config):
+    """
+    Dispatch ready project tasks to idle workers. Projects sharing workers get
+    turns by weighted fair share; a project at its max_concurrency, or with no
+    idle worker, sits out until the next call.
+    """
+    _revoke_stale_project_prefetches()
     scheduled = False
-    with SCHEDULER_LOCK:
-        project_ids = list(PROJECTS.keys())
-    for project_id in project_ids:
-        while True:
-            with SCHEDULER_LOCK:
-                project = PROJECTS.get(str(project_id))
-                if not project or project.get("status") != "running":
-                    break
-                ready_task = None
-                for task_id in project.get("task_order") or list((project.get("tasks") or {}).keys()):
-                    task = (project.get("tasks") or {}).get(task_id)
-                    if task and _project_task_is_ready(project, task_id):
-                        ready_task = task
-                        break
-                if not ready_task:
+    sitting_out = set()
+    merge_train_project_ids = set()
+    while True:
+        with SCHEDULER_LOCK:
+            candidates = []
+            for project_id, project in PROJECTS.items():
+                if project_id in sitting_out or project.get("status") != "running":
+                    continue
+                if not _project_next_ready_task(project):
                     _refresh_project_status(project)
-                    break
-            swarm_id, node_id = _project_first_idle_target(project)
-            if swarm_id is None or node_id is None:
-                break
-            swarm = SWARMS.get(str(swarm_id))
-            provider = _provider_for_swarm(str(swarm_id))
-            if not swarm or not provider:
-                break
-            task_prompt = _build_project_task_prompt(project, ready_task)
-            request_id = f"project:{project_id}:{ready_task.get('task_id')}:{uuid.uuid4().hex[:8]}"
-            branch_name = _project_task_branch_name(project, ready_task)
-            _mark_outstanding(str(swarm_id), node_id, +1)
-            success, injection_id, error = perform_injection(
-                config,
-                provider,
-                request_id,
-                str(swarm_id),
-                str(swarm.get("job_id")),
-                int(node_id),
-                task_prompt,
-                count_outstanding=False,
-            )
-            if not success:
-                _mark_outstanding(str(swarm_id), node_id, -1)
-                with SCHEDULER_LOCK:
-                    current_project = PROJECTS.get(str(project_id))
-                    if current_project:
-                        task = (current_project.get("tasks") or {}).get(str(ready_task.get("task_id")))
-                        if task:
-                            task["status"] = "failed"
-                            task["last_error"] = error or "project injection failed"
-                            task["updated_at"] = time.time()
-                            _refresh_project_status(current_project)
-                _emit_projects_updated()
-                save_state()
-                break
-            project_ref = None
-            task_ref = None
-            with SCHEDULER_LOCK:
-                current_project = PROJECTS.get(str(project_id))
-                if current_project:
-                    task = (current_project.get("tasks") or {}).get(str(ready_task.get("task_id")))
-                    if task:
-                        task["status"] = "assigned"
-                        task["attempts"] = int(task.get("attempts") or 0) + 1
-                        task["assigned_swarm_id"] = str(swarm_id)
-                        task["assigned_node_id"] = int(node_id)
-                        task["last_assigned_swarm_id"] = str(swarm_id)
-                        task["last_assigned_node_id"] = int(node_id)
-                        task["assignment_injection_id"] = injection_id
-                        task["active_attempt_usage"] = None
-                        task["branch"] = branch_name
-                        task["last_error"] = None
-                        task["updated_at"] = time.time()
-                        _refresh_project_status(current_project)
-                        project_ref = current_project
-                        task_ref = task
-            _sync_task_status_to_beads(project_ref, task_ref)
+                    if _project_merge_train_has_work(project):
+                        merge_train_project_ids.add(project_id)
+                    continue
+                if not _project_under_concurrency_cap(project):
+                    continue
+                candidates.append((project_id, _fair_share_weight((project.get("fair_share") or {}).get("weight"))))
+            project_id = _fair_share_pick("project", candidates)
+        if project_id is None:
+            break
+        if _dispatch_next_project_task(config, project_id) == "dispatched":
             scheduled = True
-            _emit_projects_updated()
-            save_state()
+        else:
+            sitting_out.add(project_id)
+    for project_id in merge_train_project_ids:
+        _schedule_project_merge_train(project_id)
     return scheduled
 
 
@@ -4219,7 +6896,7 @@ def _mark_outstanding(swarm_id, node_id, delta):
         NODE_OUTSTANDING[key] = max(0, int(NODE_OUTSTANDING.get(key, 0)) + int(delta))
 
 
-def _first_idle_node_id(swarm_id):
+def _first_idle_node_id(swarm_id, exclude=None):
     swarm = SWARMS.get(str(swarm_id))
     if not swarm:
         return None
@@ -4227,6 +6904,8 @@ def _first_idle_node_id(swarm_id):
     fallback_node = None
     for node_id in range(node_count):
         key = _node_key(swarm_id, node_id)
+        if key in NODE_DOWN or key in NODE_RECOVERING or node_id == exclude:
+            continue
         if int(NODE_OUTSTANDING.get(key, 0)) == 0:
             if not bool(NODE_THREAD_ACTIVE.get(key, False)):
                 return node_id
@@ -4243,6 +6922,8 @@ def _first_quiescent_node_id(swarm_id):
         return None
     node_count = int(swarm.get("node_count") or 0)
     for node_id in range(node_count):
+        if _node_key(swarm_id, node_id) in NODE_DOWN:
+            continue
         if _is_node_quiescent(swarm_id, node_id):
             return node_id
     return None
@@ -4270,6 +6951,8 @@ def _first_available_node_id(swarm_id):
 
 def _is_node_quiescent(swarm_id, node_id):
     key = _node_key(swarm_id, node_id)
+    if key in NODE_RECOVERING:
+        return False
     outstanding = int(NODE_OUTSTANDING.get(key, 0))
     active = bool(NODE_THREAD_ACTIVE.get(key, False))
     return outstanding == 0 and not active
@@ -4305,6 +6988,402 @@ def _is_swarm_quiescent_for_termination(swarm_id):
         return True
 
 
+def _note_follower_heartbeat(event, now=None):
+    """Track which jobs' outbox streams the router is currently reading."""
+    now = time.time() if now is None else now
+    for job_id in event.get("jobs") or []:
+        stream = FOLLOWER_STREAMS.get(str(job_id))
+        if stream is None or now - float(stream.get("last_at") or 0) > FOLLOWER_STREAM_STALE_SECONDS:
+            # A new or resumed stream gives every node a full timeout to report in.
+            stream = FOLLOWER_STREAMS[str(job_id)] = {"resumed_at": now}
+        stream["last_at"] = now
+
+
+def _note_node_alive(swarm_id, node_id, heartbeat=False, now=None, busy=None):
+    """
+    Record output from a node. Only heartbeat records enrol a node in failure
+    detection, so workers that never write them are never judged. A node that
+    was only stalled may still be running the turn it had when marked down,
+    so it stays out of idle selection until a heartbeat reports ``busy:
+    false`` or the turn completes. Returns True when a down node came back.
+    """
+    if swarm_id is None or not isinstance(node_id, int):
+        return False
+    key = _node_key(swarm_id, node_id)
+    if not heartbeat and key not in NODE_LAST_SEEN:
+        return False
+    now = time.time() if now is None else now
+    NODE_LAST_SEEN[key] = now
+    down_since = NODE_DOWN.pop(key, None)
+    if busy is False:
+        released = key in NODE_RECOVERING
+        NODE_RECOVERING.discard(key)
+        if down_since is None:
+            return released
+    elif down_since is not None:
+        NODE_RECOVERING.add(key)
+    if down_since is None:
+        return False
+    emit_event("node_up", {
+        "swarm_id": key[0],
+        "node_id": key[1],
+        "down_seconds": round(now - down_since, 3),
+    })
+    return True
+
+
+def _detect_failed_nodes(config, now=None):
+    """
+    Mark nodes down that have been silent for NODE_HEARTBEAT_TIMEOUT_SECONDS
+    while their job's outbox stream was being read. Returns the keys marked.
+    """
+    if NODE_HEARTBEAT_TIMEOUT_SECONDS <= 0:
+        return []
+    now = time.time() if now is None else now
+    failed = []
+    for key, last_seen in list(NODE_LAST_SEEN.items()):
+        if key in NODE_DOWN:
+            continue
+        swarm = SWARMS.get(key[0])
+        if not swarm or swarm.get("status") in ("terminating", "terminated"):
+            continue
+        stream = FOLLOWER_STREAMS.get(str(swarm.get("job_id")))
+        if not stream or now - float(stream.get("last_at") or 0) > FOLLOWER_STREAM_STALE_SECONDS:
+            continue
+        silent_since = max(float(last_seen), float(stream.get("resumed_at") or 0))
+        if now - silent_since > NODE_HEARTBEAT_TIMEOUT_SECONDS:
+            _mark_node_down(config, key, now, now - float(last_seen))
+            failed.append(key)
+    return failed
+
+
+def _mark_node_down(config, key, now, silent_seconds):
+    """
+    Take a silent node out of scheduling and move its work elsewhere: project
+    tasks assigned to it fall back to their hedge or to pending, planner
+    injections are queued again and inter-swarm items return to the front of
+    their queue.
+    """
+    swarm_id, node_id = key
+    reason = f"Worker node {node_id} of swarm {swarm_id} stopped sending heartbeats"
+    requeued_tasks = []
+    requeued_plans = []
+    requeued_items = []
+    with SCHEDULER_LOCK:
+        NODE_DOWN[key] = now
+        NODE_OUTSTANDING[key] = 0
+        NODE_THREAD_ACTIVE[key] = False
+        for project_id, project in PROJECTS.items():
+            if not isinstance(project, dict):
+                continue
+            changed = False
+            for task_id, task in (project.get("tasks") or {}).items():
+                if not isinstance(task, dict) or task.get("status") != "assigned":
+                    continue
+                hedge = task.get("hedge")
+                if isinstance(hedge, dict) and (str(hedge.get("swarm_id")), hedge.get("node_id")) == key:
+                    task["hedge"] = None
+                    task["updated_at"] = now
+                    hedge = None
+                    changed = True
+                if (str(task.get("assigned_swarm_id")), task.get("assigned_node_id")) != key:
+                    continue
+                PROJECT_PREFETCHED_INJECTIONS.pop(str(task.get("assignment_injection_id") or ""), None)
+                task["prefetched"] = False
+                if isinstance(hedge, dict):
+                    _promote_task_hedge(task)
+                else:
+                    task["status"] = "pending"
+                    task["assigned_swarm_id"] = None
+                    task["assigned_node_id"] = None
+                    task["assignment_injection_id"] = None
+                    task["active_attempt_usage"] = None
+                    task["last_error"] = reason
+                    if _task_is_integration(task):
+                        _reset_project_integration_result(project)
+                task["updated_at"] = now
+                requeued_tasks.append((project, task))
+                changed = True
+            if changed:
+                _refresh_project_status(project)
+        for plan_id, plan in PENDING_PROJECT_PLANS.items():
+            if not isinstance(plan, dict) or plan.get("status") != "planning":
+                continue
+            if (str(plan.get("planner_swarm_id")), plan.get("planner_node_id")) != key:
+                continue
+            plan["status"] = "queued"
+            plan["injection_id"] = None
+            plan["planner_node_id"] = None
+            plan["last_error"] = reason
+            plan["updated_at"] = now
+            requeued_plans.append(str(plan_id))
+        for injection_id, inflight in list(INTER_SWARM_INFLIGHT.items()):
+            if inflight.get("node") != key:
+                continue
+            INTER_SWARM_INFLIGHT.pop(injection_id, None)
+            item = inflight["item"]
+            if item.get("map_reduce_id") and not _note_map_reduce_requeued(item):
+                continue
+            _insert_inter_swarm_item(INTER_SWARM_QUEUE[_inter_swarm_queue_key(item)], item, front=True)
+            requeued_items.append(item)
+
+    for project, task in requeued_tasks:
+        _sync_task_status_to_beads(project, task)
+    for item in requeued_items:
+        emit_event("inter_swarm_requeued", {
+            "queue_id": item.get("queue_id"),
+            "source_swarm_id": item.get("source_swarm_id"),
+            "target_swarm_id": item.get("target_swarm_id"),
+            "node_id": node_id,
+            "reason": reason,
+        })
+    swarm = SWARMS.get(swarm_id) or {}
+    emit_event("node_down", {
+        "swarm_id": swarm_id,
+        "node_id": node_id,
+        "job_id": swarm.get("job_id"),
+        "silent_seconds": round(silent_seconds, 3),
+        "requeued_task_ids": [str(task.get("task_id")) for _, task in requeued_tasks],
+        "requeued_plan_ids": requeued_plans,
+        "requeued_queue_ids": [item.get("queue_id") for item in requeued_items],
+    })
+    print(
+        f"[router WARN] node {node_id} of swarm {swarm_id} marked down after "
+        f"{silent_seconds:.0f}s without heartbeats",
+        file=sys.stderr,
+        flush=True,
+    )
+    if requeued_tasks or requeued_plans:
+        _emit_projects_updated()
+    if requeued_items:
+        _emit_queue_updated()
+    save_state()
+    _dispatch_inter_swarm_queue(config)
+    _dispatch_pending_project_plans(config)
+    _dispatch_project_tasks(config)
+
+
+def _autoscale_group_load(group_id, group, now):
+    """
+    Measure an autoscale group: live member swarms, nodes running or being
+    launched, quiescent nodes, and demand from ready project tasks and
+    queued inter-swarm items. Caller holds SCHEDULER_LOCK.
+    """
+    for request_id, launch in list(group["launching"].items()):
+        if now - float(launch.get("started_at") or 0) > AUTOSCALE_LAUNCH_TIMEOUT_SECONDS:
+            group["launching"].pop(request_id, None)
+    members = []
+    for swarm_id, swarm in SWARMS.items():
+        if swarm.get("autoscale_group") != group_id or swarm.get("status") in ("terminating", "terminated"):
+            continue
+        members.append(str(swarm_id))
+        group["launching"].pop(str(swarm.get("launch_request_id") or ""), None)
+    nodes = sum(int(SWARMS[swarm_id].get("node_count") or 0) for swarm_id in members)
+    launching_nodes = sum(int(launch.get("nodes") or 0) for launch in group["launching"].values())
+    idle = sum(
+        1
+        for swarm_id in members
+        for node_id in range(int(SWARMS[swarm_id].get("node_count") or 0))
+        if _node_key(swarm_id, node_id) not in NODE_DOWN and _is_node_quiescent(swarm_id, node_id)
+    )
+    ready = sum(
+        int((project.get("task_counts") or {}).get("ready") or 0)
+        for project in PROJECTS.values()
+        if project.get("autoscale_group") == group_id and project.get("status") == "running"
+    )
+    queued = sum(len(INTER_SWARM_QUEUE.get(swarm_id) or ()) for swarm_id in members)
+    if group.get("pool"):
+        queued += len(INTER_SWARM_QUEUE.get(f"{SWARM_POOL_QUEUE_PREFIX}{group['pool']}") or ())
+    return {
+        "members": members,
+        "nodes": nodes,
+        "launching_nodes": launching_nodes,
+        "idle_nodes": idle,
+        "demand": ready + queued,
+    }
+
+
+def _run_autoscaler(now=None):
+    """
+    Grow or shrink each autoscale group. A group launches another swarm from
+    its provider spec when demand has exceeded idle (and launching) nodes for
+    scale_up_after_seconds, or when it is below min_nodes. A member swarm
+    quiescent for scale_down_after_seconds is terminated while the group
+    stays at or above min_nodes. Launches and terminations go through the
+    regular swarm_launch and swarm_terminate commands.
+    """
+    now = time.time() if now is None else now
+    actions = []
+    with SCHEDULER_LOCK:
+        for group_id, group in AUTOSCALE_GROUPS.items():
+            load = _autoscale_group_load(group_id, group, now)
+            capacity = load["idle_nodes"] + load["launching_nodes"]
+            if load["demand"] > capacity:
+                if group["pressure_since"] is None:
+                    group["pressure_since"] = now
+            else:
+                group["pressure_since"] = None
+            total_nodes = load["nodes"] + load["launching_nodes"]
+            size = group["nodes_per_swarm"]
+            below_min = total_nodes < group["min_nodes"]
+            pressured = (
+                group["pressure_since"] is not None
+                and now - group["pressure_since"] >= group["scale_up_after_seconds"]
+            )
+            if below_min or pressured:
+                within_nodes = group["max_nodes"] is None or total_nodes + size <= group["max_nodes"]
+                within_cost = (
+                    group["max_hourly_cost_usd"] is None
+                    or (total_nodes + size) * group["node_hour_cost_usd"] <= group["max_hourly_cost_usd"]
+                )
+                if within_nodes and within_cost:
+                    request_id = f"autoscale:{group_id}:{uuid.uuid4().hex[:8]}"
+                    group["launching"][request_id] = {"started_at": now, "nodes": size}
+                    # Sustained pressure must build up again before the next launch.
+                    group["pressure_since"] = None
+                    group["launched"] += 1
+                    actions.append(("launch", group_id, request_id, "min_nodes" if below_min else "queue_depth", load))
+                    continue
+            quiet_since = group["quiet_since"]
+            for swarm_id in list(quiet_since):
+                if swarm_id not in load["members"]:
+                    quiet_since.pop(swarm_id, None)
+            if group["pressure_since"] is not None or load["demand"] > 0:
+                quiet_since.clear()
+                continue
+            for swarm_id in load["members"]:
+                quiet = not INTER_SWARM_QUEUE.get(swarm_id) and all(
+                    _is_node_quiescent(swarm_id, node_id)
+                    for node_id in range(int(SWARMS[swarm_id].get("node_count") or 0))
+                )
+                if not quiet:
+                    quiet_since.pop(swarm_id, None)
+                    continue
+                since = quiet_since.setdefault(swarm_id, now)
+                node_count = int(SWARMS[swarm_id].get("node_count") or 0)
+                if now - since < group["scale_down_after_seconds"] or total_nodes - node_count < group["min_nodes"]:
+                    continue
+                quiet_since.pop(swarm_id, None)
+                group["terminated"] += 1
+                total_nodes -= node_count
+                for project in PROJECTS.values():
+                    if project.get("autoscale_group") == group_id and swarm_id in (project.get("worker_swarm_ids") or []):
+                        project["worker_swarm_ids"] = [
+                            item for item in project["worker_swarm_ids"] if item != swarm_id
+                        ]
+                actions.append(("terminate", group_id, swarm_id, "cooldown", load))
+                break
+
+    for action, group_id, target, reason, load in actions:
+        group = AUTOSCALE_GROUPS[group_id]
+        if action == "launch":
+            request_id = target
+            COMMAND_QUEUE.put(json.dumps({
+                "protocol": PROTOCOL,
+                "command": "swarm_launch",
+                "request_id": request_id,
+                "payload": {
+                    "nodes": group["nodes_per_swarm"],
+                    "provider": group["provider"],
+                    "provider_params": dict(group["provider_params"]),
+                    "system_prompt": group["system_prompt"],
+                    "prefetch_depth": group["prefetch_depth"],
+                    "autoscale_group": group_id,
+                    "pool": group["pool"],
+                },
+            }))
+            swarm_id = None
+        else:
+            request_id = f"autoscale:{group_id}:{uuid.uuid4().hex[:8]}"
+            swarm_id = target
+            COMMAND_QUEUE.put(json.dumps({
+                "protocol": PROTOCOL,
+                "command": "swarm_terminate",
+                "request_id": request_id,
+                "payload": {"swarm_id": swarm_id},
+            }))
+        emit_event("autoscale_action", {
+            "group": group_id,
+            "action": action,
+            "reason": reason,
+            "request_id": request_id,
+            "swarm_id": swarm_id,
+            "nodes": load["nodes"],
+            "launching_nodes": load["launching_nodes"],
+            "idle_nodes": load["idle_nodes"],
+            "demand": load["demand"],
+        })
+    if any(action == "terminate" for action, *_ in actions):
+        _emit_projects_updated()
+        save_state()
+    return [(action, group_id, target) for action, group_id, target, _, _ in actions]
+
+
+def _autoscale_launch_failed(group_id, request_id, error):
+    group = AUTOSCALE_GROUPS.get(str(group_id))
+    if not group:
+        return
+    with SCHEDULER_LOCK:
+        group["launching"].pop(str(request_id), None)
+    print(f"[router WARN] autoscale launch for group {group_id} failed: {error}", file=sys.stderr, flush=True)
+
+
+def _attach_autoscaled_swarm(config, swarm_id):
+    """
+    Add a newly launched group swarm to the projects that scale with its
+    group. Running projects prepare the swarm's checkouts before it joins,
+    so no task is dispatched to a worker without the repository.
+    """
+    swarm = SWARMS.get(str(swarm_id)) or {}
+    group_id = swarm.get("autoscale_group")
+    if not group_id:
+        return
+    with SCHEDULER_LOCK:
+        project_ids = [
+            project_id
+            for project_id, project in PROJECTS.items()
+            if project.get("autoscale_group") == group_id and str(swarm_id) not in (project.get("worker_swarm_ids") or [])
+        ]
+
+    def _join(project_id):
+        project = PROJECTS.get(str(project_id))
+        if not project:
+            return
+        prepared = None
+        if project.get("status") == "running":
+            provider = _provider_for_swarm(str(swarm_id))
+            try:
+                prepared = provider.prepare_repository(
+                    str(swarm.get("job_id")),
+                    str(project.get("repo_path")),
+                    branch=project.get("base_branch"),
+                    subdir=project.get("workspace_subdir") or "repo",
+                    worker_progress_cb=_repo_worker_progress_cb(project_id, str(swarm_id)),
+                    sparse_checkout=bool(project.get("sparse_checkout")),
+                    sparse_paths=project.get("sparse_always_include") or [],
+                )
+            except Exception as e:
+                print(
+                    f"[router WARN] autoscaled swarm {swarm_id} could not join project {project_id}: {e}",
+                    file=sys.stderr,
+                    flush=True,
+                )
+                return
+        with SCHEDULER_LOCK:
+            project = PROJECTS.get(str(project_id))
+            if not project or str(swarm_id) in (project.get("worker_swarm_ids") or []):
+                return
+            project.setdefault("worker_swarm_ids", []).append(str(swarm_id))
+            if prepared is not None:
+                project.setdefault("repo_preparation", {})[str(swarm_id)] = prepared
+        _emit_projects_updated()
+        save_state()
+        _dispatch_project_tasks(config)
+
+    for project_id in project_ids:
+        threading.Thread(target=_join, args=(project_id,), daemon=True).start()
+
+
 def _finalize_swarm_termination(provider, request_id, swarm_id, job_id):
     swarm = SWARMS.get(str(swarm_id))
     if not swarm:
@@ -4321,6 +7400,10 @@ def _finalize_swarm_termination(provider, request_id, swarm_id, job_id):
             key = _node_key(swarm_id, node_id)
             NODE_THREAD_ACTIVE.pop(key, None)
             NODE_OUTSTANDING.pop(key, None)
+            NODE_LAST_SEEN.pop(key, None)
+            NODE_DOWN.pop(key, None)
+            NODE_RECOVERING.discard(key)
+        FOLLOWER_STREAMS.pop(str(job_id), None)
         stale_final_keys = [
             k for k in FINAL_ANSWER_SEEN
             if isinstance(k, tuple) and len(k) == 3 and str(k[0]) == str(swarm_id)
@@ -4334,6 +7417,12 @@ def _finalize_swarm_termination(provider, request_id, swarm_id, job_id):
     except Exception:
         pass
 
+    # Drop the job's blob references so unshared blobs are deleted (best-effort)
+    try:
+        provider.release_job_blobs(job_id)
+    except Exception as e:
+        print(f"[router WARN] blob release failed for job {job_id}: {e}", file=sys.stderr, flush=True)
+
     emit_event("swarm_terminated", {
         "request_id": request_id,
         "swarm_id": swarm_id
@@ -4341,6 +7430,8 @@ def _finalize_swarm_termination(provider, request_id, swarm_id, job_id):
 
     with SCHEDULER_LOCK:
         dropped = list(INTER_SWARM_QUEUE.pop(str(swarm_id), []))
+        for item in dropped:
+            _note_pipeline_queued(item, -1)
     for item in dropped:
         emit_event("inter_swarm_dropped", {
             "queue_id": item.get("queue_id"),
@@ -4596,158 +7687,891 @@ def _graceful_terminate_swarm(config, provider, request_id, swarm_id, terminate_
         TERMINATION_IN_PROGRESS.discard(str(swarm_id))
 
 
-def _dispatch_inter_swarm_queue(config):
+def _dispatch_inter_swarm_queue(config):
+    """
+    Route queued inter-swarm work to the first idle node in each target swarm.
+    Pool items go to the least-loaded member with an idle node. Expired items
+    are left to the run_daemon expiry tick.
+    """
+    with SCHEDULER_LOCK:
+        queue_keys = list(INTER_SWARM_QUEUE.keys())
+
+    for queue_key in queue_keys:
+        while True:
+            with SCHEDULER_LOCK:
+                queue_for_target = INTER_SWARM_QUEUE.get(queue_key)
+                if not queue_for_target:
+                    break
+                item = _next_inter_swarm_item(queue_key, queue_for_target)
+            if item is None:
+                break
+
+            target_pool = item.get("target_pool")
+            idle_node_id = None
+            if target_pool:
+                # Pools wait for a member rather than dropping; one may launch later.
+                target_swarm_id, idle_node_id = _pick_pool_target(target_pool)
+                if target_swarm_id is None:
+                    break
+            else:
+                target_swarm_id = queue_key
+                if PIPELINES and target_swarm_id in SWARMS and _pipeline_backpressured(target_swarm_id):
+                    break
+
+            target_swarm = SWARMS.get(str(target_swarm_id))
+            if not target_swarm or target_swarm.get("status") in ("terminated", "terminating"):
+                with SCHEDULER_LOCK:
+                    _remove_inter_swarm_item(queue_key, item)
+                emit_event("inter_swarm_dropped", {
+                    "queue_id": item.get("queue_id"),
+                    "source_swarm_id": item.get("source_swarm_id"),
+                    "target_swarm_id": target_swarm_id,
+                    "reason": "target swarm unavailable",
+                })
+                _emit_queue_updated()
+                save_state()
+                continue
+
+            target_provider = _provider_for_swarm(target_swarm_id)
+            if not target_provider:
+                with SCHEDULER_LOCK:
+                    _remove_inter_swarm_item(queue_key, item)
+                emit_event("inter_swarm_dropped", {
+                    "queue_id": item.get("queue_id"),
+                    "source_swarm_id": item.get("source_swarm_id"),
+                    "target_swarm_id": target_swarm_id,
+                    "reason": "provider unavailable",
+                })
+                _emit_queue_updated()
+                save_state()
+                continue
+
+            selector = item.get("selector") or "idle"
+            if selector in ("all", "nodes"):
+                job_id = target_swarm.get("job_id")
+                if not job_id:
+                    break
+                node_count = int(target_swarm.get("node_count") or 0)
+                if selector == "all":
+                    targets = [
+                        node_id for node_id in range(node_count)
+                        if _node_key(target_swarm_id, node_id) not in NODE_DOWN
+                    ]
+                else:
+                    raw_targets = item.get("nodes")
+                    targets = [
+                        node_id for node_id in (raw_targets if isinstance(raw_targets, list) else [])
+                        if isinstance(node_id, int) and 0 <= node_id < node_count
+                    ]
+
+                if not targets:
+                    with SCHEDULER_LOCK:
+                        _remove_inter_swarm_item(queue_key, item)
+                    emit_event("inter_swarm_dropped", {
+                        "queue_id": item.get("queue_id"),
+                        "source_swarm_id": item.get("source_swarm_id"),
+                        "target_swarm_id": target_swarm_id,
+                        "reason": "no valid target nodes",
+                    })
+                    _emit_queue_updated()
+                    save_state()
+                    continue
+
+                content = item.get("content")
+                request_id = item.get("request_id")
+                for node_id in targets:
+                    threading.Thread(
+                        target=perform_injection,
+                        args=(config, target_provider, request_id, str(target_swarm_id), str(job_id), int(node_id), content),
+                        daemon=True
+                    ).start()
+
+                with SCHEDULER_LOCK:
+                    _remove_inter_swarm_item(queue_key, item, dispatched=True)
+
+                emit_event("inter_swarm_dispatched", {
+                    "queue_id": item.get("queue_id"),
+                    "request_id": request_id,
+                    "source_swarm_id": item.get("source_swarm_id"),
+                    "target_swarm_id": target_swarm_id,
+                    "selector": selector,
+                    "nodes": targets if selector == "nodes" else None,
+                })
+                _emit_queue_updated()
+                save_state()
+                continue
+
+            if idle_node_id is None:
+                idle_node_id = _first_idle_node_id(target_swarm_id)
+            if idle_node_id is None:
+                break
+
+            request_id = item.get("request_id")
+            content = item.get("content")
+            job_id = target_swarm.get("job_id")
+
+            if not job_id:
+                break
+
+            # Reserve by incrementing before injection write; if inject fails it is reverted.
+            _mark_outstanding(target_swarm_id, idle_node_id, +1)
+            success, injection_id, error = perform_injection(
+                config,
+                target_provider,
+                request_id,
+                str(target_swarm_id),
+                str(job_id),
+                int(idle_node_id),
+                content,
+                count_outstanding=False,
+            )
+            if not success:
+                _mark_outstanding(target_swarm_id, idle_node_id, -1)
+                emit_event("inter_swarm_blocked", {
+                    "queue_id": item.get("queue_id"),
+                    "source_swarm_id": item.get("source_swarm_id"),
+                    "target_swarm_id": target_swarm_id,
+                    "target_pool": target_pool,
+                    "node_id": idle_node_id,
+                    "reason": error or "inject failed",
+                })
+                break
+
+            with SCHEDULER_LOCK:
+                _remove_inter_swarm_item(queue_key, item, dispatched=True)
+                # Kept until the turn completes so a node failure can requeue it.
+                INTER_SWARM_INFLIGHT[str(injection_id)] = {
+                    "item": item,
+                    "node": _node_key(target_swarm_id, idle_node_id),
+                    "dispatched_at": time.time(),
+                }
+                if item.get("pipeline_id"):
+                    _note_pipeline_dispatch(item, time.time())
+                if item.get("map_reduce_id"):
+                    _note_map_reduce_dispatch(item, target_swarm_id, idle_node_id, injection_id)
+
+            emit_event("inter_swarm_dispatched", {
+                "queue_id": item.get("queue_id"),
+                "request_id": request_id,
+                "source_swarm_id": item.get("source_swarm_id"),
+                "target_swarm_id": target_swarm_id,
+                "target_pool": target_pool,
+                "node_id": idle_node_id,
+                "injection_id": injection_id,
+            })
+            _emit_queue_updated()
+            save_state()
+
+
+def _map_reduce_shard_prompts(payload):
+    """
+    Shards for a map_reduce command as ``[(shard_id, prompt)]``: either the
+    ``shards`` list (strings or ``{shard_id, prompt}`` objects), or one
+    ``prompt`` repeated ``shard_count`` times with ``{shard_index}`` and
+    ``{shard_count}`` substituted. Returns None when the payload is invalid.
+    """
+    raw_shards = payload.get("shards")
+    shards = []
+    if isinstance(raw_shards, list):
+        for index, raw in enumerate(raw_shards):
+            if isinstance(raw, dict):
+                shard_id = str(raw.get("shard_id") if raw.get("shard_id") is not None else index)
+                prompt = raw.get("prompt")
+            else:
+                shard_id, prompt = str(index), raw
+            if not isinstance(prompt, str) or not prompt.strip():
+                return None
+            shards.append((shard_id, prompt))
+    else:
+        prompt = payload.get("prompt")
+        shard_count = _to_int(payload.get("shard_count"))
+        if not isinstance(prompt, str) or not prompt.strip() or not shard_count or shard_count < 1:
+            return None
+        shards = [
+            (
+                str(index),
+                prompt.replace("{shard_index}", str(index)).replace("{shard_count}", str(shard_count)),
+            )
+            for index in range(shard_count)
+        ]
+    if not shards or len({shard_id for shard_id, _prompt in shards}) != len(shards):
+        return None
+    return shards
+
+
+def _map_reduce_counts(job):
+    counts = {"total": len(job.get("shards") or {}), "queued": 0, "running": 0, "done": 0, "failed": 0, "cancelled": 0}
+    for shard in (job.get("shards") or {}).values():
+        status = shard.get("status")
+        if status in counts:
+            counts[status] += 1
+    return counts
+
+
+def _map_reduce_snapshot():
+    with SCHEDULER_LOCK:
+        jobs = []
+        for job in MAP_REDUCE_JOBS.values():
+            jobs.append({
+                "map_reduce_id": job.get("map_reduce_id"),
+                "request_id": job.get("request_id"),
+                "status": job.get("status"),
+                "target_swarm_id": job.get("target_swarm_id"),
+                "target_pool": job.get("target_pool"),
+                "quorum": job.get("quorum"),
+                "deadline": job.get("deadline"),
+                "shard_counts": _map_reduce_counts(job),
+                "shards": [
+                    {
+                        "shard_id": shard_id,
+                        "status": job["shards"][shard_id].get("status"),
+                        "swarm_id": job["shards"][shard_id].get("swarm_id"),
+                        "node_id": job["shards"][shard_id].get("node_id"),
+                    }
+                    for shard_id in job.get("shard_order") or []
+                ],
+                "reduce_swarm_id": job.get("reduce_swarm_id"),
+                "reduce_node_id": job.get("reduce_node_id"),
+                "reduce_deadline": job.get("reduce_deadline"),
+                "error": job.get("error"),
+                "created_at": job.get("created_at"),
+                "finished_at": job.get("finished_at"),
+            })
+        return jobs
+
+
+def _start_map_reduce(request_id, target_swarm_id, target_pool, shards, options):
+    """
+    Register a map-reduce job and queue one inter-swarm item per shard, so
+    shards spread over idle nodes through the regular queue dispatch.
+    """
+    now = time.time()
+    map_reduce_id = str(uuid.uuid4())
+    job = {
+        "map_reduce_id": map_reduce_id,
+        "request_id": request_id,
+        "status": "mapping",
+        "target_swarm_id": str(target_swarm_id) if target_swarm_id else None,
+        "target_pool": target_pool,
+        "shard_order": [shard_id for shard_id, _prompt in shards],
+        "shards": {
+            shard_id: {"shard_id": shard_id, "status": "queued", "result": None}
+            for shard_id, _prompt in shards
+        },
+        "quorum": options["quorum"],
+        "timeout_seconds": options.get("timeout_seconds"),
+        "deadline": now + options["timeout_seconds"] if options.get("timeout_seconds") else None,
+        "reduce_deadline": None,
+        "reduce_prompt": options.get("reduce_prompt"),
+        "reduce_swarm_id": options.get("reduce_swarm_id"),
+        "reduce_node_id": options.get("reduce_node_id"),
+        "reduce_injection_id": None,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "finished_at": None,
+    }
+    with SCHEDULER_LOCK:
+        MAP_REDUCE_JOBS[map_reduce_id] = job
+        for shard_id, prompt in shards:
+            item = {
+                "queue_id": str(uuid.uuid4()),
+                "request_id": request_id,
+                "source_swarm_id": None,
+                "target_swarm_id": job["target_swarm_id"],
+                "target_pool": target_pool,
+                "selector": "idle",
+                "nodes": None,
+                "content": prompt,
+                "weight": 1.0,
+                "priority": options["priority"],
+                "expires_at": None,
+                "map_reduce_id": map_reduce_id,
+                "shard_id": shard_id,
+                "created_at": now,
+            }
+            _insert_inter_swarm_item(INTER_SWARM_QUEUE[_inter_swarm_queue_key(item)], item)
+    emit_event("map_reduce_started", {
+        "request_id": request_id,
+        "map_reduce_id": map_reduce_id,
+        "target_swarm_id": job["target_swarm_id"],
+        "target_pool": target_pool,
+        "shard_ids": list(job["shard_order"]),
+        "quorum": job["quorum"],
+        "deadline": job["deadline"],
+    })
+    return map_reduce_id
+
+
+def _note_map_reduce_dispatch(item, swarm_id, node_id, injection_id):
+    """Call with SCHEDULER_LOCK held."""
+    job = MAP_REDUCE_JOBS.get(item.get("map_reduce_id"))
+    shard = (job or {}).get("shards", {}).get(item.get("shard_id"))
+    if not shard or job.get("status") != "mapping":
+        return
+    shard.update({
+        "status": "running",
+        "swarm_id": str(swarm_id),
+        "node_id": node_id,
+        "injection_id": str(injection_id),
+        "dispatched_at": time.time(),
+    })
+    MAP_REDUCE_INJECTIONS[str(injection_id)] = (job["map_reduce_id"], shard["shard_id"])
+
+
+def _note_map_reduce_requeued(item):
+    """
+    A shard's node failed. Returns False when the shard is no longer wanted
+    and its item should not go back to the queue. Call with SCHEDULER_LOCK held.
+    """
+    job = MAP_REDUCE_JOBS.get(item.get("map_reduce_id"))
+    shard = (job or {}).get("shards", {}).get(item.get("shard_id"))
+    if not shard or shard.get("status") != "running":
+        return False
+    MAP_REDUCE_INJECTIONS.pop(str(shard.get("injection_id") or ""), None)
+    shard.update({"status": "queued", "swarm_id": None, "node_id": None, "injection_id": None})
+    return True
+
+
+def _finish_map_reduce(job, status, now, error=None):
+    """Call with SCHEDULER_LOCK held."""
+    job["status"] = status
+    job["error"] = error
+    job["finished_at"] = now
+    for injection_id, (map_reduce_id, _shard_id) in list(MAP_REDUCE_INJECTIONS.items()):
+        if map_reduce_id == job["map_reduce_id"]:
+            MAP_REDUCE_INJECTIONS.pop(injection_id, None)
+    finished = sorted(
+        (item for item in MAP_REDUCE_JOBS.values() if item.get("finished_at")),
+        key=lambda item: item["finished_at"],
+    )
+    for stale in finished[:-MAP_REDUCE_HISTORY_LIMIT]:
+        MAP_REDUCE_JOBS.pop(stale["map_reduce_id"], None)
+
+
+def _map_reduce_finished_event(job):
+    return {
+        "request_id": job.get("request_id"),
+        "map_reduce_id": job.get("map_reduce_id"),
+        "status": job.get("status"),
+        "error": job.get("error"),
+        "shard_counts": _map_reduce_counts(job),
+        "results": {
+            shard_id: job["shards"][shard_id].get("result")
+            for shard_id in job.get("shard_order") or []
+            if job["shards"][shard_id].get("status") == "done"
+        },
+        "result": job.get("result"),
+        "reduce_swarm_id": job.get("reduce_swarm_id"),
+        "reduce_node_id": job.get("reduce_node_id"),
+        "seconds": round(float(job.get("finished_at") or 0) - float(job.get("created_at") or 0), 3),
+    }
+
+
+def _map_reduce_reduce_prompt(job):
+    done = [
+        job["shards"][shard_id]
+        for shard_id in job.get("shard_order") or []
+        if job["shards"][shard_id].get("status") == "done"
+    ]
+    sections = [f"Collected {len(done)} of {len(job.get('shard_order') or [])} shard results."]
+    for shard in done:
+        sections.append(f"## Shard {shard['shard_id']}\n{shard.get('result') or ''}".rstrip())
+    results = "\n\n".join(sections)
+    prompt = job.get("reduce_prompt") or ""
+    if "{results}" in prompt:
+        return prompt.replace("{results}", results)
+    return f"{prompt.rstrip()}\n\n{results}"
+
+
+def _map_reduce_reduce_target(job):
+    """
+    The designated reduce node, or else the node that returned the first
+    shard result. Falls back to another live node of that swarm when the
+    node is down. Call with SCHEDULER_LOCK held.
+    """
+    swarm_id, node_id = job.get("reduce_swarm_id"), job.get("reduce_node_id")
+    if swarm_id is None:
+        done = sorted(
+            (shard for shard in job["shards"].values() if shard.get("status") == "done"),
+            key=lambda shard: float(shard.get("completed_at") or 0),
+        )
+        if not done:
+            return None, None
+        swarm_id, node_id = done[0].get("swarm_id"), done[0].get("node_id")
+    swarm = SWARMS.get(str(swarm_id))
+    if not swarm or swarm.get("status") in ("terminating", "terminated") or not swarm.get("job_id"):
+        return None, None
+    node_count = int(swarm.get("node_count") or 0)
+    if node_id is None or _node_key(swarm_id, node_id) in NODE_DOWN:
+        node_id = next(
+            (candidate for candidate in range(node_count) if _node_key(swarm_id, candidate) not in NODE_DOWN),
+            None,
+        )
+    if node_id is None:
+        return None, None
+    return str(swarm_id), int(node_id)
+
+
+def _advance_map_reduce(config, map_reduce_id, now=None, timed_out=False):
+    """
+    Close the map phase once every shard has settled, the quorum of shard
+    results is in, or the job timed out. Shards still queued are withdrawn
+    and late results from running ones are ignored. The reduce prompt, with
+    the collected results, is then injected into the reduce node as held
+    work, since that node's shard turn (or a cancelled shard) may still be
+    running when its final answer arrives.
+    """
+    now = time.time() if now is None else now
+    with SCHEDULER_LOCK:
+        job = MAP_REDUCE_JOBS.get(map_reduce_id)
+        if not job or job.get("status") != "mapping":
+            return
+        counts = _map_reduce_counts(job)
+        settled = counts["done"] + counts["failed"] == counts["total"]
+        if not (timed_out or settled or counts["done"] >= int(job.get("quorum") or counts["total"])):
+            return
+        for queue_key, queue_for_target in list(INTER_SWARM_QUEUE.items()):
+            for item in [item for item in queue_for_target if item.get("map_reduce_id") == map_reduce_id]:
+                _remove_inter_swarm_item(queue_key, item)
+        for shard in job["shards"].values():
+            if shard.get("status") in ("queued", "running"):
+                shard["status"] = "cancelled"
+        reduce_target = (None, None)
+        if counts["done"] == 0:
+            _finish_map_reduce(job, "failed", now, error="timed out" if timed_out else "no shard results")
+        elif not job.get("reduce_prompt"):
+            job["result"] = None
+            _finish_map_reduce(job, "completed", now)
+        else:
+            reduce_target = _map_reduce_reduce_target(job)
+            if reduce_target[0] is None:
+                _finish_map_reduce(job, "failed", now, error="no reduce node available")
+            else:
+                job["status"] = "reducing"
+                job["reduce_swarm_id"], job["reduce_node_id"] = reduce_target
+                if job.get("timeout_seconds"):
+                    job["reduce_deadline"] = now + float(job["timeout_seconds"])
+
+    _emit_queue_updated()
+    if job["status"] != "reducing":
+        emit_event(f"map_reduce_{job['status']}", _map_reduce_finished_event(job))
+        save_state()
+        return
+    _inject_map_reduce_reduce(config, job, timed_out=bool(timed_out and not settled))
+
+
+def _inject_map_reduce_reduce(config, job, timed_out=False):
+    """Inject the reduce prompt into the job's current reduce node."""
+    map_reduce_id = job["map_reduce_id"]
+    with SCHEDULER_LOCK:
+        if job.get("status") != "reducing":
+            return
+        swarm_id, node_id = job["reduce_swarm_id"], job["reduce_node_id"]
+        reduce_prompt = _map_reduce_reduce_prompt(job)
+    provider = _provider_for_swarm(swarm_id)
+    success, injection_id, error = (False, None, "provider unavailable")
+    if provider:
+        success, injection_id, error = perform_injection(
+            config,
+            provider,
+            job.get("request_id"),
+            swarm_id,
+            str(SWARMS[swarm_id].get("job_id")),
+            node_id,
+            reduce_prompt,
+            hold=True,
+        )
+    with SCHEDULER_LOCK:
+        if success:
+            job["reduce_injection_id"] = str(injection_id)
+            MAP_REDUCE_INJECTIONS[str(injection_id)] = (map_reduce_id, None)
+        else:
+            _finish_map_reduce(job, "failed", time.time(), error=f"reduce inject failed: {error}")
+    if success:
+        emit_event("map_reduce_reducing", {
+            "request_id": job.get("request_id"),
+            "map_reduce_id": map_reduce_id,
+            "swarm_id": swarm_id,
+            "node_id": node_id,
+            "injection_id": injection_id,
+            "shard_counts": _map_reduce_counts(job),
+            "timed_out": timed_out,
+        })
+    else:
+        emit_event("map_reduce_failed", _map_reduce_finished_event(job))
+    save_state()
+
+
+def _record_map_reduce_result(config, injection_id, content):
+    """
+    Record the final answer of a shard or reduce injection. Returns True when
+    the injection belongs to a map-reduce job.
+    """
+    now = time.time()
+    text = _extract_text_content(content) or ""
+    with SCHEDULER_LOCK:
+        ref = MAP_REDUCE_INJECTIONS.pop(str(injection_id or ""), None)
+        if not ref:
+            return False
+        map_reduce_id, shard_id = ref
+        job = MAP_REDUCE_JOBS.get(map_reduce_id)
+        if not job:
+            return True
+        if shard_id is None:
+            if job.get("status") != "reducing":
+                return True
+            job["result"] = text
+            _finish_map_reduce(job, "completed", now)
+            finished = _map_reduce_finished_event(job)
+        else:
+            shard = job["shards"].get(shard_id)
+            if job.get("status") != "mapping" or not shard or shard.get("status") != "running":
+                return True
+            shard.update({"status": "done", "result": text, "completed_at": now})
+            finished = None
+            progress = {
+                "request_id": job.get("request_id"),
+                "map_reduce_id": map_reduce_id,
+                "shard_id": shard_id,
+                "swarm_id": shard.get("swarm_id"),
+                "node_id": shard.get("node_id"),
+                "seconds": round(now - float(shard.get("dispatched_at") or now), 3),
+                "shard_counts": _map_reduce_counts(job),
+            }
+    if finished is not None:
+        emit_event("map_reduce_completed", finished)
+        save_state()
+        return True
+    emit_event("map_reduce_progress", progress)
+    _advance_map_reduce(config, map_reduce_id, now)
+    return True
+
+
+def _run_map_reduce_timers(config, now=None):
     """
-    Route queued inter-swarm work to the first idle node in each target swarm.
+    Time out mapping jobs past their deadline and fail shards whose queue
+    item was dropped or whose swarm went away. Reduce steps get the same
+    timeout again, fail when their swarm goes away and move to another live
+    node of that swarm when their node is down.
     """
+    now = time.time() if now is None else now
+    advance = []
+    failed = []
+    retarget = []
     with SCHEDULER_LOCK:
-        target_ids = list(INTER_SWARM_QUEUE.keys())
+        if not MAP_REDUCE_JOBS:
+            return
+        queued_shards = {
+            (item.get("map_reduce_id"), item.get("shard_id"))
+            for queue_for_target in INTER_SWARM_QUEUE.values()
+            for item in queue_for_target
+            if item.get("map_reduce_id")
+        }
+        inflight_shards = {
+            (inflight["item"].get("map_reduce_id"), inflight["item"].get("shard_id"))
+            for inflight in INTER_SWARM_INFLIGHT.values()
+            if inflight["item"].get("map_reduce_id")
+        }
+        for map_reduce_id, job in MAP_REDUCE_JOBS.items():
+            if job.get("status") == "reducing":
+                swarm = SWARMS.get(str(job.get("reduce_swarm_id")))
+                reduce_deadline = job.get("reduce_deadline")
+                if not swarm or swarm.get("status") in ("terminating", "terminated"):
+                    _finish_map_reduce(job, "failed", now, error="reduce swarm unavailable")
+                    failed.append(job)
+                elif reduce_deadline is not None and now >= float(reduce_deadline):
+                    _finish_map_reduce(job, "failed", now, error="reduce timed out")
+                    failed.append(job)
+                elif (
+                    job.get("reduce_injection_id")
+                    and _node_key(job["reduce_swarm_id"], job["reduce_node_id"]) in NODE_DOWN
+                ):
+                    MAP_REDUCE_INJECTIONS.pop(str(job["reduce_injection_id"]), None)
+                    job["reduce_injection_id"] = None
+                    reduce_target = _map_reduce_reduce_target(job)
+                    if reduce_target[0] is None:
+                        _finish_map_reduce(job, "failed", now, error="no reduce node available")
+                        failed.append(job)
+                    else:
+                        job["reduce_swarm_id"], job["reduce_node_id"] = reduce_target
+                        retarget.append(job)
+                continue
+            if job.get("status") != "mapping":
+                continue
+            changed = False
+            for shard_id, shard in job["shards"].items():
+                key = (map_reduce_id, shard_id)
+                if shard.get("status") == "queued" and key not in queued_shards and key not in inflight_shards:
+                    shard.update({"status": "failed", "error": "dropped from queue"})
+                    changed = True
+                elif shard.get("status") == "running":
+                    swarm = SWARMS.get(str(shard.get("swarm_id")))
+                    if not swarm or swarm.get("status") in ("terminating", "terminated"):
+                        MAP_REDUCE_INJECTIONS.pop(str(shard.get("injection_id") or ""), None)
+                        shard.update({"status": "failed", "error": "swarm unavailable"})
+                        changed = True
+            deadline = job.get("deadline")
+            timed_out = deadline is not None and now >= float(deadline)
+            if changed or timed_out:
+                advance.append((map_reduce_id, timed_out))
+    for job in failed:
+        emit_event("map_reduce_failed", _map_reduce_finished_event(job))
+    for job in retarget:
+        _inject_map_reduce_reduce(config, job)
+    for map_reduce_id, timed_out in advance:
+        _advance_map_reduce(config, map_reduce_id, now, timed_out=timed_out)
+    if failed and not advance and not retarget:
+        save_state()
 
-    for target_swarm_id in target_ids:
-        while True:
-            with SCHEDULER_LOCK:
-                queue_for_target = INTER_SWARM_QUEUE.get(target_swarm_id)
-                if not queue_for_target:
-                    break
-                item = queue_for_target[0]
 
-            target_swarm = SWARMS.get(str(target_swarm_id))
-            if not target_swarm or target_swarm.get("status") in ("terminated", "terminating"):
-                with SCHEDULER_LOCK:
-                    INTER_SWARM_QUEUE[target_swarm_id].popleft()
-                    if not INTER_SWARM_QUEUE[target_swarm_id]:
-                        INTER_SWARM_QUEUE.pop(target_swarm_id, None)
-                emit_event("inter_swarm_dropped", {
-                    "queue_id": item.get("queue_id"),
-                    "source_swarm_id": item.get("source_swarm_id"),
-                    "target_swarm_id": target_swarm_id,
-                    "reason": "target swarm unavailable",
-                })
-                _emit_queue_updated()
-                save_state()
-                continue
+def _pipeline_stage_sources(stage, swarm_id, swarm):
+    if stage.get("source_swarm_id"):
+        return stage["source_swarm_id"] == str(swarm_id)
+    return bool(stage.get("source_pool")) and (swarm or {}).get("pool") == stage["source_pool"]
 
-            target_provider = _provider_for_swarm(target_swarm_id)
-            if not target_provider:
-                with SCHEDULER_LOCK:
-                    INTER_SWARM_QUEUE[target_swarm_id].popleft()
-                    if not INTER_SWARM_QUEUE[target_swarm_id]:
-                        INTER_SWARM_QUEUE.pop(target_swarm_id, None)
-                emit_event("inter_swarm_dropped", {
-                    "queue_id": item.get("queue_id"),
-                    "source_swarm_id": item.get("source_swarm_id"),
-                    "target_swarm_id": target_swarm_id,
-                    "reason": "provider unavailable",
-                })
-                _emit_queue_updated()
-                save_state()
-                continue
 
-            selector = item.get("selector") or "idle"
-            if selector in ("all", "nodes"):
-                job_id = target_swarm.get("job_id")
-                if not job_id:
-                    break
-                node_count = int(target_swarm.get("node_count") or 0)
-                if selector == "all":
-                    targets = list(range(node_count))
-                else:
-                    raw_targets = item.get("nodes")
-                    targets = [
-                        node_id for node_id in (raw_targets if isinstance(raw_targets, list) else [])
-                        if isinstance(node_id, int) and 0 <= node_id < node_count
-                    ]
+def _pipeline_stage_stats(pipeline_id, stage_id):
+    """Call with SCHEDULER_LOCK held."""
+    return PIPELINE_STATS.setdefault((str(pipeline_id), str(stage_id)), {
+        "matched": 0,
+        "filtered": 0,
+        "enqueued": 0,
+        "dropped": 0,
+        "dispatched": 0,
+        "completed": 0,
+        "total_wait_seconds": 0.0,
+        "max_wait_seconds": None,
+        "total_latency_seconds": 0.0,
+        "max_latency_seconds": None,
+        "completions": deque(),
+        "backpressure_since": None,
+        "backpressure_episodes": 0,
+    })
 
-                if not targets:
-                    with SCHEDULER_LOCK:
-                        INTER_SWARM_QUEUE[target_swarm_id].popleft()
-                        if not INTER_SWARM_QUEUE[target_swarm_id]:
-                            INTER_SWARM_QUEUE.pop(target_swarm_id, None)
-                    emit_event("inter_swarm_dropped", {
-                        "queue_id": item.get("queue_id"),
-                        "source_swarm_id": item.get("source_swarm_id"),
-                        "target_swarm_id": target_swarm_id,
-                        "reason": "no valid target nodes",
-                    })
-                    _emit_queue_updated()
-                    save_state()
-                    continue
 
-                content = item.get("content")
-                request_id = item.get("request_id")
-                for node_id in targets:
-                    threading.Thread(
-                        target=perform_injection,
-                        args=(config, target_provider, request_id, str(target_swarm_id), str(job_id), int(node_id), content),
-                        daemon=True
-                    ).start()
+def _pipeline_in_flight():
+    """(pipeline_id, stage_id) -> dispatched items not yet complete. Call with SCHEDULER_LOCK held."""
+    counts = defaultdict(int)
+    for inflight in INTER_SWARM_INFLIGHT.values():
+        item = inflight["item"]
+        if item.get("pipeline_id"):
+            counts[(item["pipeline_id"], item.get("stage_id"))] += 1
+    return counts
 
-                with SCHEDULER_LOCK:
-                    INTER_SWARM_QUEUE[target_swarm_id].popleft()
-                    if not INTER_SWARM_QUEUE[target_swarm_id]:
-                        INTER_SWARM_QUEUE.pop(target_swarm_id, None)
 
-                emit_event("inter_swarm_dispatched", {
-                    "queue_id": item.get("queue_id"),
-                    "request_id": request_id,
-                    "source_swarm_id": item.get("source_swarm_id"),
-                    "target_swarm_id": target_swarm_id,
-                    "selector": selector,
-                    "nodes": targets if selector == "nodes" else None,
-                })
-                _emit_queue_updated()
-                save_state()
-                continue
+def _pipeline_stage_at_limit(item, in_flight):
+    pipeline = PIPELINES.get(item.get("pipeline_id")) or {}
+    stage = next((stage for stage in pipeline.get("stages") or [] if stage["stage_id"] == item.get("stage_id")), None)
+    limit = (stage or {}).get("max_in_flight")
+    return bool(limit) and in_flight.get((item["pipeline_id"], item.get("stage_id")), 0) >= limit
 
-            idle_node_id = _first_idle_node_id(target_swarm_id)
-            if idle_node_id is None:
-                break
 
-            request_id = item.get("request_id")
-            content = item.get("content")
-            job_id = target_swarm.get("job_id")
+def _pipeline_backpressured(swarm_id):
+    """
+    True when a stage fed by this swarm already has max_queued items waiting.
+    Queued work for the swarm then waits too, so an upstream stage cannot
+    outrun the stage it feeds.
+    """
+    swarm = SWARMS.get(str(swarm_id))
+    stages = [
+        (pipeline_id, stage)
+        for pipeline_id, pipeline in PIPELINES.items()
+        for stage in pipeline.get("stages") or []
+        if stage.get("max_queued") and _pipeline_stage_sources(stage, swarm_id, swarm)
+    ]
+    if not stages:
+        return False
+    held = False
+    with SCHEDULER_LOCK:
+        for pipeline_id, stage in stages:
+            stats = _pipeline_stage_stats(pipeline_id, stage["stage_id"])
+            if PIPELINE_QUEUED.get((pipeline_id, stage["stage_id"]), 0) >= stage["max_queued"]:
+                if stats["backpressure_since"] is None:
+                    stats["backpressure_since"] = time.time()
+                    stats["backpressure_episodes"] += 1
+                held = True
+            else:
+                stats["backpressure_since"] = None
+    return held
 
-            if not job_id:
-                break
 
-            # Reserve by incrementing before injection write; if inject fails it is reverted.
-            _mark_outstanding(target_swarm_id, idle_node_id, +1)
-            success, injection_id, error = perform_injection(
-                config,
-                target_provider,
-                request_id,
-                str(target_swarm_id),
-                str(job_id),
-                int(idle_node_id),
-                content,
-                count_outstanding=False,
-            )
-            if not success:
-                _mark_outstanding(target_swarm_id, idle_node_id, -1)
-                emit_event("inter_swarm_blocked", {
-                    "queue_id": item.get("queue_id"),
-                    "source_swarm_id": item.get("source_swarm_id"),
-                    "target_swarm_id": target_swarm_id,
-                    "node_id": idle_node_id,
-                    "reason": error or "inject failed",
-                })
-                break
+def _render_pipeline_prompt(template, values):
+    prompt = str(template)
+    for key, value in values.items():
+        prompt = prompt.replace("{" + key + "}", str(value if value is not None else ""))
+    return prompt
 
-            with SCHEDULER_LOCK:
-                INTER_SWARM_QUEUE[target_swarm_id].popleft()
-                if not INTER_SWARM_QUEUE[target_swarm_id]:
-                    INTER_SWARM_QUEUE.pop(target_swarm_id, None)
 
-            emit_event("inter_swarm_dispatched", {
-                "queue_id": item.get("queue_id"),
-                "request_id": request_id,
-                "source_swarm_id": item.get("source_swarm_id"),
-                "target_swarm_id": target_swarm_id,
-                "node_id": idle_node_id,
-                "injection_id": injection_id,
+def _route_pipeline_answer(data):
+    """
+    Queue a final answer for every pipeline stage whose source is the
+    answering swarm (or its pool) and whose match pattern finds it. Returns
+    the number of items queued.
+    """
+    swarm_id = str(data.get("swarm_id") or "")
+    swarm = SWARMS.get(swarm_id)
+    if not swarm:
+        return 0
+    text = _extract_text_content(data.get("content")) or ""
+    now = time.time()
+    queued = []
+    dropped = []
+    with SCHEDULER_LOCK:
+        for pipeline_id, pipeline in PIPELINES.items():
+            for stage in pipeline.get("stages") or []:
+                if not _pipeline_stage_sources(stage, swarm_id, swarm):
+                    continue
+                stats = _pipeline_stage_stats(pipeline_id, stage["stage_id"])
+                # Pool membership can change after the stage was accepted.
+                if stage.get("target_swarm_id") == swarm_id or (
+                    stage.get("target_pool") and swarm.get("pool") == stage["target_pool"]
+                ):
+                    stats["dropped"] += 1
+                    dropped.append((pipeline_id, stage, "target is the answering swarm"))
+                    continue
+                found = re.search(stage["match"], text) if stage.get("match") else None
+                if stage.get("match") and not found:
+                    stats["filtered"] += 1
+                    continue
+                stats["matched"] += 1
+                target_error = _inter_swarm_target_error(stage.get("target_swarm_id"), stage.get("target_pool"))
+                if target_error:
+                    stats["dropped"] += 1
+                    dropped.append((pipeline_id, stage, target_error))
+                    continue
+                matched = text
+                if found:
+                    matched = (found.group(1) if found.re.groups else found.group(0)) or ""
+                item = {
+                    "queue_id": str(uuid.uuid4()),
+                    "request_id": f"pipeline:{pipeline_id}:{stage['stage_id']}",
+                    "source_swarm_id": swarm_id,
+                    "target_swarm_id": stage.get("target_swarm_id"),
+                    "target_pool": stage.get("target_pool"),
+                    "selector": "idle",
+                    "nodes": None,
+                    "content": _render_pipeline_prompt(stage["prompt_template"], {
+                        "answer": text,
+                        "match": matched,
+                        "source_swarm_id": swarm_id,
+                        "source_node_id": data.get("node_id"),
+                        "pipeline_id": pipeline_id,
+                        "stage_id": stage["stage_id"],
+                    }),
+                    "weight": 1.0,
+                    "priority": stage.get("priority"),
+                    "expires_at": None,
+                    "pipeline_id": pipeline_id,
+                    "stage_id": stage["stage_id"],
+                    "created_at": now,
+                }
+                _insert_inter_swarm_item(INTER_SWARM_QUEUE[_inter_swarm_queue_key(item)], item)
+                stats["enqueued"] += 1
+                queued.append(item)
+    for item in queued:
+        emit_event("pipeline_stage_enqueued", {
+            "pipeline_id": item["pipeline_id"],
+            "stage_id": item["stage_id"],
+            "queue_id": item["queue_id"],
+            "source_swarm_id": swarm_id,
+            "source_node_id": data.get("node_id"),
+            "source_injection_id": data.get("injection_id"),
+            "target_swarm_id": item["target_swarm_id"],
+            "target_pool": item["target_pool"],
+        })
+    for pipeline_id, stage, reason in dropped:
+        emit_event("pipeline_stage_dropped", {
+            "pipeline_id": pipeline_id,
+            "stage_id": stage["stage_id"],
+            "source_swarm_id": swarm_id,
+            "source_node_id": data.get("node_id"),
+            "source_injection_id": data.get("injection_id"),
+            "reason": reason,
+        })
+    if queued:
+        _emit_queue_updated()
+        save_state()
+    return len(queued)
+
+
+def _note_pipeline_dispatch(item, now):
+    """Call with SCHEDULER_LOCK held."""
+    if item["pipeline_id"] not in PIPELINES:
+        return
+    stats = _pipeline_stage_stats(item["pipeline_id"], item.get("stage_id"))
+    waited = max(0.0, now - float(item.get("created_at") or now))
+    stats["dispatched"] += 1
+    stats["total_wait_seconds"] += waited
+    if stats["max_wait_seconds"] is None or waited > stats["max_wait_seconds"]:
+        stats["max_wait_seconds"] = round(waited, 3)
+
+
+def _record_pipeline_stage_completed(inflight, now=None):
+    now = time.time() if now is None else now
+    item = inflight["item"]
+    latency = max(0.0, now - float(item.get("created_at") or now))
+    with SCHEDULER_LOCK:
+        if item["pipeline_id"] not in PIPELINES:
+            return
+        stats = _pipeline_stage_stats(item["pipeline_id"], item.get("stage_id"))
+        stats["completed"] += 1
+        stats["total_latency_seconds"] += latency
+        if stats["max_latency_seconds"] is None or latency > stats["max_latency_seconds"]:
+            stats["max_latency_seconds"] = round(latency, 3)
+        stats["completions"].append(now)
+        while stats["completions"] and now - stats["completions"][0] > PIPELINE_THROUGHPUT_WINDOW_SECONDS:
+            stats["completions"].popleft()
+
+
+def _pipeline_snapshot(now=None):
+    """
+    Pipeline definitions with per-stage stats. Waits run from enqueue to
+    dispatch and latencies from enqueue to turn completion. Throughput is
+    measured over the last PIPELINE_THROUGHPUT_WINDOW_SECONDS.
+    """
+    now = time.time() if now is None else now
+    with SCHEDULER_LOCK:
+        in_flight = _pipeline_in_flight()
+        pipelines = []
+        for pipeline_id, pipeline in PIPELINES.items():
+            stages = []
+            for stage in pipeline.get("stages") or []:
+                stats = _pipeline_stage_stats(pipeline_id, stage["stage_id"])
+                while stats["completions"] and now - stats["completions"][0] > PIPELINE_THROUGHPUT_WINDOW_SECONDS:
+                    stats["completions"].popleft()
+                dispatched = stats["dispatched"]
+                completed = stats["completed"]
+                key = (pipeline_id, stage["stage_id"])
+                stages.append({
+                    **stage,
+                    "stats": {
+                        "queued": PIPELINE_QUEUED.get(key, 0),
+                        "in_flight": in_flight.get(key, 0),
+                        "matched": stats["matched"],
+                        "filtered": stats["filtered"],
+                        "enqueued": stats["enqueued"],
+                        "dropped": stats["dropped"],
+                        "dispatched": dispatched,
+                        "completed": completed,
+                        "mean_wait_seconds": round(stats["total_wait_seconds"] / dispatched, 3) if dispatched else None,
+                        "max_wait_seconds": stats["max_wait_seconds"],
+                        "mean_latency_seconds": round(stats["total_latency_seconds"] / completed, 3) if completed else None,
+                        "max_latency_seconds": stats["max_latency_seconds"],
+                        "completed_per_minute": round(
+                            len(stats["completions"]) * 60.0 / PIPELINE_THROUGHPUT_WINDOW_SECONDS, 3
+                        ),
+                        "backpressured": stats["backpressure_since"] is not None,
+                        "backpressure_episodes": stats["backpressure_episodes"],
+                    },
+                })
+            pipelines.append({
+                "pipeline_id": pipeline_id,
+                "origin": pipeline.get("origin"),
+                "created_at": pipeline.get("created_at"),
+                "stages": stages,
             })
-            _emit_queue_updated()
-            save_state()
+        return pipelines
 
 
 def execute_synthetic_approved_command(meta, job_id, call_id):
@@ -4919,7 +8743,7 @@ def _has_nonempty_text(value):
     return isinstance(value, str) and bool(value.strip())
 
 
-def perform_injection(config, provider, request_id, swarm_id, job_id, node_id, content, count_outstanding=True):
+def perform_injection(config, provider, request_id, swarm_id, job_id, node_id, content, count_outstanding=True, hold=False):
     injection_id = str(uuid.uuid4())
 
     emit_event("inject_ack", {
@@ -4931,7 +8755,10 @@ def perform_injection(config, provider, request_id, swarm_id, job_id, node_id, c
     })
 
     try:
-        provider.inject(job_id, node_id, content, injection_id)
+        if hold:
+            provider.inject(job_id, node_id, content, injection_id, hold=True)
+        else:
+            provider.inject(job_id, node_id, content, injection_id)
         if count_outstanding:
             _mark_outstanding(swarm_id, node_id, +1)
 
@@ -6193,6 +10020,12 @@ def run_daemon(config, providers):
     # Resume queued inter-swarm work after router restart.
     _dispatch_inter_swarm_queue(config)
     _dispatch_project_tasks(config)
+    next_hedge_check_at = time.time() + PROJECT_HEDGE_CHECK_INTERVAL_SECONDS
+    next_node_check_at = time.time() + NODE_FAILURE_CHECK_INTERVAL_SECONDS
+    next_task_timer_at = time.time() + PROJECT_TASK_TIMER_TICK_SECONDS
+    next_autoscale_at = time.time() + AUTOSCALE_CHECK_INTERVAL_SECONDS
+    next_queue_expiry_at = time.time() + INTER_SWARM_EXPIRY_CHECK_INTERVAL_SECONDS
+    next_map_reduce_check_at = time.time() + MAP_REDUCE_CHECK_INTERVAL_SECONDS
 
     while True:
         # Remove exited follower processes so EOF pipes do not cause a tight
@@ -6224,6 +10057,48 @@ def run_daemon(config, providers):
                 print(f"[router DEBUG] restarting follower: {backend}", flush=True)
             threading.Thread(target=start_follower_async, args=(backend, provider), daemon=True).start()
 
+        if now >= next_hedge_check_at:
+            next_hedge_check_at = now + PROJECT_HEDGE_CHECK_INTERVAL_SECONDS
+            try:
+                _hedge_project_stragglers(config)
+            except Exception as e:
+                print(f"[router WARN] straggler hedging failed: {e}", file=sys.stderr, flush=True)
+
+        if now >= next_node_check_at:
+            next_node_check_at = now + NODE_FAILURE_CHECK_INTERVAL_SECONDS
+            try:
+                _detect_failed_nodes(config, now)
+            except Exception as e:
+                print(f"[router WARN] node failure detection failed: {e}", file=sys.stderr, flush=True)
+
+        if now >= next_task_timer_at:
+            next_task_timer_at = now + PROJECT_TASK_TIMER_TICK_SECONDS
+            try:
+                _run_project_task_timers(config, now)
+            except Exception as e:
+                print(f"[router WARN] project task timers failed: {e}", file=sys.stderr, flush=True)
+
+        if AUTOSCALE_GROUPS and now >= next_autoscale_at:
+            next_autoscale_at = now + AUTOSCALE_CHECK_INTERVAL_SECONDS
+            try:
+                _run_autoscaler(now)
+            except Exception as e:
+                print(f"[router WARN] autoscaler failed: {e}", file=sys.stderr, flush=True)
+
+        if now >= next_queue_expiry_at:
+            next_queue_expiry_at = now + INTER_SWARM_EXPIRY_CHECK_INTERVAL_SECONDS
+            try:
+                _expire_inter_swarm_items(now)
+            except Exception as e:
+                print(f"[router WARN] inter-swarm queue expiry failed: {e}", file=sys.stderr, flush=True)
+
+        if MAP_REDUCE_JOBS and now >= next_map_reduce_check_at:
+            next_map_reduce_check_at = now + MAP_REDUCE_CHECK_INTERVAL_SECONDS
+            try:
+                _run_map_reduce_timers(config, now)
+            except Exception as e:
+                print(f"[router WARN] map-reduce timers failed: {e}", file=sys.stderr, flush=True)
+
         streams = []
         fd_to_stream = {}
         for backend, proc in follower_procs.items():
@@ -6272,10 +10147,39 @@ def run_daemon(config, providers):
                 except Exception:
                     continue
 
+                # Liveness records feed the failure detector and are not forwarded.
+                if event.get("type") == "follower_heartbeat":
+                    _note_follower_heartbeat(event)
+                    continue
+                if event.get("type") == "heartbeat":
+                    if _note_node_alive(
+                        JOB_TO_SWARM.get(str(event.get("job_id"))),
+                        event.get("node_id"),
+                        heartbeat=True,
+                        busy=event.get("busy"),
+                    ):
+                        _dispatch_inter_swarm_queue(config)
+                        _dispatch_pending_project_plans(config)
+                        _dispatch_project_tasks(config)
+                    continue
+
                 translated = translate_event(event)
                 if translated:
                     event_name, data = translated
                     suppress_emit = False
+                    if _note_node_alive(data.get("swarm_id"), data.get("node_id")):
+                        _dispatch_inter_swarm_queue(config)
+                        _dispatch_pending_project_plans(config)
+                        _dispatch_project_tasks(config)
+                    if (
+                        PROJECT_PREFETCHED_INJECTIONS
+                        and data.get("injection_id") in PROJECT_PREFETCHED_INJECTIONS
+                    ):
+                        if event_name == "prefetch_revoked":
+                            if _handle_project_prefetch_revoked(data):
+                                _dispatch_project_tasks(config)
+                        else:
+                            _mark_prefetched_task_started(data.get("injection_id"))
                     if event_name == "exec_approval_required":
                         approval_id = _register_canonical_exec_approval(data)
                         if approval_id and not data.get("approval_id"):
@@ -6289,15 +10193,21 @@ def run_daemon(config, providers):
                                 NODE_THREAD_ACTIVE[key] = True
                             elif status_type == "idle":
                                 NODE_THREAD_ACTIVE[key] = False
+                                NODE_RECOVERING.discard(key)
                                 # Reconcile missed turn_complete events so idle queue
                                 # dispatch cannot deadlock on stale outstanding counts.
-                                NODE_OUTSTANDING[key] = 0
+                                # Prefetched injections held in the inbox still count.
+                                NODE_OUTSTANDING[key] = _node_prefetched_count(*key)
                         if status_type == "idle":
                             _dispatch_inter_swarm_queue(config)
                             _dispatch_pending_project_plans(config)
                             _dispatch_project_tasks(config)
                     if event_name == "turn_complete":
                         _mark_outstanding(data.get("swarm_id"), data.get("node_id"), -1)
+                        NODE_RECOVERING.discard(_node_key(data.get("swarm_id"), data.get("node_id")))
+                        inflight = INTER_SWARM_INFLIGHT.pop(str(data.get("injection_id") or ""), None)
+                        if inflight and inflight["item"].get("pipeline_id"):
+                            _record_pipeline_stage_completed(inflight)
                         _dispatch_inter_swarm_queue(config)
                         _dispatch_pending_project_plans(config)
                         _dispatch_project_tasks(config)
@@ -6305,6 +10215,12 @@ def run_daemon(config, providers):
                         # Some traces emit task_complete without a matching turn_complete;
                         # reconcile outstanding count to avoid idle-queue starvation.
                         _mark_outstanding(data.get("swarm_id"), data.get("node_id"), -1)
+                        NODE_RECOVERING.discard(_node_key(data.get("swarm_id"), data.get("node_id")))
+                        inflight = INTER_SWARM_INFLIGHT.pop(str(data.get("injection_id") or ""), None)
+                        if inflight and inflight["item"].get("pipeline_id"):
+                            _record_pipeline_stage_completed(inflight)
+                        if MAP_REDUCE_INJECTIONS:
+                            _record_map_reduce_result(config, data.get("injection_id"), data.get("last_agent_message"))
                         plan_id = _find_pending_project_plan_by_injection(data.get("injection_id"))
                         if plan_id:
                             _record_project_plan_result(plan_id, data)
@@ -6325,6 +10241,10 @@ def run_daemon(config, providers):
                             if final_key not in FINAL_ANSWER_SEEN:
                                 FINAL_ANSWER_SEEN.add(final_key)
                                 should_record = True
+                        if should_record and MAP_REDUCE_INJECTIONS:
+                            _record_map_reduce_result(config, data.get("injection_id"), data.get("content"))
+                        if should_record and PIPELINES:
+                            _route_pipeline_answer(data)
                         plan_id = _find_pending_project_plan_by_injection(data.get("injection_id"))
                         if should_record and plan_id:
                             _record_project_plan_result(plan_id, {
@@ -6334,6 +10254,7 @@ def run_daemon(config, providers):
                         if should_record and project_id and task_id:
                             _record_project_task_result(project_id, task_id, {
                                 "last_agent_message": data.get("content"),
+                                "injection_id": data.get("injection_id"),
                             })
                         # Record project/task results as soon as the final answer lands
                         # so downstream dependency scheduling can proceed, but do not
@@ -6399,6 +10320,9 @@ def run_daemon(config, providers):
                 default_agents_md = _load_default_agents_md()
                 provider_id = payload.get("provider")
                 provider_params = payload.get("provider_params")
+                prefetch_depth = _normalize_prefetch_depth(payload.get("prefetch_depth"))
+                autoscale_group = str(payload.get("autoscale_group") or "").strip() or None
+                pool = str(payload.get("pool") or "").strip() or None
                 agents_md_content = _normalize_agents_text(agents_md_content)
                 if not isinstance(agents_bundle, dict):
                     agents_bundle = None
@@ -6520,6 +10444,9 @@ def run_daemon(config, providers):
                     launch_provider_ref=launch_provider_ref,
                     launch_provider_backend=launch_provider_backend,
                     launch_provider_id=launch_provider_id,
+                    launch_prefetch_depth=prefetch_depth,
+                    launch_autoscale_group=autoscale_group,
+                    launch_pool=pool,
                     _launch_progress=_launch_progress,
                 ):
                     try:
@@ -6531,6 +10458,8 @@ def run_daemon(config, providers):
                             progress_cb=_launch_progress,
                         )
                     except Exception as e:
+                        if launch_autoscale_group:
+                            _autoscale_launch_failed(launch_autoscale_group, launch_request_id, e)
                         emit_event("command_rejected", {
                             "request_id": launch_request_id,
                             "reason": str(e)
@@ -6569,6 +10498,11 @@ def run_daemon(config, providers):
                         "provider_backend": launch_provider_backend,
                         "provider_id": launch_provider_id,
                         "provider_params": launch_effective_params,
+                        "prefetch_depth": launch_prefetch_depth,
+                        "autoscale_group": launch_autoscale_group,
+                        "pool": launch_pool,
+                        "launch_request_id": launch_request_id,
+                        "launched_at": time.time(),
                     }
 
                     JOB_TO_SWARM[job_id] = swarm_id
@@ -6591,6 +10525,9 @@ def run_daemon(config, providers):
                         "agent_runtime": SWARMS[swarm_id].get("agent_runtime"),
                         "agent_model": SWARMS[swarm_id].get("agent_model"),
                         "pricing_model": SWARMS[swarm_id].get("pricing_model"),
+                        "prefetch_depth": launch_prefetch_depth,
+                        "autoscale_group": launch_autoscale_group,
+                        "pool": launch_pool,
                         "claude_env_profile": (
                             SWARMS[swarm_id].get("provider_params", {}) or {}
                         ).get("claude_env_profile"),
@@ -6611,6 +10548,7 @@ def run_daemon(config, providers):
                                 ),
                                 daemon=True
                             ).start()
+                    _attach_autoscaled_swarm(config, swarm_id)
                     _dispatch_inter_swarm_queue(config)
 
                 threading.Thread(target=_run_launch, daemon=True).start()
@@ -6658,32 +10596,57 @@ def run_daemon(config, providers):
             elif command == "enqueue_inject":
                 source_swarm_id = payload.get("source_swarm_id")
                 target_swarm_id = payload.get("target_swarm_id")
+                target_pool = str(payload.get("target_pool") or "").strip() or None
                 selector = payload.get("selector", "idle")
                 content = payload.get("content")
                 nodes = payload.get("nodes")
 
-                if not target_swarm_id or not isinstance(content, str) or not content.strip():
+                if (
+                    bool(target_swarm_id) == bool(target_pool)
+                    or not isinstance(content, str)
+                    or not content.strip()
+                ):
                     emit_event("command_rejected", {
                         "request_id": request_id,
                         "reason": "invalid enqueue payload"
                     })
                     continue
 
-                target_swarm = SWARMS.get(str(target_swarm_id))
-                if not target_swarm:
+                target_error = _inter_swarm_target_error(target_swarm_id, target_pool)
+                if target_error:
                     emit_event("command_rejected", {
                         "request_id": request_id,
-                        "reason": "unknown target_swarm_id"
+                        "reason": target_error
                     })
                     continue
-                if target_swarm.get("status") in ("terminating", "terminated"):
+                if target_pool:
+                    # A pool resolves to one member at dispatch time, so only
+                    # the idle selector is meaningful.
+                    selector = "idle"
+                if selector not in ("idle", "all", "nodes"):
+                    selector = "idle"
+
+                enqueued_at = time.time()
+                expires_at = None
+                try:
+                    if payload.get("ttl_seconds") is not None and float(payload["ttl_seconds"]) > 0:
+                        expires_at = enqueued_at + float(payload["ttl_seconds"])
+                    if payload.get("deadline") is not None:
+                        deadline = float(payload["deadline"])
+                        expires_at = deadline if expires_at is None else min(expires_at, deadline)
+                except (TypeError, ValueError):
                     emit_event("command_rejected", {
                         "request_id": request_id,
-                        "reason": "target swarm is terminating or terminated"
+                        "reason": "invalid ttl_seconds or deadline"
                     })
                     continue
-                if selector not in ("idle", "all", "nodes"):
-                    selector = "idle"
+                if expires_at is not None and expires_at <= enqueued_at:
+                    emit_event("command_rejected", {
+                        "request_id": request_id,
+                        "reason": "deadline already passed"
+                    })
+                    continue
+                priority = _inter_swarm_priority(payload.get("priority"))
 
                 queue_id = str(uuid.uuid4())
                 queued_nodes = nodes if selector == "nodes" and isinstance(nodes, list) else None
@@ -6691,22 +10654,29 @@ def run_daemon(config, providers):
                     "queue_id": queue_id,
                     "request_id": request_id,
                     "source_swarm_id": source_swarm_id,
-                    "target_swarm_id": str(target_swarm_id),
+                    "target_swarm_id": None if target_pool else str(target_swarm_id),
+                    "target_pool": target_pool,
                     "selector": selector,
                     "nodes": queued_nodes,
                     "content": content,
-                    "created_at": time.time(),
+                    "weight": _fair_share_weight(payload.get("weight")),
+                    "priority": priority,
+                    "expires_at": expires_at,
+                    "created_at": enqueued_at,
                 }
                 with SCHEDULER_LOCK:
-                    INTER_SWARM_QUEUE[str(target_swarm_id)].append(queue_item)
+                    _insert_inter_swarm_item(INTER_SWARM_QUEUE[_inter_swarm_queue_key(queue_item)], queue_item)
 
                 emit_event("inter_swarm_enqueued", {
                     "request_id": request_id,
                     "queue_id": queue_id,
                     "source_swarm_id": source_swarm_id,
-                    "target_swarm_id": target_swarm_id,
+                    "target_swarm_id": queue_item["target_swarm_id"],
+                    "target_pool": target_pool,
                     "selector": selector,
                     "nodes": queued_nodes,
+                    "priority": priority,
+                    "expires_at": expires_at,
                 })
                 _emit_queue_updated()
                 save_state()
@@ -6715,9 +10685,119 @@ def run_daemon(config, providers):
             elif command == "queue_list":
                 emit_event("queue_list", {
                     "request_id": request_id,
-                    "items": _queue_snapshot()
+                    "items": _queue_snapshot(),
+                    "dead_letters": _dead_letter_snapshot(),
+                    "wait_stats": _inter_swarm_wait_stats_snapshot(),
+                })
+                _emit_queue_updated()
+
+            elif command == "map_reduce":
+                target_swarm_id = payload.get("target_swarm_id")
+                target_pool = str(payload.get("target_pool") or "").strip() or None
+                shards = _map_reduce_shard_prompts(payload)
+                reduce_prompt = payload.get("reduce_prompt")
+                if bool(target_swarm_id) == bool(target_pool) or shards is None or (
+                    reduce_prompt is not None and not isinstance(reduce_prompt, str)
+                ):
+                    emit_event("command_rejected", {
+                        "request_id": request_id,
+                        "reason": "invalid map_reduce payload"
+                    })
+                    continue
+                target_error = _inter_swarm_target_error(target_swarm_id, target_pool)
+                reduce_swarm_id = payload.get("reduce_swarm_id")
+                reduce_node_id = _to_int(payload.get("reduce_node_id"))
+                if not target_error and reduce_swarm_id is not None:
+                    reduce_swarm = SWARMS.get(str(reduce_swarm_id))
+                    if not reduce_swarm or reduce_swarm.get("status") in ("terminating", "terminated"):
+                        target_error = "unknown reduce_swarm_id"
+                    elif reduce_node_id is not None and not 0 <= reduce_node_id < int(reduce_swarm.get("node_count") or 0):
+                        target_error = "invalid reduce_node_id"
+                if target_error:
+                    emit_event("command_rejected", {
+                        "request_id": request_id,
+                        "reason": target_error
+                    })
+                    continue
+                quorum = _to_int(payload.get("quorum"))
+                try:
+                    timeout_seconds = float(payload.get("timeout_seconds") or 0)
+                except (TypeError, ValueError):
+                    timeout_seconds = 0.0
+                _start_map_reduce(request_id, target_swarm_id, target_pool, shards, {
+                    "quorum": min(len(shards), max(1, quorum)) if quorum else len(shards),
+                    "timeout_seconds": timeout_seconds if timeout_seconds > 0 else None,
+                    "priority": _inter_swarm_priority(payload.get("priority")),
+                    "reduce_prompt": reduce_prompt if _has_nonempty_text(reduce_prompt) else None,
+                    "reduce_swarm_id": str(reduce_swarm_id) if reduce_swarm_id is not None else None,
+                    "reduce_node_id": reduce_node_id,
                 })
                 _emit_queue_updated()
+                save_state()
+                _dispatch_inter_swarm_queue(config)
+
+            elif command == "map_reduce_status":
+                map_reduce_id = payload.get("map_reduce_id")
+                emit_event("map_reduce_status", {
+                    "request_id": request_id,
+                    "jobs": [
+                        job for job in _map_reduce_snapshot()
+                        if not map_reduce_id or job.get("map_reduce_id") == map_reduce_id
+                    ],
+                })
+
+            elif command == "pipeline_create":
+                pipeline, error = _normalize_pipeline(payload)
+                existing = PIPELINES.get(pipeline["pipeline_id"]) if pipeline else None
+                if not error and existing and existing.get("origin") == "config":
+                    error = "pipeline is defined in router config"
+                if error:
+                    emit_event("command_rejected", {
+                        "request_id": request_id,
+                        "reason": error
+                    })
+                    continue
+                with SCHEDULER_LOCK:
+                    PIPELINES[pipeline["pipeline_id"]] = pipeline
+                    for key in [key for key in PIPELINE_STATS if key[0] == pipeline["pipeline_id"]]:
+                        PIPELINE_STATS.pop(key, None)
+                emit_event("pipeline_created", {
+                    "request_id": request_id,
+                    "pipeline_id": pipeline["pipeline_id"],
+                    "stages": pipeline["stages"],
+                })
+                save_state()
+
+            elif command == "pipeline_remove":
+                pipeline_id = str(payload.get("pipeline_id") or "")
+                pipeline = PIPELINES.get(pipeline_id)
+                if not pipeline or pipeline.get("origin") == "config":
+                    emit_event("command_rejected", {
+                        "request_id": request_id,
+                        "reason": "unknown pipeline_id" if not pipeline else "pipeline is defined in router config"
+                    })
+                    continue
+                with SCHEDULER_LOCK:
+                    PIPELINES.pop(pipeline_id, None)
+                    for key in [key for key in PIPELINE_STATS if key[0] == pipeline_id]:
+                        PIPELINE_STATS.pop(key, None)
+                emit_event("pipeline_removed", {
+                    "request_id": request_id,
+                    "pipeline_id": pipeline_id,
+                })
+                save_state()
+
+            elif command == "pipeline_list":
+                emit_event("pipeline_list", {
+                    "request_id": request_id,
+                    "pipelines": _pipeline_snapshot(),
+                })
+
+            elif command == "pool_list":
+                emit_event("pool_list", {
+                    "request_id": request_id,
+                    "pools": _swarm_pools_snapshot(),
+                })
 
             elif command == "project_list":
                 emit_event("project_list", {
@@ -6760,6 +10840,7 @@ def run_daemon(config, providers):
                         base_branch=base_branch,
                         workspace_subdir=workspace_subdir,
                         repo_meta=repo_meta,
+                        checkout_options=payload,
                     )
                 except Exception as e:
                     emit_event("command_rejected", {
@@ -6858,6 +10939,14 @@ def run_daemon(config, providers):
                         "worker_swarm_ids": worker_swarm_ids if isinstance(worker_swarm_ids, list) else [],
                         "base_branch": base_branch,
                         "workspace_subdir": workspace_subdir,
+                        **_normalize_sparse_checkout_options(payload),
+                        "merge_train": bool(payload.get("merge_train")),
+                        "hedging": payload.get("hedging"),
+                        "critical_path_history": bool(payload.get("critical_path_history")),
+                        "weight": payload.get("weight"),
+                        "max_concurrency": payload.get("max_concurrency"),
+                        "retry_policy": payload.get("retry_policy"),
+                        "autoscale_group": payload.get("autoscale_group"),
                         "injection_id": None,
                         "prompt": prompt,
                         "auto_start": auto_start,
@@ -7037,7 +11126,11 @@ def run_daemon(config, providers):
                                 "swarm_id": swarm_id,
                                 "job_id": job_id,
                                 "node_count": swarm["node_count"],
-                                "status": swarm["status"]
+                                "status": swarm["status"],
+                                "down_nodes": sorted(
+                                    node_id for down_swarm_id, node_id in list(NODE_DOWN)
+                                    if down_swarm_id == str(swarm_id)
+                                ),
                             })
                     except Exception as e:
                         emit_event("swarm_status", {
@@ -7686,6 +11779,10 @@ def main():
     requested_provider_specs = get_provider_specs(config)
     PROVIDERS, PROVIDER_SPECS = build_providers(config, requested_provider_specs)
     MODEL_PRICING = _load_model_pricing_catalog(config)
+    _configure_project_repo_persistence(config)
+    _configure_node_failure_detection(config)
+    _configure_autoscaling(config)
+    _configure_pipelines(config)
     disabled_specs = [spec for spec in PROVIDER_SPECS if bool(spec.get("disabled"))]
     if disabled_specs:
         for spec in disabled_specs:
@@ -7696,7 +11793,17 @@ def main():
     # Load persisted state and reconcile with cluster backends
     load_state()
 
-    for provider in PROVIDERS.values():
+    for provider_ref, provider in PROVIDERS.items():
+        if hasattr(provider, "reaper_progress_cb"):
+            provider.reaper_progress_cb = (
+                lambda job_id, stage, message, _ref=provider_ref: emit_event("provider_reaper_progress", {
+                    "provider": _ref,
+                    "job_id": job_id,
+                    "stage": str(stage),
+                    "message": str(message),
+                    "timestamp": time.time(),
+                })
+            )
         try:
             recovered = provider.recover_swarms()
         except Exception:
@@ -7735,11 +11842,18 @@ def main():
     save_state()
 
     reconcile(PROVIDERS, config)
+    _recover_project_assignments()
+    _arm_project_task_timers()
 
     # Ensure state is flushed on shutdown
     import signal
 
     def graceful_shutdown(signum, frame):
+        try:
+            flush_project_beads_snapshots()
+        except Exception:
+            pass
+        close_git_revision_helpers()
         save_state()
         remove_pid_file()
         sys.exit(0)
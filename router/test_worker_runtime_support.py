@@ -1,11 +1,19 @@
+import json
+import shutil
 import tempfile
+import time
 import unittest
 import subprocess
 import sys
+import tarfile
+from collections import deque
 from unittest.mock import patch
 from pathlib import Path
 
 from agent import claude_worker as claude_worker_module
+from agent import codex_worker as codex_worker_module
+from agent import mock_worker as mock_worker_module
+from common import staging_cache as staging_cache_module
 from router import router as router_module
 from router.providers import local as local_module
 from router.providers.factory import _default_launch_fields_for_backend, get_provider_specs
@@ -276,6 +284,1149 @@ class WorkerRuntimeSupportTests(unittest.TestCase):
                 prepared = provider.prepare_repository(job_id, str(source_repo))
             self.assertEqual(Path(str(prepared.get("origin") or "")).resolve(), origin_repo.resolve())
 
+    def test_local_prepare_repository_clones_workers_from_shared_object_store(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            provider = LocalProvider({"workspace_root": temp_dir, "repo_prepare_concurrency": 2})
+            source_repo = Path(temp_dir) / "source-repo"
+            subprocess.run(["git", "init", "-b", "main", str(source_repo)], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            subprocess.run(["git", "-C", str(source_repo), "config", "user.name", "Codeswarm Test"], check=True)
+            subprocess.run(["git", "-C", str(source_repo), "config", "user.email", "codeswarm@example.com"], check=True)
+            (source_repo / "README.md").write_text("hello\n", encoding="utf-8")
+            subprocess.run(["git", "-C", str(source_repo), "add", "README.md"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            subprocess.run(["git", "-C", str(source_repo), "commit", "-m", "init"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+            job_id = "local_test_shared_objects"
+            workers = [{"pid": 100 + node_id, "node_id": node_id} for node_id in range(3)]
+            reports: list[dict] = []
+            with patch.object(provider, "_active_workers_for_job", return_value=workers):
+                prepared = provider.prepare_repository(job_id, str(source_repo), branch="main", worker_progress_cb=reports.append)
+
+            object_store = Path(prepared["object_store"])
+            self.assertTrue(object_store.is_dir())
+            self.assertEqual([report["node_id"] for report in prepared["worker_reports"]], [0, 1, 2])
+            self.assertEqual(sorted(report["node_id"] for report in reports), [0, 1, 2])
+            self.assertTrue(all(report["status"] == "cloned" for report in reports))
+            for path in prepared["worker_paths"]:
+                alternates = Path(path) / ".git" / "objects" / "info" / "alternates"
+                self.assertEqual(Path(alternates.read_text(encoding="utf-8").strip()), object_store / "objects")
+                self.assertEqual((Path(path) / "README.md").read_text(encoding="utf-8"), "hello\n")
+
+            with patch.object(provider, "_active_workers_for_job", return_value=workers):
+                again = provider.prepare_repository(job_id, str(source_repo), branch="main")
+            self.assertTrue(all(report["status"] == "refreshed" for report in again["worker_reports"]))
+
+    def test_local_sparse_checkout_widens_to_task_declared_paths(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            provider = LocalProvider({"workspace_root": temp_dir})
+            source_repo = Path(temp_dir) / "source-repo"
+            subprocess.run(["git", "init", "-b", "main", str(source_repo)], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            for rel in ("README.md", "docs/guide.md", "services/api/app.py", "services/web/index.js"):
+                path = source_repo / rel
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(f"{rel}\n", encoding="utf-8")
+            subprocess.run(["git", "-C", str(source_repo), "add", "."], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            subprocess.run(
+                ["git", "-C", str(source_repo), "-c", "user.name=Codeswarm Test", "-c", "user.email=codeswarm@example.com", "commit", "-m", "init"],
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+
+            job_id = "local_test_sparse"
+            project = {
+                "workspace_subdir": "repo",
+                **router_module._normalize_sparse_checkout_options({"sparse_checkout": True, "sparse_always_include": ["docs/"]}),
+            }
+            with patch.object(provider, "_active_workers_for_job", return_value=[{"pid": 100, "node_id": 0}]):
+                prepared = provider.prepare_repository(
+                    job_id,
+                    str(source_repo),
+                    branch="main",
+                    sparse_checkout=True,
+                    sparse_paths=project["sparse_always_include"],
+                )
+            checkout = Path(prepared["worker_paths"][0])
+            self.assertTrue((checkout / "README.md").exists())
+            self.assertTrue((checkout / "docs" / "guide.md").exists())
+            self.assertFalse((checkout / "services").exists())
+
+            task = {"task_id": "T-001", "owned_paths": ["services/api/app.py"], "expected_touch_paths": ["services/api/**"]}
+            self.assertEqual(router_module._project_task_sparse_paths(project, task), ["docs", "services/api"])
+            self.assertIsNone(router_module._project_task_sparse_paths(project, {"task_kind": "integration", "owned_paths": ["docs"]}))
+            router_module._widen_project_sparse_checkout(project, provider, {"job_id": job_id}, 0, task)
+            self.assertTrue((checkout / "services" / "api" / "app.py").exists())
+            self.assertFalse((checkout / "services" / "web").exists())
+
+    def test_project_control_clones_share_one_mirror_per_upstream(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            upstream = root / "upstream.git"
+            seed = root / "seed"
+            subprocess.run(["git", "init", "--bare", "-b", "main", str(upstream)], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            subprocess.run(["git", "clone", str(upstream), str(seed)], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            (seed / "README.md").write_text("hello\n", encoding="utf-8")
+            subprocess.run(["git", "-C", str(seed), "add", "README.md"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            subprocess.run(
+                ["git", "-C", str(seed), "-c", "user.name=Codeswarm Test", "-c", "user.email=codeswarm@example.com", "commit", "-m", "init"],
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            subprocess.run(["git", "-C", str(seed), "push", "origin", "HEAD:main"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+            cache_root = root / "cache"
+            git_calls: list[list[str]] = []
+            real_run_git = router_module._run_git
+
+            def tracking_run_git(repo_path, args):
+                git_calls.append([str(repo_path), *args])
+                return real_run_git(repo_path, args)
+
+            with patch.dict("os.environ", {"CODESWARM_PROJECT_REPO_CACHE_ROOT": str(cache_root)}, clear=False):
+                with patch.object(router_module, "_run_git", side_effect=tracking_run_git):
+                    with patch.object(router_module, "PROJECT_REPO_MIRROR_TTL_SECONDS", 3600.0):
+                        router_module._sync_project_control_clone(str(upstream), cache_root / "_control" / "a")
+                        router_module._sync_project_control_clone(str(upstream) + "/", cache_root / "_control" / "b")
+                        router_module._sync_project_control_clone(str(upstream), cache_root / "_control" / "a")
+
+                mirrors = list((cache_root / "_mirrors").glob("*.git"))
+                self.assertEqual(len(mirrors), 1)
+                self.assertFalse(any(call[0] == str(mirrors[0]) and "fetch" in call for call in git_calls))
+                for name in ("a", "b"):
+                    clone = cache_root / "_control" / name
+                    self.assertEqual(router_module._git_origin_remote_url(clone), str(upstream) if name == "a" else str(upstream) + "/")
+                    self.assertEqual((clone / "README.md").read_text(encoding="utf-8"), "hello\n")
+                    self.assertTrue(router_module._git_resolve_revision(clone, ["origin/main"]))
+
+                other = root / "other.git"
+                subprocess.run(["git", "clone", "--bare", str(upstream), str(other)], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                with patch.object(router_module, "PROJECT_REPO_MIRROR_BUDGET_BYTES", 1):
+                    newest = router_module._ensure_project_repo_mirror(str(other))
+                self.assertEqual([path.name for path in (cache_root / "_mirrors").glob("*.git")], [newest.name])
+
+    def test_project_repo_mirror_eviction_skips_mirrors_in_use(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            upstream = root / "upstream.git"
+            subprocess.run(["git", "init", "--bare", "-b", "main", str(upstream)], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            cache_root = root / "cache"
+            with patch.dict("os.environ", {"CODESWARM_PROJECT_REPO_CACHE_ROOT": str(cache_root)}, clear=False):
+                mirror = router_module._acquire_project_repo_mirror(str(upstream))
+                try:
+                    with patch.object(router_module, "PROJECT_REPO_MIRROR_BUDGET_BYTES", 1):
+                        self.assertEqual(router_module._evict_project_repo_mirrors(), [])
+                    self.assertTrue((mirror / "HEAD").exists())
+                finally:
+                    router_module._release_project_repo_mirror(mirror)
+                self.assertNotIn(str(mirror), router_module.PROJECT_REPO_MIRROR_USERS)
+                with patch.object(router_module, "PROJECT_REPO_MIRROR_BUDGET_BYTES", 1):
+                    self.assertEqual(router_module._evict_project_repo_mirrors(), [str(mirror)])
+
+    def test_task_branch_verification_reuses_batched_git_lookups(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repo = Path(temp_dir) / "repo"
+            git = lambda *args: subprocess.run(
+                ["git", "-C", str(repo), "-c", "user.name=Codeswarm Test", "-c", "user.email=codeswarm@example.com", *args],
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            ).stdout.strip()
+            subprocess.run(["git", "init", "-b", "main", str(repo)], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            git("commit", "--allow-empty", "-m", "init")
+            git("checkout", "-b", "task-1")
+            git("commit", "--allow-empty", "-m", "work")
+            recorded = git("rev-parse", "HEAD")
+            git("commit", "--allow-empty", "-m", "more work")
+            git("checkout", "main")
+
+            project = {"base_branch": "main"}
+            task = {"branch": "task-1", "head_commit": recorded}
+            git_calls: list[list[str]] = []
+            real_run_git = router_module._run_git
+
+            def tracking_run_git(repo_path, args):
+                git_calls.append(list(args))
+                return real_run_git(repo_path, args)
+
+            try:
+                with patch.object(router_module, "_run_git", side_effect=tracking_run_git):
+                    first = router_module._verify_task_branch_state(project, task, repo)
+                    self.assertTrue(first["recoverable"])
+                    self.assertEqual(first["branch_tip"], git("rev-parse", "task-1"))
+                    self.assertEqual(git_calls, [["merge-base", "--is-ancestor", recorded, first["branch_tip"]]])
+
+                    git_calls.clear()
+                    self.assertEqual(router_module._verify_task_branch_state(project, task, repo), first)
+                    self.assertEqual(git_calls, [])
+
+                    git("branch", "-f", "task-1", "main")
+                    moved = router_module._verify_task_branch_state(project, task, repo)
+                    self.assertEqual(moved["branch_tip"], git("rev-parse", "main"))
+                    self.assertFalse(moved["recoverable"])
+                    self.assertIsNone(router_module._git_resolve_revision(repo, ["missing-branch"]))
+            finally:
+                router_module.close_git_revision_helpers()
+
+    def test_merge_train_merges_clean_branches_and_escalates_conflicts(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repo = Path(temp_dir) / "repo"
+            git = lambda *args: subprocess.run(
+                ["git", "-C", str(repo), "-c", "user.name=Codeswarm Test", "-c", "user.email=codeswarm@example.com", *args],
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            ).stdout.strip()
+            subprocess.run(["git", "init", "-b", "main", str(repo)], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            (repo / "shared.txt").write_text("base\n", encoding="utf-8")
+            git("add", "shared.txt")
+            git("commit", "-m", "init")
+            for branch, path, text in (
+                ("codeswarm/p1/T-001", "shared.txt", "one\n"),
+                ("codeswarm/p1/T-002", "other.txt", "two\n"),
+                ("codeswarm/p1/T-003", "shared.txt", "three\n"),
+            ):
+                git("checkout", "-q", "-b", branch, "main")
+                (repo / path).write_text(text, encoding="utf-8")
+                git("add", path)
+                git("commit", "-m", branch)
+            git("checkout", "-q", "main")
+
+            tasks = {}
+            for index, task_id in enumerate(("T-001", "T-002", "T-003")):
+                tasks[task_id] = router_module._normalize_task_payload({"task_id": task_id, "title": task_id, "prompt": "work"}, index)
+                tasks[task_id].update({"status": "completed", "branch": f"codeswarm/p1/{task_id}"})
+            tasks["T-004"] = router_module._normalize_task_payload(
+                router_module._build_integration_task("p1", "main", ["T-001", "T-002", "T-003"], tasks),
+                3,
+            )
+            project = {
+                "project_id": "p1",
+                "repo_path": str(repo),
+                "repo_mode": "local_path",
+                "base_branch": "main",
+                "status": "running",
+                "task_order": ["T-001", "T-002", "T-003", "T-004"],
+                "tasks": tasks,
+                "merge_train": router_module._new_project_merge_train(True),
+            }
+            with patch.dict(router_module.PROJECTS, {"p1": project}, clear=False):
+                with patch.object(router_module, "save_state"), patch.object(router_module, "emit_event"), patch.object(
+                    router_module, "_dispatch_project_tasks"
+                ):
+                    self.assertFalse(router_module._project_task_is_ready(project, "T-004"))
+                    router_module._advance_project_merge_train("p1")
+
+                    train = project["merge_train"]
+                    self.assertEqual([item["result"] for item in train["merges"]], ["fast_forward", "clean", "conflict"])
+                    self.assertEqual(train["merges"][2]["conflict_paths"], ["shared.txt"])
+                    self.assertEqual(git("show", f"{train['branch']}:other.txt"), "two")
+                    self.assertEqual(tasks["T-003"]["merge_state"], "escalated")
+                    resolver_id = tasks["T-003"]["merge_resolved_by"]
+                    self.assertEqual(tasks[resolver_id]["task_kind"], "merge")
+                    self.assertEqual(project["task_order"][-2:], [resolver_id, "T-004"])
+                    self.assertIn(resolver_id, tasks["T-004"]["depends_on"])
+                    self.assertEqual(tasks["T-004"]["status"], "pending")
+
+                    git("checkout", "-q", "-b", f"codeswarm/p1/{resolver_id}", train["head_commit"])
+                    subprocess.run(["git", "-C", str(repo), "merge", "codeswarm/p1/T-003"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                    (repo / "shared.txt").write_text("one\nthree\n", encoding="utf-8")
+                    git("commit", "-am", "resolve")
+                    git("checkout", "-q", "main")
+                    tasks[resolver_id].update({"status": "completed", "branch": f"codeswarm/p1/{resolver_id}"})
+                    router_module._advance_project_merge_train("p1")
+
+            self.assertEqual(tasks["T-004"]["status"], "completed")
+            self.assertEqual(tasks["T-004"]["result_status"], "merged_by_router")
+            self.assertEqual(project["merge_train"]["status"], "completed")
+            self.assertEqual(project["final_result_head_commit"], git("rev-parse", "codeswarm/p1/integration"))
+            self.assertEqual(git("show", "codeswarm/p1/integration:shared.txt"), "one\nthree")
+            router_module.close_git_revision_helpers()
+
+    def test_straggler_is_hedged_and_first_verified_result_wins(self):
+        task = router_module._normalize_task_payload({"task_id": "T-001", "title": "Slow", "prompt": "work"}, 0)
+        task.update({
+            "status": "assigned",
+            "assigned_swarm_id": "s1",
+            "assigned_node_id": 0,
+            "assignment_injection_id": "inj-primary",
+            "branch": "codeswarm/p1/T-001",
+            "assigned_at": time.time() - 100,
+        })
+        project = {
+            "project_id": "p1",
+            "status": "running",
+            "base_branch": "main",
+            "worker_swarm_ids": ["s1"],
+            "task_order": ["T-001"],
+            "tasks": {"T-001": task},
+            "hedging": router_module._normalize_hedging_options({"hedging": {"percentile": 90, "min_elapsed_seconds": 0}}),
+            "task_durations": [10.0, 20.0, 30.0],
+            "usage": router_module._empty_usage_totals(),
+        }
+        injections = []
+
+        def fake_injection(config, provider, request_id, swarm_id, job_id, node_id, content, count_outstanding=True):
+            injections.append((swarm_id, node_id, content))
+            return True, "inj-hedge", None
+
+        result = "TASK_RESULT\ntask_id: T-001\nstatus: done\nbranch: {branch}\nbase_commit: abc\nhead_commit: def\nnotes: ok\n"
+        with patch.dict(router_module.PROJECTS, {"p1": project}, clear=False), patch.dict(
+            router_module.SWARMS, {"s1": {"swarm_id": "s1", "job_id": "job-1", "node_count": 2, "status": "running"}}, clear=False
+        ), patch.dict(router_module.NODE_OUTSTANDING, {("s1", 0): 1}, clear=False):
+            with patch.object(router_module, "perform_injection", side_effect=fake_injection), patch.object(
+                router_module, "_provider_for_swarm", return_value=object()
+            ), patch.object(router_module, "save_state"), patch.object(router_module, "emit_event"):
+                self.assertTrue(router_module._hedge_project_stragglers(None))
+                self.assertEqual([(swarm_id, node_id) for swarm_id, node_id, _ in injections], [("s1", 1)])
+                self.assertIn("codeswarm/p1/T-001-hedge", injections[0][2])
+                self.assertEqual(task["hedge"]["node_id"], 1)
+                self.assertFalse(router_module._hedge_project_stragglers(None))
+
+                router_module._update_project_usage_for_injection({"injection_id": "inj-hedge", "swarm_id": "s1", "node_id": 1, "total_tokens": 40})
+                self.assertEqual(project["hedging"]["usage"]["total_tokens"], 40)
+                self.assertEqual(project["usage"]["total_tokens"], 40)
+
+                with patch.object(router_module, "_refresh_project_repo_for_task_results", return_value=(Path("/tmp"), None)), patch.object(
+                    router_module, "_verify_task_branch_state", return_value={"recoverable": True, "reason": "ok"}
+                ):
+                    router_module._record_project_task_result("p1", "T-001", {
+                        "injection_id": "inj-hedge",
+                        "last_agent_message": result.format(branch="codeswarm/p1/T-001-hedge"),
+                    })
+                    router_module._record_project_task_result("p1", "T-001", {
+                        "injection_id": "inj-primary",
+                        "last_agent_message": result.format(branch="codeswarm/p1/T-001"),
+                    })
+
+                router_module._update_project_usage_for_injection({"injection_id": "inj-primary", "swarm_id": "s1", "node_id": 0, "total_tokens": 25})
+
+        self.assertEqual(task["status"], "completed")
+        self.assertEqual(task["branch"], "codeswarm/p1/T-001-hedge")
+        self.assertEqual(task["hedge_outcome"]["attempt"], "hedge")
+        self.assertEqual(project["hedging"]["hedge_wins"], 1)
+        self.assertEqual(len(project["task_durations"]), 4)
+        self.assertEqual(project["usage"]["total_tokens"], 65)
+        self.assertEqual(project["hedging"]["usage"]["total_tokens"], 40)
+
+    def test_scheduler_prefers_tasks_on_the_longest_remaining_chain(self):
+        raw_tasks = [
+            {"task_id": "T-001", "title": "Wide 1", "prompt": "p", "owned_paths": ["docs"]},
+            {"task_id": "T-002", "title": "Wide 2", "prompt": "p", "owned_paths": ["web"]},
+            {"task_id": "T-003", "title": "Deep 1", "prompt": "p", "owned_paths": ["core"]},
+            {"task_id": "T-004", "title": "Deep 2", "prompt": "p", "depends_on": ["T-003"], "owned_paths": ["core"]},
+            {"task_id": "T-005", "title": "Deep 3", "prompt": "p", "depends_on": ["T-004"], "owned_paths": ["core"]},
+        ]
+        with patch.dict(router_module.SWARMS, {"s1": {"swarm_id": "s1"}}, clear=False), patch.dict(
+            router_module.PROJECTS, {}, clear=True
+        ), patch.object(router_module, "save_state"), patch.object(router_module, "emit_event"), patch.object(
+            router_module, "_sync_project_to_beads"
+        ):
+            project = router_module._create_project_record("Graph", "/tmp/repo", ["s1"], raw_tasks)
+            tasks = project["tasks"]
+            self.assertEqual([tasks[task_id]["critical_path"] for task_id in ("T-001", "T-003", "T-005", "T-006")], [2.0, 4.0, 2.0, 1.0])
+            self.assertEqual(router_module._project_next_ready_task(project)["task_id"], "T-003")
+
+            tasks["T-003"]["status"] = "completed"
+            router_module._update_project_task_priorities(project, ["T-003"])
+            self.assertEqual(tasks["T-003"]["critical_path"], 3.0)
+            self.assertEqual(router_module._project_next_ready_task(project)["task_id"], "T-004")
+
+            project["critical_path_history"] = True
+            tasks["T-001"].update({"status": "completed", "duration_seconds": 30.0})
+            tasks["T-004"].update({"status": "completed", "duration_seconds": 600.0})
+            router_module._update_project_task_priorities(project)
+            # Estimates fall back from (kind, path set) to kind to all completed tasks.
+            self.assertEqual(tasks["T-002"]["critical_path"], 30.0 + 30.0)
+            self.assertEqual(tasks["T-005"]["critical_path"], 600.0 + 30.0)
+
+    def test_project_dispatch_shares_workers_by_weight_and_caps_concurrency(self):
+        def make_project(project_id, **options):
+            tasks = {}
+            for index in range(6):
+                task = router_module._normalize_task_payload({"task_id": f"T-{index + 1:03d}", "title": "t", "prompt": "p"}, index)
+                tasks[task["task_id"]] = task
+            return {
+                "project_id": project_id,
+                "title": project_id,
+                "status": "running",
+                "base_branch": "main",
+                "worker_swarm_ids": ["s1"],
+                "task_order": list(tasks.keys()),
+                "tasks": tasks,
+                "fair_share": router_module._normalize_fair_share_options(options),
+            }
+
+        projects = {
+            "old": make_project("old", weight=1),
+            "heavy": make_project("heavy", weight=2),
+            "capped": make_project("capped", weight=5, max_concurrency=1),
+        }
+        injected = []
+
+        def fake_injection(config, provider, request_id, swarm_id, job_id, node_id, content, count_outstanding=True, hold=False):
+            injected.append(request_id.split(":")[1])
+            return True, f"inj-{len(injected)}", None
+
+        with patch.dict(router_module.PROJECTS, projects, clear=True), patch.dict(
+            router_module.SWARMS, {"s1": {"swarm_id": "s1", "job_id": "job-1", "node_count": 7, "status": "running"}}, clear=False
+        ), patch.dict(router_module.NODE_OUTSTANDING, {}, clear=True), patch.dict(router_module.FAIR_SHARE_PASSES, {}, clear=True):
+            with patch.object(router_module, "perform_injection", side_effect=fake_injection), patch.object(
+                router_module, "_provider_for_swarm", return_value=object()
+            ), patch.object(router_module, "save_state"), patch.object(router_module, "emit_event"):
+                self.assertTrue(router_module._dispatch_project_tasks(None))
+
+        self.assertEqual(len(injected), 7)
+        self.assertEqual(injected.count("capped"), 1)
+        self.assertEqual(injected.count("heavy"), 4)
+        self.assertEqual(injected.count("old"), 2)
+        self.assertEqual(projects["heavy"]["fair_share"]["dispatched"], 4)
+        self.assertIsNotNone(projects["heavy"]["fair_share"]["mean_wait_seconds"])
+
+    def test_prefetch_holds_next_task_on_busy_node_and_revokes_on_conflict(self):
+        tasks = {}
+        for index, path in enumerate(["core", "docs"]):
+            task = router_module._normalize_task_payload(
+                {"task_id": f"T-{index + 1:03d}", "title": "t", "prompt": "p", "owned_paths": [path]}, index
+            )
+            tasks[task["task_id"]] = task
+        project = {
+            "project_id": "p1",
+            "title": "p1",
+            "status": "running",
+            "base_branch": "main",
+            "worker_swarm_ids": ["s1"],
+            "task_order": list(tasks.keys()),
+            "tasks": tasks,
+        }
+        injected = []
+
+        def fake_injection(config, provider, request_id, swarm_id, job_id, node_id, content, count_outstanding=True, hold=False):
+            injected.append((request_id.split(":")[2], hold))
+            return True, f"inj-{len(injected)}", None
+
+        class Provider:
+            controls = []
+
+            def send_control(self, job_id, node_id, message):
+                self.controls.append((job_id, node_id, message))
+
+        provider = Provider()
+        with patch.dict(router_module.PROJECTS, {"p1": project}, clear=True), patch.dict(
+            router_module.SWARMS,
+            {"s1": {"swarm_id": "s1", "job_id": "job-1", "node_count": 1, "status": "running", "prefetch_depth": 1}},
+            clear=True,
+        ), patch.dict(router_module.NODE_OUTSTANDING, {("s1", 0): 1}, clear=True), patch.dict(
+            router_module.PROJECT_PREFETCHED_INJECTIONS, {}, clear=True
+        ), patch.dict(router_module.FAIR_SHARE_PASSES, {}, clear=True), patch.object(
+            router_module, "perform_injection", side_effect=fake_injection
+        ), patch.object(router_module, "_provider_for_swarm", return_value=provider), patch.object(
+            router_module, "save_state"
+        ), patch.object(router_module, "emit_event"), patch.object(router_module, "_sync_task_status_to_beads"):
+            router_module._dispatch_project_tasks(None)
+            # Depth 1: one task queued behind the running turn, nothing more.
+            self.assertEqual(injected, [("T-001", True)])
+            self.assertTrue(tasks["T-001"]["prefetched"])
+            self.assertEqual(router_module.NODE_OUTSTANDING[("s1", 0)], 2)
+            self.assertEqual(router_module._node_prefetched_count("s1", 0), 1)
+
+            tasks["T-003"] = router_module._normalize_task_payload(
+                {"task_id": "T-003", "title": "m", "prompt": "p", "owned_paths": ["core"], "task_kind": "merge"}, 2
+            )
+            router_module._dispatch_project_tasks(None)
+            self.assertEqual(provider.controls, [("job-1", 0, {"type": "revoke_injection", "injection_id": "inj-1"})])
+            self.assertTrue(router_module._handle_project_prefetch_revoked({"injection_id": "inj-1"}))
+            self.assertEqual(tasks["T-001"]["status"], "pending")
+            self.assertEqual(tasks["T-001"]["attempts"], 0)
+            self.assertEqual(router_module.NODE_OUTSTANDING[("s1", 0)], 1)
+
+            router_module._dispatch_project_tasks(None)
+            self.assertEqual(injected[-1], ("T-002", True))
+            self.assertTrue(router_module._mark_prefetched_task_started("inj-2"))
+            self.assertFalse(tasks["T-002"]["prefetched"])
+            self.assertEqual(router_module._node_prefetched_count("s1", 0), 0)
+
+    def test_task_deadline_and_retry_policy_move_task_to_another_node(self):
+        task = router_module._normalize_task_payload(
+            {"task_id": "T-001", "title": "t", "prompt": "p", "retry_policy": {"deadline_seconds": 60}}, 0
+        )
+        project = {
+            "project_id": "p1",
+            "title": "p1",
+            "status": "running",
+            "base_branch": "main",
+            "worker_swarm_ids": ["s1"],
+            "retry_policy": router_module._normalize_retry_policy({"max_attempts": 2, "backoff_seconds": 10}),
+            "task_order": ["T-001"],
+            "tasks": {"T-001": task},
+        }
+        injected = []
+        events = []
+
+        def fake_injection(config, provider, request_id, swarm_id, job_id, node_id, content, count_outstanding=True, hold=False):
+            injected.append(node_id)
+            return True, f"inj-{len(injected)}", None
+
+        with patch.dict(router_module.PROJECTS, {"p1": project}, clear=True), patch.dict(
+            router_module.SWARMS,
+            {"s1": {"swarm_id": "s1", "job_id": "job-1", "node_count": 2, "status": "running"}},
+            clear=True,
+        ), patch.dict(router_module.NODE_OUTSTANDING, {}, clear=True), patch.dict(
+            router_module.NODE_THREAD_ACTIVE, {}, clear=True
+        ), patch.dict(router_module.NODE_DOWN, {}, clear=True), patch.dict(
+            router_module.FAIR_SHARE_PASSES, {}, clear=True
+        ), patch.dict(router_module.PROJECT_TASK_TIMER_WHEEL, {}, clear=True), patch.object(
+            router_module, "PROJECT_TASK_TIMER_TICK", None
+        ), patch.object(router_module, "perform_injection", side_effect=fake_injection), patch.object(
+            router_module, "_provider_for_swarm", return_value=object()
+        ), patch.object(router_module, "save_state"), patch.object(
+            router_module, "emit_event", side_effect=lambda name, data: events.append((name, data))
+        ), patch.object(router_module, "_sync_task_status_to_beads"):
+            router_module._dispatch_project_tasks(None)
+            self.assertEqual(injected, [0])
+            started = task["assigned_at"]
+
+            self.assertEqual(router_module._run_project_task_timers(None, now=started + 30), 0)
+            self.assertEqual(task["status"], "assigned")
+            self.assertEqual(router_module._run_project_task_timers(None, now=started + 61), 1)
+            self.assertEqual(task["status"], "pending")
+            self.assertEqual(task["failed_attempts"], 1)
+            self.assertEqual(task["retry_avoid_node"], ["s1", 0])
+            self.assertEqual(project["task_counts"]["retrying"], 1)
+            self.assertEqual(project["status"], "running")
+            self.assertEqual(router_module._project_task_attempt(task, "inj-1"), "side")
+            self.assertIn("project_task_timed_out", dict(events))
+
+            # The abandoned turn finishes; both nodes are idle but node 0 is avoided.
+            router_module.NODE_OUTSTANDING[("s1", 0)] = 0
+            router_module._run_project_task_timers(None, now=started + 72)
+            self.assertEqual(injected, [0, 1])
+            self.assertEqual(task["assigned_node_id"], 1)
+
+            router_module._record_project_task_result(
+                "p1", "T-001", {"injection_id": "inj-2", "last_agent_message": "TASK_RESULT\nstatus: failed\n"}
+            )
+            self.assertEqual(task["status"], "failed")
+            self.assertEqual(task["failed_attempts"], 2)
+            self.assertEqual(project["status"], "attention")
+
+    def test_project_task_timer_wheel_keeps_later_laps(self):
+        with patch.dict(router_module.PROJECT_TASK_TIMER_WHEEL, {}, clear=True), patch.object(
+            router_module, "PROJECT_TASK_TIMER_TICK", 1000
+        ):
+            slots = router_module.PROJECT_TASK_TIMER_SLOTS
+            router_module._schedule_project_task_timer("p", "soon", "retry", 1005.5)
+            router_module._schedule_project_task_timer("p", "later", "retry", 1005.5 + slots)
+            router_module._schedule_project_task_timer("p", "overdue", "retry", 10.0)
+            self.assertEqual(router_module._pop_due_project_task_timers(1004.0), [("p", "overdue", "retry")])
+            self.assertEqual(router_module._pop_due_project_task_timers(1006.0), [("p", "soon", "retry")])
+            self.assertEqual(router_module._pop_due_project_task_timers(1006.0 + slots), [("p", "later", "retry")])
+
+    def test_autoscaler_launches_under_sustained_demand_and_retires_quiet_swarms(self):
+        group = {
+            **router_module._normalize_autoscale_group({
+                "provider": "local-worker",
+                "nodes_per_swarm": 2,
+                "min_nodes": 2,
+                "max_nodes": 4,
+                "scale_up_after_seconds": 60,
+                "scale_down_after_seconds": 300,
+            }),
+            "pressure_since": None,
+            "quiet_since": {},
+            "launching": {},
+            "launched": 0,
+            "terminated": 0,
+        }
+        project = {"project_id": "p1", "status": "running", "autoscale_group": "g", "worker_swarm_ids": ["s1"]}
+        project["task_counts"] = {"ready": 5}
+        swarms = {"s1": {"swarm_id": "s1", "node_count": 2, "status": "running", "autoscale_group": "g"}}
+        commands = router_module.queue.Queue()
+        with patch.dict(router_module.AUTOSCALE_GROUPS, {"g": group}, clear=True), patch.dict(
+            router_module.SWARMS, swarms, clear=True
+        ), patch.dict(router_module.PROJECTS, {"p1": project}, clear=True), patch.dict(
+            router_module.NODE_OUTSTANDING, {("s1", 0): 1, ("s1", 1): 1}, clear=True
+        ), patch.dict(router_module.NODE_THREAD_ACTIVE, {}, clear=True), patch.dict(
+            router_module.NODE_DOWN, {}, clear=True
+        ), patch.dict(router_module.INTER_SWARM_QUEUE, {}, clear=True), patch.object(
+            router_module, "COMMAND_QUEUE", commands
+        ), patch.object(router_module, "emit_event"), patch.object(router_module, "save_state"):
+            self.assertEqual(router_module._run_autoscaler(now=1000.0), [])
+            launched = router_module._run_autoscaler(now=1061.0)
+            self.assertEqual([action for action, _, _ in launched], ["launch"])
+            command = json.loads(commands.get_nowait())
+            self.assertEqual(command["command"], "swarm_launch")
+            self.assertEqual(command["payload"]["autoscale_group"], "g")
+            self.assertEqual(command["payload"]["nodes"], 2)
+            # max_nodes caps the group even under continued pressure.
+            self.assertEqual(router_module._run_autoscaler(now=1200.0), [])
+
+            router_module.SWARMS["s2"] = {
+                "swarm_id": "s2",
+                "node_count": 2,
+                "status": "running",
+                "autoscale_group": "g",
+                "launch_request_id": launched[0][2],
+            }
+            project["task_counts"] = {"ready": 0}
+            router_module.NODE_OUTSTANDING.clear()
+            self.assertEqual(router_module._run_autoscaler(now=1300.0), [])
+            self.assertEqual(group["launching"], {})
+            retired = router_module._run_autoscaler(now=1601.0)
+            self.assertEqual(retired, [("terminate", "g", "s1")])
+            self.assertEqual(json.loads(commands.get_nowait())["payload"], {"swarm_id": "s1"})
+            self.assertEqual(project["worker_swarm_ids"], [])
+            router_module.SWARMS["s1"]["status"] = "terminating"
+            # min_nodes keeps the last swarm.
+            self.assertEqual(router_module._run_autoscaler(now=2000.0), [])
+
+    def test_inter_swarm_queue_interleaves_sources(self):
+        queue = deque(
+            [{"queue_id": f"a{i}", "source_swarm_id": "a"} for i in range(3)] + [{"queue_id": "b0", "source_swarm_id": "b"}]
+        )
+        order = []
+        with patch.dict(router_module.INTER_SWARM_QUEUE, {"t": queue}, clear=True), patch.dict(
+            router_module.FAIR_SHARE_PASSES, {}, clear=True
+        ):
+            while router_module.INTER_SWARM_QUEUE.get("t"):
+                item = router_module._next_inter_swarm_item("t", router_module.INTER_SWARM_QUEUE["t"])
+                order.append(item["queue_id"])
+                router_module._remove_inter_swarm_item("t", item, dispatched=True)
+        self.assertEqual(order, ["a0", "b0", "a1", "a2"])
+
+    def test_inter_swarm_queue_orders_by_priority_and_dead_letters_expired_items(self):
+        queue = deque()
+        for queue_id, priority, expires_at in [
+            ("b0", "bulk", None),
+            ("n0", None, 150.0),
+            ("u0", "urgent", None),
+            ("n1", "normal", None),
+            ("u1", "urgent", 120.0),
+        ]:
+            router_module._insert_inter_swarm_item(queue, {
+                "queue_id": queue_id,
+                "source_swarm_id": "a",
+                "target_swarm_id": "t",
+                "priority": router_module._inter_swarm_priority(priority),
+                "expires_at": expires_at,
+                "created_at": 100.0,
+            })
+        router_module._insert_inter_swarm_item(queue, {"queue_id": "n2", "priority": "normal"}, front=True)
+        self.assertEqual([item["queue_id"] for item in queue], ["u0", "u1", "n2", "n0", "n1", "b0"])
+
+        with patch.dict(router_module.INTER_SWARM_QUEUE, {"t": queue}, clear=True), patch.dict(
+            router_module.FAIR_SHARE_PASSES, {}, clear=True
+        ), patch.dict(router_module.INTER_SWARM_WAIT_STATS, {}, clear=True), patch.object(
+            router_module, "INTER_SWARM_DEAD_LETTERS", deque()
+        ), patch.object(router_module, "emit_event") as emit, patch.object(router_module, "save_state"):
+            self.assertEqual(router_module._expire_inter_swarm_items(now=130.0), 1)
+            self.assertEqual(emit.call_args_list[0].args[0], "inter_swarm_expired")
+            item = router_module._next_inter_swarm_item("t", router_module.INTER_SWARM_QUEUE["t"])
+            self.assertEqual(item["queue_id"], "u0")
+            with patch.object(router_module.time, "time", return_value=140.0):
+                router_module._remove_inter_swarm_item("t", item, dispatched=True)
+            # Items past their deadline are never dispatched before the expiry tick.
+            with patch.object(router_module.time, "time", return_value=160.0):
+                late = deque([{"queue_id": "late", "priority": "normal", "expires_at": 150.0}])
+                self.assertIsNone(router_module._next_inter_swarm_item("t", late))
+            self.assertEqual(router_module._expire_inter_swarm_items(now=200.0), 1)
+            dead_letters = router_module._dead_letter_snapshot()
+            stats = router_module._inter_swarm_wait_stats_snapshot(now=210.0)
+            remaining = [item["queue_id"] for item in router_module.INTER_SWARM_QUEUE["t"]]
+
+        self.assertEqual([item["queue_id"] for item in dead_letters], ["u1", "n0"])
+        self.assertEqual(dead_letters[0]["reason"], "expired")
+        self.assertEqual(remaining, ["n2", "n1", "b0"])
+        self.assertEqual(stats["urgent"]["dispatched"], 1)
+        self.assertEqual(stats["urgent"]["mean_wait_seconds"], 40.0)
+        self.assertEqual(stats["urgent"]["expired"], 1)
+        self.assertEqual(stats["normal"]["expired"], 1)
+        self.assertEqual(stats["normal"]["queued"], 2)
+        self.assertEqual(stats["bulk"]["oldest_wait_seconds"], 110.0)
+
+    def test_map_reduce_spreads_shards_and_reduces_collected_results(self):
+        injections = []
+
+        def fake_injection(config, provider, request_id, swarm_id, job_id, node_id, content, **kwargs):
+            injections.append((node_id, content))
+            return True, f"inj-{len(injections)}", None
+
+        swarms = {"s1": {"job_id": "job-1", "node_count": 2, "status": "running"}}
+        with patch.dict(router_module.SWARMS, swarms, clear=True), patch.dict(
+            router_module.NODE_OUTSTANDING, {}, clear=True
+        ), patch.dict(router_module.NODE_THREAD_ACTIVE, {}, clear=True), patch.dict(
+            router_module.NODE_DOWN, {}, clear=True
+        ), patch.dict(router_module.INTER_SWARM_QUEUE, {}, clear=True), patch.dict(
+            router_module.INTER_SWARM_INFLIGHT, {}, clear=True
+        ), patch.dict(router_module.MAP_REDUCE_JOBS, {}, clear=True), patch.dict(
+            router_module.MAP_REDUCE_INJECTIONS, {}, clear=True
+        ), patch.object(router_module, "_provider_for_swarm", return_value=object()), patch.object(
+            router_module, "perform_injection", side_effect=fake_injection
+        ), patch.object(router_module, "emit_event") as emit, patch.object(router_module, "save_state"):
+            shards = router_module._map_reduce_shard_prompts({"prompt": "part {shard_index}/{shard_count}", "shard_count": 3})
+            options = {"quorum": 3, "priority": "normal", "reduce_prompt": "Combine:\n{results}"}
+            job_id = router_module._start_map_reduce("req-1", "s1", None, shards, options)
+            router_module._dispatch_inter_swarm_queue({})
+            self.assertEqual(injections, [(0, "part 0/3"), (1, "part 1/3")])
+
+            router_module._record_map_reduce_result({}, "inj-2", "B")
+            router_module._mark_outstanding("s1", 1, -1)
+            router_module._dispatch_inter_swarm_queue({})
+            self.assertEqual(injections[-1], (1, "part 2/3"))
+            router_module._record_map_reduce_result({}, "inj-1", "A")
+            router_module._record_map_reduce_result({}, "inj-3", "C")
+            self.assertEqual(router_module.MAP_REDUCE_JOBS[job_id]["status"], "reducing")
+            reduce_node, reduce_prompt = injections[-1]
+            self.assertEqual(reduce_node, 1)
+            self.assertTrue(reduce_prompt.startswith("Combine:\nCollected 3 of 3 shard results."))
+            self.assertIn("## Shard 0\nA\n\n## Shard 1\nB\n\n## Shard 2\nC", reduce_prompt)
+            router_module._record_map_reduce_result({}, "inj-4", "ABC")
+            completed = [call.args[1] for call in emit.call_args_list if call.args[0] == "map_reduce_completed"]
+            progress = [call.args[1]["shard_id"] for call in emit.call_args_list if call.args[0] == "map_reduce_progress"]
+
+            timed_job = router_module._start_map_reduce(
+                "req-2", "s1", None, [("x", "x"), ("y", "y")], {"quorum": 2, "priority": "bulk", "timeout_seconds": 5}
+            )
+            deadline = router_module.MAP_REDUCE_JOBS[timed_job]["deadline"]
+            router_module._run_map_reduce_timers({}, now=deadline + 1)
+            timed_status = router_module.MAP_REDUCE_JOBS[timed_job]["status"]
+            queued_after_timeout = dict(router_module.INTER_SWARM_QUEUE)
+
+        self.assertEqual(progress, ["1", "0", "2"])
+        self.assertEqual(completed[0]["result"], "ABC")
+        self.assertEqual(completed[0]["results"], {"0": "A", "1": "B", "2": "C"})
+        self.assertEqual(timed_status, "failed")
+        self.assertEqual(queued_after_timeout, {})
+
+    def test_map_reduce_holds_reduce_step_behind_running_turns(self):
+        injections = []
+
+        def fake_injection(config, provider, request_id, swarm_id, job_id, node_id, content, **kwargs):
+            injections.append((node_id, content, kwargs.get("hold", False)))
+            return True, f"inj-{len(injections)}", None
+
+        swarms = {"s1": {"job_id": "job-1", "node_count": 2, "status": "running"}}
+        with patch.dict(router_module.SWARMS, swarms, clear=True), patch.dict(
+            router_module.NODE_OUTSTANDING, {}, clear=True
+        ), patch.dict(router_module.NODE_THREAD_ACTIVE, {}, clear=True), patch.dict(
+            router_module.NODE_DOWN, {}, clear=True
+        ), patch.dict(router_module.INTER_SWARM_QUEUE, {}, clear=True), patch.dict(
+            router_module.INTER_SWARM_INFLIGHT, {}, clear=True
+        ), patch.dict(router_module.MAP_REDUCE_JOBS, {}, clear=True), patch.dict(
+            router_module.MAP_REDUCE_INJECTIONS, {}, clear=True
+        ), patch.object(router_module, "_provider_for_swarm", return_value=object()), patch.object(
+            router_module, "perform_injection", side_effect=fake_injection
+        ), patch.object(router_module, "emit_event"), patch.object(router_module, "save_state"):
+            shards = [("a", "shard a"), ("b", "shard b")]
+            options = {"quorum": 1, "priority": "normal", "reduce_prompt": "Combine:\n{results}"}
+            job_id = router_module._start_map_reduce("req-1", "s1", None, shards, options)
+            router_module._dispatch_inter_swarm_queue({})
+            self.assertEqual([(node, hold) for node, _content, hold in injections], [(0, False), (1, False)])
+
+            # The shard's final answer arrives while its turn is still open.
+            router_module._record_map_reduce_result({}, "inj-2", "B")
+            self.assertEqual(router_module.NODE_OUTSTANDING.get(router_module._node_key("s1", 1)), 1)
+            job = router_module.MAP_REDUCE_JOBS[job_id]
+            self.assertEqual(job["status"], "reducing")
+            self.assertEqual(job["shards"]["a"]["status"], "cancelled")
+            reduce_node, reduce_prompt, reduce_hold = injections[-1]
+
+            # The reduce node dies: the prompt moves to the other node, then
+            # the job fails once the last node is down too.
+            router_module.NODE_DOWN[router_module._node_key("s1", 1)] = 100.0
+            router_module._run_map_reduce_timers({})
+            moved_node, moved_prompt, moved_hold = injections[-1]
+            moved_injection = job["reduce_injection_id"]
+            router_module._record_map_reduce_result({}, "inj-3", "stale")
+            status_after_stale = job["status"]
+            router_module.NODE_DOWN[router_module._node_key("s1", 0)] = 100.0
+            router_module._run_map_reduce_timers({})
+
+            timed_job = router_module._start_map_reduce(
+                "req-2", "s1", None, [("x", "x")], {"quorum": 1, "priority": "normal", "reduce_prompt": "R", "timeout_seconds": 5}
+            )
+            router_module.NODE_DOWN.clear()
+            router_module.NODE_OUTSTANDING.clear()
+            router_module._dispatch_inter_swarm_queue({})
+            router_module._record_map_reduce_result({}, f"inj-{len(injections)}", "X")
+            timed = router_module.MAP_REDUCE_JOBS[timed_job]
+            reduce_deadline = timed["reduce_deadline"]
+            router_module._run_map_reduce_timers({}, now=reduce_deadline - 1)
+            status_before_deadline = timed["status"]
+            router_module._run_map_reduce_timers({}, now=reduce_deadline + 1)
+
+        self.assertEqual(reduce_node, 1)
+        self.assertTrue(reduce_hold)
+        self.assertIn("## Shard b\nB", reduce_prompt)
+        self.assertEqual((moved_node, moved_prompt, moved_hold), (0, reduce_prompt, True))
+        self.assertEqual(moved_injection, "inj-4")
+        self.assertEqual(status_after_stale, "reducing")
+        self.assertEqual((job["status"], job["error"]), ("failed", "no reduce node available"))
+        self.assertEqual(status_before_deadline, "reducing")
+        self.assertEqual((timed["status"], timed["error"]), ("failed", "reduce timed out"))
+
+    def test_pipeline_routes_matching_answers_downstream_with_limits(self):
+        stage = {
+            "stage_id": "verify",
+            "source_swarm_id": "s1",
+            "target_swarm_id": "s2",
+            "match": r"VERDICT: (\w+)",
+            "prompt_template": "Verify {match} from node {source_node_id}:\n{answer}",
+            "max_in_flight": 1,
+            "max_queued": 2,
+        }
+        _pipeline, error = router_module._normalize_pipeline({
+            "stages": [stage, {**stage, "stage_id": "back", "source_swarm_id": "s2", "target_swarm_id": "s1"}],
+        })
+        self.assertEqual(error, "pipeline stages form a cycle")
+        pipeline, error = router_module._normalize_pipeline({"pipeline_id": "p", "stages": [stage]})
+        self.assertIsNone(error)
+        pool_stage = {"source_pool": "gpu", "target_swarm_id": "g1", "prompt_template": "{answer}"}
+        with patch.dict(router_module.PIPELINES, {"p": pipeline}, clear=True), patch.dict(
+            router_module.SWARMS, {"g1": {"pool": "gpu"}}, clear=True
+        ):
+            _pipeline, back_error = router_module._normalize_pipeline({
+                "stages": [{**stage, "stage_id": "back", "source_swarm_id": "s2", "target_swarm_id": "s1"}],
+            })
+            _pipeline, replace_error = router_module._normalize_pipeline({"pipeline_id": "p", "stages": [stage]})
+            _pipeline, pool_error = router_module._normalize_pipeline({"stages": [pool_stage]})
+        self.assertEqual(back_error, "pipeline stages form a cycle")
+        self.assertIsNone(replace_error)
+        self.assertEqual(pool_error, "stage 0 feeds its own source")
+
+        swarms = {
+            "s1": {"job_id": "job-1", "node_count": 1, "status": "running"},
+            "s2": {"job_id": "job-2", "node_count": 2, "status": "running"},
+        }
+        with patch.dict(router_module.SWARMS, swarms, clear=True), patch.dict(
+            router_module.PIPELINES, {"p": pipeline}, clear=True
+        ), patch.dict(router_module.PIPELINE_STATS, {}, clear=True), patch.dict(
+            router_module.PIPELINE_QUEUED, {}, clear=True
+        ), patch.dict(router_module.INTER_SWARM_QUEUE, {}, clear=True), patch.dict(router_module.INTER_SWARM_INFLIGHT, {}, clear=True), patch.object(
+            router_module, "emit_event"
+        ), patch.object(router_module, "save_state"):
+            self.assertEqual(router_module._route_pipeline_answer({"swarm_id": "s1", "node_id": 0, "content": "no verdict"}), 0)
+            for verdict in ("pass", "fail"):
+                router_module._route_pipeline_answer({"swarm_id": "s1", "node_id": 0, "content": f"VERDICT: {verdict}"})
+            queue = router_module.INTER_SWARM_QUEUE["s2"]
+            self.assertEqual(queue[0]["content"], "Verify pass from node 0:\nVERDICT: pass")
+            self.assertTrue(router_module._pipeline_backpressured("s1"))
+            self.assertFalse(router_module._pipeline_backpressured("s2"))
+
+            first = router_module._next_inter_swarm_item("s2", queue)
+            router_module._remove_inter_swarm_item("s2", first, dispatched=True)
+            router_module._note_pipeline_dispatch(first, first["created_at"] + 2.0)
+            router_module.INTER_SWARM_INFLIGHT["inj-1"] = {"item": first, "node": ("s2", 0)}
+            self.assertIsNone(router_module._next_inter_swarm_item("s2", queue))
+            self.assertFalse(router_module._pipeline_backpressured("s1"))
+
+            router_module._record_pipeline_stage_completed(
+                router_module.INTER_SWARM_INFLIGHT.pop("inj-1"), now=first["created_at"] + 5.0
+            )
+            self.assertIs(router_module._next_inter_swarm_item("s2", queue), queue[0])
+            stats = router_module._pipeline_snapshot(now=first["created_at"] + 6.0)[0]["stages"][0]["stats"]
+
+        self.assertEqual(
+            {key: stats[key] for key in ("queued", "in_flight", "matched", "filtered", "enqueued", "dispatched", "completed")},
+            {"queued": 1, "in_flight": 0, "matched": 2, "filtered": 1, "enqueued": 2, "dispatched": 1, "completed": 1},
+        )
+        self.assertEqual(stats["mean_wait_seconds"], 2.0)
+        self.assertEqual(stats["mean_latency_seconds"], 5.0)
+        self.assertEqual(stats["backpressure_episodes"], 1)
+
+        # g1 joined the gpu pool after the stage was accepted.
+        late_stage = {**pipeline["stages"][0], "source_swarm_id": None, "source_pool": "gpu", "target_swarm_id": "g1", "match": None}
+        with patch.dict(router_module.SWARMS, {"g1": {"job_id": "job-3", "node_count": 1, "status": "running", "pool": "gpu"}}, clear=True), patch.dict(
+            router_module.PIPELINES, {"q": {**pipeline, "pipeline_id": "q", "stages": [late_stage]}}, clear=True
+        ), patch.dict(router_module.PIPELINE_STATS, {}, clear=True), patch.dict(
+            router_module.PIPELINE_QUEUED, {}, clear=True
+        ), patch.dict(router_module.INTER_SWARM_QUEUE, {}, clear=True), patch.object(router_module, "emit_event") as emit, patch.object(router_module, "save_state"):
+            self.assertEqual(router_module._route_pipeline_answer({"swarm_id": "g1", "node_id": 0, "content": "done"}), 0)
+            self.assertEqual(router_module.PIPELINE_STATS[("q", "verify")]["dropped"], 1)
+        self.assertEqual(emit.call_args.args[1]["reason"], "target is the answering swarm")
+
+    def test_pool_items_route_to_least_loaded_member(self):
+        swarms = {
+            "s1": {"node_count": 2, "status": "running", "pool": "gpu"},
+            "s2": {"node_count": 2, "status": "running", "pool": "gpu"},
+            "s3": {"node_count": 1, "status": "terminating", "pool": "gpu"},
+        }
+        with patch.dict(router_module.SWARMS, swarms, clear=True), patch.dict(
+            router_module.NODE_OUTSTANDING, {("s1", 0): 1}, clear=True
+        ), patch.dict(router_module.NODE_THREAD_ACTIVE, {}, clear=True), patch.dict(
+            router_module.INTER_SWARM_QUEUE, {}, clear=True
+        ), patch.dict(router_module.NODE_DOWN, {}, clear=True):
+            self.assertEqual(router_module._swarm_pool_members("gpu"), ["s1", "s2"])
+            self.assertEqual(router_module._pick_pool_target("gpu"), ("s2", 0))
+            router_module.NODE_OUTSTANDING.update({("s2", 0): 1, ("s2", 1): 1})
+            self.assertEqual(router_module._pick_pool_target("gpu"), ("s1", 1))
+            router_module.NODE_OUTSTANDING[("s1", 1)] = 1
+            self.assertEqual(router_module._pick_pool_target("gpu"), (None, None))
+
+            # A backpressured member is passed over rather than holding the pool.
+            router_module.NODE_OUTSTANDING.clear()
+            router_module.NODE_OUTSTANDING[("s1", 0)] = 1
+            stage = {"stage_id": "v", "source_swarm_id": "s2", "target_swarm_id": "s9", "max_queued": 1}
+            with patch.dict(router_module.PIPELINES, {"p": {"stages": [stage]}}, clear=True), patch.dict(
+                router_module.PIPELINE_STATS, {}, clear=True
+            ), patch.dict(router_module.PIPELINE_QUEUED, {("p", "v"): 1}, clear=True):
+                self.assertEqual(router_module._pick_pool_target("gpu"), ("s1", 1))
+                router_module.PIPELINE_QUEUED.clear()
+                self.assertEqual(router_module._pick_pool_target("gpu"), ("s2", 0))
+        self.assertEqual(router_module._inter_swarm_queue_key({"target_pool": "gpu"}), "pool:gpu")
+        self.assertEqual(router_module._inter_swarm_queue_key({"target_swarm_id": "s1"}), "s1")
+
+    def test_restart_recovery_rebinds_live_assignments_and_replays_outbox(self):
+        tasks = {}
+        for index, (swarm_id, injection_id) in enumerate([("s1", "inj-done"), ("s1", "inj-busy"), ("gone", "inj-lost")]):
+            task = router_module._normalize_task_payload({"task_id": f"T-{index + 1:03d}", "title": "t", "prompt": "p"}, index)
+            task.update({
+                "status": "assigned",
+                "assigned_swarm_id": swarm_id,
+                "assigned_node_id": index % 2,
+                "assignment_injection_id": injection_id,
+            })
+            tasks[task["task_id"]] = task
+        project = {
+            "project_id": "p1",
+            "title": "p1",
+            "status": "running",
+            "base_branch": "main",
+            "worker_swarm_ids": ["s1"],
+            "task_order": list(tasks.keys()),
+            "tasks": tasks,
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            provider = LocalProvider({"workspace_root": tmp})
+            archive = Path(tmp) / "mailbox" / "archive"
+            archive.mkdir(parents=True)
+            events = [
+                {"type": "worker_event", "event": "turn_started", "job_id": "job-1", "node_id": 0, "injection_id": "inj-done"},
+                {
+                    "type": "worker_event",
+                    "event": "task_complete",
+                    "job_id": "job-1",
+                    "node_id": 0,
+                    "injection_id": "inj-done",
+                    "payload": {"last_agent_message": "TASK_RESULT\nstatus: done\nbranch: task/T-001\n"},
+                },
+                {"type": "worker_event", "event": "task_complete", "job_id": "job-1", "node_id": 0, "injection_id": "inj-old"},
+            ]
+            (archive / "job-1_00.jsonl").write_text("".join(json.dumps(event) + "\n" for event in events))
+            with patch.dict(router_module.PROJECTS, {"p1": project}, clear=True), patch.dict(
+                router_module.SWARMS,
+                {"s1": {"swarm_id": "s1", "job_id": "job-1", "node_count": 2, "status": "running", "provider": "local"}},
+                clear=True,
+            ), patch.dict(router_module.JOB_TO_SWARM, {"job-1": "s1"}, clear=True), patch.dict(
+                router_module.PROVIDERS, {"local": provider}, clear=True
+            ), patch.dict(router_module.NODE_OUTSTANDING, {}, clear=True), patch.object(
+                router_module, "save_state"
+            ), patch.object(router_module, "emit_event"), patch.object(router_module, "_sync_task_status_to_beads"):
+                summary = router_module._recover_project_assignments()
+                outstanding = dict(router_module.NODE_OUTSTANDING)
+
+        self.assertEqual(summary, {"rebound": 2, "reset": 1, "replayed": 1})
+        self.assertEqual(tasks["T-001"]["status"], "completed")
+        self.assertEqual(tasks["T-001"]["branch"], "task/T-001")
+        self.assertEqual(tasks["T-002"]["status"], "assigned")
+        self.assertEqual(tasks["T-002"]["assignment_injection_id"], "inj-busy")
+        self.assertEqual(tasks["T-003"]["status"], "pending")
+        self.assertIsNone(tasks["T-003"]["assigned_swarm_id"])
+        self.assertEqual(outstanding, {("s1", 0): 0, ("s1", 1): 1})
+
+    def test_silent_node_is_marked_down_and_its_work_requeued(self):
+        task = router_module._normalize_task_payload({"task_id": "T-001", "title": "t", "prompt": "p"}, 0)
+        task.update({
+            "status": "assigned",
+            "assigned_swarm_id": "s1",
+            "assigned_node_id": 0,
+            "assignment_injection_id": "inj-task",
+        })
+        project = {
+            "project_id": "p1",
+            "title": "p1",
+            "status": "running",
+            "base_branch": "main",
+            "worker_swarm_ids": ["s1"],
+            "task_order": ["T-001"],
+            "tasks": {"T-001": task},
+        }
+        item = {"queue_id": "q1", "source_swarm_id": "s0", "target_swarm_id": "s1", "content": "hi"}
+        events = []
+        with patch.dict(router_module.PROJECTS, {"p1": project}, clear=True), patch.dict(
+            router_module.SWARMS,
+            {"s1": {"swarm_id": "s1", "job_id": "job-1", "node_count": 2, "status": "running"}},
+            clear=True,
+        ), patch.dict(router_module.JOB_TO_SWARM, {"job-1": "s1"}, clear=True), patch.dict(
+            router_module.NODE_OUTSTANDING, {("s1", 0): 2}, clear=True
+        ), patch.dict(router_module.NODE_THREAD_ACTIVE, {}, clear=True), patch.dict(
+            router_module.NODE_LAST_SEEN, {}, clear=True
+        ), patch.dict(router_module.NODE_DOWN, {}, clear=True), patch.dict(
+            router_module.FOLLOWER_STREAMS, {}, clear=True
+        ), patch.dict(router_module.INTER_SWARM_INFLIGHT, {"inj-q": {"item": item, "node": ("s1", 0)}}, clear=True), patch.dict(
+            router_module.INTER_SWARM_QUEUE, {}, clear=True
+        ), patch.dict(router_module.PENDING_PROJECT_PLANS, {}, clear=True), patch.object(
+            router_module, "NODE_HEARTBEAT_TIMEOUT_SECONDS", 30.0
+        ), patch.object(router_module, "NODE_RECOVERING", set()), patch.object(router_module, "save_state"), patch.object(
+            router_module, "emit_event", side_effect=lambda name, data: events.append((name, data))
+        ), patch.object(router_module, "_sync_task_status_to_beads"), patch.object(
+            router_module, "_dispatch_inter_swarm_queue"
+        ), patch.object(router_module, "_dispatch_pending_project_plans"), patch.object(
+            router_module, "_dispatch_project_tasks"
+        ):
+            router_module._note_follower_heartbeat({"jobs": ["job-1"]}, now=100.0)
+            self.assertFalse(router_module._note_node_alive("s1", 0, heartbeat=True, now=100.0))
+            router_module._note_node_alive("s1", 1, heartbeat=True, now=100.0)
+            # Plain output only refreshes nodes that already send heartbeats.
+            router_module._note_node_alive("s2", 0, now=100.0)
+            self.assertNotIn(("s2", 0), router_module.NODE_LAST_SEEN)
+
+            router_module._note_follower_heartbeat({"jobs": ["job-1"]}, now=115.0)
+            router_module._note_node_alive("s1", 1, heartbeat=True, now=115.0)
+            self.assertEqual(router_module._detect_failed_nodes(None, now=115.0), [])
+
+            router_module._note_follower_heartbeat({"jobs": ["job-1"]}, now=131.0)
+            router_module._note_node_alive("s1", 1, heartbeat=True, now=131.0)
+            self.assertEqual(router_module._detect_failed_nodes(None, now=131.0), [("s1", 0)])
+
+            self.assertEqual(task["status"], "pending")
+            self.assertIsNone(task["assigned_swarm_id"])
+            self.assertEqual(router_module.NODE_OUTSTANDING[("s1", 0)], 0)
+            self.assertEqual(list(router_module.INTER_SWARM_QUEUE["s1"]), [item])
+            self.assertEqual(router_module._first_idle_node_id("s1"), 1)
+            node_down = dict(events)["node_down"]
+            self.assertEqual(node_down["requeued_task_ids"], ["T-001"])
+            self.assertEqual(node_down["requeued_queue_ids"], ["q1"])
+
+            self.assertTrue(router_module._note_node_alive("s1", 0, heartbeat=True, now=140.0))
+            self.assertEqual(dict(events)["node_up"]["down_seconds"], 9.0)
+            self.assertNotIn(("s1", 0), router_module.NODE_DOWN)
+            # A stalled node may still be running its old turn.
+            self.assertEqual(router_module._first_idle_node_id("s1", exclude=1), None)
+            self.assertFalse(router_module._is_node_quiescent("s1", 0))
+            self.assertFalse(router_module._note_node_alive("s1", 0, heartbeat=True, now=145.0, busy=True))
+            self.assertEqual(router_module._first_idle_node_id("s1", exclude=1), None)
+            self.assertTrue(router_module._note_node_alive("s1", 0, heartbeat=True, now=150.0, busy=False))
+            self.assertEqual(router_module._first_idle_node_id("s1", exclude=1), 0)
+
+    def test_node_failure_detection_waits_for_a_live_follower_stream(self):
+        with patch.dict(
+            router_module.SWARMS,
+            {"s1": {"swarm_id": "s1", "job_id": "job-1", "node_count": 1, "status": "running"}},
+            clear=True,
+        ), patch.dict(router_module.NODE_LAST_SEEN, {("s1", 0): 100.0}, clear=True), patch.dict(
+            router_module.NODE_DOWN, {}, clear=True
+        ), patch.dict(router_module.FOLLOWER_STREAMS, {"job-1": {"resumed_at": 0.0, "last_at": 110.0}}, clear=True), patch.object(
+            router_module, "NODE_HEARTBEAT_TIMEOUT_SECONDS", 30.0
+        ), patch.object(router_module, "_mark_node_down") as mark_down:
+            # The router stopped reading the stream, so the silence is not the node's.
+            self.assertEqual(router_module._detect_failed_nodes(None, now=200.0), [])
+            # Once the stream resumes the node gets a full timeout again.
+            router_module._note_follower_heartbeat({"jobs": ["job-1"]}, now=200.0)
+            router_module._note_follower_heartbeat({"jobs": ["job-1"]}, now=215.0)
+            self.assertEqual(router_module._detect_failed_nodes(None, now=220.0), [])
+            router_module._note_follower_heartbeat({"jobs": ["job-1"]}, now=231.0)
+            self.assertEqual(router_module._detect_failed_nodes(None, now=231.0), [("s1", 0)])
+            mark_down.assert_called_once()
+
+    def test_beads_snapshots_are_coalesced_per_project_and_flushed(self):
+        project = {"project_id": "project-1", "status": "running", "beads_sync_status": "synced"}
+        persisted: list[str] = []
+        with patch.dict(router_module.PROJECTS, {"project-1": project}, clear=False):
+            with patch.object(router_module, "PROJECT_BEADS_PERSIST_INTERVAL_SECONDS", 0.2):
+                with patch.object(router_module, "_persist_project_beads_snapshot", side_effect=lambda item: persisted.append(item["project_id"])):
+                    for _ in range(5):
+                        router_module._schedule_project_beads_snapshot(project)
+                    self.assertEqual(persisted, [])
+                    deadline = time.time() + 5
+                    while not persisted and time.time() < deadline:
+                        time.sleep(0.02)
+                    time.sleep(0.3)
+                    self.assertEqual(persisted, ["project-1"])
+
+                    router_module._schedule_project_beads_snapshot(project)
+                    self.assertEqual(router_module.flush_project_beads_snapshots(), ["project-1"])
+                    self.assertEqual(persisted, ["project-1", "project-1"])
+                    self.assertEqual(router_module.flush_project_beads_snapshots(), [])
+
+                    project["status"] = "completed"
+                    router_module._schedule_project_beads_snapshot(project, flush=True)
+                    self.assertEqual(len(persisted), 3)
+
+    def test_beads_bulk_import_creates_tasks_in_dependency_order(self):
+        project = {
+            "project_id": "project-1",
+            "repo_path": "/tmp/repo",
+            "base_branch": "main",
+            "beads_prefix": "repo",
+            "task_order": ["T-003", "T-002", "T-001"],
+            "tasks": {
+                "T-001": {"task_id": "T-001", "title": "one", "depends_on": []},
+                "T-002": {"task_id": "T-002", "title": "two", "depends_on": ["T-001"]},
+                "T-003": {"task_id": "T-003", "title": "three", "depends_on": ["T-002"]},
+            },
+        }
+        imports: list[list[dict]] = []
+
+        def fake_run_beads(repo_path, args, input_text=None):
+            self.assertEqual(args[:2], ["import", "-i"])
+            records = [json.loads(line) for line in Path(args[2]).read_text(encoding="utf-8").splitlines()]
+            imports.append(records)
+            if len(imports) == 2:
+                return None, "import failed"
+            return subprocess.CompletedProcess(args, 0, "", ""), None
+
+        with patch.object(router_module, "_run_beads", side_effect=fake_run_beads):
+            created = router_module._bulk_create_beads_tasks(project, "repo-root", chunk_size=2)
+
+        self.assertEqual(created, ["T-001", "T-002"])
+        self.assertEqual([record["metadata"]["codeswarm_task_id"] for record in imports[0]], ["T-001", "T-002"])
+        tasks = project["tasks"]
+        self.assertEqual(
+            imports[0][1]["dependencies"],
+            [
+                {"issue_id": tasks["T-002"]["beads_id"], "depends_on_id": "repo-root", "type": "parent-child", "created_at": imports[0][1]["created_at"]},
+                {"issue_id": tasks["T-002"]["beads_id"], "depends_on_id": tasks["T-001"]["beads_id"], "type": "blocks", "created_at": imports[0][1]["created_at"]},
+            ],
+        )
+        self.assertTrue(tasks["T-001"]["beads_id"].startswith("repo-"))
+        self.assertEqual(tasks["T-002"]["beads_dependencies_synced"], ["T-001"])
+        self.assertNotIn("beads_id", tasks["T-003"])
+
+    def test_local_workspace_archive_restores_self_contained_clones(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            provider = LocalProvider({"workspace_root": temp_dir})
+            source_repo = Path(temp_dir) / "source-repo"
+            subprocess.run(["git", "init", "-b", "main", str(source_repo)], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            subprocess.run(["git", "-C", str(source_repo), "config", "user.name", "Codeswarm Test"], check=True)
+            subprocess.run(["git", "-C", str(source_repo), "config", "user.email", "codeswarm@example.com"], check=True)
+            (source_repo / "README.md").write_text("hello\n", encoding="utf-8")
+            subprocess.run(["git", "-C", str(source_repo), "add", "README.md"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            subprocess.run(["git", "-C", str(source_repo), "commit", "-m", "init"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+            job_id = "local_test_archive_objects"
+            workers = [{"pid": 100, "node_id": 0}]
+            with patch.object(provider, "_active_workers_for_job", return_value=workers):
+                prepared = provider.prepare_repository(job_id, str(source_repo), branch="main")
+
+            archive_path = provider.create_workspace_archive(job_id, "swarm-a", Path(temp_dir) / "exports")
+            self.assertIsNotNone(archive_path)
+            shutil.rmtree(Path(prepared["object_store"]))
+
+            restored = Path(temp_dir) / "restored"
+            with tarfile.open(archive_path, "r:gz") as tar:
+                tar.extractall(restored)
+            clone = restored / "runs" / job_id / "agent_00" / "repo"
+            self.assertFalse((clone / ".git" / "objects" / "info" / "alternates").exists())
+            log = subprocess.run(["git", "-C", str(clone), "log", "--format=%s"], capture_output=True, text=True)
+            self.assertEqual(log.returncode, 0, log.stderr)
+            self.assertEqual(log.stdout.strip(), "init")
+            fsck = subprocess.run(["git", "-C", str(clone), "fsck", "--full"], capture_output=True, text=True)
+            self.assertEqual(fsck.returncode, 0, fsck.stderr)
+
     def test_local_launch_fields_include_claude_env_profile_options(self):
         fields = _default_launch_fields_for_backend(
             "local",
@@ -777,6 +1928,86 @@ class WorkerRuntimeSupportTests(unittest.TestCase):
             ],
         )
 
+    def test_aws_provider_terminate_hands_teardown_to_background_reaper(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            provider = AwsProvider(
+                {
+                    "cluster": {
+                        "workspace_root": "/srv",
+                        "cluster_subdir": "codeswarm",
+                        "aws": {
+                            "region": "us-east-1",
+                        },
+                    }
+                }
+            )
+            provider.state_file = Path(temp_dir) / "aws_state.json"
+            provider._state_cache = {"jobs": {}}
+            provider._set_job_meta("awsjob", {"job_id": "awsjob", "volume_id": "vol-1", "status": "running"})
+            aws_calls: list[list[str]] = []
+            reaper_events: list[tuple[str, str]] = []
+
+            def fake_aws(args, expect_json=False):
+                aws_calls.append(list(args))
+                return {} if expect_json else object()
+
+            with patch.object(provider, "_get_instances_for_job", return_value=[{"InstanceId": "i-1"}]):
+                with patch.object(provider, "_list_job_volume_ids", return_value=["vol-1", "vol-2"]):
+                    with patch.object(provider, "_aws", side_effect=fake_aws):
+                        with patch.object(provider, "_wait_instances_terminated", return_value=(True, {})):
+                            with patch.object(provider, "_wait_volume_available", return_value=True):
+                                provider.reaper_progress_cb = lambda job_id, stage, message: reaper_events.append(("resumed", stage))
+                                provider._state_lock.acquire()
+                                try:
+                                    provider.terminate(
+                                        "awsjob",
+                                        terminate_params={
+                                            "delete_ebs_on_shutdown": True,
+                                            "_progress_cb": lambda stage, message: reaper_events.append((stage, message)),
+                                        },
+                                    )
+                                    # Teardown is still pending while terminate has returned.
+                                    pending = provider.pending_reaps()
+                                    self.assertEqual(sorted(pending.keys()), ["awsjob"])
+                                    self.assertEqual(pending["awsjob"]["volume_ids"], ["vol-1", "vol-2"])
+                                    self.assertEqual(provider._get_job_meta("awsjob").get("status"), "terminated")
+                                finally:
+                                    provider._state_lock.release()
+                                provider._reaper_executor.shutdown(wait=True)
+
+            self.assertEqual(provider.pending_reaps(), {})
+            self.assertIsNone(provider._get_job_meta("awsjob"))
+            self.assertIn(["ec2", "terminate-instances", "--instance-ids", "i-1"], aws_calls)
+            deleted = sorted(call[-1] for call in aws_calls if call[:2] == ["ec2", "delete-volume"])
+            self.assertEqual(deleted, ["vol-1", "vol-2"])
+            self.assertIn("provider_reaped", [stage for stage, _ in reaper_events])
+            self.assertNotIn("resumed", [stage for stage, _ in reaper_events])
+
+            # A teardown recorded before a restart is resumed from the state file.
+            provider._set_reap_entry(
+                "oldjob",
+                {"job_id": "oldjob", "instance_ids": [], "volume_ids": [], "phase": "volumes"},
+            )
+            resumed = AwsProvider(
+                {
+                    "cluster": {
+                        "workspace_root": "/srv",
+                        "cluster_subdir": "codeswarm",
+                        "aws": {
+                            "region": "us-east-1",
+                        },
+                    }
+                }
+            )
+            resumed.state_file = provider.state_file
+            resumed._state_cache = resumed._load_state()
+            resumed_events: list[tuple[str, str, str]] = []
+            resumed.reaper_progress_cb = lambda job_id, stage, message: resumed_events.append((job_id, stage, message))
+            self.assertEqual(resumed.recover_swarms(), {})
+            resumed._reaper_executor.shutdown(wait=True)
+            self.assertEqual(resumed.pending_reaps(), {})
+            self.assertIn(("oldjob", "provider_reaped"), [(job_id, stage) for job_id, stage, _ in resumed_events])
+
     def test_translate_event_accepts_canonical_worker_event(self):
         original_job_to_swarm = router_module.JOB_TO_SWARM
         try:
@@ -1079,7 +2310,10 @@ class WorkerRuntimeSupportTests(unittest.TestCase):
         )
         rsync_mock.assert_called_once_with(repo_dir.resolve(), "/srv/codeswarm/project_sources/12345/source")
         self.assertEqual(checkout_mock.call_count, 2)
+        self.assertEqual([report["node_id"] for report in prepared["worker_reports"]], [0, 1])
         joined = "\n".join(scripts)
+        self.assertIn('git clone --mirror "$SOURCE" "$STORE"', joined)
+        self.assertIn('git clone --shared "$STORE" "$TARGET"', joined)
         self.assertIn("/srv/codeswarm/runtime/github-token.txt", joined)
         self.assertIn("credential.helper", joined)
         self.assertIn("https://github.com/example/project.git", joined)
@@ -1179,6 +2413,289 @@ class WorkerRuntimeSupportTests(unittest.TestCase):
         self.assertIn("export CODESWARM_FRESH_THREAD_PER_INJECTION=1", script)
         self.assertNotIn("codex_worker.py", script)
 
+    def test_slurm_allocate_packs_agents_per_node(self):
+        args = slurm_allocate_module.argparse.Namespace(
+            nodes=10,
+            agents_per_node=4,
+            time="00:30:00",
+            partition="cpu",
+            account=None,
+            qos=None,
+            approval_policy="never",
+            fresh_thread_per_injection=None,
+            launch_worker_run=True,
+            launch_codex_run=False,
+            launch_codex_test=False,
+            worker_mode="codex",
+        )
+        script = slurm_allocate_module.build_sbatch_script(
+            args,
+            {
+                "cluster": {
+                    "workspace_root": "/srv",
+                    "cluster_subdir": "codeswarm",
+                    "slurm": {},
+                }
+            },
+        )
+        self.assertIn("#SBATCH --nodes=3\n", script)
+        self.assertIn("#SBATCH --ntasks=10\n", script)
+        self.assertIn("#SBATCH --ntasks-per-node=4\n", script)
+        self.assertIn("export CODESWARM_NODE_ID=$SLURM_PROCID", script)
+        self.assertIn('AGENT_WORKDIR="/srv/codeswarm/runs/$SLURM_JOB_ID/agent_${AGENT_INDEX}"', script)
+
+    def test_local_inject_stores_large_content_once_and_releases_it_with_the_job(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            provider = LocalProvider({"workspace_root": temp_dir})
+            mailbox = Path(temp_dir).resolve() / "mailbox"
+            content = "x" * (64 * 1024)
+            provider.inject("42", 0, content, "inj-1")
+            provider.inject("42", 1, content, "inj-2")
+            provider.inject("42", 1, "small", "inj-3")
+
+            first = json.loads((mailbox / "inbox" / "42_00.jsonl").read_text().strip())
+            lines = [json.loads(line) for line in (mailbox / "inbox" / "42_01.jsonl").read_text().splitlines()]
+            key = first["content_ref"]
+            self.assertNotIn("content", first)
+            self.assertEqual(lines[0]["content_ref"], key)
+            self.assertEqual(lines[1]["content"], "small")
+            self.assertEqual(len([p for p in (mailbox / "blobs").rglob("*") if p.is_file() and p.name == key]), 2)
+            for worker in (codex_worker_module, claude_worker_module, mock_worker_module):
+                with patch.object(worker, "_BLOB_CACHE", {}):
+                    self.assertEqual(worker.resolve_inbox_content(first, mailbox), content)
+                    self.assertEqual(worker.resolve_inbox_content(lines[1], mailbox), "small")
+                    self.assertEqual(list(worker._BLOB_CACHE), [key])
+
+            provider.inject("43", 0, content, "inj-4")
+            provider.release_job_blobs("42")
+            self.assertTrue((mailbox / "blobs" / key[:2] / key).exists())
+            provider.release_job_blobs("43")
+            self.assertFalse((mailbox / "blobs" / key[:2] / key).exists())
+            self.assertFalse((mailbox / "blobs" / "refs" / "42").exists())
+
+    def test_staging_cache_skips_upload_for_unchanged_tree(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            source = root / "agent"
+            source.mkdir()
+            (source / "worker.py").write_text("print('v1')\n", encoding="utf-8")
+            cache_root = str(root / "remote" / "cache")
+            target = str(root / "remote" / "agent")
+            uploads: list[tuple[str, str | None]] = []
+
+            def run_remote(script):
+                return subprocess.run(["bash", "-c", script], capture_output=True, text=True, check=False)
+
+            def upload(local, remote_dir, link_dest):
+                uploads.append((remote_dir, link_dest))
+                shutil.copytree(local, remote_dir, dirs_exist_ok=True)
+
+            def stage():
+                return staging_cache_module.stage_tree(
+                    source,
+                    staging_cache_module.tree_content_hash(source),
+                    cache_root,
+                    "agent",
+                    target,
+                    run_remote=run_remote,
+                    upload=upload,
+                )
+
+            self.assertFalse(stage())
+            self.assertTrue(stage())
+            self.assertEqual(len(uploads), 1)
+            self.assertEqual(uploads[0][1], None)
+            self.assertEqual((Path(target) / "worker.py").read_text(encoding="utf-8"), "print('v1')\n")
+
+            (source / "worker.py").write_text("print('v2')\n", encoding="utf-8")
+            self.assertFalse(stage())
+            self.assertEqual(uploads[-1][1], "../latest")
+            self.assertEqual((Path(target) / "worker.py").read_text(encoding="utf-8"), "print('v2')\n")
+            self.assertFalse((Path(target) / ".complete").exists())
+
+    def test_git_commit_key_changes_with_refs_and_ignored_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = Path(tmpdir)
+
+            def git(*args):
+                subprocess.run(
+                    ["git", "-C", str(repo), "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+                    check=True,
+                    capture_output=True,
+                )
+
+            git("init", "-q")
+            (repo / ".gitignore").write_text("build/\n", encoding="utf-8")
+            (repo / "README.md").write_text("hello\n", encoding="utf-8")
+            git("add", ".")
+            git("commit", "-q", "-m", "init")
+            (repo / "build").mkdir()
+            (repo / "build" / "out.txt").write_text("v1\n", encoding="utf-8")
+
+            first = staging_cache_module.git_commit_key(repo)
+            self.assertIsNotNone(first)
+            self.assertEqual(staging_cache_module.git_commit_key(repo), first)
+
+            git("branch", "feature")
+            with_branch = staging_cache_module.git_commit_key(repo)
+            self.assertNotEqual(with_branch, first)
+
+            (repo / "build" / "out.txt").write_text("v2 longer\n", encoding="utf-8")
+            self.assertNotEqual(staging_cache_module.git_commit_key(repo), with_branch)
+
+            (repo / "README.md").write_text("dirty\n", encoding="utf-8")
+            self.assertIsNone(staging_cache_module.git_commit_key(repo))
+
+    def test_slurm_allocate_gates_workers_on_staging_marker(self):
+        config = {
+            "cluster": {
+                "workspace_root": "/srv",
+                "cluster_subdir": "codeswarm",
+                "slurm": {"login_host": "cluster-login"},
+            }
+        }
+        args = slurm_allocate_module.argparse.Namespace(
+            nodes=2,
+            time="00:30:00",
+            partition="cpu",
+            account=None,
+            qos=None,
+            approval_policy="never",
+            fresh_thread_per_injection=None,
+            launch_worker_run=True,
+            launch_codex_run=False,
+            launch_codex_test=False,
+            worker_mode="codex",
+            wait_for_staging=True,
+            staging_timeout=60,
+        )
+        script = slurm_allocate_module.build_sbatch_script(args, config)
+        marker_line = 'STAGED_MARKER="/srv/codeswarm/runs/$SLURM_JOB_ID/.staged"'
+        self.assertIn(marker_line, script)
+        self.assertIn("for _ in $(seq 1 12); do", script)
+        self.assertLess(script.index(marker_line), script.index("srun bash -c"))
+
+        order: list[str] = []
+
+        def fake_ssh_login(login_host, cmd, input_text=None):
+            order.append(cmd)
+            return subprocess.CompletedProcess([], 0, "", "")
+
+        with patch.object(slurm_allocate_module, "ssh_login", side_effect=fake_ssh_login):
+            with patch.object(slurm_allocate_module, "deploy_agent_dir", side_effect=lambda *_: order.append("agent_dir")):
+                with patch.object(slurm_allocate_module, "ensure_runtime_ready", side_effect=lambda *_: order.append("tools")):
+                    with patch.object(slurm_allocate_module, "prepare_run_dirs", side_effect=lambda *_: order.append("run_dirs")):
+                        slurm_allocate_module.run_staging_pipeline(args, config, "777")
+        self.assertEqual(order[-1], "touch /srv/codeswarm/runs/777/.staged")
+        self.assertEqual(set(order[1:-1]), {"agent_dir", "tools", "run_dirs"})
+
+    def test_slurm_allocate_builds_pool_supervisor_and_step_command(self):
+        config = {
+            "cluster": {
+                "workspace_root": "/srv",
+                "cluster_subdir": "codeswarm",
+                "slurm": {},
+            }
+        }
+        pool_args = slurm_allocate_module.argparse.Namespace(
+            nodes=4,
+            time="08:00:00",
+            partition="cpu",
+            account=None,
+            qos=None,
+            pool_idle_timeout=600,
+        )
+        script = slurm_allocate_module.build_pool_sbatch_script(pool_args, config)
+        self.assertIn("#SBATCH --job-name=codeswarm-pool\n", script)
+        self.assertIn("#SBATCH --nodes=4\n", script)
+        self.assertIn('if [ "$idle" -ge 600 ]; then', script)
+        self.assertNotIn("srun", script)
+
+        step_args = slurm_allocate_module.argparse.Namespace(
+            nodes=6,
+            agents_per_node=2,
+            pool_job="4242",
+            swarm_job_id="4242-pool-0123abcd",
+        )
+        command = slurm_allocate_module.build_pool_step_command(
+            step_args,
+            config,
+            "/srv/codeswarm/pool/4242/4242-pool-0123abcd.sh",
+            "/srv/codeswarm/pool/4242/4242-pool-0123abcd.log",
+        )
+        self.assertIn("srun --jobid=4242 --overlap --job-name=codeswarm-4242-pool-0123abcd", command)
+        self.assertIn("--nodes=3 --ntasks=6 --ntasks-per-node=2", command)
+        self.assertTrue(command.startswith("nohup setsid "))
+
+    def test_slurm_provider_leases_best_fitting_pool_allocation(self):
+        provider = SlurmProvider(
+            {
+                "cluster": {
+                    "workspace_root": "/srv",
+                    "cluster_subdir": "codeswarm",
+                    "slurm": {
+                        "login_host": "cluster-login",
+                        "allocation_pool": {"enabled": True, "min_remaining_seconds": 600},
+                    },
+                }
+            }
+        )
+        snapshot = {
+            "101": {"job_id": "101", "state": "RUNNING", "nodes": 8, "time_left_seconds": 7200, "partition": "cpu", "lease": None},
+            "102": {"job_id": "102", "state": "RUNNING", "nodes": 2, "time_left_seconds": 7200, "partition": "cpu", "lease": None},
+            "103": {"job_id": "103", "state": "RUNNING", "nodes": 2, "time_left_seconds": 300, "partition": "cpu", "lease": None},
+            "104": {"job_id": "104", "state": "RUNNING", "nodes": 2, "time_left_seconds": 7200, "partition": "cpu", "lease": "104-pool-aaaaaaaa"},
+        }
+        ssh_calls: list[list[str]] = []
+
+        def fake_ssh_run(args, timeout=None, input_text=None):
+            ssh_calls.append(list(args))
+            return subprocess.CompletedProcess(args, 0, "", "")
+
+        with patch.object(provider, "_pool_snapshot", return_value=snapshot):
+            with patch.object(provider, "_ssh_run", side_effect=fake_ssh_run):
+                pool_job_id, job_id = provider._pool_try_lease(2, "cpu")
+        self.assertEqual(pool_job_id, "102")
+        self.assertEqual(provider._pooled_allocation_id(job_id), "102")
+        self.assertIn("/srv/codeswarm/pool/102/lease", ssh_calls[0][-1])
+        self.assertIsNone(provider._pooled_allocation_id("4242"))
+        self.assertEqual(provider._parse_slurm_duration("1-02:03:04"), 93784)
+        self.assertEqual(provider._parse_slurm_duration("05:00"), 300)
+        self.assertIsNone(provider._parse_slurm_duration("UNLIMITED"))
+
+    def test_slurm_pool_refresh_claims_lease_before_cancelling(self):
+        provider = SlurmProvider(
+            {
+                "cluster": {
+                    "workspace_root": "/srv",
+                    "cluster_subdir": "codeswarm",
+                    "slurm": {
+                        "login_host": "cluster-login",
+                        "allocation_pool": {"enabled": True, "size": 0},
+                    },
+                }
+            }
+        )
+        snapshot = {
+            "201": {"job_id": "201", "state": "RUNNING", "nodes": 2, "time_left_seconds": 1200, "partition": "cpu", "lease": None},
+            "202": {"job_id": "202", "state": "RUNNING", "nodes": 2, "time_left_seconds": 1200, "partition": "cpu", "lease": None},
+        }
+        scripts: list[str] = []
+
+        def fake_ssh_run(args, timeout=None, input_text=None):
+            scripts.append(args[-1])
+            # A launch leased 202 after the snapshot was taken.
+            returncode = 1 if "/pool/202/lease" in args[-1] else 0
+            return subprocess.CompletedProcess(args, returncode, "", "")
+
+        with patch.object(provider, "_pool_snapshot", return_value=snapshot):
+            with patch.object(provider, "_ssh_run", side_effect=fake_ssh_run):
+                self.assertEqual(provider._pool_try_lease(2, "cpu"), (None, None))
+                self.assertEqual(scripts, [])
+                report = provider.maintain_allocation_pool()
+        self.assertEqual(report["refreshed"], ["201"])
+        self.assertTrue(all("noclobber" in script and "scancel" in script for script in scripts))
+
     def test_slurm_provider_stages_claude_env_file_without_putting_values_in_path(self):
         provider = SlurmProvider(
             {
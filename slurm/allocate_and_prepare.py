@@ -6,8 +6,10 @@ import time
 import base64
 import shlex
 import json
+import math
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from pathlib import PurePosixPath
 
@@ -15,6 +17,7 @@ from pathlib import PurePosixPath
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from common.config import load_config
+from common.staging_cache import stage_tree, tree_content_hash
 
 MIN_PYTHON = (3, 10)
 if sys.version_info < MIN_PYTHON and os.environ.get("CODESWARM_PY_REEXEC") != "1":
@@ -105,22 +108,102 @@ def resolved_worker_mode(args) -> str:
     return "codex"
 
 
-def build_sbatch_script(args, config):
-    workspace_root, cluster_subdir = resolve_slurm_paths(config)
-    hpc_base = f"{workspace_root}/{cluster_subdir}"
-
-    lines = [
-        "#!/bin/bash",
-        "#SBATCH --job-name=codeswarm",
-        f"#SBATCH --nodes={args.nodes}",
-        f"#SBATCH --ntasks={args.nodes}",
-        f"#SBATCH --time={args.time}",
-        "#SBATCH --signal=TERM@60",
-        f"#SBATCH --output={hpc_base}/codeswarm_%j.out",
-        f"#SBATCH --error={hpc_base}/codeswarm_%j.err",
+def agents_per_node(args) -> int:
+    try:
+        value = int(getattr(args, "agents_per_node", None) or 1)
+    except (TypeError, ValueError):
+        value = 1
+    return max(1, value)
+
+
+def compute_node_count(args) -> int:
+    # args.nodes is the number of agents (one Slurm task each); with packing,
+    # several tasks share a compute node.
+    return max(1, math.ceil(int(args.nodes) / agents_per_node(args)))
+
+
+def build_worker_lines(args, hpc_base, job_id_ref="$SLURM_JOB_ID"):
+    """Shell lines run once per Slurm task to start one agent worker."""
+    worker_mode = resolved_worker_mode(args)
+    capture_all_session = str(os.environ.get("CODESWARM_CAPTURE_ALL_SESSION") or "").strip()
+    capture_line = (
+        f"export CODESWARM_CAPTURE_ALL_SESSION={shlex.quote(capture_all_session)}\n"
+        if capture_all_session
+        else ""
+    )
+    worker_lines = [
+        f"export CODESWARM_JOB_ID={job_id_ref}",
+        # Router node ids are global task ranks, so packed agents on the
+        # same compute node still get distinct ids and work dirs.
+        "export CODESWARM_NODE_ID=$SLURM_PROCID",
+        "export CODESWARM_HOST_INDEX=$SLURM_NODEID",
+        "export CODESWARM_AGENT_SLOT=$SLURM_LOCALID",
+        f"export CODESWARM_BASE_DIR={hpc_base}",
+        f"export CODESWARM_ASK_FOR_APPROVAL={shlex.quote(str(args.approval_policy or 'never'))}",
     ]
+    if getattr(args, "fresh_thread_per_injection", None) is not None:
+        worker_lines.append(
+            "export CODESWARM_FRESH_THREAD_PER_INJECTION="
+            + shlex.quote("1" if _truthy_flag(args.fresh_thread_per_injection) else "0")
+        )
+    if worker_mode == "codex":
+        worker_lines.extend(
+            [
+                f"export CODESWARM_CODEX_BIN={hpc_base}/tools/npm-global/bin/codex",
+                f"export PATH={hpc_base}/tools/npm-global/bin:$PATH",
+            ]
+        )
+        if capture_line:
+            worker_lines.append(capture_line.rstrip("\n"))
+        worker_entrypoint = f"python3 {hpc_base}/agent/codex_worker.py"
+    elif worker_mode == "claude":
+        worker_lines.append(
+            "export CODESWARM_CLAUDE_PERMISSION_MODE="
+            + shlex.quote(str(args.claude_permission_mode or "bypassPermissions"))
+        )
+        worker_lines.extend(
+            [
+                f'CLAUDE_VENV="{hpc_base}/tools/claude-venv"',
+                'if [ ! -x "$CLAUDE_VENV/bin/python" ]; then',
+                '  echo "Claude runtime virtualenv is missing at $CLAUDE_VENV" >&2',
+                "  exit 1",
+                "fi",
+                'export PATH="$CLAUDE_VENV/bin:$PATH"',
+            ]
+        )
+        if args.claude_env_file:
+            quoted_env_file = shlex.quote(str(args.claude_env_file))
+            worker_lines.extend(
+                [
+                    f"if [ ! -f {quoted_env_file} ]; then",
+                    f'  echo "Claude env file is missing at {args.claude_env_file}" >&2',
+                    "  exit 1",
+                    "fi",
+                    f". {quoted_env_file}",
+                ]
+            )
+        if args.claude_model:
+            worker_lines.append("export CODESWARM_CLAUDE_MODEL=" + shlex.quote(str(args.claude_model)))
+        if args.claude_cli_path:
+            worker_lines.append("export CODESWARM_CLAUDE_CLI_PATH=" + shlex.quote(str(args.claude_cli_path)))
+        worker_entrypoint = '"$CLAUDE_VENV/bin/python" ' + f'"{hpc_base}/agent/claude_worker.py"'
+    else:
+        raise RuntimeError(f"Unsupported worker_mode: {worker_mode}")
+    worker_lines.extend(
+        [
+            'AGENT_INDEX=$(printf "%02d" $SLURM_PROCID)',
+            f'AGENT_WORKDIR="{hpc_base}/runs/{job_id_ref}/agent_${{AGENT_INDEX}}"',
+            'mkdir -p "$AGENT_WORKDIR"',
+            'cd "$AGENT_WORKDIR"',
+            worker_entrypoint,
+        ]
+    )
+    return worker_lines
+
 
+def scheduling_directives(args, config):
     slurm_cfg = config.get("cluster", {}).get("slurm", {})
+    lines = []
 
     if args.partition:
         lines.append(f"#SBATCH --partition={args.partition}")
@@ -137,6 +220,31 @@ def build_sbatch_script(args, config):
     elif slurm_cfg.get("default_qos"):
         lines.append(f"#SBATCH --qos={slurm_cfg.get('default_qos')}")
 
+    return lines
+
+
+def build_sbatch_script(args, config):
+    workspace_root, cluster_subdir = resolve_slurm_paths(config)
+    hpc_base = f"{workspace_root}/{cluster_subdir}"
+    packing = agents_per_node(args)
+
+    lines = [
+        "#!/bin/bash",
+        "#SBATCH --job-name=codeswarm",
+        f"#SBATCH --nodes={compute_node_count(args)}",
+        f"#SBATCH --ntasks={args.nodes}",
+    ]
+    if packing > 1:
+        lines.append(f"#SBATCH --ntasks-per-node={packing}")
+    lines += [
+        f"#SBATCH --time={args.time}",
+        "#SBATCH --signal=TERM@60",
+        f"#SBATCH --output={hpc_base}/codeswarm_%j.out",
+        f"#SBATCH --error={hpc_base}/codeswarm_%j.err",
+    ]
+
+    lines.extend(scheduling_directives(args, config))
+
     lines.extend([
         "",
         f"mkdir -p {hpc_base}",
@@ -144,76 +252,22 @@ def build_sbatch_script(args, config):
     ])
 
     if launch_worker_requested(args):
-        worker_mode = resolved_worker_mode(args)
-        capture_all_session = str(os.environ.get("CODESWARM_CAPTURE_ALL_SESSION") or "").strip()
-        capture_line = (
-            f"export CODESWARM_CAPTURE_ALL_SESSION={shlex.quote(capture_all_session)}\n"
-            if capture_all_session
-            else ""
-        )
-        worker_lines = [
-            "export CODESWARM_JOB_ID=$SLURM_JOB_ID",
-            "export CODESWARM_NODE_ID=$SLURM_PROCID",
-            f"export CODESWARM_BASE_DIR={hpc_base}",
-            f"export CODESWARM_ASK_FOR_APPROVAL={shlex.quote(str(args.approval_policy or 'never'))}",
-        ]
-        if getattr(args, "fresh_thread_per_injection", None) is not None:
-            worker_lines.append(
-                "export CODESWARM_FRESH_THREAD_PER_INJECTION="
-                + shlex.quote("1" if _truthy_flag(args.fresh_thread_per_injection) else "0")
-            )
-        if worker_mode == "codex":
-            worker_lines.extend(
-                [
-                    f"export CODESWARM_CODEX_BIN={hpc_base}/tools/npm-global/bin/codex",
-                    f"export PATH={hpc_base}/tools/npm-global/bin:$PATH",
-                ]
-            )
-            if capture_line:
-                worker_lines.append(capture_line.rstrip("\n"))
-            worker_entrypoint = f"python3 {hpc_base}/agent/codex_worker.py"
-        elif worker_mode == "claude":
-            worker_lines.append(
-                "export CODESWARM_CLAUDE_PERMISSION_MODE="
-                + shlex.quote(str(args.claude_permission_mode or "bypassPermissions"))
-            )
-            worker_lines.extend(
-                [
-                    f'CLAUDE_VENV="{hpc_base}/tools/claude-venv"',
-                    'if [ ! -x "$CLAUDE_VENV/bin/python" ]; then',
-                    '  echo "Claude runtime virtualenv is missing at $CLAUDE_VENV" >&2',
-                    "  exit 1",
-                    "fi",
-                    'export PATH="$CLAUDE_VENV/bin:$PATH"',
-                ]
-            )
-            if args.claude_env_file:
-                quoted_env_file = shlex.quote(str(args.claude_env_file))
-                worker_lines.extend(
-                    [
-                        f"if [ ! -f {quoted_env_file} ]; then",
-                        f'  echo "Claude env file is missing at {args.claude_env_file}" >&2',
-                        "  exit 1",
-                        "fi",
-                        f". {quoted_env_file}",
-                    ]
-                )
-            if args.claude_model:
-                worker_lines.append("export CODESWARM_CLAUDE_MODEL=" + shlex.quote(str(args.claude_model)))
-            if args.claude_cli_path:
-                worker_lines.append("export CODESWARM_CLAUDE_CLI_PATH=" + shlex.quote(str(args.claude_cli_path)))
-            worker_entrypoint = '"$CLAUDE_VENV/bin/python" ' + f'"{hpc_base}/agent/claude_worker.py"'
-        else:
-            raise RuntimeError(f"Unsupported worker_mode: {worker_mode}")
-        worker_lines.extend(
-            [
-                'AGENT_INDEX=$(printf "%02d" $SLURM_PROCID)',
-                f'AGENT_WORKDIR="{hpc_base}/runs/$SLURM_JOB_ID/agent_${{AGENT_INDEX}}"',
-                'mkdir -p "$AGENT_WORKDIR"',
-                'cd "$AGENT_WORKDIR"',
-                worker_entrypoint,
-            ]
-        )
+        worker_lines = build_worker_lines(args, hpc_base)
+        if getattr(args, "wait_for_staging", False):
+            # The job may start before the launcher finishes staging.
+            staging_timeout = int(getattr(args, "staging_timeout", None) or 1800)
+            lines.extend([
+                "",
+                f'STAGED_MARKER="{hpc_base}/runs/$SLURM_JOB_ID/{STAGING_MARKER}"',
+                f"for _ in $(seq 1 {max(1, staging_timeout // 5)}); do",
+                '  [ -f "$STAGED_MARKER" ] && break',
+                "  sleep 5",
+                "done",
+                'if [ ! -f "$STAGED_MARKER" ]; then',
+                '  echo "Launcher staging did not complete" >&2',
+                "  exit 1",
+                "fi",
+            ])
         lines.extend(
             [
                 "",
@@ -241,6 +295,293 @@ def build_sbatch_script(args, config):
     return "\n".join(lines) + "\n"
 
 
+POOL_JOB_NAME = "codeswarm-pool"
+
+
+def build_pool_sbatch_script(args, config):
+    """
+    Long-lived pool allocation. The batch script only supervises: swarms run
+    as job steps started with `srun --jobid`, and the allocation releases
+    itself once it has been unleased for the idle timeout.
+    """
+    workspace_root, cluster_subdir = resolve_slurm_paths(config)
+    hpc_base = f"{workspace_root}/{cluster_subdir}"
+    idle_timeout = max(60, int(getattr(args, "pool_idle_timeout", None) or 900))
+
+    lines = [
+        "#!/bin/bash",
+        f"#SBATCH --job-name={POOL_JOB_NAME}",
+        f"#SBATCH --nodes={args.nodes}",
+        f"#SBATCH --time={args.time}",
+        f"#SBATCH --output={hpc_base}/pool/codeswarm_pool_%j.out",
+        f"#SBATCH --error={hpc_base}/pool/codeswarm_pool_%j.err",
+    ]
+    lines.extend(scheduling_directives(args, config))
+    lines.extend([
+        "",
+        f'POOL_DIR="{hpc_base}/pool/$SLURM_JOB_ID"',
+        'mkdir -p "$POOL_DIR"',
+        'touch "$POOL_DIR/last_active"',
+        "while true; do",
+        '  if [ -f "$POOL_DIR/lease" ]; then',
+        '    touch "$POOL_DIR/last_active"',
+        "  else",
+        '    idle=$(( $(date +%s) - $(stat -c %Y "$POOL_DIR/last_active") ))',
+        f"    if [ \"$idle\" -ge {idle_timeout} ]; then",
+        "      break",
+        "    fi",
+        "  fi",
+        "  sleep 15",
+        "done",
+        'rm -rf "$POOL_DIR"',
+    ])
+    return "\n".join(lines) + "\n"
+
+
+def build_pool_step_command(args, config, step_script, log_path):
+    packing = agents_per_node(args)
+    srun = [
+        "srun",
+        f"--jobid={args.pool_job}",
+        "--overlap",
+        f"--job-name=codeswarm-{args.swarm_job_id}",
+        f"--nodes={compute_node_count(args)}",
+        f"--ntasks={args.nodes}",
+    ]
+    if packing > 1:
+        srun.append(f"--ntasks-per-node={packing}")
+    srun += ["bash", step_script]
+    return (
+        "nohup setsid "
+        + " ".join(shlex.quote(part) for part in srun)
+        + f" > {shlex.quote(log_path)} 2>&1 < /dev/null &"
+    )
+
+
+def start_pool_step(args, config):
+    login_host = resolve_login_host(config)
+    workspace_root, cluster_subdir = resolve_slurm_paths(config)
+    hpc_base = f"{workspace_root}/{cluster_subdir}"
+    pool_dir = f"{hpc_base}/pool/{args.pool_job}"
+    step_script = f"{pool_dir}/{args.swarm_job_id}.sh"
+    log_path = f"{pool_dir}/{args.swarm_job_id}.log"
+
+    worker_lines = build_worker_lines(args, hpc_base, job_id_ref=args.swarm_job_id)
+    result = ssh_login(
+        login_host,
+        f"cat > {shlex.quote(step_script)}",
+        input_text="#!/bin/bash\n" + "\n".join(worker_lines) + "\n",
+    )
+    if result.returncode != 0:
+        print(f"Failed to stage pool step script: {result.stderr}")
+        sys.exit(1)
+
+    result = ssh_login(
+        login_host,
+        f"cd {shlex.quote(hpc_base)} && " + build_pool_step_command(args, config, step_script, log_path),
+    )
+    if result.returncode != 0:
+        print(f"Failed to start workers in pool allocation {args.pool_job}: {result.stderr}")
+        sys.exit(1)
+
+    step_name = f"codeswarm-{args.swarm_job_id}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        steps = ssh_login(login_host, f"squeue -s -j {args.pool_job} -h -o '%i|%j'")
+        for line in steps.stdout.splitlines():
+            if line.strip().endswith(f"|{step_name}"):
+                return
+        time.sleep(2)
+    print(f"Workers did not start in pool allocation {args.pool_job}; see {log_path}")
+    sys.exit(1)
+
+
+STAGING_MARKER = ".staged"
+
+
+def timed_stage(name, func, *args, **kwargs):
+    started = time.time()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        print(f"STAGE_TIMING stage={name} seconds={time.time() - started:.2f}", flush=True)
+
+
+def deploy_agent_dir(config):
+    login_host = resolve_login_host(config)
+    workspace_root, cluster_subdir = resolve_slurm_paths(config)
+    agent_local_dir = Path(__file__).parent.parent / "agent"
+    agent_remote_dir = f"{workspace_root}/{cluster_subdir}/agent"
+    slurm_cfg = config.get("cluster", {}).get("slurm", {})
+
+    if slurm_cfg.get("staging_cache", True):
+        # Content-addressed: an unchanged agent dir is hardlinked from the
+        # remote cache instead of being re-sent.
+        key = tree_content_hash(agent_local_dir)
+
+        def upload(local, remote_dir, link_dest):
+            ssh_login(login_host, f"mkdir -p {shlex.quote(remote_dir)}")
+            cmd = ["rsync", "-az", "--delete"]
+            if link_dest:
+                cmd.append(f"--link-dest={link_dest}")
+            subprocess.run(cmd + [str(local) + "/", f"{login_host}:{remote_dir}/"], check=True)
+
+        hit = stage_tree(
+            agent_local_dir,
+            key,
+            f"{workspace_root}/{cluster_subdir}/cache/staging",
+            "agent",
+            agent_remote_dir,
+            run_remote=lambda script: ssh_login(login_host, "/bin/bash -lc " + shlex.quote(script)),
+            upload=upload,
+            keep=int(slurm_cfg.get("staging_cache_keep") or 5),
+        )
+        print(f"STAGING_CACHE name=agent_dir result={'hit' if hit else 'miss'} key={key}", flush=True)
+        return
+
+    # Ensure remote directory exists
+    ssh_login(login_host, f"mkdir -p {agent_remote_dir}")
+
+    # Rsync entire agent directory (codex_worker.py, outbox_follower.py, future utilities)
+    subprocess.run(
+        [
+            "rsync",
+            "-az",
+            str(agent_local_dir) + "/",
+            f"{login_host}:{agent_remote_dir}/",
+        ],
+        check=True,
+    )
+
+
+def ensure_runtime_ready(args, config):
+    worker_mode = resolved_worker_mode(args)
+    if worker_mode == "codex":
+        ensure_codex_ready(config)
+    elif worker_mode == "claude":
+        ensure_claude_ready(config)
+
+
+def decode_agents_payload(args):
+    agents_md_content = None
+    agents_bundle = None
+    if args.agents_md_b64:
+        try:
+            agents_md_content = base64.b64decode(args.agents_md_b64).decode("utf-8")
+        except Exception as e:
+            raise RuntimeError(f"Invalid --agents-md-b64 payload: {e}") from e
+    if args.agents_bundle_b64:
+        try:
+            decoded = base64.b64decode(args.agents_bundle_b64).decode("utf-8")
+            parsed = json.loads(decoded)
+            if isinstance(parsed, dict):
+                agents_bundle = parsed
+        except Exception as e:
+            raise RuntimeError(f"Invalid --agents-bundle-b64 payload: {e}") from e
+
+    bundle_md = agents_bundle.get("agents_md_content") if isinstance(agents_bundle, dict) else None
+    if isinstance(bundle_md, str) and bundle_md.strip():
+        agents_md_content = bundle_md
+    bundle_mode = str(agents_bundle.get("mode") or "file") if isinstance(agents_bundle, dict) else "file"
+    raw_skills = agents_bundle.get("skills_files") if isinstance(agents_bundle, dict) else []
+    skill_files = []
+    if bundle_mode == "directory" and isinstance(raw_skills, list):
+        for item in raw_skills:
+            if not isinstance(item, dict):
+                continue
+            rel_path = item.get("path")
+            content = item.get("content")
+            if not isinstance(rel_path, str) or not isinstance(content, str):
+                continue
+            safe_rel = safe_skill_rel_path(rel_path)
+            if not safe_rel:
+                continue
+            skill_files.append((safe_rel, content))
+    return agents_md_content, skill_files
+
+
+def prepare_run_dirs(args, config, job_id):
+    """
+    Create runs/<job>/agent_XX for every agent. Shared files are uploaded
+    once into a template dir and hardlinked per agent in a single remote
+    script, so neither SSH round trips nor disk use grow with swarm size.
+    """
+    login_host = resolve_login_host(config)
+    workspace_root, cluster_subdir = resolve_slurm_paths(config)
+    run_base = f"{workspace_root}/{cluster_subdir}/runs/{job_id}"
+    template_dir = f"{run_base}/.agent_template"
+    ssh_login(login_host, f"mkdir -p {shlex.quote(template_dir)}")
+    layout = {
+        "agents": int(args.nodes),
+        "agents_per_node": agents_per_node(args),
+        "compute_nodes": compute_node_count(args),
+    }
+    ssh_login(
+        login_host,
+        f"cat > {shlex.quote(run_base + '/layout.json')}",
+        input_text=json.dumps(layout) + "\n",
+    )
+
+    agents_md_content, skill_files = decode_agents_payload(args)
+    if agents_md_content is not None:
+        ssh_login(
+            login_host,
+            f"cat > {shlex.quote(template_dir + '/AGENTS.md')}",
+            input_text=agents_md_content,
+        )
+    for rel_path, content in skill_files:
+        remote_file = f"{template_dir}/.agents/skills/{rel_path}"
+        remote_dir = str(PurePosixPath(remote_file).parent)
+        ssh_login(
+            login_host,
+            f"mkdir -p {shlex.quote(remote_dir)} && cat > {shlex.quote(remote_file)}",
+            input_text=content,
+        )
+
+    script = f"""
+set -euo pipefail
+RUN_BASE={shlex.quote(run_base)}
+TEMPLATE={shlex.quote(template_dir)}
+# Linked copies share one inode, so no agent may edit them in place.
+find "$TEMPLATE" -type f -exec chmod a-w {{}} +
+for i in $(seq 0 {int(args.nodes) - 1}); do
+  AGENT_DIR="$RUN_BASE/agent_$(printf '%02d' "$i")"
+  mkdir -p "$AGENT_DIR"
+  echo "Agent $i: Say hello in one short sentence." > "$AGENT_DIR/PROMPT.txt"
+  cp -al "$TEMPLATE"/. "$AGENT_DIR"/
+done
+rm -rf "$TEMPLATE"
+"""
+    result = ssh_login(login_host, "/bin/bash -lc " + shlex.quote(script))
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to prepare agent run directories: {result.stderr}")
+
+
+def run_staging_pipeline(args, config, job_id):
+    """Stage tools, agent code and run dirs concurrently, then mark the job staged."""
+    login_host = resolve_login_host(config)
+    workspace_root, cluster_subdir = resolve_slurm_paths(config)
+    run_base = f"{workspace_root}/{cluster_subdir}/runs/{job_id}"
+    ssh_login(login_host, f"mkdir -p {shlex.quote(run_base)}")
+
+    stages = {
+        "agent_dir": (deploy_agent_dir, (config,)),
+        "runtime_tools": (ensure_runtime_ready, (args, config)),
+        "run_dirs": (prepare_run_dirs, (args, config, job_id)),
+    }
+    with ThreadPoolExecutor(max_workers=len(stages)) as pool:
+        futures = [
+            pool.submit(timed_stage, name, func, *func_args)
+            for name, (func, func_args) in stages.items()
+        ]
+        for future in futures:
+            future.result()
+
+    result = ssh_login(login_host, f"touch {shlex.quote(run_base + '/' + STAGING_MARKER)}")
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to mark job {job_id} staged: {result.stderr}")
+
+
 def ensure_codex_ready(config):
     login_host = resolve_login_host(config)
     workspace_root, cluster_subdir = resolve_slurm_paths(config)
@@ -434,10 +775,11 @@ def ensure_partition_capacity(args, config):
             except Exception:
                 pass
 
-    if idle_nodes < args.nodes:
+    required_nodes = compute_node_count(args)
+    if idle_nodes < required_nodes:
         print("\nERROR:")
         print(f"Partition '{partition}' has {idle_nodes} idle nodes.")
-        print(f"Requested {args.nodes} nodes.")
+        print(f"Requested {required_nodes} nodes.")
         print("Not submitting job.\n")
         sys.exit(1)
 
@@ -489,6 +831,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", required=True)
     parser.add_argument("--nodes", type=int, default=1)
+    parser.add_argument("--agents-per-node", type=int, default=1)
     parser.add_argument("--time")
     parser.add_argument("--partition")
     parser.add_argument("--account")
@@ -505,6 +848,11 @@ if __name__ == "__main__":
     parser.add_argument("--claude-env-file")
     parser.add_argument("--launch-codex-test", action="store_true")
     parser.add_argument("--launch-codex-run", action="store_true")
+    parser.add_argument("--pool-allocation", action="store_true")
+    parser.add_argument("--pool-idle-timeout", type=int)
+    parser.add_argument("--pool-job")
+    parser.add_argument("--swarm-job-id")
+    parser.add_argument("--staging-timeout", type=int)
 
     args = parser.parse_args()
     config = load_config(args.config)
@@ -517,104 +865,55 @@ if __name__ == "__main__":
     hpc_base = f"{workspace_root}/{cluster_subdir}"
     login_host = resolve_login_host(config)
 
-    # ✅ DEPLOY AGENT DIRECTORY (worker + follower) BEFORE SUBMISSION
-    if launch_worker_requested(args):
-        agent_local_dir = Path(__file__).parent.parent / "agent"
-        agent_remote_dir = f"{hpc_base}/agent"
-
-        # Ensure remote directory exists
-        ssh_login(login_host, f"mkdir -p {agent_remote_dir}")
-
-        # Rsync entire agent directory (codex_worker.py, outbox_follower.py, future utilities)
-        subprocess.run(
-            [
-                "rsync",
-                "-az",
-                str(agent_local_dir) + "/",
-                f"{login_host}:{agent_remote_dir}/",
-            ],
-            check=True,
-        )
+    if args.pool_allocation:
+        # Pool allocations may queue; the router only leases them once RUNNING.
+        ssh_login(login_host, f"mkdir -p {hpc_base}/pool")
+        script = build_pool_sbatch_script(args, config)
+        result = ssh_login(login_host, "sbatch", input_text=script)
+        if result.returncode != 0:
+            print(result.stderr)
+            sys.exit(1)
+        pool_job_id = next((token for token in result.stdout.split() if token.isdigit()), None)
+        if not pool_job_id:
+            raise RuntimeError("Failed to parse pool job ID")
+        print(f"POOL_JOB_ID={pool_job_id}")
+        sys.exit(0)
 
-    # Ensure Codex installed and authenticated before submission
-    if launch_worker_requested(args):
-        worker_mode = resolved_worker_mode(args)
-        if worker_mode == "codex":
-            ensure_codex_ready(config)
-        elif worker_mode == "claude":
-            ensure_claude_ready(config)
+    launch_started = time.time()
 
-    # Ensure partition has sufficient idle nodes
-    ensure_partition_capacity(args, config)
+    if args.pool_job:
+        if not args.swarm_job_id:
+            print("--swarm-job-id is required with --pool-job")
+            sys.exit(1)
+        job_id = args.swarm_job_id
+        print(f"Using pool allocation {args.pool_job} for swarm job {job_id}")
+    else:
+        # Ensure partition has sufficient idle nodes
+        timed_stage("partition_check", ensure_partition_capacity, args, config)
 
-    print("Submitting allocation job...")
-    job_id = submit_job(args, config)
-    print(f"Submitted job {job_id}")
+        # Submit before staging so queue wait overlaps tool/agent/workspace
+        # preparation. Workers in the batch script wait for the staged marker.
+        if launch_worker_requested(args):
+            args.wait_for_staging = True
+        print("Submitting allocation job...")
+        job_id = timed_stage("submit", submit_job, args, config)
+        print(f"Submitted job {job_id}")
 
-    # ✅ CREATE RUN DIRECTORIES AFTER JOB ID EXISTS
     if launch_worker_requested(args):
-        run_base = f"{hpc_base}/runs/{job_id}"
-        ssh_login(login_host, f"mkdir -p {run_base}")
-        agents_md_content = None
-        agents_bundle = None
-        if args.agents_md_b64:
-            try:
-                agents_md_content = base64.b64decode(args.agents_md_b64).decode("utf-8")
-            except Exception as e:
-                raise RuntimeError(f"Invalid --agents-md-b64 payload: {e}") from e
-        if args.agents_bundle_b64:
-            try:
-                decoded = base64.b64decode(args.agents_bundle_b64).decode("utf-8")
-                parsed = json.loads(decoded)
-                if isinstance(parsed, dict):
-                    agents_bundle = parsed
-            except Exception as e:
-                raise RuntimeError(f"Invalid --agents-bundle-b64 payload: {e}") from e
-
-        bundle_md = agents_bundle.get("agents_md_content") if isinstance(agents_bundle, dict) else None
-        if isinstance(bundle_md, str) and bundle_md.strip():
-            agents_md_content = bundle_md
-        bundle_mode = str(agents_bundle.get("mode") or "file") if isinstance(agents_bundle, dict) else "file"
-        raw_skills = agents_bundle.get("skills_files") if isinstance(agents_bundle, dict) else []
-        skill_files = []
-        if bundle_mode == "directory" and isinstance(raw_skills, list):
-            for item in raw_skills:
-                if not isinstance(item, dict):
-                    continue
-                rel_path = item.get("path")
-                content = item.get("content")
-                if not isinstance(rel_path, str) or not isinstance(content, str):
-                    continue
-                safe_rel = safe_skill_rel_path(rel_path)
-                if not safe_rel:
-                    continue
-                skill_files.append((safe_rel, content))
-
-        for i in range(args.nodes):
-            agent_dir = f"{run_base}/agent_{i:02d}"
-            ssh_login(login_host, f"mkdir -p {agent_dir}")
-            ssh_login(
-                login_host,
-                f'echo "Agent {i}: Say hello in one short sentence." > {agent_dir}/PROMPT.txt'
-            )
-            if agents_md_content is not None:
-                ssh_login(
-                    login_host,
-                    f"cat > {shlex.quote(agent_dir + '/AGENTS.md')}",
-                    input_text=agents_md_content,
-                )
-            for rel_path, content in skill_files:
-                remote_file = f"{agent_dir}/.agents/skills/{rel_path}"
-                remote_dir = str(PurePosixPath(remote_file).parent)
-                ssh_login(login_host, f"mkdir -p {shlex.quote(remote_dir)}")
-                ssh_login(
-                    login_host,
-                    f"cat > {shlex.quote(remote_file)}",
-                    input_text=content,
-                )
-
-    print("Waiting for RUNNING state...")
-    wait_running(job_id, config)
+        try:
+            run_staging_pipeline(args, config, job_id)
+        except BaseException:
+            if not args.pool_job:
+                ssh_login(login_host, f"scancel {job_id}")
+            raise
+
+    if args.pool_job:
+        print("Starting workers in pool allocation...")
+        timed_stage("worker_start", start_pool_step, args, config)
+    else:
+        print("Waiting for RUNNING state...")
+        timed_stage("queue_wait", wait_running, job_id, config)
 
+    print(f"STAGE_TIMING stage=total seconds={time.time() - launch_started:.2f}")
     print("Allocation complete.")
     print(f"JOB_ID={job_id}")